@@ -0,0 +1,158 @@
+# HOLY CORE ETHERNET FFT BENCHMARK
+#
+# Measures how many FFTs / s the HOLY CORE + DMA pipeline sustains :
+#   - sample blocks are precomputed with numpy, frames are packed
+#     in batches with a single tobytes()
+#   - batches are sent at a target rate (--rate 0 : as fast as possible)
+#   - the reply only holds the 128 magnitudes : it is matched to its
+#     request by its spectrum (bit exact fft.c model of each block), to
+#     the oldest request of that block sent after the last matched one
+#     (the board answers in order). A reply matching no block is counted
+#     as a bad spectrum
+#   - reports achieved TX / RX frames/s, loss and round trip latency
+#     percentiles
+#
+# e.g.
+# python3 bench.py --transport loopback --rate 2000 --frames 20000
+# sudo python3 bench.py --transport raw --iface enp0s31f6 --rate 500
+#
+# BRH 10/26
+
+import argparse
+import collections
+import threading
+import time
+
+import numpy as np
+
+from transport import FFT_N, add_transport_args, fft_q15, make_transport
+
+FFT_BINS      = FFT_N // 2
+N_BLOCKS      = 64                 # distinct sample blocks, cycled through
+
+
+def make_blocks(n_blocks, seed=0):
+    """(n_blocks, FFT_N) int32 sample blocks : a few tones with random frequencies & phases"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(FFT_N) * 2 * np.pi / FFT_N
+    freqs = rng.integers(1, FFT_BINS, size=(n_blocks, 4, 1))
+    phases = rng.random((n_blocks, 4, 1)) * 2 * np.pi
+    amps = rng.random((n_blocks, 4, 1))
+    y = (amps * np.sin(freqs * t + phases)).sum(axis=1)
+    y /= np.abs(y).max(axis=1, keepdims=True)
+    return (y * (2**31 - 1) * 0.9).astype(np.int32)
+
+
+class Bench:
+    def __init__(self, transport, n_frames):
+        self.transport = transport
+        self.n_frames  = n_frames
+        self.blocks    = make_blocks(N_BLOCKS)
+        # expected reply bytes -> block index, replies are identified by their spectrum
+        self.block_of  = {fft_q15(b).astype("<i4").tobytes(): k for k, b in enumerate(self.blocks)}
+        if len(self.block_of) != N_BLOCKS:
+            raise ValueError("sample blocks with identical spectra, replies can't be matched")
+
+        self.sent_t    = np.full(n_frames, np.nan)
+        self.rtt       = np.full(n_frames, np.nan)
+        self.lock      = threading.Lock()
+        self.pending   = [collections.deque() for _ in range(N_BLOCKS)]   # unanswered requests, per block
+        self.last_seq  = -1            # last matched request
+        self.received  = 0
+        self.unmatched = 0
+        self.mismatches = 0
+        self.last_rx_t = None
+
+    def pack_batch(self, first_seq, count):
+        """count frames starting at first_seq -> list of payloads (one tobytes for the whole batch)"""
+        seqs = np.arange(first_seq, first_seq + count)
+        buf = np.ascontiguousarray(self.blocks[seqs % N_BLOCKS], dtype="<i4").tobytes()
+        size = FFT_N * 4
+        return [buf[k * size:(k + 1) * size] for k in range(count)]
+
+    def on_payload(self, payload: bytes):
+        now = time.perf_counter()
+        block = self.block_of.get(bytes(payload[:FFT_BINS * 4]))
+        with self.lock:
+            if block is None:
+                self.mismatches += 1
+                return
+            pending = self.pending[block]
+            # the board answers in order : older requests of this block were lost
+            while pending and pending[0] <= self.last_seq:
+                pending.popleft()
+            if not pending:
+                self.unmatched += 1
+                return
+            seq = pending.popleft()
+            self.last_seq = seq
+            self.rtt[seq] = now - self.sent_t[seq]
+            self.received += 1
+            self.last_rx_t = now
+
+    def run(self, rate, batch, drain):
+        self.transport.start(self.on_payload)
+        period = batch / rate if rate else 0.0
+        start = time.perf_counter()
+        sent = 0
+        try:
+            while sent < self.n_frames:
+                count = min(batch, self.n_frames - sent)
+                payloads = self.pack_batch(sent, count)
+                if period:
+                    # absolute schedule : no drift when a batch is late
+                    delay = start + (sent // batch) * period - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                for k, payload in enumerate(payloads):
+                    seq = sent + k
+                    with self.lock:
+                        self.sent_t[seq] = time.perf_counter()
+                        self.pending[seq % N_BLOCKS].append(seq)
+                    self.transport.send(payload)
+                sent += count
+            tx_end = time.perf_counter()
+
+            # wait for late replies, stop early once everything came back
+            deadline = tx_end + drain
+            while time.perf_counter() < deadline and self.received < self.n_frames:
+                time.sleep(0.01)
+        finally:
+            self.transport.stop()
+        return start, tx_end
+
+    def report(self, start, tx_end):
+        tx_time = tx_end - start
+        rx_time = (self.last_rx_t - start) if self.last_rx_t else float("nan")
+        rtt_ms = self.rtt[~np.isnan(self.rtt)] * 1e3
+        lost = self.n_frames - self.received
+
+        print(f"transport    : {self.transport.describe()}")
+        print(f"sent         : {self.n_frames} frames in {tx_time:.3f} s ({self.n_frames / tx_time:.1f} frames/s)")
+        print(f"received     : {self.received} frames ({self.received / rx_time:.1f} frames/s)")
+        print(f"lost         : {lost} ({100 * lost / self.n_frames:.2f} %)")
+        if self.unmatched:
+            print(f"unmatched    : {self.unmatched}")
+        print(f"bad spectrum : {self.mismatches}")
+        if len(rtt_ms):
+            p50, p90, p99 = np.percentile(rtt_ms, [50, 90, 99])
+            print(f"rtt (ms)     : min {rtt_ms.min():.3f}  p50 {p50:.3f}  p90 {p90:.3f}  "
+                  f"p99 {p99:.3f}  max {rtt_ms.max():.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HOLY CORE ethernet FFT throughput / latency benchmark")
+    add_transport_args(parser)
+    parser.add_argument("--frames", type=int, default=10000, help="frames to send")
+    parser.add_argument("--rate", type=float, default=1000, help="target TX frames/s, 0 = unthrottled")
+    parser.add_argument("--batch", type=int, default=32, help="frames packed & sent per batch")
+    parser.add_argument("--drain", type=float, default=1.0, help="seconds to wait for late replies")
+    args = parser.parse_args()
+
+    bench = Bench(make_transport(args), args.frames)
+    start, tx_end = bench.run(args.rate, args.batch, args.drain)
+    bench.report(start, tx_end)
+
+
+if __name__ == "__main__":
+    main()
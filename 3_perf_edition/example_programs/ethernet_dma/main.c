@@ -5,6 +5,9 @@
 
 #define DMA_BASE         0x10040000
 #define DEBUG            0
+// 1 if the core is built with DTCM_EN = 1 and the DTCM window over the
+// DMA buffers (DTCM_BASE = 0x80004000, 8KiB) with the DMA wired to s_axi_dtcm
+#define USE_DTCM         0
 
 #define MM2S_DMACR      (*(volatile uint32_t*)(DMA_BASE + 0x00))
 #define MM2S_DMASR      (*(volatile uint32_t*)(DMA_BASE + 0x04))
@@ -20,9 +23,16 @@
 #define EXPECTED_POINTS     256
 #define EXPECTED_FFT_POINTS 128
 
+#if USE_DTCM
+// FFT working buffers in the DTCM, between the RX & TX DMA buffers :
+// no misses, no dirty evictions, nothing to flush before the DMA reads TX
+#define fft_re          ((int32_t*)(DMA_RX_BRAM + 0x800))
+#define fft_im          ((int32_t*)(DMA_RX_BRAM + 0xC00))
+#else
 // FFT working buffers — static so they don't go on the stack
 static int32_t fft_re[FFT_N];
 static int32_t fft_im[FFT_N];
+#endif
 
 void main() {
     uart_puts("\n\r[BOOT] DMA ethernet FFT starting\n\r");
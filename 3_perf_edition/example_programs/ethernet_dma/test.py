@@ -1,42 +1,26 @@
-from scapy.all import Ether, sendp, AsyncSniffer, get_if_hwaddr
+import argparse
 import time
 
+from transport import ETH_PAYLOAD_MIN, add_transport_args, make_transport
+
 # ── Config ────────────────────────────────────────────────────────────────────
-IFACE    = "enp0s31f6"
-ETH_TYPE = 0x9000
-DST_MAC  = "de:ea:be:ef:00:01"
-SRC_MAC  = get_if_hwaddr(IFACE)
 INTERVAL = 0.005      # seconds between frames
 
-# Minimum Ethernet payload size = 46 bytes
-ETH_PAYLOAD_MIN = 46
+parser = argparse.ArgumentParser(description="HOLY CORE ethernet DMA smoke test")
+add_transport_args(parser)
+transport = make_transport(parser.parse_args())
 
 # ── RX callback ───────────────────────────────────────────────────────────────
-def on_packet(pkt):
-    if not pkt.haslayer(Ether):
-        return
-
-    payload = bytes(pkt[Ether].payload)
-
-    # compare destination MAC
-    if pkt[Ether].dst.lower() == DST_MAC.lower():
-        return  # ignore this packet
-
+def on_payload(payload):
     # Print raw bytes, low-level
     print("RX bytes:", " ".join(f"{b:02X}" for b in payload))
 
 # ── Main loop ─────────────────────────────────────────────────────────────────
-sniffer = AsyncSniffer(
-    iface=IFACE,
-    filter=f"ether proto {0x9000}",
-    prn=on_packet,
-    store=False,
-)
-sniffer.start()
+transport.start(on_payload)
 
 tx_count = 0
 
-print(f"Sending on {IFACE}  src={SRC_MAC}  ethertype=0x{ETH_TYPE:04X}")
+print(f"Sending on {transport.describe()}")
 print("Ctrl-C to stop\n")
 
 try:
@@ -56,9 +40,8 @@ try:
         if len(payload) < ETH_PAYLOAD_MIN:
             payload += bytes(ETH_PAYLOAD_MIN - len(payload))
 
-        # Create and send Ethernet frame
-        pkt = Ether(dst=DST_MAC, src=SRC_MAC, type=ETH_TYPE) / payload
-        sendp(pkt, iface=IFACE, verbose=False)
+        # Send frame
+        transport.send(payload)
 
         tx_count += 1
         print(f"TX frame {tx_count}  payload_len={len(payload)}")
@@ -67,4 +50,4 @@ try:
 
 except KeyboardInterrupt:
     print("\nStopped")
-    sniffer.stop()
\ No newline at end of file
+    transport.stop()
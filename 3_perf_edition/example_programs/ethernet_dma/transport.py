@@ -0,0 +1,462 @@
+# HOLY CORE ETHERNET DMA TRANSPORTS
+#
+# Packet transports used by tui.py & test.py so the host side does
+# not have to be hard-wired to scapy on a real NIC :
+#
+#   raw       scapy sendp / AsyncSniffer on a real interface (KC705 board)
+#   udp       payloads as UDP datagrams, e.g. to `python3 transport.py serve`
+#             or to a bridge (socat...) forwarding to the board
+#   loopback  in-process stand-in for the board : runs the same Q1.15 FFT
+#             as fft.c / main.c and replies with the 128 magnitude words
+#
+# All transports deal in ethernet PAYLOADS (bytes), the raw one is
+# the only one that knows about MACs & ethertype.
+#
+# Each backend exists in a threaded flavour (Transport : test.py,
+# bench.py) and an asyncio one (AsyncTransport : tui.py).
+#
+# Standalone UDP FFT server (board stand-in in another process / machine) :
+#   python3 transport.py serve --port 9000
+#
+# BRH 10/26
+
+import argparse
+import asyncio
+import os
+import re
+import socket
+import threading
+import queue
+
+import numpy as np
+
+IFACE           = "enp0s31f6"
+ETH_TYPE        = 0x9000
+DST_MAC         = "de:ea:be:ef:00:01"
+ETH_PAYLOAD_MIN = 46
+
+UDP_HOST        = "127.0.0.1"
+UDP_PORT        = 9000
+
+# ── FFT stand-in ──────────────────────────────────────────────────────────────
+
+FFT_N           = 256
+FFT_BITS        = 8
+RX_BRAM_SIZE    = 1500          # S2MM_LENGTH in main.c
+
+
+def _load_twiddles(path=os.path.join(os.path.dirname(os.path.abspath(__file__)), "fft.c")):
+    """Read tw_re / tw_im straight from fft.c so the stand-in can't drift from the firmware"""
+    with open(path, "r") as f:
+        src = f.read()
+    tables = []
+    for name in ("tw_re", "tw_im"):
+        body = re.search(name + r"\[\d+\]\s*=\s*\{(.*?)\};", src, re.S).group(1)
+        tables.append(np.array([int(v) for v in re.findall(r"-?\d+", body)], dtype=np.int64))
+    return tables
+
+
+TW_RE, TW_IM = _load_twiddles()
+BIT_REVERSE = np.array([int(f"{i:0{FFT_BITS}b}"[::-1], 2) for i in range(FFT_N)])
+
+
+def _stage_indexes():
+    """(i, j, twiddle index) of every butterfly, per stage, as in fft.c's loops"""
+    stages = []
+    for stage in range(1, FFT_BITS + 1):
+        span    = 1 << (stage - 1)
+        step    = span << 1
+        tw_step = 128 >> (stage - 1)
+        k = np.tile(np.arange(span), FFT_N // step)
+        i = np.repeat(np.arange(0, FFT_N, step), span) + k
+        stages.append((i, i + span, k * tw_step))
+    return stages
+
+
+STAGES = _stage_indexes()
+
+
+def fft_q15(samples):
+    """Bit exact model of fft() + fft_magnitude() : int32 samples -> 128 int32 magnitudes"""
+    re_ = (np.asarray(samples, dtype=np.int64) >> 16)[BIT_REVERSE]   # int32 -> Q1.15
+    im_ = np.zeros(FFT_N, dtype=np.int64)
+
+    # butterflies of one stage never touch the same index twice : vectorize per stage
+    for i, j, tw in STAGES:
+        wr, wi = TW_RE[tw], TW_IM[tw]
+        tr = ((wr * re_[j] - wi * im_[j]) >> 15).astype(np.int32).astype(np.int64)
+        ti = ((wr * im_[j] + wi * re_[j]) >> 15).astype(np.int32).astype(np.int64)
+        re_[j], im_[j] = re_[i] - tr, im_[i] - ti
+        re_[i], im_[i] = re_[i] + tr, im_[i] + ti
+        re_ = re_.astype(np.int32).astype(np.int64)
+        im_ = im_.astype(np.int32).astype(np.int64)
+
+    half = FFT_N // 2
+    mag = re_[:half] * re_[:half] + im_[:half] * im_[:half]
+    return (mag >> 15).astype(np.int32)
+
+
+class FftStandIn:
+    """Emulates main.c : payload lands in the RX BRAM (stale bytes stay there,
+    like on the board), the first 256 words go through the FFT and the 128
+    magnitude words are sent back."""
+
+    def __init__(self):
+        self.rx_bram = bytearray(RX_BRAM_SIZE)
+
+    def process(self, payload: bytes) -> bytes:
+        payload = payload[:RX_BRAM_SIZE]
+        self.rx_bram[:len(payload)] = payload
+        samples = np.frombuffer(bytes(self.rx_bram[:FFT_N * 4]), dtype="<i4")
+        return fft_q15(samples).astype("<i4").tobytes()
+
+
+# ── Transports ────────────────────────────────────────────────────────────────
+
+class Transport:
+    """start(on_payload) registers the RX callback (called from a worker thread),
+    send(payload) transmits one frame, stop() releases everything."""
+
+    name = "base"
+
+    def start(self, on_payload):
+        self.on_payload = on_payload
+
+    def send(self, payload: bytes):
+        raise NotImplementedError
+
+    def stop(self):
+        pass
+
+    def describe(self):
+        return self.name
+
+
+class RawSocketTransport(Transport):
+    name = "raw"
+
+    def __init__(self, iface=IFACE, dst_mac=DST_MAC, eth_type=ETH_TYPE):
+        # scapy is only needed (and only importable with privileges) for this one
+        from scapy.all import Ether, sendp, AsyncSniffer, get_if_hwaddr
+        self._Ether = Ether
+        self._sendp = sendp
+        self._AsyncSniffer = AsyncSniffer
+        self.iface = iface
+        self.dst_mac = dst_mac
+        self.eth_type = eth_type
+        self.src_mac = get_if_hwaddr(iface)
+        self._sniffer = None
+
+    def start(self, on_payload):
+        super().start(on_payload)
+        self._sniffer = self._AsyncSniffer(
+            iface=self.iface,
+            filter=f"ether proto {self.eth_type}",
+            prn=self._on_packet,
+            store=False,
+        )
+        self._sniffer.start()
+
+    def _on_packet(self, pkt):
+        Ether = self._Ether
+        if not pkt.haslayer(Ether):
+            return
+        # ignore our own frames
+        if pkt[Ether].src.lower() == self.src_mac.lower():
+            return
+        self.on_payload(bytes(pkt[Ether].payload))
+
+    def send(self, payload: bytes):
+        payload += bytes(max(0, ETH_PAYLOAD_MIN - len(payload)))
+        pkt = self._Ether(dst=self.dst_mac, src=self.src_mac, type=self.eth_type) / payload
+        self._sendp(pkt, iface=self.iface, verbose=False)
+
+    def stop(self):
+        if self._sniffer is not None:
+            self._sniffer.stop()
+            self._sniffer = None
+
+    def describe(self):
+        return f"{self.iface} src={self.src_mac}"
+
+
+class UdpTransport(Transport):
+    name = "udp"
+
+    def __init__(self, host=UDP_HOST, port=UDP_PORT, local_port=0):
+        self.remote = (host, port)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(("", local_port))
+        self.sock.settimeout(0.1)
+        self._running = False
+        self._thread = None
+
+    def start(self, on_payload):
+        super().start(on_payload)
+        self._running = True
+        self._thread = threading.Thread(target=self._rx_loop, daemon=True)
+        self._thread.start()
+
+    def _rx_loop(self):
+        while self._running:
+            try:
+                payload, _ = self.sock.recvfrom(2048)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            self.on_payload(payload)
+
+    def send(self, payload: bytes):
+        self.sock.sendto(payload, self.remote)
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.sock.close()
+
+    def describe(self):
+        return f"udp {self.remote[0]}:{self.remote[1]}"
+
+
+class LoopbackTransport(Transport):
+    """Board stand-in : frames are processed by FftStandIn in a worker thread,
+    one at a time, like the single core firmware does."""
+
+    name = "loopback"
+
+    def __init__(self):
+        self.board = FftStandIn()
+        self._pending = queue.Queue()
+        self._thread = None
+
+    def start(self, on_payload):
+        super().start(on_payload)
+        self._thread = threading.Thread(target=self._board_loop, daemon=True)
+        self._thread.start()
+
+    def _board_loop(self):
+        while True:
+            payload = self._pending.get()
+            if payload is None:
+                break
+            self.on_payload(self.board.process(payload))
+
+    def send(self, payload: bytes):
+        self._pending.put(payload)
+
+    def stop(self):
+        if self._thread is not None:
+            self._pending.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def describe(self):
+        return "loopback (fft.c stand-in)"
+
+
+TRANSPORTS = {
+    "raw": RawSocketTransport,
+    "udp": UdpTransport,
+    "loopback": LoopbackTransport,
+}
+
+
+def add_transport_args(parser):
+    parser.add_argument("--transport", choices=TRANSPORTS.keys(), default="raw")
+    parser.add_argument("--iface", default=IFACE, help="raw : network interface")
+    parser.add_argument("--host", default=UDP_HOST, help="udp : remote host")
+    parser.add_argument("--port", type=int, default=UDP_PORT, help="udp : remote port")
+    parser.add_argument("--local-port", type=int, default=0, help="udp : local port (0 = any)")
+
+
+def make_transport(args):
+    if args.transport == "raw":
+        return RawSocketTransport(iface=args.iface)
+    if args.transport == "udp":
+        return UdpTransport(host=args.host, port=args.port, local_port=args.local_port)
+    return LoopbackTransport()
+
+
+# ── Asyncio transports ────────────────────────────────────────────────────────
+#
+# Same backends for asyncio applications (tui.py) : no threads, no
+# blocking call. open(on_payload) registers a callback that runs IN the
+# event loop and must not block (typically a put_nowait in a bounded
+# asyncio.Queue), send() is a coroutine.
+
+class AsyncTransport:
+    name = "base"
+
+    async def open(self, on_payload):
+        self.on_payload = on_payload
+
+    async def send(self, payload: bytes):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def describe(self):
+        return self.name
+
+
+def _iface_mac(iface):
+    with open(f"/sys/class/net/{iface}/address", "r") as f:
+        return bytes.fromhex(f.read().strip().replace(":", ""))
+
+
+class AsyncRawSocketTransport(AsyncTransport):
+    """AF_PACKET socket bound to our ethertype (linux only, needs CAP_NET_RAW),
+    driven by the event loop instead of scapy's sniffer thread."""
+
+    name = "raw"
+
+    def __init__(self, iface=IFACE, dst_mac=DST_MAC, eth_type=ETH_TYPE):
+        self.iface = iface
+        self.eth_type = eth_type
+        self.src_mac = _iface_mac(iface)
+        self.header = (bytes.fromhex(dst_mac.replace(":", "")) + self.src_mac
+                       + eth_type.to_bytes(2, "big"))
+        self.sock = None
+
+    async def open(self, on_payload):
+        await super().open(on_payload)
+        self.sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(self.eth_type))
+        self.sock.bind((self.iface, self.eth_type))
+        self.sock.setblocking(False)
+        asyncio.get_running_loop().add_reader(self.sock.fileno(), self._readable)
+
+    def _readable(self):
+        # drain everything the kernel has, one callback per frame
+        while True:
+            try:
+                frame = self.sock.recv(2048)
+            except BlockingIOError:
+                return
+            # ignore our own frames
+            if frame[6:12] == self.src_mac:
+                continue
+            self.on_payload(frame[14:])
+
+    async def send(self, payload: bytes):
+        payload += bytes(max(0, ETH_PAYLOAD_MIN - len(payload)))
+        await asyncio.get_running_loop().sock_sendall(self.sock, self.header + payload)
+
+    def close(self):
+        if self.sock is not None:
+            asyncio.get_running_loop().remove_reader(self.sock.fileno())
+            self.sock.close()
+            self.sock = None
+
+    def describe(self):
+        return f"{self.iface} src={self.src_mac.hex(':')}"
+
+
+class _DatagramProtocol(asyncio.DatagramProtocol):
+    def __init__(self, on_payload):
+        self.on_payload = on_payload
+
+    def datagram_received(self, data, addr):
+        self.on_payload(data)
+
+
+class AsyncUdpTransport(AsyncTransport):
+    name = "udp"
+
+    def __init__(self, host=UDP_HOST, port=UDP_PORT, local_port=0):
+        self.remote = (host, port)
+        self.local_port = local_port
+        self.endpoint = None
+
+    async def open(self, on_payload):
+        await super().open(on_payload)
+        self.endpoint, _ = await asyncio.get_running_loop().create_datagram_endpoint(
+            lambda: _DatagramProtocol(on_payload),
+            local_addr=("0.0.0.0", self.local_port),
+        )
+
+    async def send(self, payload: bytes):
+        # never blocks : the kernel drops when its buffer is full
+        self.endpoint.sendto(payload, self.remote)
+
+    def close(self):
+        if self.endpoint is not None:
+            self.endpoint.close()
+            self.endpoint = None
+
+    def describe(self):
+        return f"udp {self.remote[0]}:{self.remote[1]}"
+
+
+class AsyncLoopbackTransport(AsyncTransport):
+    """Board stand-in as an asyncio task, the FFT itself runs in the default
+    executor so it never stalls the event loop."""
+
+    name = "loopback"
+
+    def __init__(self):
+        self.board = FftStandIn()
+        self._pending = None
+        self._task = None
+
+    async def open(self, on_payload):
+        await super().open(on_payload)
+        self._pending = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._board_loop())
+
+    async def _board_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            payload = await self._pending.get()
+            self.on_payload(await loop.run_in_executor(None, self.board.process, payload))
+
+    async def send(self, payload: bytes):
+        self._pending.put_nowait(payload)
+
+    def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def describe(self):
+        return "loopback (fft.c stand-in)"
+
+
+def make_async_transport(args):
+    if args.transport == "raw":
+        return AsyncRawSocketTransport(iface=args.iface)
+    if args.transport == "udp":
+        return AsyncUdpTransport(host=args.host, port=args.port, local_port=args.local_port)
+    return AsyncLoopbackTransport()
+
+
+# ── Standalone UDP server ─────────────────────────────────────────────────────
+
+def serve(port):
+    """Answer every datagram with the FFT of its payload, like the board does"""
+    board = FftStandIn()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("", port))
+    print(f"FFT stand-in listening on udp port {port}, Ctrl-C to stop")
+    served = 0
+    try:
+        while True:
+            payload, addr = sock.recvfrom(2048)
+            sock.sendto(board.process(payload), addr)
+            served += 1
+    except KeyboardInterrupt:
+        print(f"\nStopped after {served} frames")
+    finally:
+        sock.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HOLY CORE ethernet DMA transports")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    serve_parser = sub.add_parser("serve", help="run the FFT stand-in as a UDP server")
+    serve_parser.add_argument("--port", type=int, default=UDP_PORT)
+    args = parser.parse_args()
+    serve(args.port)
@@ -1,25 +1,27 @@
 from textual.app import App, ComposeResult
 from textual.widgets import Header, Footer, Static, Button, Label
-from textual.reactive import reactive
 from textual.containers import Horizontal, Vertical
-from scapy.all import Ether, sendp, AsyncSniffer, get_if_hwaddr
+import argparse
+import asyncio
 import math
 import struct
-import threading
-from collections import deque
+import time
 import numpy as np
 import random
 
+from transport import ETH_PAYLOAD_MIN, add_transport_args, make_async_transport
+
 # ── Config ────────────────────────────────────────────────────────────────────
 
-IFACE           = "enp0s31f6"
-ETH_TYPE        = 0x9000
-DST_MAC         = "de:ea:be:ef:00:01"
-SRC_MAC         = get_if_hwaddr(IFACE)
-ETH_PAYLOAD_MIN = 46
 SCALE           = 2**31 - 1
 FPS = 30
 
+# bounded queues between packet I/O and rendering. When RX is full the
+# oldest frame is dropped (the heatmap wants the latest), when TX is full
+# the new frame is dropped : in both cases it is counted, never blocking.
+RX_QUEUE_DEPTH  = 256
+TX_QUEUE_DEPTH  = 8
+
 
 def make_frame(value: int) -> bytes:
     payload = struct.pack("<i", value)
@@ -29,78 +31,144 @@ def make_frame(value: int) -> bytes:
 # main signal function sent for FFT to HOLY CORE
 def main_signal(t):
     y = (
-        1 * math.cos(t)
-        + 0.2 * math.sin(7 * t)
-        + 0.8 * math.sin(3 * t)
-        + 0.25 * math.sin(5 * t)
+        1 * np.cos(t)
+        + 0.2 * np.sin(7 * t)
+        + 0.8 * np.sin(3 * t)
+        + 0.25 * np.sin(5 * t)
     )
     return y
 
 
 # ── Widgets ───────────────────────────────────────────────────────────────────
 
+FFT_BINS    = 128
+RX_HISTORY  = 512
+TX_HISTORY  = 1024
+
+# heatmap intensity -> glyph, value > edge selects the next glyph
+GLYPH_EDGES = np.array([0.2, 0.6, 0.7, 0.8])
+GLYPHS      = np.array([" ", "░", "▒", "▓", "█"])
+
+
+def canvas_to_str(canvas) -> str:
+    """(h, w) array of single chars -> text, each row viewed as one w chars string (no per cell join)"""
+    h, w = canvas.shape
+    return "\n".join(np.ascontiguousarray(canvas).view(f"<U{w}").ravel())
+
+
+class FrameRing:
+    """Preallocated ring of the last `depth` normalized FFT frames"""
+
+    def __init__(self, depth=RX_HISTORY, width=FFT_BINS):
+        self.buf   = np.zeros((depth, width), dtype=np.float32)
+        self.depth = depth
+        self.total = 0      # frames ever pushed
+
+    def push_many(self, frames):
+        frames = frames[-self.depth:]
+        idx = np.arange(self.total, self.total + len(frames)) % self.depth
+        self.buf[idx] = frames
+        self.total += len(frames)
+
+    def since(self, seen, limit):
+        """(frames pushed after `seen` (oldest first, at most `limit`), new total)"""
+        n = min(self.total - seen, limit, self.depth)
+        idx = np.arange(self.total - n, self.total) % self.depth
+        return self.buf[idx], self.total
+
+
 class TxPlot(Static):
-    offset  = reactive(0.0)
-    tx_data = reactive(list)
+    def on_mount(self) -> None:
+        self._ys    = np.zeros(TX_HISTORY, dtype=np.float32)
+        self._count = 0
+
+    def push(self, yn: float) -> None:
+        self._ys[self._count % TX_HISTORY] = yn
+        self._count += 1
+        self.refresh()
 
     def render(self) -> str:
         w = max(10, self.size.width  - 2)
         h = max(4,  self.size.height - 1)
-        plot = [[" "] * w for _ in range(h)]
         mid  = h // 2
 
-        for x in range(w):
-            plot[mid][x] = "─"
-        for y in range(h):
-            plot[y][0] = "│"
-        plot[mid][0] = "┼"
+        plot = np.full((h, w), " ")
+        plot[mid, :] = "─"
+        plot[:, 0]   = "│"
+        plot[mid, 0] = "┼"
 
-        for (xn, yn) in self.tx_data:
-            px = int(xn * (w - 1))
-            px = max(1, min(w - 1, px))
-            py = int(mid - yn * (mid - 1))
-            py = max(0, min(h - 1, py))
-            plot[py][px] = "●"
+        n = min(self._count, w - 1, TX_HISTORY)
+        if n:
+            ys = self._ys[np.arange(self._count - n, self._count) % TX_HISTORY]
+            xn = np.arange(n) / (n - 1) if n > 1 else np.full(1, 0.5)
+            px = np.clip((xn * (w - 1)).astype(int), 1, w - 1)
+            py = np.clip((mid - ys * (mid - 1)).astype(int), 0, h - 1)
+            plot[py, px] = "●"
 
-        return "\n".join("".join(row) for row in plot)
+        return canvas_to_str(plot)
 
 
 class RxPlot(Static):
-    # list of frames, each frame = 128 normalized values
-    heatmap = reactive(list)
+    """Scrolling heatmap, one column per FFT frame. New frames are glyph-mapped
+    and appended as columns; the canvas is only rebuilt from the ring on resize."""
+
+    def __init__(self, ring: FrameRing, **kwargs):
+        super().__init__(**kwargs)
+        self.ring    = ring
+        self._canvas = np.full((0, 0), " ")
+        self._filled = 0    # used columns, frames stay left aligned until the canvas is full
+        self._seen   = 0    # ring.total already drawn
+
+    def _bin_rows(self, h):
+        """frequency bin -> row (low freq bottom). When bins share a row, the highest one wins."""
+        rows = ((1 - np.arange(FFT_BINS) / (FFT_BINS - 1)) * (h - 1)).astype(int)
+        row_bin = np.full(h, -1)
+        np.maximum.at(row_bin, rows, np.arange(FFT_BINS))
+        return row_bin
+
+    def _columns(self, frames):
+        """(n, FFT_BINS) frames -> (h, n) glyphs"""
+        glyphs = GLYPHS[np.digitize(frames, GLYPH_EDGES, right=True)]
+        cols = np.full((self._canvas.shape[0], len(frames)), " ")
+        drawn = self._row_bin >= 0
+        cols[drawn] = glyphs[:, self._row_bin[drawn]].T
+        return cols
+
+    def _rebuild(self, h, w):
+        self._canvas   = np.full((h, w), " ")
+        self._row_bin  = self._bin_rows(h)
+        frames, self._seen = self.ring.since(0, w)
+        self._filled = len(frames)
+        if self._filled:
+            self._canvas[:, :self._filled] = self._columns(frames)
+
+    def update_frames(self) -> None:
+        """Append the frames received since the last call"""
+        h, w = self._canvas.shape
+        if w == 0:
+            return
+        frames, total = self.ring.since(self._seen, w)
+        if total == self._seen:
+            return
+        self._seen = total
+        n = len(frames)
+        free = w - self._filled
+        if n > free:
+            shift = n - free
+            self._canvas[:, :w - shift] = self._canvas[:, shift:].copy()
+            self._filled -= shift
+        self._canvas[:, self._filled:self._filled + n] = self._columns(frames)
+        self._filled += n
+        self.refresh()
 
     def render(self) -> str:
         w = max(10, self.size.width - 2)   # time axis
         h = max(8,  self.size.height - 1)  # frequency axis
 
-        plot = [[" "] * w for _ in range(h)]
-
-        if not self.heatmap:
-            return "\n".join("".join(row) for row in plot)
-
-        # keep only visible frames
-        frames = self.heatmap[-w:]
-
-        for x, frame in enumerate(frames):
-            for i, val in enumerate(frame):
-                # map frequency bin -> vertical pixel (low freq bottom)
-                y = int((1 - i / (len(frame) - 1)) * (h - 1))
+        if self._canvas.shape != (h, w):
+            self._rebuild(h, w)
 
-                # intensity mapping
-                if val > 0.8:
-                    char = "█"
-                elif val > 0.7:
-                    char = "▓"
-                elif val > 0.6:
-                    char = "▒"
-                elif val > 0.2:
-                    char = "░"
-                else:
-                    char = " "
-
-                plot[y][x] = char
-
-        return "\n".join("".join(row) for row in plot)
+        return canvas_to_str(self._canvas)
 
 
 # ── App ───────────────────────────────────────────────────────────────────────
@@ -160,6 +228,11 @@ class SineApp(App):
     Button { margin: 0 2; }
     """
 
+    def __init__(self, transport):
+        super().__init__()
+        self.transport = transport
+        self._rx_ring  = FrameRing()
+
     def compose(self) -> ComposeResult:
         yield Header()
         yield Label("⚡ HOLY CORE Ethernet Processing ⚡", id="title")
@@ -172,7 +245,7 @@ class SineApp(App):
             ),
             Vertical(
                 Label("📥  RX — Frequency Heatmap", classes="plot-title", id="rx-title"),
-                RxPlot(id="rx-plot"),
+                RxPlot(self._rx_ring, id="rx-plot"),
                 classes="plot-panel",
             ),
             id="plots",
@@ -185,66 +258,82 @@ class SineApp(App):
         )
         yield Footer()
 
-    def on_mount(self) -> None:
+    async def on_mount(self) -> None:
         self._timer    = None
-        self._rx_buf   = []
-        self._rx_lock  = threading.Lock()
-        self._rx_history = deque(maxlen=512)
-
-        self._tx_count = 0
-        self._rx_count = 0
-        self._tick_idx = 0
-
-        self._tx_history = deque(
-            (max(-(2**31), min(2**31 - 1, int(main_signal(k) * SCALE))) for k in range(256)),
-            maxlen=256
-        )
-
-        self._sniffer = AsyncSniffer(
-            iface=IFACE,
-            filter=f"ether proto {0x9000}",
-            prn=self._on_packet,
-            store=False,
-        )
-        self._sniffer.start()
-        self.query_one("#status", Label).update(f"🔌 Ready on {IFACE} — press Start")
 
-    def _on_packet(self, pkt) -> None:
-        if not pkt.haslayer(Ether):
-            return
-        if pkt[Ether].src.lower() == SRC_MAC.lower():
-            return
-
-        payload = bytes(pkt[Ether].payload)
-        if len(payload) < 128 * 4:
+        self._tx_count   = 0    # frames handed to the transport
+        self._tx_dropped = 0    # frames dropped because TX could not keep up
+        self._rx_count   = 0    # frames received
+        self._rx_dropped = 0    # frames dropped because rendering could not keep up
+        self._rendered   = 0    # frames that made it to the heatmap
+        self._tick_idx   = 0
+        self._tick_ms    = 0.0  # smoothed UI frame time
+        self._tick_max   = 0.0
+
+        # last 256 samples, sent as one frame every tick
+        self._tx_window = np.clip(
+            main_signal(np.arange(256)) * SCALE, -(2**31), 2**31 - 1
+        ).astype("<i4")
+
+        self._rx_queue = asyncio.Queue(maxsize=RX_QUEUE_DEPTH)
+        self._tx_queue = asyncio.Queue(maxsize=TX_QUEUE_DEPTH)
+
+        await self.transport.open(self._on_payload)
+        self.run_worker(self._tx_loop(), exclusive=False)
+        self.query_one("#status", Label).update(f"🔌 Ready on {self.transport.describe()} — press Start")
+
+    def _on_payload(self, payload: bytes) -> None:
+        """Runs in the event loop for every received frame : only queue it"""
+        if len(payload) < FFT_BINS * 4:
             return
+        self._rx_count += 1
+        if self._rx_queue.full():
+            self._rx_queue.get_nowait()
+            self._rx_dropped += 1
+        self._rx_queue.put_nowait(payload[:FFT_BINS * 4])
+
+    async def _tx_loop(self) -> None:
+        while True:
+            payload = await self._tx_queue.get()
+            await self.transport.send(payload)
+            self._tx_count += 1
 
-        mags = struct.unpack_from("<128i", payload)
+    def _drain_rx(self) -> int:
+        """Move every queued frame to the ring in one vectorized batch"""
+        n = self._rx_queue.qsize()
+        if not n:
+            return 0
+        payloads = b"".join(self._rx_queue.get_nowait() for _ in range(n))
+        mags = np.frombuffer(payloads, dtype="<i4").reshape(n, FFT_BINS)
 
         # log scaling for better visuals
-        frame = [math.log1p(abs(m)) for m in mags]
-        max_val = max(frame) or 1
-        frame = [v / max_val for v in frame]
-
-        with self._rx_lock:
-            self._rx_buf.append(frame)
-            self._rx_count += 1
+        frames = np.log1p(np.abs(mags.astype(np.float64)))
+        max_val = frames.max(axis=1, keepdims=True)
+        max_val[max_val == 0] = 1
+        self._rx_ring.push_many(frames / max_val)
+        return n
+
+    def _status(self, state: str) -> str:
+        return (
+            f"{state} — TX: {self._tx_count} (dropped {self._tx_dropped})  |  "
+            f"RX: {self._rx_count} (rendered {self._rendered}, dropped {self._rx_dropped})  |  "
+            f"frame {self._tick_ms:.1f} ms (max {self._tick_max:.1f})  |  {self.transport.describe()}"
+        )
 
     def on_button_pressed(self, event: Button.Pressed) -> None:
         if event.button.id == "btn-start" and self._timer is None:
             self._timer = self.set_interval(1 / FPS, self.tick)
-            self.query_one("#status", Label).update(f"🟢 Running on {IFACE}")
+            self.query_one("#status", Label).update(f"🟢 Running on {self.transport.describe()}")
         elif event.button.id == "btn-stop" and self._timer is not None:
             self._timer.stop()
             self._timer = None
-            self.query_one("#status", Label).update(
-                f"🔴 Stopped — TX: {self._tx_count}  |  RX: {self._rx_count}"
-            )
+            self.query_one("#status", Label).update(self._status("🔴 Stopped"))
         elif event.button.id == "btn-quit":
-            self._sniffer.stop()
+            self.transport.close()
             self.exit()
 
     def tick(self) -> None:
+        start = time.perf_counter()
         tx_plot = self.query_one("#tx-plot", TxPlot)
         rx_plot = self.query_one("#rx-plot", RxPlot)
 
@@ -255,38 +344,26 @@ class SineApp(App):
         y     = main_signal(t)
         y_int = max(-(2**31), min(2**31 - 1, int(y * SCALE)))
 
-        self._tx_history.append(y_int)
+        self._tx_window[:-1] = self._tx_window[1:]
+        self._tx_window[-1]  = y_int
 
-        if len(self._tx_history) == 256:
-            payload = b"".join(struct.pack("<i", s) for s in self._tx_history)
-            payload += bytes(max(0, ETH_PAYLOAD_MIN - len(payload)))
-            pkt = Ether(dst=DST_MAC, src=SRC_MAC, type=ETH_TYPE) / payload
-            sendp(pkt, iface=IFACE, verbose=False)
-            self._tx_count += 1
+        try:
+            self._tx_queue.put_nowait(self._tx_window.tobytes())
+        except asyncio.QueueFull:
+            self._tx_dropped += 1
 
-        # update TX plot
-        current_tx = list(tx_plot.tx_data)
-        current_tx.append((1.0, y / 1.5))
-        n = min(len(current_tx), w - 1)
-        tx_plot.tx_data = [
-            ((i / (n - 1)) if n > 1 else 0.5, yn)
-            for i, (_, yn) in enumerate(current_tx[-n:])
-        ]
-
-        # RX handling
-        with self._rx_lock:
-            new_rx = list(self._rx_buf)
-            self._rx_buf.clear()
-
-        if new_rx:
-            for frame in new_rx:
-                self._rx_history.append(frame)
-            rx_plot.heatmap = list(self._rx_history)
-
-        self.query_one("#status", Label).update(
-            f"🟢 Running — TX: {self._tx_count} frames  |  RX: {self._rx_count} frames  |  {IFACE}"
-        )
+        # update plots
+        tx_plot.push(y / 1.5)
+        self._rendered += self._drain_rx()
+        rx_plot.update_frames()
+
+        elapsed = (time.perf_counter() - start) * 1e3
+        self._tick_ms  = 0.9 * self._tick_ms + 0.1 * elapsed
+        self._tick_max = max(self._tick_max, elapsed)
+        self.query_one("#status", Label).update(self._status("🟢 Running"))
 
 
 if __name__ == "__main__":
-    SineApp().run()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="HOLY CORE ethernet FFT TUI")
+    add_transport_args(parser)
+    SineApp(make_async_transport(parser.parse_args())).run()
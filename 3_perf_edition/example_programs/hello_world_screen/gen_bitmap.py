@@ -1,11 +1,20 @@
 #!/usr/bin/env python3
 # usage :
-# pip install pillow
-# python3 gen_bitmap.py tos.png
+# pip install pillow numpy
+# python3 gen_bitmap.py tos.png                          # C array on stdout (default)
+# python3 gen_bitmap.py tos.png --format bin -o logo.bin # raw RGB565 little endian
+# python3 gen_bitmap.py tos.png --format readmemh -o logo.hex
+# python3 gen_bitmap.py tos.png --format incbin -o logo  # logo.rgb565 + logo.S + logo.h
+#
+# incbin : logo.S pulls logo.rgb565 in .rodata with .incbin and logo.h
+# declares the array, so the compiler never has to parse a 76800
+# entries initializer. Just drop logo.S & logo.h in the app folder.
 
 from PIL import Image
-import sys
+import numpy as np
+import argparse
 import os
+import sys
 
 # ================= CONFIG =================
 OUT_NAME = "templeos_logo"   # C symbol name
@@ -13,38 +22,91 @@ TARGET_W = 320               # set to None to keep original
 TARGET_H = 240               # set to None to keep original
 # ==========================================
 
-def rgb888_to_rgb565(r, g, b):
+def rgb888_to_rgb565(rgb):
+    """(H, W, 3) uint8 array -> (H, W) uint16 array"""
+    rgb = rgb.astype(np.uint16)
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
     return ((r & 0xF8) << 8) | ((g & 0xFC) << 3) | (b >> 3)
 
-def main():
-    if len(sys.argv) != 2:
-        print(f"Usage: {sys.argv[0]} <image.png>")
-        sys.exit(1)
-
-    img = Image.open(sys.argv[1]).convert("RGB")
+def load_image(path):
+    img = Image.open(path).convert("RGB")
 
     if TARGET_W and TARGET_H:
         img = img.resize((TARGET_W, TARGET_H), Image.NEAREST)
 
-    w, h = img.size
-    pixels = img.load()
-
-    print("#include <stdint.h>")
-    print()
-    print(f"#define {OUT_NAME.upper()}_W {w}")
-    print(f"#define {OUT_NAME.upper()}_H {h}")
-    print()
-    print(f"const uint16_t {OUT_NAME}[{w * h}] = {{")
-
-    for y in range(h):
-        print("    ", end="")
-        for x in range(w):
-            r, g, b = pixels[x, y]
-            p = rgb888_to_rgb565(r, g, b)
-            print(f"0x{p:04X}, ", end="")
-        print()
-
-    print("};")
+    return rgb888_to_rgb565(np.asarray(img))
+
+def to_c(pixels, name):
+    h, w = pixels.shape
+    rows = np.char.mod("0x%04X, ", pixels)
+    body = "\n".join("    " + "".join(row) for row in rows)
+    return (
+        "#include <stdint.h>\n\n"
+        f"#define {name.upper()}_W {w}\n"
+        f"#define {name.upper()}_H {h}\n\n"
+        f"const uint16_t {name}[{w * h}] = {{\n"
+        f"{body}\n"
+        "};\n"
+    )
+
+def to_readmemh(pixels):
+    return "\n".join(np.char.mod("%04x", pixels.ravel())) + "\n"
+
+def to_incbin(pixels, name, bin_path):
+    h, w = pixels.shape
+    asm = (
+        "    .section .rodata\n"
+        f"    .global {name}\n"
+        "    .balign 4\n"
+        f"{name}:\n"
+        f"    .incbin \"{os.path.basename(bin_path)}\"\n"
+        f"    .size {name}, {w * h * 2}\n"
+    )
+    header = (
+        "#include <stdint.h>\n\n"
+        f"#define {name.upper()}_W {w}\n"
+        f"#define {name.upper()}_H {h}\n\n"
+        f"extern const uint16_t {name}[{w * h}];\n"
+    )
+    return asm, header
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert an image to an RGB565 bitmap")
+    parser.add_argument("image")
+    parser.add_argument("--format", choices=["c", "bin", "readmemh", "incbin"], default="c")
+    parser.add_argument("-o", "--output", default=None,
+                        help="output file (incbin : base name for .rgb565/.S/.h), default stdout for c")
+    parser.add_argument("--name", default=OUT_NAME, help="C symbol name")
+    args = parser.parse_args()
+
+    pixels = load_image(args.image)
+
+    if args.format == "c":
+        text = to_c(pixels, args.name)
+        if args.output:
+            with open(args.output, "w") as f:
+                f.write(text)
+        else:
+            sys.stdout.write(text)
+        return
+
+    if not args.output:
+        parser.error(f"--format {args.format} needs -o")
+
+    if args.format == "bin":
+        pixels.astype("<u2").tofile(args.output)
+    elif args.format == "readmemh":
+        with open(args.output, "w") as f:
+            f.write(to_readmemh(pixels))
+    else:
+        base = os.path.splitext(args.output)[0]
+        # not .bin : make clean would wipe the blob the .S needs
+        pixels.astype("<u2").tofile(base + ".rgb565")
+        asm, header = to_incbin(pixels, args.name, base + ".rgb565")
+        with open(base + ".S", "w") as f:
+            f.write(asm)
+        with open(base + ".h", "w") as f:
+            f.write(header)
 
 if __name__ == "__main__":
     main()
@@ -1,35 +1,93 @@
 #!/usr/bin/env python3
-import sys
-
-if len(sys.argv) != 3:
-    print("Usage: python bin2verilog.py <input.bin> <output.v>")
-    sys.exit(1)
-
-bin_file = sys.argv[1]
-v_file = sys.argv[2]
-
-# Read binary
-with open(bin_file, "rb") as f:
-    data = f.read()
-
-# Compute number of 32-bit words
-words = [data[i:i+4] for i in range(0, len(data), 4)]
-
-with open(v_file, "w") as f:
-    f.write("// Auto-generated ROM from {}\n".format(bin_file))
-    f.write("module boot_rom(\n")
-    f.write("    input wire clk,\n")
-    f.write("    input wire [31:0] addr,\n")
-    f.write("    output reg [31:0] data_out\n")
-    f.write(");\n\n")
-    f.write("    reg [31:0] rom [{}:0];\n\n".format(len(words)-1))
-    f.write("    initial begin\n")
-    for i, w in enumerate(words):
-        # Convert 4 bytes to little-endian 32-bit word
-        word = int.from_bytes(w.ljust(4, b'\x00'), byteorder='little')
-        f.write("        rom[{}] = 32'h{:08x};\n".format(i, word))
-    f.write("    end\n\n")
-    f.write("    always @(*) begin\n")
-    f.write("        data_out = rom[addr[31:2]];\n")
-    f.write("    end\n\n")
-    f.write("endmodule\n")
+# BOOT ROM GENERATOR
+#
+# Converts a raw binary into the boot_rom verilog module.
+#
+# Formats :
+#   inline    (default) one initial block with the ROM content
+#   readmemh  the module loads a separate hex file with $readmemh,
+#             much faster to elaborate for big ROMs (vivado & verilator)
+#   hex       only write the $readmemh hex file (one 32 bits word / line)
+#
+# usage :
+# pip install numpy
+# python3 gen_rom.py boot.bin boot_rom.v
+# python3 gen_rom.py boot.bin boot_rom.v --format readmemh --hex boot_rom.hex
+#
+# BRH 10/26
+
+import argparse
+import numpy as np
+
+def load_words(bin_file):
+    """Raw binary -> little endian 32 bits words (zero padded)"""
+    data = np.fromfile(bin_file, dtype=np.uint8)
+    pad = (-len(data)) % 4
+    if pad:
+        data = np.concatenate((data, np.zeros(pad, dtype=np.uint8)))
+    return data.view("<u4")
+
+def to_hex_lines(words):
+    return "\n".join(np.char.mod("%08x", words)) + "\n"
+
+def module_header(bin_file, depth):
+    return (
+        "// Auto-generated ROM from {}\n".format(bin_file) +
+        "module boot_rom(\n"
+        "    input wire clk,\n"
+        "    input wire [31:0] addr,\n"
+        "    output reg [31:0] data_out\n"
+        ");\n\n"
+        "    reg [31:0] rom [{}:0];\n\n".format(depth - 1)
+    )
+
+MODULE_FOOTER = (
+    "    always @(*) begin\n"
+    "        data_out = rom[addr[31:2]];\n"
+    "    end\n\n"
+    "endmodule\n"
+)
+
+def write_inline(words, bin_file, v_file):
+    indexes = np.arange(len(words))
+    body = np.char.add(
+        np.char.mod("        rom[%d] = 32'h", indexes),
+        np.char.mod("%08x;", words)
+    )
+    with open(v_file, "w") as f:
+        f.write(module_header(bin_file, len(words)))
+        f.write("    initial begin\n")
+        f.write("\n".join(body) + "\n")
+        f.write("    end\n\n")
+        f.write(MODULE_FOOTER)
+
+def write_readmemh(words, bin_file, v_file, hex_file):
+    with open(hex_file, "w") as f:
+        f.write(to_hex_lines(words))
+    with open(v_file, "w") as f:
+        f.write(module_header(bin_file, len(words)))
+        f.write("    initial begin\n")
+        f.write("        $readmemh(\"{}\", rom);\n".format(hex_file))
+        f.write("    end\n\n")
+        f.write(MODULE_FOOTER)
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the boot_rom module from a raw binary")
+    parser.add_argument("bin_file", help="input raw binary (objcopy -O binary)")
+    parser.add_argument("out_file", help="output verilog module (or hex file with --format hex)")
+    parser.add_argument("--format", choices=["inline", "readmemh", "hex"], default="inline")
+    parser.add_argument("--hex", default="boot_rom.hex", help="hex file loaded by the readmemh module")
+    args = parser.parse_args()
+
+    words = load_words(args.bin_file)
+
+    if args.format == "inline":
+        write_inline(words, args.bin_file, args.out_file)
+    elif args.format == "readmemh":
+        write_readmemh(words, args.bin_file, args.out_file, args.hex)
+    else:
+        with open(args.out_file, "w") as f:
+            f.write(to_hex_lines(words))
+
+if __name__ == "__main__":
+    main()
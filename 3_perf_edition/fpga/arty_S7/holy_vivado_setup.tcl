@@ -18,6 +18,7 @@ add_files -norecurse {
     ./3_perf_edition/fpga/holy_top.v
     ./3_perf_edition/src/holy_data_cache.sv
     ./3_perf_edition/src/holy_no_cache.sv
+    ./3_perf_edition/src/holy_data_tcm.sv
     ./3_perf_edition/src/holy_instr_cache.sv
     ./3_perf_edition/src/control.sv
     ./3_perf_edition/src/reader.sv
@@ -1,6 +1,18 @@
 /** Glue logic for debug module
 *
 *   Author : BRH
+*
+*   Posted writes (BRH 10/26) : dm_sba does one access at a time and
+*   waits for its response, so every SBA write used to wait for the
+*   AXI LITE B response (and sbbusy stayed up meanwhile). Loading a
+*   program word by word (sbaccess32 + sbautoincrement) was bound by
+*   that round trip.
+*   Writes are now acknowledged as soon as they enter a FIFO of
+*   POSTED_WRITES entries, which drains to AXI LITE with up to
+*   POSTED_WRITES transactions in flight. Reads are not posted : they
+*   wait for the FIFO to drain and every write to be answered, so they
+*   always see the SBA writes before them.
+*   Posted writes have no error response (it was not used anyway).
 */
 
 `include "typedef.svh"
@@ -9,7 +21,10 @@
 import holy_core_pkg::*;
 import axi_pkg::*;
 
-module dm_top_to_axi_lite (
+module dm_top_to_axi_lite #(
+    // posted writes FIFO depth, also the max AXI LITE transactions in flight
+    parameter int unsigned POSTED_WRITES = 8
+)(
     // CPU LOGIC CLOCK & RESET
     input logic clk,
     input logic rst_n,
@@ -129,24 +144,111 @@ module dm_top_to_axi_lite (
     // wow, i had so musch fun making these assigns by fucking hand
     // like each and every fucking time men. fuck.
 
+    // =======================
+    // POSTED WRITES
+    // =======================
+
+    typedef struct packed {
+        addr_t addr;
+        data_t data;
+        strb_t strb;
+    } posted_write_t;
+
+    posted_write_t  posted_in, posted_head;
+    logic           posted_full, posted_empty;
+    logic           posted_push, posted_pop;
+
+    // requests to pulp's converter : the posted writes first, then reads
+    logic           conv_req, conv_we, conv_gnt;
+    addr_t          conv_addr;
+    data_t          conv_wdata;
+    strb_t          conv_be;
+    logic           conv_rsp_valid;
+
+    // converter transactions without a response yet, and the (only) read
+    logic [$clog2(POSTED_WRITES+1):0] in_flight;
+    logic           read_pending;
+    // a write was posted last cycle : answer dm_sba
+    logic           posted_ack;
+
+    logic write_accept, read_accept;
+
+    always_comb begin : posted_writes_ctrl
+        // writes are posted while there is room (and no read to answer)
+        write_accept = req_i && we_i && ~posted_full && ~read_pending;
+        posted_push  = write_accept;
+
+        // drain the posted writes, else forward a read once everything
+        // before it got its response
+        conv_req   = ~posted_empty || (req_i && ~we_i && (in_flight == '0) && ~read_pending);
+        conv_we    = ~posted_empty;
+        conv_addr  = posted_empty ? add_i : posted_head.addr;
+        conv_wdata = posted_head.data;
+        conv_be    = posted_empty ? be_i : posted_head.strb;
+        posted_pop = ~posted_empty && conv_gnt;
+
+        read_accept = posted_empty && conv_req && conv_gnt;
+        gnt_o       = write_accept || read_accept;
+    end
+
+    always_ff @(posedge clk) begin
+        if (~rst_n) begin
+            in_flight    <= '0;
+            read_pending <= 1'b0;
+            posted_ack   <= 1'b0;
+        end else begin
+            in_flight  <= in_flight + conv_gnt - conv_rsp_valid;
+            posted_ack <= write_accept;
+            if (read_accept)
+                read_pending <= 1'b1;
+            else if (conv_rsp_valid)
+                read_pending <= 1'b0;
+        end
+    end
+
+    // the write responses are dropped, dm_sba had its answer on posting
+    assign r_valid_o = posted_ack || (read_pending && conv_rsp_valid);
+
+    assign posted_in.addr = add_i;
+    assign posted_in.data = wdata_i;
+    assign posted_in.strb = be_i;
+
+    fifo_v3 #(
+        .FALL_THROUGH(1'b0),
+        .DEPTH(POSTED_WRITES),
+        .dtype(posted_write_t)
+    ) posted_writes (
+        .clk_i(clk),
+        .rst_ni(rst_n),
+        .flush_i(1'b0),
+        .testmode_i(1'b0),
+        .full_o(posted_full),
+        .empty_o(posted_empty),
+        .usage_o(),
+        .data_i(posted_in),
+        .push_i(posted_push),
+        .data_o(posted_head),
+        .pop_i(posted_pop)
+    );
+
     axi_lite_from_mem #(
         .MemAddrWidth(32'd32),
         .AxiAddrWidth(32'd32),
         .DataWidth(32'd32),
-        .MaxRequests(32'd1), // (Depth of the response mux FIFO).
+        .MaxRequests(POSTED_WRITES), // (Depth of the response mux FIFO).
         .AxiProt(3'b000),
         .axi_req_t(req_lite_t),
         .axi_rsp_t(resp_lite_t)
     ) pulp_conv (
         .clk_i(clk),
         .rst_ni(rst_n),
-        .mem_req_i(req_i),
-        .mem_addr_i(add_i),
-        .mem_we_i(we_i),
-        .mem_wdata_i(wdata_i),
-        .mem_be_i(be_i),
-        .mem_gnt_o(gnt_o),
-        .mem_rsp_valid_o(r_valid_o),
+        .mem_req_i(conv_req),
+        .mem_addr_i(conv_addr),
+        .mem_we_i(conv_we),
+        .mem_wdata_i(conv_wdata),
+        .mem_be_i(conv_be),
+        .mem_gnt_o(conv_gnt),
+        .mem_rsp_valid_o(conv_rsp_valid),
         .mem_rsp_rdata_o(r_rdata_o),
         .mem_rsp_error_o(), // not used
         .axi_req_o(axi_lite_req),
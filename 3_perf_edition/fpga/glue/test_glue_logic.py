@@ -3,12 +3,14 @@
 # BRH 10/24
 # Modif by BRH 05/25 : Verify manual flush support
 # Modif by BRH 05/25 : Convert into DATA CACHE : add non cachable ranges support
+# Modif by BRH 10/26 : SBA posted writes throughput test
 #
 # Post for guidance : https://0bab1.github.io/BRH/posts/TIPS_FOR_COCOTB/
 
 import cocotb
 from cocotb.clock import Clock
 from cocotb.triggers import RisingEdge, Timer
+from cocotb.utils import get_sim_time
 import random
 from cocotbext.axi import AxiBus, AxiRam, AxiLiteBus, AxiLiteRam
 
@@ -36,20 +38,6 @@ SIZE = 2**13
 def generate_random_bytes(length):
     return bytes([random.randint(0, 255) for _ in range(length)])
 
-def read_cache(cache_data, line) :
-    """To read cache_data, because the packed array makes it an array of bits... Fuck vivado, I mean it"""
-    l = 127 - line
-    return (int(str(cache_data.value[32*l:(32*l)+31]),2))
-
-def dump_cache(cache_data, line) -> int :
-    if line == "*" :
-        for line_a in range(128): # for fixed cache size of 128
-            l = 127 - line_a
-            print(hex(int(str(cache_data.value[32*l:(32*l)+31]),2)))
-    else :
-        print(hex(int(str(cache_data.value[32*line:(32*line)+31]),2)))
-        
-
 async def reset(dut):
     await RisingEdge(dut.clk)
     dut.rst_n.value = 0
@@ -64,6 +52,30 @@ async def reset(dut):
 
     print("reset done !")
 
+async def sba_access(dut, addr, we, wdata=0):
+    """One access the way dm_sba does it : request held until granted,
+    then wait for the response. Returns the read data."""
+    dut.req_i.value = 1
+    dut.add_i.value = addr
+    dut.we_i.value = we
+    dut.wdata_i.value = wdata
+    dut.be_i.value = 0xF
+    await Timer(1, unit="ns")
+    while dut.gnt_o.value != 1:
+        await RisingEdge(dut.clk)
+        await Timer(1, unit="ns")
+    await RisingEdge(dut.clk)
+    dut.req_i.value = 0
+    dut.we_i.value = 0
+    dut.be_i.value = 0x0
+    await Timer(1, unit="ns")
+    while dut.r_valid_o.value != 1:
+        await RisingEdge(dut.clk)
+        await Timer(1, unit="ns")
+    rdata = int(dut.r_rdata_o.value)
+    await RisingEdge(dut.clk)
+    return rdata
+
 @cocotb.test()
 async def main_test(dut):
 
@@ -142,3 +154,42 @@ async def main_test(dut):
         # TODO : quickly test what happens if you don't wait for TX to complete and compare
         # a whole ref at the end.
 
+@cocotb.test()
+async def sba_throughput_test(dut):
+    """Program loading (sbautoincrement writes) throughput, in bytes/s"""
+
+    cocotb.start_soon(Clock(dut.clk, CPU_PERIOD, unit="ns").start())
+    cocotb.start_soon(Clock(dut.aclk, AXI_PERIOD, unit="ns").start())
+    axi_lite_ram_slave = AxiLiteRam(AxiLiteBus.from_prefix(dut, "axi_lite"), dut.clk, dut.rst_n, size=SIZE, reset_active_level=False)
+    await RisingEdge(dut.clk)
+    await reset(dut)
+    await RisingEdge(dut.clk)
+
+    # a program image, written word by word at increasing addresses
+    words = [random.randint(0, 0xFFFFFFFF) for _ in range(SIZE // 8)]
+    nbytes = 4 * len(words)
+
+    start = get_sim_time("ns")
+    for i, word in enumerate(words):
+        await sba_access(dut, 4 * i, 1, word)
+    # the last posted writes land before any read answers
+    await sba_access(dut, 0, 0)
+    write_time = get_sim_time("ns") - start
+
+    assert axi_lite_ram_slave.read(0, nbytes) == b"".join(word.to_bytes(4, "little") for word in words)
+
+    # reading back is not posted : one AXI LITE round trip per word
+    start = get_sim_time("ns")
+    for i, word in enumerate(words):
+        assert await sba_access(dut, 4 * i, 0) == word
+    read_time = get_sim_time("ns") - start
+
+    write_rate = nbytes / (write_time * 1e-9)
+    read_rate = nbytes / (read_time * 1e-9)
+    print(f"SBA writes : {nbytes} bytes in {write_time:.0f} ns, {write_rate / 1e6:.1f} MB/s, "
+          f"{write_time / CPU_PERIOD / len(words):.2f} cycles / word")
+    print(f"SBA reads  : {nbytes} bytes in {read_time:.0f} ns, {read_rate / 1e6:.1f} MB/s, "
+          f"{read_time / CPU_PERIOD / len(words):.2f} cycles / word")
+
+    # a write is answered once posted, without waiting for the AXI LITE response
+    assert write_rate > read_rate
@@ -10,7 +10,12 @@ import axi_pkg::*;
 import holy_core_pkg::*;
 
 module holy_top #(
-    parameter NUM_IRQS = 2
+    parameter NUM_IRQS = 2,
+    // Data TCM (see holy_core), the s_axi_dtcm_* port is
+    // tied off inside the core when DTCM_EN = 0
+    parameter DTCM_EN = 0,
+    parameter DTCM_BASE = 32'h80004000,
+    parameter DTCM_SIZE = 8192
 )(
     // CPU clock and active low reset
     input logic clk,
@@ -89,6 +94,50 @@ module holy_top #(
     input  logic        m_axi_lite_rvalid,
     output logic        m_axi_lite_rready,
 
+    //===================================
+    // DTCM AXI FULL SLAVE Interface
+    // (e.g. DMA master => core's DTCM)
+    //===================================
+
+    // Write Address Channel
+    input  logic [3:0]               s_axi_dtcm_awid,
+    input  logic [31:0]              s_axi_dtcm_awaddr,
+    input  logic [7:0]               s_axi_dtcm_awlen,
+    input  logic [2:0]               s_axi_dtcm_awsize,
+    input  logic [1:0]               s_axi_dtcm_awburst,
+    input  logic                     s_axi_dtcm_awvalid,
+    output logic                     s_axi_dtcm_awready,
+
+    // Write Data Channel
+    input  logic [31:0]              s_axi_dtcm_wdata,
+    input  logic [3:0]               s_axi_dtcm_wstrb,
+    input  logic                     s_axi_dtcm_wlast,
+    input  logic                     s_axi_dtcm_wvalid,
+    output logic                     s_axi_dtcm_wready,
+
+    // Write Response Channel
+    output logic [3:0]               s_axi_dtcm_bid,
+    output logic [1:0]               s_axi_dtcm_bresp,
+    output logic                     s_axi_dtcm_bvalid,
+    input  logic                     s_axi_dtcm_bready,
+
+    // Read Address Channel
+    input  logic [3:0]               s_axi_dtcm_arid,
+    input  logic [31:0]              s_axi_dtcm_araddr,
+    input  logic [7:0]               s_axi_dtcm_arlen,
+    input  logic [2:0]               s_axi_dtcm_arsize,
+    input  logic [1:0]               s_axi_dtcm_arburst,
+    input  logic                     s_axi_dtcm_arvalid,
+    output logic                     s_axi_dtcm_arready,
+
+    // Read Data Channel
+    output logic [3:0]               s_axi_dtcm_rid,
+    output logic [31:0]              s_axi_dtcm_rdata,
+    output logic [1:0]               s_axi_dtcm_rresp,
+    output logic                     s_axi_dtcm_rlast,
+    output logic                     s_axi_dtcm_rvalid,
+    input  logic                     s_axi_dtcm_rready,
+
     // INTERRUPTS & EXTERNAL REQUESTS
     input logic [NUM_IRQS-1:0]  irq_in,
 
@@ -116,6 +165,8 @@ module holy_top #(
 
 // HOLY CORE AXI FULL <=> EXTERNAL RAM
 (* DONT_TOUCH = "true" *) axi_if m_axi();
+// EXTERNAL MASTER (DMA) <=> HOLY CORE DTCM
+(* DONT_TOUCH = "true" *) axi_if s_axi_dtcm();
 // HOLYCORE <=> AXIL CROSSBAR
 (* DONT_TOUCH = "true" *) axi_lite_if m_axi_lite();
 (* DONT_TOUCH = "true" *) AXI_LITE #(32,32) m_axi_lite_xbar_in [MST_NB-1:0] ();
@@ -133,7 +184,10 @@ module holy_top #(
 
 /* verilator lint_off PINMISSING */
 holy_core #(
-    .DCACHE_EN(1)
+    .DCACHE_EN(1),
+    .DTCM_EN(DTCM_EN),
+    .DTCM_BASE(DTCM_BASE),
+    .DTCM_SIZE(DTCM_SIZE)
 ) core(
     // these are set in sim
     // by loading the adres in ASM
@@ -160,6 +214,10 @@ holy_core #(
     // i.e. RAM, CLINT & PLIC.
     .m_axi_lite(m_axi_lite),
 
+    // Note : The AXI SLAVE interface lets an external
+    // master (DMA) read / write the core's DTCM.
+    .s_axi_dtcm(s_axi_dtcm),
+
     // Interrupts
     .timer_itr(timer_irq),
     .soft_itr(soft_irq),
@@ -514,5 +572,52 @@ assign m_axi_lite_xbar_out[0].r_resp = m_axi_lite_rresp;
 assign m_axi_lite_xbar_out[0].r_valid = m_axi_lite_rvalid;
 assign m_axi_lite_rready = m_axi_lite_xbar_out[0].r_ready;
 
+//===================================
+// DTCM SLAVE <=> EXTERNALS
+//===================================
+
+// Write Address Channel
+assign s_axi_dtcm.awid    = s_axi_dtcm_awid;
+assign s_axi_dtcm.awaddr  = s_axi_dtcm_awaddr;
+assign s_axi_dtcm.awlen   = s_axi_dtcm_awlen;
+assign s_axi_dtcm.awsize  = s_axi_dtcm_awsize;
+assign s_axi_dtcm.awburst = s_axi_dtcm_awburst;
+assign s_axi_dtcm.awqos   = 4'b0;
+assign s_axi_dtcm.awlock  = 2'b0;
+assign s_axi_dtcm.awvalid = s_axi_dtcm_awvalid;
+assign s_axi_dtcm_awready = s_axi_dtcm.awready;
+
+// Write Data Channel
+assign s_axi_dtcm.wdata  = s_axi_dtcm_wdata;
+assign s_axi_dtcm.wstrb  = s_axi_dtcm_wstrb;
+assign s_axi_dtcm.wlast  = s_axi_dtcm_wlast;
+assign s_axi_dtcm.wvalid = s_axi_dtcm_wvalid;
+assign s_axi_dtcm_wready = s_axi_dtcm.wready;
+
+// Write Response Channel
+assign s_axi_dtcm_bid    = s_axi_dtcm.bid;
+assign s_axi_dtcm_bresp  = s_axi_dtcm.bresp;
+assign s_axi_dtcm_bvalid = s_axi_dtcm.bvalid;
+assign s_axi_dtcm.bready = s_axi_dtcm_bready;
+
+// Read Address Channel
+assign s_axi_dtcm.arid    = s_axi_dtcm_arid;
+assign s_axi_dtcm.araddr  = s_axi_dtcm_araddr;
+assign s_axi_dtcm.arlen   = s_axi_dtcm_arlen;
+assign s_axi_dtcm.arsize  = s_axi_dtcm_arsize;
+assign s_axi_dtcm.arburst = s_axi_dtcm_arburst;
+assign s_axi_dtcm.arqos   = 4'b0;
+assign s_axi_dtcm.arlock  = 2'b0;
+assign s_axi_dtcm.arvalid = s_axi_dtcm_arvalid;
+assign s_axi_dtcm_arready = s_axi_dtcm.arready;
+
+// Read Data Channel
+assign s_axi_dtcm_rid    = s_axi_dtcm.rid;
+assign s_axi_dtcm_rdata  = s_axi_dtcm.rdata;
+assign s_axi_dtcm_rresp  = s_axi_dtcm.rresp;
+assign s_axi_dtcm_rlast  = s_axi_dtcm.rlast;
+assign s_axi_dtcm_rvalid = s_axi_dtcm.rvalid;
+assign s_axi_dtcm.rready = s_axi_dtcm_rready;
+
 endmodule
 
@@ -7,6 +7,7 @@
 */
 
 module top #(
+    parameter DTCM_EN = 0
 )(
     input wire clk,
     input wire rst_n,
@@ -62,6 +63,37 @@ module top #(
     input  wire                     m_axi_lite_rvalid,
     output wire                     m_axi_lite_rready,
 
+    // DTCM AXI FULL slave interface (DMA)
+    input  wire [3:0]               s_axi_dtcm_awid,
+    input  wire [31:0]              s_axi_dtcm_awaddr,
+    input  wire [7:0]               s_axi_dtcm_awlen,
+    input  wire [2:0]               s_axi_dtcm_awsize,
+    input  wire [1:0]               s_axi_dtcm_awburst,
+    input  wire                     s_axi_dtcm_awvalid,
+    output wire                     s_axi_dtcm_awready,
+    input  wire [31:0]              s_axi_dtcm_wdata,
+    input  wire [3:0]               s_axi_dtcm_wstrb,
+    input  wire                     s_axi_dtcm_wlast,
+    input  wire                     s_axi_dtcm_wvalid,
+    output wire                     s_axi_dtcm_wready,
+    output wire [3:0]               s_axi_dtcm_bid,
+    output wire [1:0]               s_axi_dtcm_bresp,
+    output wire                     s_axi_dtcm_bvalid,
+    input  wire                     s_axi_dtcm_bready,
+    input  wire [3:0]               s_axi_dtcm_arid,
+    input  wire [31:0]              s_axi_dtcm_araddr,
+    input  wire [7:0]               s_axi_dtcm_arlen,
+    input  wire [2:0]               s_axi_dtcm_arsize,
+    input  wire [1:0]               s_axi_dtcm_arburst,
+    input  wire                     s_axi_dtcm_arvalid,
+    output wire                     s_axi_dtcm_arready,
+    output wire [3:0]               s_axi_dtcm_rid,
+    output wire [31:0]              s_axi_dtcm_rdata,
+    output wire [1:0]               s_axi_dtcm_rresp,
+    output wire                     s_axi_dtcm_rlast,
+    output wire                     s_axi_dtcm_rvalid,
+    input  wire                     s_axi_dtcm_rready,
+
     // Debug OUT
     output wire [31:0]              pc,
     output wire [31:0]              pc_next,
@@ -81,7 +113,9 @@ module top #(
 );
 
 // Internal wiring
-holy_top wrapped (
+holy_top #(
+    .DTCM_EN(DTCM_EN)
+) wrapped (
     // System signals
     .clk(clk),
     .rst_n(rst_n),
@@ -137,6 +171,37 @@ holy_top wrapped (
     .m_axi_lite_rvalid(m_axi_lite_rvalid),
     .m_axi_lite_rready(m_axi_lite_rready),
 
+    // DTCM AXI SLAVE
+    .s_axi_dtcm_awid(s_axi_dtcm_awid),
+    .s_axi_dtcm_awaddr(s_axi_dtcm_awaddr),
+    .s_axi_dtcm_awlen(s_axi_dtcm_awlen),
+    .s_axi_dtcm_awsize(s_axi_dtcm_awsize),
+    .s_axi_dtcm_awburst(s_axi_dtcm_awburst),
+    .s_axi_dtcm_awvalid(s_axi_dtcm_awvalid),
+    .s_axi_dtcm_awready(s_axi_dtcm_awready),
+    .s_axi_dtcm_wdata(s_axi_dtcm_wdata),
+    .s_axi_dtcm_wstrb(s_axi_dtcm_wstrb),
+    .s_axi_dtcm_wlast(s_axi_dtcm_wlast),
+    .s_axi_dtcm_wvalid(s_axi_dtcm_wvalid),
+    .s_axi_dtcm_wready(s_axi_dtcm_wready),
+    .s_axi_dtcm_bid(s_axi_dtcm_bid),
+    .s_axi_dtcm_bresp(s_axi_dtcm_bresp),
+    .s_axi_dtcm_bvalid(s_axi_dtcm_bvalid),
+    .s_axi_dtcm_bready(s_axi_dtcm_bready),
+    .s_axi_dtcm_arid(s_axi_dtcm_arid),
+    .s_axi_dtcm_araddr(s_axi_dtcm_araddr),
+    .s_axi_dtcm_arlen(s_axi_dtcm_arlen),
+    .s_axi_dtcm_arsize(s_axi_dtcm_arsize),
+    .s_axi_dtcm_arburst(s_axi_dtcm_arburst),
+    .s_axi_dtcm_arvalid(s_axi_dtcm_arvalid),
+    .s_axi_dtcm_arready(s_axi_dtcm_arready),
+    .s_axi_dtcm_rid(s_axi_dtcm_rid),
+    .s_axi_dtcm_rdata(s_axi_dtcm_rdata),
+    .s_axi_dtcm_rresp(s_axi_dtcm_rresp),
+    .s_axi_dtcm_rlast(s_axi_dtcm_rlast),
+    .s_axi_dtcm_rvalid(s_axi_dtcm_rvalid),
+    .s_axi_dtcm_rready(s_axi_dtcm_rready),
+
     // Debug
     .pc(pc),  
     .pc_next(pc_next),
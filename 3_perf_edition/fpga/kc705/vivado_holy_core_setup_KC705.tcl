@@ -36,6 +36,7 @@ add_files -norecurse {
     ./HOLY_CORE_COURSE/3_perf_edition/fpga/holy_top.v
     ./HOLY_CORE_COURSE/3_perf_edition/src/holy_data_cache.sv
     ./HOLY_CORE_COURSE/3_perf_edition/src/holy_no_cache.sv
+    ./HOLY_CORE_COURSE/3_perf_edition/src/holy_data_tcm.sv
     ./HOLY_CORE_COURSE/3_perf_edition/src/holy_instr_cache.sv
     ./HOLY_CORE_COURSE/3_perf_edition/src/control.sv
     ./HOLY_CORE_COURSE/3_perf_edition/src/reader.sv
@@ -64,5 +64,22 @@
 #define PLIC_BASE 0x90000000
 #define PLIC_ENABLE (*(volatile uint32_t *)(PLIC_BASE + 0x0))
 #define PLIC_CLAIM (*(volatile uint32_t *)(PLIC_BASE + 0x4))
+#define PLIC_THRESHOLD (*(volatile uint32_t *)(PLIC_BASE + 0x8))
+#define PLIC_ENABLE_HI (*(volatile uint32_t *)(PLIC_BASE + 0xC))
+#define PLIC_PENDING (*(volatile uint32_t *)(PLIC_BASE + 0x10))
+#define PLIC_PENDING_HI (*(volatile uint32_t *)(PLIC_BASE + 0x14))
+#define PLIC_PRIORITY(id) (*(volatile uint32_t *)(PLIC_BASE + 0x100 + 4 * (id)))
+
+// CUSTOM CSRS (see csr_file.sv), use with csrw / csrr
+#define CSR_FLUSH_CACHE 0x7C0           // write 1 : D$ write back + I$ invalidate (locked lines stay)
+#define CSR_DATA_NON_CACHABLE_BASE 0x7C1
+#define CSR_DATA_NON_CACHABLE_LIMIT 0x7C2
+#define CSR_INSTR_NON_CACHABLE_BASE 0x7C3
+#define CSR_INSTR_NON_CACHABLE_LIMIT 0x7C4
+#define CSR_INSTR_LOCK_BASE 0x7C5       // I$ lines in [base, limit[ are never evicted,
+#define CSR_INSTR_LOCK_LIMIT 0x7C6      // at most one way per set (128B with the default I$)
+#define CSR_DATA_RANGE_BASE 0x7C7       // D$ lines overlapping [base, limit[ ...
+#define CSR_DATA_RANGE_LIMIT 0x7C8
+#define CSR_DATA_RANGE_OP 0x7C9         // ... write 1 : clean, 2 : invalidate, 3 : both (core stalls until done)
 
 #endif // SOC_H
\ No newline at end of file
@@ -10,4 +10,11 @@ void uart_puts(const char *s);
 void uart_putdec(int val);
 void uart_puthex(uint32_t val);
 
+// D$ range maintenance (lines overlapping [base, base + size[)
+// clean : write back dirty lines, e.g. before a DMA reads the buffer
+// invalidate : drop lines, e.g. after a DMA wrote the buffer
+void dcache_clean_range(const void *base, size_t size);
+void dcache_invalidate_range(const void *base, size_t size);
+void dcache_clean_invalidate_range(const void *base, size_t size);
+
 #endif // HOLYCORE_H
\ No newline at end of file
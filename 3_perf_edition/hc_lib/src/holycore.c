@@ -40,4 +40,37 @@ void uart_puthex(uint32_t val) {
         uint8_t nibble = (val >> (i * 4)) & 0xF;
         uart_putchar(hex_digit(nibble));
     }
-}
\ No newline at end of file
+}
+
+/*
+    D$ RANGE MAINTENANCE
+*/
+
+#define DCACHE_RANGE_CLEAN      0x1
+#define DCACHE_RANGE_INVALIDATE 0x2
+
+// the core stalls until the operation is done
+static void dcache_range_op(const void *base, size_t size, uint32_t op) {
+    uint32_t start = (uint32_t)base;
+    uint32_t limit = start + size;
+    __asm__ volatile (
+        "csrw 0x7C7, %0\n"
+        "csrw 0x7C8, %1\n"
+        "csrw 0x7C9, %2\n"
+        :
+        : "r"(start), "r"(limit), "r"(op)
+        : "memory"
+    );
+}
+
+void dcache_clean_range(const void *base, size_t size) {
+    dcache_range_op(base, size, DCACHE_RANGE_CLEAN);
+}
+
+void dcache_invalidate_range(const void *base, size_t size) {
+    dcache_range_op(base, size, DCACHE_RANGE_INVALIDATE);
+}
+
+void dcache_clean_invalidate_range(const void *base, size_t size) {
+    dcache_range_op(base, size, DCACHE_RANGE_CLEAN | DCACHE_RANGE_INVALIDATE);
+}
@@ -22,6 +22,9 @@ package holy_core_pkg;
     // STATE TO EVALUTE WHETHER A SET IS FLUSHABLE (VALID)
     // OR SHOULD BE SKIPPED
     FLUSH_NEXT, 
+    // STATE TO EVALUATE ONE LINE OF A RANGE MAINTENANCE
+    // OPERATION (CLEAN / INVALIDATE BY ADDRESS)
+    RANGE_OP_NEXT,
     SENDING_READ_REQ,
     RECEIVING_READ_DATA,
     // SIGNAL A VALID READ TO THE CPU
@@ -187,6 +190,14 @@ package holy_core_pkg;
     SOURCE_PC_DPC = 3'b100
   } pc_source_t;
 
+  // MTVEC MODES (mtvec[1:0])
+  // DIRECT : every trap goes to BASE
+  // VECTORED : interrupts go to BASE + 4*cause, exceptions to BASE
+  typedef enum logic [1:0] {
+    MTVEC_MODE_DIRECT = 2'b00,
+    MTVEC_MODE_VECTORED = 2'b01
+  } mtvec_mode_t;
+
   // Write_back signal
   typedef struct packed {
     logic [31:0] data;
@@ -1,5 +1,7 @@
 import os
+import hashlib
 import logging
+import subprocess
 
 import riscof.utils as utils
 import riscof.constants as constants
@@ -7,6 +9,9 @@ from riscof.pluginTemplate import pluginTemplate
 
 logger = logging.getLogger()
 
+# waveforms the tb may produce depending on the TRACE mode (see holy_core_tb/Makefile)
+WAVE_FILES = ["dump.vcd", "dump.fst", "window.fst"]
+
 class holy_core(pluginTemplate):
     __model__ = "holy_core"
     __version__ = "0.0.1"
@@ -45,6 +50,23 @@ class holy_core(pluginTemplate):
         else:
             self.target_run = True
 
+        # Verilator build profile used by the tb (see holy_core_tb/Makefile).
+        # "debug" keeps waveforms, "fast" trades visibility for throughput.
+        # The PROFILE env var has the last word.
+        self.profile = os.getenv('PROFILE', config.get('profile', 'debug'))
+
+        # If set, tests are sent to an already running simulation server
+        # (holy_core_tb/test_sim_server.py) listening on this queue dir instead
+        # of starting (and elaborating) a new simulator per test.
+        self.server_queue = config.get('server_queue', None)
+
+        # If set, compiled tests (elf & hex) are cached in this dir, keyed by
+        # the hash of everything the compilation depends on. Unchanged tests
+        # are then copied from the cache instead of being rebuilt.
+        self.build_cache = config.get('build_cache', None)
+        if self.build_cache:
+            self.build_cache = os.path.abspath(self.build_cache)
+
     def initialise(self, suite, work_dir, archtest_env):
 
         # capture the working directory. Any artifacts that the DUT creates should be placed in this
@@ -61,24 +83,50 @@ class holy_core(pluginTemplate):
         # 3 : .bin file intermediary
         # 4 : end HEX DUMP file
         # 5 : testentry['isa'].lower()
-        self.compile_cmd = 'riscv64-unknown-elf-gcc -march={5} -mabi=ilp32 \
+        # gcc, objcopy & hexdump steps, chained with ; (or && when the
+        # result goes to the build cache, see runTests)
+        self.compile_steps = [
+            'riscv64-unknown-elf-gcc -march={5} -mabi=ilp32 \
             -static -mcmodel=medany -fvisibility=hidden -nostdlib -nostartfiles -g\
             -T '+self.pluginpath+'/env/link.ld\
             -I '+self.pluginpath+'/env/\
-            -I ' + archtest_env + ' {0} -o {1} {2}\
-            \
-            ;\
-            \
-            riscv64-unknown-elf-objcopy -O binary {1} {3} \
-            \
-            ;\
-            \
-            hexdump -v -e \'1/4 \"%08x\\n\"\' {3} > {4}\
-            '
+            -I ' + archtest_env + ' {0} -o {1} {2}',
+            'riscv64-unknown-elf-objcopy -O binary {1} {3}',
+            'hexdump -v -e \'1/4 \"%08x\\n\"\' {3} > {4}'
+        ]
+        self.compile_cmd = ' ; '.join(self.compile_steps)
 
         # add more utility snippets here.
         # BRH : No. Thank you
 
+        # the compilation inputs shared by all the tests, for the build cache keys
+        self.env_digest = self.digest_env(archtest_env)
+
+    def digest_env(self, archtest_env):
+        """Hash of the compile command, toolchain version and env headers / linker script"""
+        digest = hashlib.sha256(self.compile_cmd.encode())
+        try:
+            digest.update(subprocess.run(['riscv64-unknown-elf-gcc', '--version'], capture_output=True).stdout)
+        except OSError:
+            pass
+        for env_dir in [os.path.join(self.pluginpath, 'env'), archtest_env]:
+            for name in sorted(os.listdir(env_dir)):
+                path = os.path.join(env_dir, name)
+                if os.path.isfile(path):
+                    digest.update(name.encode())
+                    with open(path, 'rb') as file:
+                        digest.update(file.read())
+        return digest.hexdigest()
+
+    def cache_key(self, test, compile_macros, isa):
+        """Build cache entry of a test : its source, macros & isa on top of the env"""
+        digest = hashlib.sha256(self.env_digest.encode())
+        with open(test, 'rb') as file:
+            digest.update(file.read())
+        digest.update(compile_macros.encode())
+        digest.update(isa.encode())
+        return os.path.join(self.build_cache, digest.hexdigest())
+
     def build(self, isa_yaml, platform_yaml):
         # We don't need any build for the holy core : We use cocotb.
         # or maybe execut make once for cocotb to build 1st time, idk
@@ -143,6 +191,21 @@ class holy_core(pluginTemplate):
                 testentry['isa'].lower()
             )
 
+            # build cache : copy the elf & hex of an identical previous build, or
+            # build and store them. Only a build where every step succeeded is
+            # stored (no stale my.* from a previous run : they are removed first),
+            # into a temp dir renamed into place so an entry is always complete.
+            if self.build_cache:
+                cache_entry = self.cache_key(test, compile_macros, testentry['isa'].lower())
+                if os.path.exists(cache_entry):
+                    comp_cmd = 'cp {0} {1} .'.format(os.path.join(cache_entry, elf), os.path.join(cache_entry, hex))
+                else:
+                    comp_cmd = 'rm -f {0} {1} {2} && '.format(elf, bin, hex)
+                    comp_cmd += ' && '.join(step.format(test, elf, compile_macros, bin, hex, testentry['isa'].lower())
+                                            for step in self.compile_steps)
+                    comp_cmd += ' && mkdir -p {0} && tmp=$$(mktemp -d {0}/tmp.XXXXXX)'.format(self.build_cache)
+                    comp_cmd += ' && cp {0} {1} $$tmp && {{ [ -e {2} ] || mv $$tmp {2}; }}; rm -rf $$tmp'.format(elf, hex, cache_entry)
+
 
             # get symbol list from elf file
             nm_symbols_cmd = f'riscv32-unknown-elf-nm {elf} > dut.symbols'
@@ -160,13 +223,27 @@ class holy_core(pluginTemplate):
             # if the user wants to disable running the tests and only compile the tests, then
             # the "else" clause is executed below assigning the sim command to simple no action
             # echo statement.
-            if self.target_run:
+            if self.target_run and self.server_queue:
+                # one job per test, the server handles reset / preload / signature dump
+                simcmd = 'python3 {0} --queue {1} --hex {2} --startup-hex {3}'.format(
+                    os.path.join(self.pluginpath, "../holy_core_tb/sim_client.py"),
+                    os.path.abspath(self.server_queue),
+                    os.path.join(test_dir, hex),
+                    os.path.join(self.pluginpath, "../holy_core_tb/test_startup.hex")
+                )
+                simcmd += ' --tohost $${write_tohost} --begin-signature $${begin_signature}'
+                simcmd += ' --end-signature $${end_signature} --signature {0}'.format(sig_file)
+                simcmd += ' --log {0}'.format(os.path.join(testentry['work_dir'], "dut.log"))
+                simcmd += ' > {0}'.format(os.path.join(test_dir, "tb_messages.log"))
+            elif self.target_run:
                 # We go in the tb's dir
                 simcmd = 'cd {0} && '.format(os.path.join(self.pluginpath, "../holy_core_tb/"))
+                # remove waveforms from the previous test, the TRACE mode (env var) may not produce any
+                simcmd += 'rm -f {0};'.format(" ".join(WAVE_FILES))
                 # execute make (tb) and specify init memory content + symbols addresses
-                simcmd += 'IHEX_PATH="{0}" make > tb_messages.log;'.format(os.path.join(test_dir, hex))
-                # And finally, copy paste the waveforms in the work dir
-                simcmd += 'cp ./dump.vcd {0};'.format(testentry['work_dir'])
+                simcmd += 'IHEX_PATH="{0}" PROFILE={1} make > tb_messages.log;'.format(os.path.join(test_dir, hex), self.profile)
+                # And finally, copy paste the waveforms (if any) in the work dir
+                simcmd += 'for f in {0}; do if [ -f $$f ]; then cp $$f {1}; fi; done;'.format(" ".join(WAVE_FILES), testentry['work_dir'])
                 simcmd += 'cp ./dut.log {0};'.format(testentry['work_dir'])
                 simcmd += 'cp {0} {1};'.format(sig_file ,testentry['work_dir'])
                 simcmd += 'cp ./tb_messages.log {0}'.format(testentry['work_dir'])
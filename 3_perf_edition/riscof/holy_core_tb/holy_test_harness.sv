@@ -118,6 +118,13 @@ localparam MST_NB = 1;
 axi_if m_axi();
 // HOLYCORE <=> AXIL CROSSBAR
 axi_lite_if m_axi_lite();
+// HOLY CORE DTCM SLAVE (no DMA in this tb)
+axi_if s_axi_dtcm();
+assign s_axi_dtcm.awvalid = 1'b0;
+assign s_axi_dtcm.wvalid = 1'b0;
+assign s_axi_dtcm.bready = 1'b1;
+assign s_axi_dtcm.arvalid = 1'b0;
+assign s_axi_dtcm.rready = 1'b1;
 AXI_LITE #(32,32) m_axi_lite_xbar_in [MST_NB-1:0] ();
 AXI_LITE #(32,32) m_axi_lite_xbar_out [SLV_NB-1:0] ();
 // AXIL CROSSBAR <=> PLIC
@@ -147,6 +154,7 @@ holy_core #(
     // multiple savles acrosse the system.
     // i.e. RAM, CLINT & PLIC.
     .m_axi_lite(m_axi_lite),
+    .s_axi_dtcm(s_axi_dtcm),
 
     // Interrupts
     .timer_itr(timer_irq),
@@ -350,4 +358,16 @@ assign m_axi_lite_xbar_out[0].r_resp = m_axi_lite_rresp;
 assign m_axi_lite_xbar_out[0].r_valid = m_axi_lite_rvalid;
 assign m_axi_lite_rready = m_axi_lite_xbar_out[0].r_ready;
 
-endmodule
\ No newline at end of file
+//=======================
+// WINDOWED WAVEFORM DUMP
+//=======================
+
+`ifdef HC_WAVE_WINDOW
+wave_window wave_dump (
+    .clk(clk),
+    .pc(core.pc),
+    .trap(core.trap)
+);
+`endif
+
+endmodule
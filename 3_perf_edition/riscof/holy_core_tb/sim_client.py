@@ -0,0 +1,87 @@
+# HOLY CORE SIMULATION SERVER CLIENT
+#
+# Submits one program to a running sim server (test_sim_server.py)
+# and blocks until its result comes back. Exit code is 0 if the
+# program reached its stop condition.
+#
+# e.g.
+# python3 sim_client.py --queue /tmp/hc_queue --hex my.hex \
+#     --tohost 0x80001000 --begin-signature 0x80002000 \
+#     --end-signature 0x80002100 --signature DUT-holy_core.signature
+#
+# BRH 10/26
+
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+
+def submit(queue_dir, job, timeout=None, poll=0.05):
+    """Drop a job in the queue and wait for its result dict"""
+    name = f"job_{uuid.uuid4().hex}"
+    job_path = os.path.join(queue_dir, name + ".json")
+    result_path = os.path.join(queue_dir, name + ".result.json")
+
+    # write then rename : the server never sees a half written job
+    with open(job_path + ".tmp", "w") as f:
+        json.dump(job, f)
+    os.replace(job_path + ".tmp", job_path)
+
+    start = time.monotonic()
+    while not os.path.exists(result_path):
+        if timeout is not None and time.monotonic() - start > timeout:
+            raise TimeoutError(f"no result for {name} after {timeout}s, is the server running ?")
+        time.sleep(poll)
+
+    with open(result_path, "r") as f:
+        result = json.load(f)
+    os.remove(result_path)
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a program on a HOLY CORE sim server")
+    parser.add_argument("--queue", required=True, help="server queue directory")
+    parser.add_argument("--hex", default=None, help="program hex file")
+    parser.add_argument("--base", default="80000000", help="program load address (hex)")
+    parser.add_argument("--startup-hex", default=None, help="startup code loaded at 0x0")
+    parser.add_argument("--tohost", default=None, help="stop when pc >= tohost (hex)")
+    parser.add_argument("--stop-pc", default=None, help="stop when pc == stop_pc (hex)")
+    parser.add_argument("--max-cycles", type=int, default=None)
+    parser.add_argument("--begin-signature", default=None)
+    parser.add_argument("--end-signature", default=None)
+    parser.add_argument("--signature", default=None, help="signature output file")
+    parser.add_argument("--log", default=None, help="spike like log output file (riscof's dut.log)")
+    parser.add_argument("--timeout", type=float, default=None, help="client side timeout (s)")
+    parser.add_argument("--stop", action="store_true", help="ask the server to shut down instead")
+    args = parser.parse_args()
+
+    if args.stop:
+        open(os.path.join(args.queue, "stop"), "w").close()
+        return 0
+    if args.hex is None:
+        parser.error("--hex is required")
+
+    job = {"hex": os.path.abspath(args.hex), "base": args.base}
+    if args.startup_hex:
+        job["startup_hex"] = os.path.abspath(args.startup_hex)
+    if args.tohost:
+        job["tohost"] = args.tohost
+    if args.stop_pc:
+        job["stop_pc"] = args.stop_pc
+    if args.max_cycles:
+        job["max_cycles"] = args.max_cycles
+    if args.signature:
+        job["signature"] = os.path.abspath(args.signature)
+        job["begin_signature"] = args.begin_signature
+        job["end_signature"] = args.end_signature
+    if args.log:
+        job["log"] = os.path.abspath(args.log)
+
+    result = submit(args.queue, job, timeout=args.timeout)
+    print(json.dumps(result))
+    return 0 if result["status"] == "done" else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
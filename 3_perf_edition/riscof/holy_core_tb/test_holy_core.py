@@ -7,10 +7,18 @@
 # BRH 10/24
 
 import cocotb
-from cocotb.clock import Clock
 from cocotb.triggers import RisingEdge, Timer
 from cocotbext.axi import AxiBus, AxiRam, AxiLiteBus, AxiLiteRam
 import os
+import sys
+
+# lock-step reference model lives with the core tb
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../tb/holy_core"))
+from ref_model import RefModel
+from cosim import CosimChecker, cosim_enabled
+# shared testbench helpers
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../tb"))
+from hc_tb import CSR_MAP, format_gpr, cpu_reset, inst_clocks, load_hex, CoreProbe
 
 # WARNING : Passing test on async cloks does not mean CDC timing sync is met !
 AXI_PERIOD = 10
@@ -20,70 +28,67 @@ CPU_PERIOD = 10
 # makes cache tests go ever that limit
 THRESHOLD = 200_000
 
-CSR_MAP = {
-    0x300: "mstatus",
-    0x301: "misa",
-    0x304: "mie",
-    0x344: "mip",
-    0x305: "mtvec",
-    0x341: "mepc",
-    0x342: "mcause",
-    0x343: "mtval",
-    0x340: "mscratch",
-    0x7C0: "flush_cache",
-    0x7C1: "data_non_cachable_base",
-    0x7C2: "data_non_cachable_limit",
-    0x7C3: "instr_non_cachable_base",
-    0x7C4: "instr_non_cachable_limit"
-}
-
-def binary_to_hex(bin_str):
-    # Convert binary string to hexadecimal
-    hex_str = hex(int(str(bin_str), 2))[2:]
-    hex_str = hex_str.zfill(8)
-    return hex_str.upper()
-
-def hex_to_bin(hex_str):
-    # Convert hex str to bin
-    bin_str = bin(int(str(hex_str), 16))[2:]
-    bin_str = bin_str.zfill(32)
-    return bin_str.upper()
-
-def read_cache(cache_data, line) :
-    """To read cache_data, because the packed array makes it an array of bits..."""
-    l = 127 - line
-    return (int(str(cache_data.value[32*l:(32*l)+31]),2))
-
-def format_gpr(idx):
-    """Used for debug logs."""
-    if idx < 10:
-        return f"x{idx} "
+def spike_log_line(core):
+    """Spike like log line of the instruction about to retire
+    (inspired by jeras' work, link in cpu_insrt_test)"""
+    # --- Initialize logging strings
+    str_ifu = ""
+    str_gpr = ""
+    str_lsu = ""
+    str_csr = ""
+
+    # --- GPR write-back logging ---
+    write_back_val = core.read("write_back_signal") # packed type
+    wb_data = (write_back_val >> 1) & 0xFFFFFFFF  # bits [32:1]
+    wb_valid = write_back_val & 0x1               # bit [0]
+
+    if core.read("reg_write") and wb_valid:
+        if core.read("dest_reg") != 0:  # ignore x0
+            reg_id = core.read("dest_reg")
+            reg_val = wb_data
+            str_gpr = f" {format_gpr(reg_id)} 0x{reg_val:08x}"
+        else:
+            str_gpr = ""
+    else:
+        str_gpr = ""
+
+    # --- CSR write-back logging ---
+    if core.read("csr_write_enable"):
+        # build the reg id str
+        # format cXXX_NNNNN
+        # with XXX the decimal address
+        # and NNNNN the csr standard name
+        csr_addr = core.read("csr_address")
+        csr_name = CSR_MAP[csr_addr]
+        csr_wb_data = core.read("csr_write_back_data")
+        str_csr = f" c{str(csr_addr)}_{str(csr_name)} 0x{csr_wb_data:08x}"
+    else:
+        str_csr = ""
+
+    # --- LSU memory logging ---
+    if core.read("mem_write_enable"):  # memory store
+        # address comes from alu_result directly in holy_core
+        addr = core.read("alu_result")
+        data = core.read("mem_write_data")
+        str_lsu = f" mem 0x{addr:08x} 0x{data:08x}"
+    elif core.read("mem_read_enable"):  # memory load
+        addr = core.read("alu_result")
+        data = core.read("mem_read")
+        str_lsu = f" mem 0x{addr:08x}"
+
+    # --- Instruction fetch logging ---
+    pc = core.pc
+    instr = core.instruction
+    instr_size = 4  # instruction are always 4 bytes for now...
+
+    if instr_size == 4:
+        str_ifu = f" 0x{pc:08x} (0x{instr:08x})"
     else:
-        return f"x{idx}"
-
-async def cpu_reset(dut):
-    # Init and reset
-    dut.rst_n.value = 0
-    await Timer(1, units="ns")
-    await RisingEdge(dut.clk)     # Wait for a clock edge after reset
-    dut.rst_n.value = 1           # De-assert reset
-    await RisingEdge(dut.clk)     # Wait for a clock edge after reset
-
-async def inst_clocks(dut):
-    """this instantiates the axi environement & clocks"""
-    cocotb.start_soon(Clock(dut.clk, CPU_PERIOD, units="ns").start())
-
-async def init_memory(axi_ram : AxiRam, hexfile, base_addr):
-    addr_offset = 0
-    with open(hexfile, "r") as file:
-        for raw_instruction in file :
-            addr = addr_offset + base_addr
-            str_instruction = raw_instruction.split("/")[0].strip()
-            instruction = int(str_instruction, 16).to_bytes(4,'little')
-            axi_ram.write(addr, instruction)
-            print(f'RUNNING INIT @{hex(addr)} => {instruction}')
-            axi_ram.hexdump(addr,4)
-            addr_offset += 4
+        # not used but its here, we nere know ;)
+        str_ifu = f" 0x{pc:08x} (0x{instr & 0xFFFF:04x})"
+
+    # --- Write final combined log line ---
+    return f"core   0: 3{str_ifu}{str_gpr}{str_lsu}{str_csr}\n"
 
 @cocotb.test()
 async def cpu_insrt_test(dut):
@@ -107,21 +112,21 @@ async def cpu_insrt_test(dut):
     with open("dut.log", "w"):
         pass  # Just open in write mode to truncate
 
-    await inst_clocks(dut)
+    await inst_clocks(dut, CPU_PERIOD)
 
     SIZE = 2**32
     axi_ram_slave = AxiRam(AxiBus.from_prefix(dut, "m_axi"), dut.clk, dut.rst_n, size=SIZE, reset_active_level=False)
     axi_lite_ram_slave = AxiLiteRam(AxiLiteBus.from_prefix(dut, "m_axi_lite"), dut.clk, dut.rst_n, size=SIZE, reset_active_level=False)
     await cpu_reset(dut)
+    # cached handles, the logging loop below reads them as integers every cycle
+    core = CoreProbe.of(dut)
 
     startup_hex = "./test_startup.hex"
     program_hex = os.environ["IHEX_PATH"]    
     # add custom startup code (SHOULD CNTAIN A JUMP TO 0x80000000)
-    await init_memory(axi_ram_slave, startup_hex, 0x0)
-    await init_memory(axi_lite_ram_slave, startup_hex, 0x0)
+    load_hex([axi_ram_slave, axi_lite_ram_slave], startup_hex, 0x0)
     # add test code
-    await init_memory(axi_ram_slave, program_hex, 0x80000000)
-    await init_memory(axi_lite_ram_slave, program_hex, 0x80000000)
+    load_hex([axi_ram_slave, axi_lite_ram_slave], program_hex, 0x80000000)
 
     print(f"begin_signature = {hex(begin_signature)}")
     print(f"end_signature = {hex(end_signature)}")
@@ -133,22 +138,31 @@ async def cpu_insrt_test(dut):
 
     # wait until we are about to jump to 0x8000_0000
     # to start counting...
-    while not dut.core.pc_next.value == 0x8000_0000:
+    while not core.read("pc_next") == 0x8000_0000:
         await Timer(1,"ns")
 
     # we are about to jump to 0x8000_0000, we save pc to jump back
     # to _test_end (from test_startup.S) once the test is over to
     # execute final code
-    _test_end_pc = dut.core.pc.value  + 4
+    _test_end_pc = core.pc + 4
+
+    # optional lock-step co-simulation (COSIM=1), aborts on the first divergence
+    checker = None
+    if cosim_enabled():
+        ref = RefModel()
+        ref.load_hex(startup_hex, 0x0)
+        ref.load_hex(program_hex, 0x80000000)
+        checker = CosimChecker(dut, ref)
+        checker.sync_from_dut()
 
     i = 0
 
     # actual test program execution
-    while not dut.core.pc.value.integer >= write_tohost and i < THRESHOLD:
+    while not core.pc >= write_tohost and i < THRESHOLD:
         i+=1
 
         await Timer(1, units="ns") # let signals info propagate in sim
-        print(f'PC : {hex(dut.core.pc.value.integer)} <= {hex(write_tohost)}')
+        print(f'PC : {hex(core.pc)} <= {hex(write_tohost)}')
 
         ##########################################################
         # SPIKE LIKE LOGS (inspired by jeras' work, link below)
@@ -156,66 +170,12 @@ async def cpu_insrt_test(dut):
         ##########################################################
 
         # if we're about to execute the instruction, we can log.
-        if dut.core.stall.value == 0:
-            # --- Initialize logging strings
-            str_ifu = ""
-            str_gpr = ""
-            str_lsu = ""
-            str_csr = ""
-
-            # --- GPR write-back logging ---
-            write_back_val = int(dut.core.write_back_signal.value) # packed type
-            wb_data = (write_back_val >> 1) & 0xFFFFFFFF  # bits [32:1]
-            wb_valid = write_back_val & 0x1               # bit [0]
-
-            if dut.core.reg_write.value and wb_valid:
-                if dut.core.dest_reg.value.integer != 0:  # ignore x0
-                    reg_id = dut.core.dest_reg.value.integer
-                    reg_val = wb_data
-                    str_gpr = f" {format_gpr(reg_id)} 0x{reg_val:08x}"
-                else:
-                    str_gpr = ""
-            else:
-                str_gpr = ""
-
-            # --- CSR write-back logging ---
-            if dut.core.csr_write_enable.value:
-                # build the reg id str
-                # format cXXX_NNNNN
-                # with XXX the decimal address
-                # and NNNNN the csr standard name
-                csr_addr = int(dut.core.csr_address.value)
-                csr_name = CSR_MAP[csr_addr]
-                csr_wb_data = dut.core.csr_write_back_data.value.integer
-                str_csr = f" c{str(csr_addr)}_{str(csr_name)} 0x{csr_wb_data:08x}"
-            else:
-                str_csr = ""
-
-            # --- LSU memory logging ---
-            if dut.core.mem_write_enable.value:  # memory store
-                # address comes from alu_result directly in holy_core
-                addr = dut.core.alu_result.value.integer
-                data = dut.core.mem_write_data.value.integer
-                str_lsu = f" mem 0x{addr:08x} 0x{data:08x}"
-            elif dut.core.mem_read_enable.value:  # memory load
-                addr = dut.core.alu_result.value.integer
-                data = dut.core.mem_read.value.integer
-                str_lsu = f" mem 0x{addr:08x}"
-
-            # --- Instruction fetch logging ---
-            pc = dut.core.pc.value.integer
-            instr = dut.core.instruction.value.integer
-            instr_size = 4  # instruction are always 4 bytes for now...
-
-            if instr_size == 4:
-                str_ifu = f" 0x{pc:08x} (0x{instr:08x})"
-            else:
-                # not used but its here, we nere know ;)
-                str_ifu = f" 0x{pc:08x} (0x{instr & 0xFFFF:04x})"
-
-            # --- Write final combined log line ---
+        if core.stall == 0:
+            if checker is not None:
+                checker.check_retire()
+
             with open("dut.log", "a") as fd:
-                fd.write(f"core   0: 3{str_ifu}{str_gpr}{str_lsu}{str_csr}\n")
+                fd.write(spike_log_line(core))
             
         await RisingEdge(dut.clk)
 
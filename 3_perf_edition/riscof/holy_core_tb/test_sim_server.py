@@ -0,0 +1,170 @@
+# HOLY CORE SIMULATION SERVER
+#
+# Long lived cocotb test that runs many programs through ONE
+# elaborated holy_test_harness, so the (slow) verilator build
+# and elaboration are paid once for a whole batch (arch tests,
+# benchmarks...).
+#
+# Protocol is a simple directory queue (see sim_client.py):
+#   - clients drop <name>.json job files in $SIM_SERVER_QUEUE
+#     (written as .tmp then renamed, so a job is always complete)
+#   - for each job, the server wipes the memory, resets the DUT, preloads it,
+#     runs until the stop condition and writes <name>.result.json
+#     (+ the signature file if requested)
+#   - a file named "stop" in the queue shuts the server down
+#
+# Job fields:
+#   hex               program hex path (loaded at base, default 0x80000000)
+#   startup_hex       optional startup code loaded at 0x0 (default: ./test_startup.hex)
+#   tohost            stop when pc >= tohost (riscof's write_tohost)
+#   stop_pc           OR stop when pc == stop_pc
+#   max_cycles        hard limit (default THRESHOLD)
+#   begin_signature / end_signature / signature : optional signature dump
+#   log               optional spike like log (riscof's dut.log), slows the run down
+#
+# Run with : make SIM_SERVER=1 SIM_SERVER_QUEUE=/tmp/hc_queue
+#
+# BRH 10/26
+
+import cocotb
+from cocotb.triggers import RisingEdge, Timer
+from cocotbext.axi import AxiBus, AxiRam, AxiLiteBus, AxiLiteRam
+import json
+import os
+import time
+
+from test_holy_core import THRESHOLD, spike_log_line
+from hc_tb import CoreProbe, cpu_reset, inst_clocks, load_hex
+
+POLL_PERIOD_S = 0.05
+DRAIN_CYCLES = 1000
+
+def parse_int(value):
+    return value if isinstance(value, int) else int(str(value), 16)
+
+def clear_memory(rams):
+    """Drop every page the previous program touched (loads, dumps AND its
+    own stores) : the sparse memory reads back zeros, like a fresh RAM"""
+    for ram in rams:
+        ram.mem.clear()
+
+def next_job(queue_dir):
+    """Oldest complete job in the queue, "stop" or None"""
+    if os.path.exists(os.path.join(queue_dir, "stop")):
+        return "stop"
+    jobs = [f for f in os.listdir(queue_dir) if f.endswith(".json") and not f.endswith(".result.json")]
+    if not jobs:
+        return None
+    jobs.sort(key=lambda f: os.path.getmtime(os.path.join(queue_dir, f)))
+    return os.path.join(queue_dir, jobs[0])
+
+async def run_job(dut, rams, axi_ram_slave, job):
+    """Reset, preload and run one program. Returns the result dict"""
+    clear_memory(rams)
+    await cpu_reset(dut)
+
+    startup_hex = job.get("startup_hex", "./test_startup.hex")
+    base_addr = parse_int(job.get("base", 0x80000000))
+    load_hex(rams, startup_hex, 0x0)
+    load_hex(rams, job["hex"], base_addr)
+
+    tohost = parse_int(job["tohost"]) if "tohost" in job else None
+    stop_pc = parse_int(job["stop_pc"]) if "stop_pc" in job else None
+    max_cycles = int(job.get("max_cycles", THRESHOLD))
+
+    # wait until we are about to jump to the program
+    cycles = 0
+    while not dut.core.pc_next.value == base_addr and cycles < max_cycles:
+        await RisingEdge(dut.clk)
+        cycles += 1
+    await Timer(1, unit="ns")
+    _test_end_pc = int(dut.core.pc.value) + 4
+
+    core = CoreProbe.of(dut) if "log" in job else None
+    log = open(job["log"], "w") if core is not None else None
+
+    status = "timeout"
+    try:
+        while cycles < max_cycles:
+            await RisingEdge(dut.clk)
+            await Timer(1, unit="ns") # let signals info propagate in sim
+            cycles += 1
+            pc = int(dut.core.pc.value)
+            if (tohost is not None and pc >= tohost) or (stop_pc is not None and pc == stop_pc):
+                status = "done"
+                break
+            # same lines as the riscof tb's dut.log
+            if log is not None and core.stall == 0:
+                log.write(spike_log_line(core))
+    finally:
+        if log is not None:
+            log.close()
+
+    result = {"status": status, "cycles": cycles}
+    if log is not None:
+        result["log"] = job["log"]
+
+    if "signature" in job:
+        # same end of test procedure as the riscof tb : go back to _test_end
+        # to flush the data cache, then dump the signature
+        dut.core.pc.value = _test_end_pc
+        for _ in range(DRAIN_CYCLES):
+            await RisingEdge(dut.clk)
+
+        begin_signature = parse_int(job["begin_signature"])
+        end_signature = parse_int(job["end_signature"])
+        with open(job["signature"], "w") as sig_file:
+            for addr in range(begin_signature, end_signature, 4):
+                word = int.from_bytes(axi_ram_slave.read(addr, 4), byteorder="little")
+                sig_file.write("{:08x}\n".format(word))
+        result["signature"] = job["signature"]
+
+    return result
+
+@cocotb.test()
+async def sim_server(dut):
+    queue_dir = os.environ.get("SIM_SERVER_QUEUE", "./sim_queue")
+    os.makedirs(queue_dir, exist_ok=True)
+    dut._log.info(f"HOLY CORE sim server listening on {queue_dir}")
+
+    await inst_clocks(dut)
+
+    SIZE = 2**32
+    axi_ram_slave = AxiRam(AxiBus.from_prefix(dut, "m_axi"), dut.clk, dut.rst_n, size=SIZE, reset_active_level=False)
+    axi_lite_ram_slave = AxiLiteRam(AxiLiteBus.from_prefix(dut, "m_axi_lite"), dut.clk, dut.rst_n, size=SIZE, reset_active_level=False)
+    rams = [axi_ram_slave, axi_lite_ram_slave]
+
+    served = 0
+
+    while True:
+        job_path = next_job(queue_dir)
+        if job_path is None:
+            # nothing to do : block the simulator (no sim time passes)
+            time.sleep(POLL_PERIOD_S)
+            continue
+        if job_path == "stop":
+            os.remove(os.path.join(queue_dir, "stop"))
+            break
+
+        result_path = job_path[:-len(".json")] + ".result.json"
+        start = time.perf_counter()
+        try:
+            with open(job_path, "r") as f:
+                job = json.load(f)
+            os.remove(job_path)
+            result = await run_job(dut, rams, axi_ram_slave, job)
+        except Exception as e:
+            # a bad job should not kill the whole batch
+            if os.path.exists(job_path):
+                os.remove(job_path)
+            result = {"status": "error", "error": repr(e)}
+        result["wall_time_s"] = time.perf_counter() - start
+
+        with open(result_path + ".tmp", "w") as f:
+            json.dump(result, f)
+        os.replace(result_path + ".tmp", result_path)
+
+        served += 1
+        dut._log.info(f"[{served}] {os.path.basename(job_path)} : {result['status']}")
+
+    dut._log.info(f"HOLY CORE sim server stopped after {served} programs")
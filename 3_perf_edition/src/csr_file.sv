@@ -60,16 +60,24 @@ module csr_file (
     output logic [31:0]  data_non_cachable_limit_o,
     output logic [31:0]  instr_non_cachable_base_o,
     output logic [31:0]  instr_non_cachable_limit_o,
+    output logic [31:0]  instr_lock_base_o,
+    output logic [31:0]  instr_lock_limit_o,
+    output logic [31:0]  data_range_base_o,
+    output logic [31:0]  data_range_limit_o,
+    output logic [1:0]   data_range_op_o,
+    input logic          data_range_op_ack,
 
     // Trap handling
     output logic trap,
-    output logic [31:0] csr_mtvec,
+    output logic [31:0] trap_vector,
     output logic [31:0] csr_mepc,
 
     // Debug pc for exiting debug mode
     output logic [31:0] csr_dpc,
     // Are we single stepping ?
-    output logic        single_step
+    output logic        single_step,
+    // Leaving debug mode (dret) : the I$ drops its lines
+    output logic        debug_exit
 );
 
 /*  
@@ -81,10 +89,10 @@ module csr_file (
 */
 
 // Output signals assigns
-assign csr_mtvec = mtvec;
 assign csr_mepc  = mepc;
 assign csr_dpc = dpc;
 assign single_step = dcsr[2];
+assign debug_exit = debug_mode && d_ret && instruction_valid;
 
 // Declare all CSRs and they next signals here
 
@@ -112,6 +120,11 @@ logic [31:0] data_non_cachable_base, next_data_non_cachable_base;     // 0x7C1
 logic [31:0] data_non_cachable_limit, next_data_non_cachable_limit;   // 0x7C2
 logic [31:0] instr_non_cachable_base, next_instr_non_cachable_base;     // 0x7C3
 logic [31:0] instr_non_cachable_limit, next_instr_non_cachable_limit;   // 0x7C4
+logic [31:0] instr_lock_base, next_instr_lock_base;                     // 0x7C5
+logic [31:0] instr_lock_limit, next_instr_lock_limit;                   // 0x7C6
+logic [31:0] data_range_base, next_data_range_base;                     // 0x7C7
+logic [31:0] data_range_limit, next_data_range_limit;                   // 0x7C8
+logic [31:0] data_range_op, next_data_range_op;                         // 0x7C9
 
 // trap_taken state register
 logic trap_taken; // 1 if currently handling a trap
@@ -128,6 +141,13 @@ always_ff @(posedge clk) begin
         data_non_cachable_limit     <= 32'hFFFFFFFF;
         instr_non_cachable_base     <= 32'd0;
         instr_non_cachable_limit    <= 32'hFFFFFFFF;
+        // no I$ line is locked by default.
+        instr_lock_base             <= 32'd0;
+        instr_lock_limit            <= 32'd0;
+        // empty D$ maintenance range, no op.
+        data_range_base             <= 32'd0;
+        data_range_limit            <= 32'd0;
+        data_range_op               <= 32'd0;
 
         // Trap handling
         mstatus             <= 32'h00001800;
@@ -155,6 +175,11 @@ always_ff @(posedge clk) begin
         data_non_cachable_limit     <= next_data_non_cachable_limit;
         instr_non_cachable_base     <= next_instr_non_cachable_base;
         instr_non_cachable_limit    <= next_instr_non_cachable_limit;
+        instr_lock_base             <= next_instr_lock_base;
+        instr_lock_limit            <= next_instr_lock_limit;
+        data_range_base             <= next_data_range_base;
+        data_range_limit            <= next_data_range_limit;
+        data_range_op               <= next_data_range_op;
         // Trap handling
         mstatus             <= next_mstatus;
         mie                 <= next_mie;
@@ -179,7 +204,7 @@ always_ff @(posedge clk) begin
         // Debug mode seq logic
         if(jump_to_debug || jump_to_debug_exception) begin
             debug_mode <= 1;
-        end else if(d_ret && instruction_valid) begin
+        end else if(debug_exit) begin
             debug_mode <= 0;
         end else begin
             debug_mode <= debug_mode;
@@ -265,7 +290,9 @@ always_comb begin : next_csr_value_logic
         // interrupts have priority over excpetions
 
         // if its an interrupt...
-        if((|(mie & mip))) begin
+        // (pending but globally disabled interrupts do not count :
+        // an exception taken meanwhile is an exception)
+        if((|(mie & mip)) && mstatus[3]) begin
             next_mcause[31] = 1;
             // the order here defines priority
             if(mip[11] && mie[11])begin
@@ -400,6 +427,47 @@ always_comb begin : next_csr_value_logic
     if (~stall && write_enable && (address == 12'h7C4)) begin
         next_instr_non_cachable_limit = write_back_to_csr;
     end
+
+    // ----------------------------
+    // I$ lock window base and limit CSR
+    // (I$ lines in [base, limit[ are never evicted nor flushed)
+
+    next_instr_lock_base = instr_lock_base;
+    if (~stall && write_enable && (address == 12'h7C5)) begin
+        next_instr_lock_base = write_back_to_csr;
+    end
+
+    next_instr_lock_limit = instr_lock_limit;
+    if (~stall && write_enable && (address == 12'h7C6)) begin
+        next_instr_lock_limit = write_back_to_csr;
+    end
+
+    // ----------------------------
+    // D$ range maintenance CSRs
+    // Lines overlapping [base, limit[ get cleaned (op bit 0, written back
+    // if dirty) and / or invalidated (op bit 1, dropped). The op CSR
+    // stays pending until the D$ takes it (it waits for a running flush)
+    // and resets itself the cycle after.
+
+    next_data_range_base = data_range_base;
+    if (~stall && write_enable && (address == 12'h7C7)) begin
+        next_data_range_base = write_back_to_csr;
+    end
+
+    next_data_range_limit = data_range_limit;
+    if (~stall && write_enable && (address == 12'h7C8)) begin
+        next_data_range_limit = write_back_to_csr;
+    end
+
+    if(data_range_op_ack) begin
+        next_data_range_op = 32'd0;
+    end
+    else if (~stall && write_enable && (address == 12'h7C9))begin
+        next_data_range_op = write_back_to_csr;
+    end
+    else begin
+        next_data_range_op = data_range_op;
+    end
 end
 
 // Always output the CSR data at the given address (or 0)
@@ -422,6 +490,11 @@ always_comb begin : csr_read_logic
         12'h7C2: read_data = data_non_cachable_limit;
         12'h7C3: read_data = instr_non_cachable_base;
         12'h7C4: read_data = instr_non_cachable_limit;
+        12'h7C5: read_data = instr_lock_base;
+        12'h7C6: read_data = instr_lock_limit;
+        12'h7C7: read_data = data_range_base;
+        12'h7C8: read_data = data_range_limit;
+        12'h7C9: read_data = data_range_op;
 
         // Debug CSRs readout
         12'h7B0: read_data = dcsr;
@@ -472,6 +545,13 @@ always_comb begin : control_assignments
     // instr caching ranges
     instr_non_cachable_base_o = instr_non_cachable_base;
     instr_non_cachable_limit_o = instr_non_cachable_limit;
+    // I$ lock window
+    instr_lock_base_o = instr_lock_base;
+    instr_lock_limit_o = instr_lock_limit;
+    // D$ range maintenance
+    data_range_base_o = data_range_base;
+    data_range_limit_o = data_range_limit;
+    data_range_op_o = data_range_op[1:0];
 
     // Debug logic
     // If a trap is being handled, we shall not enter debug mode yet.
@@ -503,6 +583,18 @@ always_comb begin : control_assignments
     // Trap logic
     // Debug has priority but trap still gets asserted to continue normal flow outside of debug mode
     trap = (((| (mie & mip)) && mstatus[3]) || exception) & ~trap_taken & ~debug_mode;
+
+    // Trap vector (where control sends the PC when trapping)
+    // Direct mode : BASE
+    // Vectored mode : BASE + 4*cause for interrupts, BASE for exceptions.
+    // next_mcause holds the cause on the trap cycle AND on the cycles
+    // after it (mcause registered) when control latched the trap while
+    // stalling, so the vector stays valid until the core actually jumps.
+    // Reserved modes (2, 3) behave as direct.
+    trap_vector = {mtvec[31:2], 2'b00};
+    if((mtvec[1:0] == MTVEC_MODE_VECTORED) && next_mcause[31]) begin
+        trap_vector = {mtvec[31:2], 2'b00} + {next_mcause[29:0], 2'b00};
+    end
 end
 
 endmodule
\ No newline at end of file
@@ -19,7 +19,13 @@ import holy_core_pkg::*;
 module holy_core #(
     // IF DCACHE_EN is 0, we only enerate the non cache version.
     // Which is lighter, less complex and more suited to simple FPGA SoCs.
-    parameter DCACHE_EN = 1
+    parameter DCACHE_EN = 1,
+    // IF DTCM_EN is 1, data accesses in [DTCM_BASE, DTCM_BASE + DTCM_SIZE)
+    // go to a single cycle scratchpad instead of the cache / non cache paths.
+    // DTCM_SIZE is a power of 2 and DTCM_BASE is aligned on it.
+    parameter DTCM_EN = 0,
+    parameter DTCM_BASE = 32'h80004000,
+    parameter DTCM_SIZE = 8192
 )(
     // DEBUG Support implemented via execution based method.
     // Using pulp platform's debug module. When a debug request comes
@@ -36,6 +42,8 @@ module holy_core #(
     // AXI Interface for external requests
     axi_if.master m_axi,
     axi_lite_if.master m_axi_lite,
+    // AXI Slave port to the DTCM (for DMAs), tied off if DTCM_EN = 0
+    axi_if.slave s_axi_dtcm,
 
     // Interrupts
     input logic timer_itr,
@@ -122,7 +130,7 @@ always_comb begin : pc_select
     case (pc_source)
         SOURCE_PC_PLUS_4 :      pc_anticipated = pc_plus_four;
         SOURCE_PC_SECOND_ADD :  pc_anticipated = second_add_result;
-        SOURCE_PC_MTVEC :       pc_anticipated = csr_mtvec;
+        SOURCE_PC_MTVEC :       pc_anticipated = csr_trap_vector;
         SOURCE_PC_MEPC :        pc_anticipated = csr_mepc;
         SOURCE_PC_DPC :         pc_anticipated = csr_dpc;
         default :               pc_anticipated = pc_plus_four;
@@ -178,6 +186,13 @@ holy_instr_cache instr_cache (
     .read_valid(instr_cachable_read_valid),
     .read_ack(instr_read_ack),
 
+    // cache control
+    .flush(csr_flush_order),
+    // code fetched before a debug halt may have been patched by the debugger
+    .invalidate(debug_exit),
+    .lock_base(instr_lock_base),
+    .lock_limit(instr_lock_limit),
+
     // M_AXI EXERNAL REQ IF
     .axi(axi_instr),
     .cache_state(i_cachable_state)
@@ -387,7 +402,7 @@ logic csr_write_enable;
 
 // Trap related signals
 logic trap;
-logic [31:0] csr_mtvec;
+logic [31:0] csr_trap_vector;
 logic [31:0] csr_mepc;
 target_addr exception_target_addr;
 assign exception_target_addr.alu_addr = alu_result;
@@ -397,6 +412,7 @@ assign exception_target_addr.second_adder_addr = second_add_result;
 logic jump_to_debug;
 logic jump_to_debug_exception;
 logic [31:0] csr_dpc;
+logic debug_exit;
 
 // csr orders
 logic csr_flush_order;
@@ -404,6 +420,12 @@ logic [31:0] data_non_cachable_base;
 logic [31:0] data_non_cachable_limit;
 logic [31:0] instr_non_cachable_base;
 logic [31:0] instr_non_cachable_limit;
+logic [31:0] instr_lock_base;
+logic [31:0] instr_lock_limit;
+logic [31:0] data_range_base;
+logic [31:0] data_range_limit;
+logic [1:0]  data_range_op;
+logic        d_cache_range_ack;
 
 /* verilator lint_off PINMISSING */
 csr_file holy_csr_file(
@@ -443,6 +465,12 @@ csr_file holy_csr_file(
     .data_non_cachable_limit_o(data_non_cachable_limit),
     .instr_non_cachable_base_o(instr_non_cachable_base),
     .instr_non_cachable_limit_o(instr_non_cachable_limit),
+    .instr_lock_base_o(instr_lock_base),
+    .instr_lock_limit_o(instr_lock_limit),
+    .data_range_base_o(data_range_base),
+    .data_range_limit_o(data_range_limit),
+    .data_range_op_o(data_range_op),
+    .data_range_op_ack(d_cache_range_ack),
 
     // trap request signal
     // This trap flag is high for 1 cycle and until
@@ -451,11 +479,12 @@ csr_file holy_csr_file(
     // No handshake, this simple design assumes control will
     // register it and adapt pc_next accordignly
     .trap(trap),
-    .csr_mtvec(csr_mtvec),
+    .trap_vector(csr_trap_vector),
     .csr_mepc(csr_mepc),
 
     // debug dpc for exiting debug mode
-    .csr_dpc(csr_dpc)
+    .csr_dpc(csr_dpc),
+    .debug_exit(debug_exit)
 );
 /* verilator lint_on PINMISSING */
 
@@ -575,6 +604,10 @@ assign data_req_valid = ~i_cache_stall && (mem_write_enable || mem_read_enable);
 assign data_req_write = mem_write_enable;
 assign data_read_ack = data_req_valid && mem_read_enable && data_read_valid; // Always ack reads immediately
 
+// D$ range maintenance is blocking : the core waits for it to be over
+// so that whatever comes next (e.g. starting a DMA) sees memory in sync
+logic d_cache_range_busy;
+
 // Generate the stalling signal based on handshake state
 always_comb begin
     d_cache_stall = 1;
@@ -585,10 +618,15 @@ always_comb begin
     end else begin
         d_cache_stall = ~data_req_complete;
     end
+
+    if(d_cache_range_busy) begin
+        d_cache_stall = 1'b1;
+    end
 end
 
 wire    [31:0]  mem_read;
-wire    [31:0]  cachable_mem_read, non_cachable_mem_read;
+wire    [31:0]  ext_mem_read, cachable_mem_read, non_cachable_mem_read;
+logic           ext_req_valid, ext_req_ready, ext_read_valid;
 cache_state_t   d_cachable_state, d_non_cachable_state;
 logic           non_cachable;
 logic           cachable_req_valid, non_cachable_req_valid;
@@ -602,12 +640,12 @@ if (DCACHE_EN) begin : gen_data_cache
                           (alu_result < data_non_cachable_limit);
     
     // Route requests based on cachability
-    assign cachable_req_valid = data_req_valid && ~non_cachable;
-    assign non_cachable_req_valid = data_req_valid && non_cachable;
+    assign cachable_req_valid = ext_req_valid && ~non_cachable;
+    assign non_cachable_req_valid = ext_req_valid && non_cachable;
     
     // Mux ready and read_valid signals from active module
-    assign data_req_ready = non_cachable ? non_cachable_req_ready : cachable_req_ready;
-    assign data_read_valid = non_cachable ? non_cachable_read_valid : cachable_read_valid;
+    assign ext_req_ready = non_cachable ? non_cachable_req_ready : cachable_req_ready;
+    assign ext_read_valid = non_cachable ? non_cachable_read_valid : cachable_read_valid;
     
     holy_data_cache #(
         .WORDS_PER_LINE(32),
@@ -627,6 +665,11 @@ if (DCACHE_EN) begin : gen_data_cache
         .read_data(cachable_mem_read),
         // CSR
         .csr_flush_order(csr_flush_order),
+        .csr_range_op(data_range_op),
+        .csr_range_base(data_range_base),
+        .csr_range_limit(data_range_limit),
+        .range_op_ack(d_cache_range_ack),
+        .range_op_busy(d_cache_range_busy),
         .axi(axi_data),
         .cache_state(d_cachable_state)
     );
@@ -650,16 +693,19 @@ if (DCACHE_EN) begin : gen_data_cache
     );
     
     // Mux outputs based on address range
-    assign mem_read = non_cachable ? non_cachable_mem_read : cachable_mem_read;
+    assign ext_mem_read = non_cachable ? non_cachable_mem_read : cachable_mem_read;
     
 end else begin : gen_data_no_cache
     
     assign non_cachable = 1'b0;
+    assign d_cache_range_busy = 1'b0;
+    // nothing to maintain, ops are dropped right away
+    assign d_cache_range_ack = |data_range_op;
     
     // Direct assignment when no dcache
-    assign non_cachable_req_valid = data_req_valid;
-    assign data_req_ready = non_cachable_req_ready;
-    assign data_read_valid = non_cachable_read_valid;
+    assign non_cachable_req_valid = ext_req_valid;
+    assign ext_req_ready = non_cachable_req_ready;
+    assign ext_read_valid = non_cachable_read_valid;
     
     holy_no_cache data_no_cache (
         .clk(clk),
@@ -673,7 +719,7 @@ end else begin : gen_data_no_cache
         .req_write(data_req_write),
         .read_valid(non_cachable_read_valid),
         .read_ack(data_read_ack),
-        .read_data(mem_read),
+        .read_data(ext_mem_read),
         // AXI Lite
         .axi_lite(axi_lite_data),
         .cache_state(d_non_cachable_state)
@@ -681,6 +727,66 @@ end else begin : gen_data_no_cache
 end
 endgenerate
 
+/**
+* DATA TCM
+* Has priority over the cache / non cache paths in its window.
+*/
+
+logic           dtcm_sel;
+logic           dtcm_req_valid;
+logic           dtcm_read_valid;
+wire    [31:0]  dtcm_mem_read;
+
+generate
+if (DTCM_EN) begin : gen_dtcm
+    assign dtcm_sel = (alu_result[31:$clog2(DTCM_SIZE)] == DTCM_BASE[31:$clog2(DTCM_SIZE)]);
+    assign dtcm_req_valid = data_req_valid && dtcm_sel;
+
+    holy_data_tcm #(
+        .SIZE_BYTES(DTCM_SIZE)
+    ) data_tcm (
+        .clk(clk),
+        .rst_n(rst_n),
+        .address(alu_result),
+        .write_data(mem_write_data),
+        .byte_enable(mem_byte_enable),
+        // Handshake signals
+        .req_valid(dtcm_req_valid),
+        .req_ready(),
+        .req_write(data_req_write),
+        .read_valid(dtcm_read_valid),
+        .read_data(dtcm_mem_read),
+        // AXI Slave (DMA)
+        .s_axi(s_axi_dtcm)
+    );
+
+end else begin : gen_no_dtcm
+
+    assign dtcm_sel = 1'b0;
+    assign dtcm_req_valid = 1'b0;
+    assign dtcm_read_valid = 1'b0;
+    assign dtcm_mem_read = '0;
+
+    // slave port never accepts anything
+    assign s_axi_dtcm.awready = 1'b0;
+    assign s_axi_dtcm.wready = 1'b0;
+    assign s_axi_dtcm.bvalid = 1'b0;
+    assign s_axi_dtcm.bresp = 2'b00;
+    assign s_axi_dtcm.bid = '0;
+    assign s_axi_dtcm.arready = 1'b0;
+    assign s_axi_dtcm.rvalid = 1'b0;
+    assign s_axi_dtcm.rdata = '0;
+    assign s_axi_dtcm.rresp = 2'b00;
+    assign s_axi_dtcm.rlast = 1'b0;
+    assign s_axi_dtcm.rid = '0;
+end
+endgenerate
+
+assign ext_req_valid = data_req_valid && ~dtcm_sel;
+assign data_req_ready = dtcm_sel ? 1'b1 : ext_req_ready;
+assign data_read_valid = dtcm_sel ? dtcm_read_valid : ext_read_valid;
+assign mem_read = dtcm_sel ? dtcm_mem_read : ext_mem_read;
+
 /**
 * READER
 */
@@ -8,6 +8,10 @@
 *                 The goal is to allow the user to connect its own memory on FPGA.
 *                 It also supports non cachable ranges, which the use can set
 *                 using CSRs.
+*                 Range maintenance (CSRs 0x7C7 - 0x7C9) cleans and / or
+*                 invalidates only the lines overlapping [base, limit[, it
+*                 visits at most NUM_SETS sets (2 ways each) instead of
+*                 writing back the whole cache like the flush does.
 *
 *                 Goal is to implement cache as BRAM for optimal perfs
 *                 Target : Xilinx FPGAs.
@@ -42,6 +46,15 @@ module holy_data_cache #(
 
     // incomming CSR Orders
     input logic         csr_flush_order,
+    // range maintenance : op bit 0 = clean, bit 1 = invalidate,
+    // held until range_op_ack (the op waits for a running flush).
+    // base / limit shall be stable until done (the core stalls on
+    // range_op_busy).
+    input logic [1:0]   csr_range_op,
+    input logic [31:0]  csr_range_base,
+    input logic [31:0]  csr_range_limit,
+    output logic        range_op_ack,
+    output logic        range_op_busy,
 
     // AXI Interface for external requests
     axi_if.master axi,
@@ -54,7 +67,7 @@ module holy_data_cache #(
     // =======================
 
     // Ready when idle (and not flushing)
-    assign req_ready = (state == IDLE) && ~(csr_flush_order && ~csr_flushing_done);
+    assign req_ready = (state == IDLE) && ~(csr_flush_order && ~csr_flushing_done) && ~(|csr_range_op);
     
     // flag accepted request for state transition
     logic req_accepted;
@@ -184,6 +197,39 @@ module holy_data_cache #(
     logic csr_flushing, next_csr_flushing;
     logic csr_flushing_done, next_csr_flushing_done;
 
+    // =======================
+    // RANGE MAINTENANCE
+    // =======================
+
+    // Lines are compared as line numbers (address without the line offset)
+    localparam LINE_BITS = TAG_BITS + SET_INDEX_BITS;
+
+    logic range_op_active, next_range_op_active;
+    logic range_clean, next_range_clean;
+    logic range_inval, next_range_inval;
+    // sets left to visit after the current one
+    logic [SET_INDEX_BITS-1:0] range_sets_left, next_range_sets_left;
+
+    logic [LINE_BITS-1:0] range_first_line, range_last_line, range_lines_m1;
+    logic range_empty;
+    logic range_line_hit;
+
+    // the op is taken in IDLE, after a pending flush order (same
+    // priority as the IDLE state below)
+    assign range_op_ack = (state == IDLE) && ~(csr_flush_order && ~csr_flushing_done) && (|csr_range_op);
+    assign range_op_busy = range_op_active || (|csr_range_op);
+
+    always_comb begin
+        range_first_line = csr_range_base[31 -: LINE_BITS];
+        range_last_line = (csr_range_limit - 1) >> (BYTE_OFFSET_BITS + WORD_OFFSET_BITS);
+        range_lines_m1 = range_last_line - range_first_line;
+        range_empty = csr_range_limit <= csr_range_base;
+        // line currently evaluated (flush_way / flush_set) overlaps the range
+        range_line_hit = cache_valid[flush_way][flush_set] &&
+            ({cache_tags[flush_way][flush_set], flush_set} >= range_first_line) &&
+            ({cache_tags[flush_way][flush_set], flush_set} <= range_last_line);
+    end
+
     // =======================
     // HIT DETECTION COMB
     // =======================
@@ -193,8 +239,17 @@ module holy_data_cache #(
     assign hit = hit_way0 || hit_way1;
     assign hit_way_select = hit_way1; // 0 if way0 hits, 1 if way1 hits
 
-    // Victim selection for replacement (use LRU)
-    assign victim_way = lru_bits[req_set];
+    // Victim selection for replacement (use LRU), an invalid
+    // way (e.g. range invalidated) is always picked first
+    always_comb begin
+        if (~cache_valid[0][req_set]) begin
+            victim_way = 1'b0;
+        end else if (~cache_valid[1][req_set]) begin
+            victim_way = 1'b1;
+        end else begin
+            victim_way = lru_bits[req_set];
+        end
+    end
 
     // =======================
     // CACHE LOGIC
@@ -402,6 +457,10 @@ module holy_data_cache #(
         if (~rst_n) begin
             csr_flushing <= 1'b0;
             csr_flushing_done <= 1'b0;
+            range_op_active <= 1'b0;
+            range_clean <= 1'b0;
+            range_inval <= 1'b0;
+            range_sets_left <= '0;
             // flush reg
             flush_way <= 0;
             flush_set <= 0;
@@ -449,6 +508,10 @@ module holy_data_cache #(
             
             csr_flushing <= next_csr_flushing;
             csr_flushing_done <= next_csr_flushing_done;
+            range_op_active <= next_range_op_active;
+            range_clean <= next_range_clean;
+            range_inval <= next_range_inval;
+            range_sets_left <= next_range_sets_left;
 
             // flush reg
             flush_way <= next_flush_way;
@@ -515,6 +578,12 @@ module holy_data_cache #(
         next_csr_flushing_done = csr_flushing_done ? csr_flush_order : csr_flushing_done;
         next_flush_set = flush_set;
         next_flush_way = flush_way;
+
+        // range maintenance control
+        next_range_op_active = range_op_active;
+        next_range_clean = range_clean;
+        next_range_inval = range_inval;
+        next_range_sets_left = range_sets_left;
         
         // cache metadata
         next_cache_tags = cache_tags;
@@ -567,6 +636,25 @@ module holy_data_cache #(
                         next_state = FLUSH_NEXT;
                     end
                 end
+
+                // INIT RANGE MAINTENANCE PROCEDURE
+                // Starts at the set of the first line, and visits
+                // as many sets as the range has lines (all of them at most)
+                else if (|csr_range_op) begin
+                    if (~range_empty) begin
+                        next_range_op_active = 1'b1;
+                        next_range_clean = csr_range_op[0];
+                        next_range_inval = csr_range_op[1];
+                        next_flush_set = range_first_line[SET_INDEX_BITS-1:0];
+                        next_flush_way = 0;
+                        if (range_lines_m1 >= LAST_SET) begin
+                            next_range_sets_left = LAST_SET[SET_INDEX_BITS-1:0];
+                        end else begin
+                            next_range_sets_left = range_lines_m1[SET_INDEX_BITS-1:0];
+                        end
+                        next_state = RANGE_OP_NEXT;
+                    end
+                end
                 
                 // ACCEPT MISS
                 else if (req_accepted && ~hit) begin
@@ -670,6 +758,11 @@ module holy_data_cache #(
                             end
                         end
 
+                    end else if (range_op_active) begin
+                        // Range clean : the line is now clean, back to
+                        // its evaluation (which will invalidate it if asked)
+                        next_cache_dirty[current_way][pending_set] = 1'b0;
+                        next_state = RANGE_OP_NEXT;
                     end else begin
                         // Normal write-back complete, now fetch the data
                         next_state = SENDING_READ_REQ;
@@ -706,6 +799,32 @@ module holy_data_cache #(
                 end
             end
 
+            RANGE_OP_NEXT: begin
+                if (range_line_hit && range_clean && cache_dirty[flush_way][flush_set]) begin
+                    // write back through the regular miss write back path
+                    next_current_way = flush_way;
+                    next_pending_set = flush_set;
+                    next_state = SENDING_WRITE_REQ;
+                end else begin
+                    if (range_line_hit && range_inval) begin
+                        next_cache_valid[flush_way][flush_set] = 1'b0;
+                        next_cache_dirty[flush_way][flush_set] = 1'b0;
+                    end
+
+                    // advance to next way / set OR end the procedure
+                    if (flush_way == 1'b0) begin
+                        next_flush_way = 1'b1;
+                    end else if (range_sets_left == '0) begin
+                        next_state = IDLE;
+                        next_range_op_active = 1'b0;
+                    end else begin
+                        next_flush_way = 1'b0;
+                        next_flush_set = flush_set + 1'b1;
+                        next_range_sets_left = range_sets_left - 1'b1;
+                    end
+                end
+            end
+
             SENDING_READ_REQ: begin
                 axi.araddr = {pending_tag, pending_set, {WORD_OFFSET_BITS{1'b0}}, 2'b00};
                 
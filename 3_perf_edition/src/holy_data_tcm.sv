@@ -0,0 +1,213 @@
+/** DATA TIGHTLY COUPLED MEMORY (DTCM)
+*
+*   Author : BRH
+*   Project : Holy Core SoC & Software edition
+*   Description : A small scratchpad mapped into a fixed address window, next to the
+*                 data cache and the non cachable path. CPU reads and writes are served
+*                 in the request cycle (no miss, no stall, nothing to flush).
+*                 An AXI FULL slave port lets a DMA (or any bus master) fill / drain it
+*                 directly, so DMA buffers & working sets never go through the D$.
+*
+*                 - The window is SIZE_BYTES wide and must be aligned on its size,
+*                   both ports only use the low address bits.
+*                 - One write port : CPU writes have priority, the AXI W channel is
+*                   simply not ready on a cycle the CPU writes.
+*                 - Reads are combinational (distributed RAM on FPGA).
+*                 - AXI : INCR & FIXED 32 bits bursts, one outstanding transaction
+*                   per direction, always OKAY.
+*
+*   Created 10/26
+*/
+
+`timescale 1ns/1ps
+
+import holy_core_pkg::*;
+
+module holy_data_tcm #(
+    parameter SIZE_BYTES = 8192
+)(
+    // CPU LOGIC CLOCK & RESET
+    input logic clk,
+    input logic rst_n,
+
+    // CPU Interface
+    input logic [31:0]  address,
+    input logic [31:0]  write_data,
+    input logic [3:0]   byte_enable,
+    // handshake
+    input logic         req_valid,
+    output logic        req_ready,
+    input logic         req_write, // 0->R // 1->W
+    // read out
+    output logic [31:0] read_data,
+    output logic        read_valid,
+
+    // AXI FULL Slave Interface for external masters (DMA)
+    axi_if.slave s_axi
+);
+
+    localparam WORDS = SIZE_BYTES / 4;
+    localparam INDEX_WIDTH = $clog2(WORDS);
+
+    logic [31:0] mem [WORDS-1:0];
+
+    // =======================
+    // CPU PORT
+    // =======================
+
+    logic [INDEX_WIDTH-1:0] cpu_index;
+    assign cpu_index = address[INDEX_WIDTH+1:2];
+
+    logic cpu_write;
+    assign cpu_write = req_valid && req_write;
+
+    assign req_ready = 1'b1;
+    assign read_valid = req_valid && ~req_write;
+    assign read_data = mem[cpu_index];
+
+    // =======================
+    // AXI WRITE FSM
+    // =======================
+
+    typedef enum logic [1:0] {
+        W_IDLE,
+        W_DATA,
+        W_RESP
+    } tcm_write_state_t;
+
+    tcm_write_state_t w_state;
+    logic [INDEX_WIDTH-1:0] w_index;
+    logic [3:0]             w_id;
+    logic                   w_incr;
+
+    logic axi_write;
+    assign axi_write = (w_state == W_DATA) && s_axi.wvalid && s_axi.wready;
+
+    assign s_axi.awready = (w_state == W_IDLE);
+    assign s_axi.wready  = (w_state == W_DATA) && ~cpu_write;
+    assign s_axi.bvalid  = (w_state == W_RESP);
+    assign s_axi.bresp   = 2'b00;
+    assign s_axi.bid     = w_id;
+
+    always_ff @(posedge clk) begin
+        if (~rst_n) begin
+            w_state <= W_IDLE;
+            w_index <= '0;
+            w_id <= '0;
+            w_incr <= 1'b0;
+        end else begin
+            case (w_state)
+                W_IDLE : begin
+                    if (s_axi.awvalid) begin
+                        w_index <= s_axi.awaddr[INDEX_WIDTH+1:2];
+                        w_id <= s_axi.awid;
+                        w_incr <= (s_axi.awburst == 2'b01);
+                        w_state <= W_DATA;
+                    end
+                end
+
+                W_DATA : begin
+                    if (axi_write) begin
+                        if (w_incr) w_index <= w_index + 1;
+                        if (s_axi.wlast) w_state <= W_RESP;
+                    end
+                end
+
+                W_RESP : begin
+                    if (s_axi.bready) w_state <= W_IDLE;
+                end
+
+                default : w_state <= W_IDLE;
+            endcase
+        end
+    end
+
+    // =======================
+    // AXI READ FSM
+    // =======================
+
+    typedef enum logic {
+        R_IDLE,
+        R_DATA
+    } tcm_read_state_t;
+
+    tcm_read_state_t r_state;
+    logic [INDEX_WIDTH-1:0] r_index;
+    logic [7:0]             r_count;
+    logic [3:0]             r_id;
+    logic                   r_incr;
+
+    assign s_axi.arready = (r_state == R_IDLE);
+    assign s_axi.rvalid  = (r_state == R_DATA);
+    assign s_axi.rdata   = mem[r_index];
+    assign s_axi.rlast   = (r_count == 0);
+    assign s_axi.rresp   = 2'b00;
+    assign s_axi.rid     = r_id;
+
+    always_ff @(posedge clk) begin
+        if (~rst_n) begin
+            r_state <= R_IDLE;
+            r_index <= '0;
+            r_count <= '0;
+            r_id <= '0;
+            r_incr <= 1'b0;
+        end else begin
+            case (r_state)
+                R_IDLE : begin
+                    if (s_axi.arvalid) begin
+                        r_index <= s_axi.araddr[INDEX_WIDTH+1:2];
+                        r_count <= s_axi.arlen;
+                        r_id <= s_axi.arid;
+                        r_incr <= (s_axi.arburst == 2'b01);
+                        r_state <= R_DATA;
+                    end
+                end
+
+                R_DATA : begin
+                    if (s_axi.rready) begin
+                        if (s_axi.rlast) begin
+                            r_state <= R_IDLE;
+                        end else begin
+                            r_count <= r_count - 1;
+                            if (r_incr) r_index <= r_index + 1;
+                        end
+                    end
+                end
+
+                default : r_state <= R_IDLE;
+            endcase
+        end
+    end
+
+    // =======================
+    // MEMORY WRITE PORT
+    // =======================
+
+    // single write port, CPU first
+    logic [INDEX_WIDTH-1:0] wr_index;
+    logic [31:0]            wr_data;
+    logic [3:0]             wr_strb;
+    logic                   wr_en;
+
+    always_comb begin
+        wr_en = cpu_write || axi_write;
+        if (cpu_write) begin
+            wr_index = cpu_index;
+            wr_data = write_data;
+            wr_strb = byte_enable;
+        end else begin
+            wr_index = w_index;
+            wr_data = s_axi.wdata;
+            wr_strb = s_axi.wstrb;
+        end
+    end
+
+    always_ff @(posedge clk) begin
+        if (wr_en) begin
+            for (int i = 0; i < 4; i++) begin
+                if (wr_strb[i]) mem[wr_index][(i*8)+:8] <= wr_data[(i*8)+:8];
+            end
+        end
+    end
+
+endmodule
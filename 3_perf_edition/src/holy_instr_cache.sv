@@ -7,6 +7,19 @@
 *
 *   Default Config is 256B as the memory is a raw async read buffer
 *   which takes lots of resources, but do we really need more ?
+*
+*   Line locking : lines overlapping [lock_base, lock_limit[ (CSRs 0x7C5
+*   & 0x7C6) are never evicted and survive flushes (CSR 0x7C0), giving
+*   a deterministic fetch time to interrupt handlers & hot loops. Only
+*   one way per set can be locked (i.e. half the cache at most), the
+*   other one always serves regular code.
+*
+*   Debug coherence : invalidate drops every line, locked ones included.
+*   The core fires it when leaving debug mode (dret) : the debugger may
+*   have patched the code meanwhile (software breakpoints are ebreaks
+*   written over the original instructions, then restored), so nothing
+*   fetched before the halt can be trusted. Locked lines refill, and lock
+*   again, on their next fetch.
 */
 
 import holy_core_pkg::*;
@@ -31,6 +44,12 @@ module holy_instr_cache #(
     output logic        read_valid,
     input logic         read_ack,
 
+    // Cache control (custom CSRs)
+    input logic         flush,
+    input logic         invalidate,
+    input logic [31:0]  lock_base,
+    input logic [31:0]  lock_limit,
+
     // AXI Interface for external requests
     axi_if.master axi,
 
@@ -48,6 +67,7 @@ module holy_instr_cache #(
     localparam WORD_OFFSET_BITS = $clog2(WORDS_PER_LINE);
     localparam SET_INDEX_BITS   = $clog2(NUM_SETS);
     localparam TAG_BITS         = 32 - BYTE_OFFSET_BITS - WORD_OFFSET_BITS - SET_INDEX_BITS;
+    localparam LINE_BYTES       = WORDS_PER_LINE * 4;
 
     // Loop bounds (warning-free)
     localparam LAST_WORD = WORDS_PER_LINE - 1;
@@ -108,8 +128,38 @@ module holy_instr_cache #(
     assign hit = hit_way0 || hit_way1;
     assign hit_way_select = hit_way1;  // 0 if way0 hits, 1 if way1 hits
 
-    // Victim selection for replacement (use LRU)
-    assign victim_way = lru_bits[req_set];
+    // =======================
+    // LINE LOCKING
+    // =======================
+
+    // A valid line overlapping the lock window is locked. If both ways of
+    // a set are in the window, way 0 keeps the lock so a miss always has
+    // a victim.
+    logic        line_locked [NUM_WAYS-1:0][NUM_SETS-1:0];
+    logic        in_window   [NUM_WAYS-1:0];
+    logic [32:0] line_start, line_end;
+
+    always_comb begin : lock_detection
+        for (int s = 0; s < NUM_SETS; s++) begin
+            for (int w = 0; w < NUM_WAYS; w++) begin
+                line_start   = {1'b0, cache_tags[w][s], SET_INDEX_BITS'(s), {WORD_OFFSET_BITS{1'b0}}, 2'b00};
+                line_end     = line_start + 33'(LINE_BYTES);
+                in_window[w] = cache_valid[w][s] && (line_start < {1'b0, lock_limit}) && (line_end > {1'b0, lock_base});
+            end
+            line_locked[0][s] = in_window[0];
+            line_locked[1][s] = in_window[1] && ~in_window[0];
+        end
+    end
+
+    // Victim selection for replacement (use LRU, never a locked line)
+    assign victim_way = line_locked[0][req_set] ? 1'b1 :
+                        line_locked[1][req_set] ? 1'b0 :
+                        lru_bits[req_set];
+
+    // A flush (or invalidate) during a line fill : the CPU still gets its
+    // instruction but the line is not kept, it may have been read before
+    // the D$ write back the flush was meant for.
+    logic fill_stale;
 
     // =======================
     // FSM STATE
@@ -248,10 +298,16 @@ module holy_instr_cache #(
             state       <= IDLE;
             word_ptr    <= '0;
             current_way <= 1'b0;
+            fill_stale  <= 1'b0;
         end else begin
             state       <= next_state;
             word_ptr    <= next_word_ptr;
             current_way <= next_current_way;
+
+            if ((flush || invalidate) && next_state != IDLE)
+                fill_stale <= 1'b1;
+            else if (next_state == IDLE)
+                fill_stale <= 1'b0;
         end
     end
 
@@ -350,7 +406,7 @@ module holy_instr_cache #(
                     next_state = IDLE;
                     // Update cache metadata
                     next_cache_tags[current_way][pending_set]  = pending_tag;
-                    next_cache_valid[current_way][pending_set] = 1'b1;
+                    next_cache_valid[current_way][pending_set] = ~fill_stale;
                     next_lru_bits[pending_set] = ~current_way;
                 end
             end
@@ -359,6 +415,24 @@ module holy_instr_cache #(
                 next_state = IDLE;
             end
         endcase
+
+        // FLUSH : invalidate every unlocked line
+        if (flush) begin
+            for (int w = 0; w < NUM_WAYS; w++) begin
+                for (int s = 0; s < NUM_SETS; s++) begin
+                    if (~line_locked[w][s]) next_cache_valid[w][s] = 1'b0;
+                end
+            end
+        end
+
+        // INVALIDATE : drop every line, locked or not
+        if (invalidate) begin
+            for (int w = 0; w < NUM_WAYS; w++) begin
+                for (int s = 0; s < NUM_SETS; s++) begin
+                    next_cache_valid[w][s] = 1'b0;
+                end
+            end
+        end
     end
 
     // =======================
@@ -9,8 +9,11 @@
 *                 the whole SoC.
 *                 Sync reset.
 *                 Supports non level interrupts (latches until claimed !)
+*                 Up to 64 sources, per source priorities, a context threshold
+*                 and a tree based max priority selector (log2(NUM_IRQS) deep).
 *
 *   Created 07/25
+*   Priorities, threshold & wide vectors : BRH 10/26
 */
 
 // todo : add AXI error on wong address for write request
@@ -19,7 +22,8 @@
 import holy_core_pkg::*;
 
 module holy_plic #(
-    parameter NUM_IRQS = 5,
+    parameter NUM_IRQS = 5,     // 1 to 64
+    parameter PRIO_BITS = 3,    // priority levels 0 (never) to 2**PRIO_BITS-1
     parameter BASE_ADDR = 0
 ) (
     input  logic                  clk,
@@ -36,8 +40,20 @@ module holy_plic #(
 );
 
     // REGISTERS MAP
-    localparam ENABLE = 32'd0;
+    localparam ENABLE = 32'd0;                  // sources 1 to 32
     localparam CONTEXT_CLAIM_COMPLETE = 32'd4;
+    localparam CONTEXT_THRESHOLD = 32'd8;
+    localparam ENABLE_HI = 32'hC;               // sources 33 to 64
+    localparam PENDING = 32'h10;                // read only, gateways requests
+    localparam PENDING_HI = 32'h14;
+    localparam PRIORITY_BASE = 32'h100;         // source id priority @ PRIORITY_BASE + 4*id
+
+    localparam ID_W = $clog2(NUM_IRQS) + 1;
+
+    // elaboration time check
+    if (NUM_IRQS < 1 || NUM_IRQS > 64) begin : g_num_irqs_check
+        $error("holy_plic: NUM_IRQS must be in [1:64]");
+    end
 
     /**
     *   GATEWAYS
@@ -96,7 +112,7 @@ module holy_plic #(
     // once handling is complete. This completion write
     // deassets in_service and allows the output notification
     // to be high again
-    logic [$clog2(NUM_IRQS):0] serviced_id, serviced_id_next;
+    logic [ID_W-1:0] serviced_id, serviced_id_next;
     // Note that service id is set on claim. As the target can
     // manually, without notification claim another interrupt
     // before declaring completion of the first one.
@@ -132,6 +148,8 @@ module holy_plic #(
         awaddr_next = awaddr;
         araddr_next = araddr;
         enabled_next = enabled;
+        threshold_next = threshold;
+        prio_next = prio;
         serviced_id_next = serviced_id;
         for (int i = 0; i < NUM_IRQS; i++) begin
             irq_clear[i] = 1'b0;
@@ -171,7 +189,27 @@ module holy_plic #(
                     ENABLE:begin
                         s_axi_lite.rresp = 2'b00;
                         // simply return 0 extended contents
-                        s_axi_lite.rdata = { {(32-NUM_IRQS){1'b0}}, enabled };
+                        s_axi_lite.rdata = enabled_64[31:0];
+                    end
+
+                    ENABLE_HI:begin
+                        s_axi_lite.rresp = 2'b00;
+                        s_axi_lite.rdata = enabled_64[63:32];
+                    end
+
+                    PENDING:begin
+                        s_axi_lite.rresp = 2'b00;
+                        s_axi_lite.rdata = pending_64[31:0];
+                    end
+
+                    PENDING_HI:begin
+                        s_axi_lite.rresp = 2'b00;
+                        s_axi_lite.rdata = pending_64[63:32];
+                    end
+
+                    CONTEXT_THRESHOLD:begin
+                        s_axi_lite.rresp = 2'b00;
+                        s_axi_lite.rdata = 32'(threshold);
                     end
 
                     CONTEXT_CLAIM_COMPLETE: begin
@@ -193,9 +231,14 @@ module holy_plic #(
                     end
 
                     default: begin
-                        // Return error
-                        s_axi_lite.rresp = 2'b11;
-                        s_axi_lite.rdata = 32'hAEAEAEAE;
+                        if (is_prio_addr(araddr)) begin
+                            s_axi_lite.rresp = 2'b00;
+                            s_axi_lite.rdata = 32'(prio[prio_index(araddr)]);
+                        end else begin
+                            // Return error
+                            s_axi_lite.rresp = 2'b11;
+                            s_axi_lite.rdata = 32'hAEAEAEAE;
+                        end
                     end
                 endcase
 
@@ -212,7 +255,19 @@ module holy_plic #(
                     // Get wdata
                     case(awaddr)
                         ENABLE:begin
-                            enabled_next = s_axi_lite.wdata[NUM_IRQS-1:0];
+                            for (int i = 0; i < NUM_IRQS && i < 32; i++) begin
+                                enabled_next[i] = s_axi_lite.wdata[i];
+                            end
+                        end
+
+                        ENABLE_HI:begin
+                            for (int i = 32; i < NUM_IRQS; i++) begin
+                                enabled_next[i] = s_axi_lite.wdata[i - 32];
+                            end
+                        end
+
+                        CONTEXT_THRESHOLD:begin
+                            threshold_next = s_axi_lite.wdata[PRIO_BITS-1:0];
                         end
 
                         CONTEXT_CLAIM_COMPLETE:begin
@@ -222,7 +277,13 @@ module holy_plic #(
                             end
                         end
 
-                        default: $display("PLIC: not a valid address pal!");
+                        default: begin
+                            if (is_prio_addr(awaddr)) begin
+                                prio_next[prio_index(awaddr)] = s_axi_lite.wdata[PRIO_BITS-1:0];
+                            end else begin
+                                $display("PLIC: not a valid address pal!");
+                            end
+                        end
                     endcase
 
                     next_state =  LITE_SENDING_WRITE_RES;
@@ -244,6 +305,19 @@ module holy_plic #(
         endcase
     end
 
+    /**
+    *   PRIORITY REGISTERS ADDRESSING
+    */
+
+    function automatic logic is_prio_addr(input logic [31:0] addr);
+        return (addr >= PRIORITY_BASE + 4) && (addr < PRIORITY_BASE + 4 * (NUM_IRQS + 1)) && (addr[1:0] == 2'b00);
+    endfunction
+
+    // source index (id - 1) of a priority register address
+    function automatic int prio_index(input logic [31:0] addr);
+        return int'((addr - PRIORITY_BASE) >> 2) - 1;
+    endfunction
+
     /**
     *   ACTUAL CONTROLLER LOGIC
     */
@@ -251,19 +325,48 @@ module holy_plic #(
     // Logic cells => Determine the max id
     // Based on this scheme:
     // https://people.eecs.berkeley.edu/~krste/papers/riscv-privileged-v1.9.pdf#page=74
-    logic [$clog2(NUM_IRQS):0] max_id;
-    logic found;
+    //
+    // Instead of a linear scan, the pending sources are reduced with a
+    // binary tree of comparators : the combinational depth (i.e. the claim
+    // & notification latency) only grows with log2(NUM_IRQS).
+    // Priority 0 means "never interrupt". On equal priorities, the HIGHEST
+    // id wins (itr5 over itr4, like the original fixed priority PLIC).
+    localparam LEVELS = (NUM_IRQS > 1) ? $clog2(NUM_IRQS) : 1;
+    localparam LEAVES = 1 << LEVELS;
+
+    /* verilator lint_off UNOPTFLAT */
+    logic [PRIO_BITS-1:0] node_prio [2*LEAVES-1];
+    logic [ID_W-1:0]      node_id   [2*LEAVES-1];
+    /* verilator lint_on UNOPTFLAT */
+
+    logic [ID_W-1:0]      max_id;
+    logic [PRIO_BITS-1:0] max_prio;
 
     always_comb begin : determine_max_id
-        max_id = 0;
-        found = 0;
+        // leaves, left to right by increasing id
+        for (int i = 0; i < LEAVES; i++) begin
+            if (i < NUM_IRQS && ip[i] && prio[i] != '0) begin
+                node_prio[LEAVES - 1 + i] = prio[i];
+                node_id[LEAVES - 1 + i]   = ID_W'(i + 1);
+            end else begin
+                node_prio[LEAVES - 1 + i] = '0;
+                node_id[LEAVES - 1 + i]   = '0;
+            end
+        end
 
-        for (int i = NUM_IRQS - 1; i >= 0; i--) begin
-            if (!found && ip[i]) begin
-                max_id = ($clog2(NUM_IRQS)+1)'(i + 1);
-                found = 1;
+        // nodes, the right child holds the higher ids and wins ties
+        for (int n = LEAVES - 2; n >= 0; n--) begin
+            if (node_prio[2*n + 2] >= node_prio[2*n + 1]) begin
+                node_prio[n] = node_prio[2*n + 2];
+                node_id[n]   = node_id[2*n + 2];
+            end else begin
+                node_prio[n] = node_prio[2*n + 1];
+                node_id[n]   = node_id[2*n + 1];
             end
         end
+
+        max_prio = node_prio[0];
+        max_id   = node_id[0];
     end
 
 
@@ -271,16 +374,37 @@ module holy_plic #(
     logic [NUM_IRQS-1:0] enabled, enabled_next;
     // logic [NUM_IRQS-1:0] enabled_next;
 
+    // Per source priorities & context threshold
+    logic [PRIO_BITS-1:0] prio [NUM_IRQS];
+    logic [PRIO_BITS-1:0] prio_next [NUM_IRQS];
+    logic [PRIO_BITS-1:0] threshold, threshold_next;
+
+    // zero extended views, for the 32 bits registers reads
+    logic [63:0] enabled_64;
+    logic [63:0] pending_64;
+    assign enabled_64 = 64'(enabled);
+    assign pending_64 = 64'(irq_req);
+
     always_comb begin : set_target_notification
-        ext_irq_o = |ip && ~in_service;
+        // only sources ABOVE the threshold notify the core,
+        // claims still return the max pending source.
+        ext_irq_o = (max_prio > threshold) && ~in_service;
     end
 
     always_ff @(posedge clk) begin : enabled_register
         if(~rst_n) begin
             enabled <= {NUM_IRQS{1'b1}};
+            // all sources at priority 1 & threshold 0 : same behavior
+            // as the original fixed priority PLIC out of reset
+            for (int i = 0; i < NUM_IRQS; i++) begin
+                prio[i] <= PRIO_BITS'(1);
+            end
+            threshold <= '0;
         end
         else begin
             enabled <= enabled_next;
+            prio <= prio_next;
+            threshold <= threshold_next;
         end
     end
 endmodule
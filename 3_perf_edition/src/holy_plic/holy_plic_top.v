@@ -8,6 +8,7 @@
 
 module holy_plic_top #(
     parameter NUM_IRQS  = 5,
+    parameter PRIO_BITS = 3,
     parameter BASE_ADDR = 32'h0000_0000
 )(
     input  wire                   clk,
@@ -59,6 +60,7 @@ module holy_plic_top #(
     // Connect debug outputs to wrapper instance
     holy_plic_wrapper #(
         .NUM_IRQS(NUM_IRQS),
+        .PRIO_BITS(PRIO_BITS),
         .BASE_ADDR(BASE_ADDR)
     ) u_holy_plic_top (
         .clk(clk),
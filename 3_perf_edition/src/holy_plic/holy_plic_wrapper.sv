@@ -8,6 +8,7 @@
 
 module holy_plic_wrapper #(
     parameter NUM_IRQS   = 5,
+    parameter PRIO_BITS  = 3,
     parameter BASE_ADDR  = 32'h0000_0000
 )(
     input  wire                  clk,
@@ -76,6 +77,7 @@ module holy_plic_wrapper #(
     // Instantiate the PLIC
     holy_plic #(
         .NUM_IRQS(NUM_IRQS),
+        .PRIO_BITS(PRIO_BITS),
         .BASE_ADDR(BASE_ADDR)
     ) inst_holy_plic (
         .clk(clk),
@@ -5,16 +5,32 @@
 import cocotb
 from cocotb.clock import Clock
 from cocotb.triggers import RisingEdge, Timer
+import os
 import random
+import sys
+from pathlib import Path
 from cocotbext.axi import AxiLiteBus, AxiLiteMaster
 
+sys.path.append(str(Path(__file__).resolve().parents[3] / "tb"))
+from hc_tb import random_iterations
+
 # AXI LITE SLAVE STATES
 SLAVE_IDLE                  = 0b00
 LITE_RECEIVING_WRITE_DATA   = 0b01
 LITE_SENDING_WRITE_RES      = 0b10
 LITE_SENDING_READ_DATA      = 0b11
 
-NUM_IRQS = 5 # to adapt manually
+NUM_IRQS = int(os.getenv("NUM_IRQS", 5)) # set by the Makefile (make NUM_IRQS=64)
+PRIO_BITS = 3
+
+# PLIC REGISTERS
+ENABLE                  = 0x0
+CONTEXT_CLAIM_COMPLETE  = 0x4
+CONTEXT_THRESHOLD       = 0x8
+ENABLE_HI               = 0xC
+PENDING                 = 0x10
+PENDING_HI              = 0x14
+PRIORITY_BASE           = 0x100 # + 4 * id
 
 def get_highest_priority_index(ref : list[int]):
     """
@@ -28,6 +44,36 @@ def get_highest_priority_index(ref : list[int]):
 
     return max_index 
 
+def expected_claim(pending : list[int], enabled : list[int], prios : list[int]):
+    """
+        Reference max selector : highest priority wins,
+        the highest id wins ties and priority 0 never wins.
+        Returns (id, priority), (0, 0) if nothing is claimable.
+    """
+    best_id, best_prio = 0, 0
+    for i in range(NUM_IRQS):
+        if pending[i] and enabled[i] and prios[i] and prios[i] >= best_prio:
+            best_id, best_prio = i + 1, prios[i]
+    return best_id, best_prio
+
+def to_bits(values : list[int]):
+    return sum(1 << i for i, v in enumerate(values) if v)
+
+async def write32(axil_master, addr, value):
+    await axil_master.write(addr, int.to_bytes(value, 4, byteorder="little"))
+
+async def read32(axil_master, addr):
+    result = await axil_master.read(addr, 4)
+    return int.from_bytes(result.data, byteorder="little")
+
+async def reset(dut):
+    dut.irq_in.value = 0
+    dut.rst_n.value = 0b0
+    for _ in range(5):
+        await RisingEdge(dut.clk)
+    dut.rst_n.value = 0b1
+    await RisingEdge(dut.clk)
+
 @cocotb.test()
 async def main_test(dut):
     """
@@ -45,12 +91,14 @@ async def main_test(dut):
 
     cocotb.start_soon(Clock(dut.clk, 10, units="ns").start())
     axil_master = AxiLiteMaster(AxiLiteBus.from_prefix(dut, "s_axi"), dut.clk, dut.rst_n, reset_active_level=False)
-    dut.rst_n.value = 0b1
+    await reset(dut)
 
     await Timer(1, units="ns")
 
     # enable ALL interrupts
     signal_completion = await axil_master.write(0x0,int.to_bytes(0xFFFFFFFF,4,byteorder="little"))
+    if NUM_IRQS > 32:
+        await write32(axil_master, ENABLE_HI, 0xFFFFFFFF)
     
     # ==================================
     # BASIC INIT TESTS
@@ -74,8 +122,8 @@ async def main_test(dut):
     # claims it, clears it, signals completion.
     # the interrupt notification should then be 0 and
     # we move on to simulate antother random intr.
-    for _ in range(100):
-        random_id = random.randint(0,4)
+    for _ in range(random_iterations(100)):
+        random_id = random.randint(0,NUM_IRQS-1)
 
         dut.irq_in[random_id].value = 0b1
 
@@ -128,7 +176,7 @@ async def main_test(dut):
     # Testing for concurrent interrupts bahavior
     # PLIC.
 
-    for _ in range(100):
+    for _ in range(random_iterations(100)):
         # init interrupts randomly.
         # Chances are multiple of them will
         # be set at once !
@@ -178,8 +226,8 @@ async def main_test(dut):
     # The goal of this test is to check if the core is able to latch onto
     # a single clock cycle interrupt as excpeted (e.G. a non empty UART intr)
 
-    for _ in range(100):
-        random_id = random.randint(0,4)
+    for _ in range(random_iterations(100)):
+        random_id = random.randint(0,NUM_IRQS-1)
         dut.irq_in[random_id].value = 0b1
         await RisingEdge(dut.clk)
         dut.irq_in[random_id].value = 0b0
@@ -233,4 +281,143 @@ async def main_test(dut):
         assert dut.u_holy_plic.in_service.value == 0
 
         # no more external interrupt at this point
-        assert dut.ext_irq_o.value == 0b0
\ No newline at end of file
+        assert dut.ext_irq_o.value == 0b0
+
+@cocotb.test()
+async def priority_test(dut):
+    """
+        Randomised multi-source test of the priorities,
+        threshold & wide vectors :
+        - random priorities (incl. 0 = never), enables and threshold
+        - random sets of simultaneous requests
+        - notification must respect the threshold
+        - claims must follow the reference max selector
+        - notification latency must not depend on NUM_IRQS
+    """
+
+    cocotb.start_soon(Clock(dut.clk, 10, unit="ns").start())
+    axil_master = AxiLiteMaster(AxiLiteBus.from_prefix(dut, "s_axi"), dut.clk, dut.rst_n, reset_active_level=False)
+    await reset(dut)
+
+    # ==================================
+    # RESET VALUES
+    # ==================================
+
+    # all enabled, all priorities at 1, threshold 0 : same
+    # behavior as the original fixed priority PLIC
+    all_ones = (1 << NUM_IRQS) - 1
+    assert await read32(axil_master, ENABLE) == all_ones & 0xFFFFFFFF
+    assert await read32(axil_master, ENABLE_HI) == all_ones >> 32
+    assert await read32(axil_master, CONTEXT_THRESHOLD) == 0
+    for i in range(NUM_IRQS):
+        assert await read32(axil_master, PRIORITY_BASE + 4 * (i + 1)) == 1
+
+    # ==================================
+    # NOTIFICATION LATENCY
+    # ==================================
+
+    # tree based selector : a single request reaches ext_irq_o in the
+    # same number of cycles whatever NUM_IRQS is : the 2 gateway flops
+    # (irq_meta, irq_req), the selection being combinational.
+    GATEWAY_CYCLES = 2
+    for random_id in random.sample(range(NUM_IRQS), min(NUM_IRQS, 8)):
+        # raise the line mid cycle, nothing pending before
+        await RisingEdge(dut.clk)
+        await Timer(1, unit="ns")
+        assert dut.ext_irq_o.value == 0
+        dut.irq_in[random_id].value = 0b1
+        cycles = 0
+        while not dut.ext_irq_o.value:
+            await RisingEdge(dut.clk)
+            await Timer(1, unit="ns")
+            cycles += 1
+            assert cycles <= GATEWAY_CYCLES, f"irq {random_id + 1} not notified after {cycles} cycles"
+        assert cycles == GATEWAY_CYCLES
+        assert await read32(axil_master, PENDING + 4 * (random_id // 32)) == 1 << (random_id % 32)
+
+        dut.irq_in[random_id].value = 0b0
+        claim = await read32(axil_master, CONTEXT_CLAIM_COMPLETE)
+        assert claim == random_id + 1
+        await write32(axil_master, CONTEXT_CLAIM_COMPLETE, claim)
+
+    # ==================================
+    # RANDOM PRIORITIES TEST
+    # ==================================
+
+    for _ in range(random_iterations(50)):
+        prios = [random.randint(0, 2**PRIO_BITS - 1) for _2 in range(NUM_IRQS)]
+        enabled = [int(random.random() < 0.8) for _2 in range(NUM_IRQS)]
+        threshold = random.randint(0, 2**PRIO_BITS - 2)
+
+        for i in range(NUM_IRQS):
+            await write32(axil_master, PRIORITY_BASE + 4 * (i + 1), prios[i])
+        enabled_bits = to_bits(enabled)
+        await write32(axil_master, ENABLE, enabled_bits & 0xFFFFFFFF)
+        await write32(axil_master, ENABLE_HI, enabled_bits >> 32)
+        await write32(axil_master, CONTEXT_THRESHOLD, threshold)
+
+        # registers read back
+        random_id = random.randint(1, NUM_IRQS)
+        assert await read32(axil_master, PRIORITY_BASE + 4 * random_id) == prios[random_id - 1]
+        assert await read32(axil_master, ENABLE) == enabled_bits & 0xFFFFFFFF
+        assert await read32(axil_master, ENABLE_HI) == enabled_bits >> 32
+        assert await read32(axil_master, CONTEXT_THRESHOLD) == threshold
+
+        # random set of simultaneous requests
+        pending = [int(random.random() < 0.3) for _2 in range(NUM_IRQS)]
+        dut.irq_in.value = to_bits(pending)
+
+        #wait a couple of cycles for gateways to sync
+        for _3 in range(5):
+            await RisingEdge(dut.clk)
+
+        # PENDING mirrors the gateways, enabled or not
+        pending_bits = to_bits(pending)
+        assert await read32(axil_master, PENDING) == pending_bits & 0xFFFFFFFF
+        assert await read32(axil_master, PENDING_HI) == pending_bits >> 32
+
+        # only sources above the threshold notify the core
+        _, best_prio = expected_claim(pending, enabled, prios)
+        assert dut.ext_irq_o.value == int(best_prio > threshold)
+
+        # claim everything claimable, in priority order
+        while True:
+            expected_id, _ = expected_claim(pending, enabled, prios)
+            if expected_id == 0:
+                break
+
+            claim = await read32(axil_master, CONTEXT_CLAIM_COMPLETE)
+            assert claim == expected_id
+            await RisingEdge(dut.clk)
+
+            # in service : no notification
+            assert dut.ext_irq_o.value == 0b0
+            assert dut.u_holy_plic.in_service.value == 1
+
+            # a wrong id does not complete
+            if random.random() < 0.2:
+                wrong_id = (claim % NUM_IRQS) + 1 if NUM_IRQS > 1 else 0
+                await write32(axil_master, CONTEXT_CLAIM_COMPLETE, wrong_id)
+                await RisingEdge(dut.clk)
+                assert dut.u_holy_plic.in_service.value == 1
+
+            # ext irq request is cleared by the target's actions
+            dut.irq_in[expected_id - 1].value = 0b0
+            pending[expected_id - 1] = 0
+            for _4 in range(3):
+                await RisingEdge(dut.clk)
+
+            await write32(axil_master, CONTEXT_CLAIM_COMPLETE, claim)
+            await RisingEdge(dut.clk)
+            assert dut.u_holy_plic.in_service.value == 0
+
+        # left overs are disabled or priority 0 sources : a claim
+        # returns 0 and clears every gateway (deadlock guard)
+        dut.irq_in.value = 0
+        for _3 in range(3):
+            await RisingEdge(dut.clk)
+        assert await read32(axil_master, CONTEXT_CLAIM_COMPLETE) == 0
+        await RisingEdge(dut.clk)
+        assert await read32(axil_master, PENDING) == 0
+        assert await read32(axil_master, PENDING_HI) == 0
+        assert dut.ext_irq_o.value == 0b0
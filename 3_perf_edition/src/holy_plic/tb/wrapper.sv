@@ -9,7 +9,8 @@
 */
 
 module holy_plic_wrapper #(
-    parameter int NUM_IRQS = 5
+    parameter int NUM_IRQS = 5,
+    parameter int PRIO_BITS = 3
 ) (
     input  logic                       clk,
     input  logic                       rst_n,
@@ -75,7 +76,8 @@ module holy_plic_wrapper #(
 
     // Instantiate the DUT
     holy_plic #(
-        .NUM_IRQS(NUM_IRQS)
+        .NUM_IRQS(NUM_IRQS),
+        .PRIO_BITS(PRIO_BITS)
     ) u_holy_plic (
         .clk        (clk),
         .rst_n      (rst_n),
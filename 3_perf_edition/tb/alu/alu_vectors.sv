@@ -0,0 +1,68 @@
+/* ALU_VECTORS
+*
+* BRH 10/26
+*
+* Batched vector replay around the ALU (see tb/vectors/vector_replay.sv).
+* Every field is padded to a nibble so the python side can write the
+* batch files with plain hex digits :
+*   stim   = {3'b0, alu_control, src1, src2}                          72 bits
+*   result = {alu_result, zero, last_bit, word_aligned, hw_aligned}    36 bits
+*/
+
+`timescale 1ns/1ps
+
+import holy_core_pkg::*;
+
+module alu_vectors #(
+    parameter DEPTH = 65536,
+    parameter MAX_FAILS = 16
+)(
+    input logic                             clk,
+    input logic                             load,
+    input logic                             start,
+    input logic [31:0]                      count,
+    output logic                            done,
+    output logic [31:0]                     fail_count,
+    output logic [MAX_FAILS-1:0][31:0]      fail_index,
+    output logic [MAX_FAILS-1:0][35:0]      fail_result
+);
+
+logic [71:0] stim;
+logic [35:0] result;
+
+logic [31:0]        alu_result;
+logic               zero;
+logic               last_bit;
+aligned_addr_signal aligned_addr;
+
+vector_replay #(
+    .IN_WIDTH(72),
+    .OUT_WIDTH(36),
+    .DEPTH(DEPTH),
+    .MAX_FAILS(MAX_FAILS)
+) replay (
+    .clk(clk),
+    .load(load),
+    .start(start),
+    .count(count),
+    .stim(stim),
+    .result(result),
+    .done(done),
+    .fail_count(fail_count),
+    .fail_index(fail_index),
+    .fail_result(fail_result)
+);
+
+alu alu_inst (
+    .alu_control(alu_control_t'(stim[68:64])),
+    .src1(stim[63:32]),
+    .src2(stim[31:0]),
+    .alu_result(alu_result),
+    .zero(zero),
+    .last_bit(last_bit),
+    .aligned_addr(aligned_addr)
+);
+
+assign result = {alu_result, zero, last_bit, aligned_addr.word_aligned, aligned_addr.halfword_aligned};
+
+endmodule
@@ -6,9 +6,93 @@
 #
 # BRH 10/24
 
+import sys
+from pathlib import Path
+
 import cocotb
 from cocotb.clock import Clock
-from cocotb.triggers import Timer, RisingEdge
+from cocotb.triggers import Timer, RisingEdge, First
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "coverage"))
+from covergroups import Coverpoint, Cross, Covergroup, CoverageCollector
+
+# =============================================================================
+# FUNCTIONAL COVERAGE (COVERAGE=1, see tb/coverage/covergroups.py)
+# =============================================================================
+
+# control is combinational and the tests only hold an instruction for
+# a few ns : it is sampled on every change of its decode inputs
+CONTROL_INPUTS = ("instr", "op", "func3", "func7", "alu_zero", "alu_last_bit", "alu_aligned_addr", "second_add_aligned_addr")
+
+R_TYPE = {
+    (0x00, 0b000): "add", (0x20, 0b000): "sub", (0x00, 0b001): "sll", (0x00, 0b010): "slt",
+    (0x00, 0b011): "sltu", (0x00, 0b100): "xor", (0x00, 0b101): "srl", (0x20, 0b101): "sra",
+    (0x00, 0b110): "or", (0x00, 0b111): "and",
+    (0x01, 0b000): "mul", (0x01, 0b001): "mulh", (0x01, 0b010): "mulhsu", (0x01, 0b011): "mulhu",
+    (0x01, 0b100): "div", (0x01, 0b101): "divu", (0x01, 0b110): "rem", (0x01, 0b111): "remu"
+}
+I_TYPE_ALU = {0b000: "addi", 0b010: "slti", 0b011: "sltiu", 0b100: "xori", 0b110: "ori", 0b111: "andi"}
+I_TYPE_SHIFTS = {(0x00, 0b001): "slli", (0x00, 0b101): "srli", (0x20, 0b101): "srai"}
+LOADS = {0b000: "lb", 0b001: "lh", 0b010: "lw", 0b100: "lbu", 0b101: "lhu"}
+STORES = {0b000: "sb", 0b001: "sh", 0b010: "sw"}
+BRANCHES = {0b000: "beq", 0b001: "bne", 0b100: "blt", 0b101: "bge", 0b110: "bltu", 0b111: "bgeu"}
+CSRS = {0b001: "csrrw", 0b010: "csrrs", 0b011: "csrrc", 0b101: "csrrwi", 0b110: "csrrsi", 0b111: "csrrci"}
+SYSTEM = {0x000: "ecall", 0x001: "ebreak", 0x302: "mret", 0x7B2: "dret"}
+UPPER_AND_JUMPS = {0b0110111: "lui", 0b0010111: "auipc", 0b1101111: "jal", 0b1100111: "jalr"}
+MNEMONICS = (
+    list(R_TYPE.values()) + list(I_TYPE_ALU.values()) + list(I_TYPE_SHIFTS.values()) + list(LOADS.values())
+    + list(STORES.values()) + list(BRANCHES.values()) + list(CSRS.values()) + list(SYSTEM.values())
+    + list(UPPER_AND_JUMPS.values()) + ["fence", "illegal"]
+)
+EXCEPTION_CAUSES = {
+    "target misaligned": 0, "illegal instruction": 2, "breakpoint": 3,
+    "load misaligned": 4, "store misaligned": 6, "ecall": 11
+}
+
+def resolved(handle):
+    """int value or None while the tb left it X / Z"""
+    try:
+        return int(handle.value)
+    except ValueError:
+        return None
+
+def decode(dut):
+    op, f3, f7 = resolved(dut.op), resolved(dut.func3), resolved(dut.func7)
+    if op == 0b0110011:
+        return R_TYPE.get((f7, f3), "illegal")
+    if op == 0b0010011:
+        return I_TYPE_ALU.get(f3) or I_TYPE_SHIFTS.get((f7, f3), "illegal")
+    if op == 0b0000011:
+        return LOADS.get(f3, "illegal")
+    if op == 0b0100011:
+        return STORES.get(f3, "illegal")
+    if op == 0b1100011:
+        return BRANCHES.get(f3, "illegal")
+    if op == 0b1110011:
+        instr = resolved(dut.instr)
+        if f3 == 0b000:
+            return SYSTEM.get(instr >> 20 if instr is not None else None, "illegal")
+        return CSRS.get(f3, "illegal")
+    if op == 0b0001111:
+        return "fence" if (f3, f7) == (0b000, 0b0000111) else "illegal"
+    return UPPER_AND_JUMPS.get(op, "illegal")
+
+def branch_taken(dut):
+    # SOURCE_PC_SECOND_ADD
+    return resolved(dut.pc_source) == 0b001
+
+instruction = Coverpoint("instruction", decode, {name: name for name in MNEMONICS})
+branch = Coverpoint("branch", decode, {name: name for name in BRANCHES.values()})
+taken = Coverpoint("taken", branch_taken, {"taken": True, "not taken": False})
+
+CONTROL_COVERAGE = CoverageCollector("control", [
+    Covergroup("decode", [instruction]),
+    Covergroup("branches", [branch, taken, Cross("branch x taken", [branch, taken])],
+               guard=lambda dut: resolved(dut.op) == 0b1100011),
+    Covergroup("exceptions", [
+        Coverpoint("cause", lambda dut: resolved(dut.exception_cause), EXCEPTION_CAUSES)
+    ], guard=lambda dut: resolved(dut.exception) == 1)
+], trigger=lambda dut: First(*(getattr(dut, name).value_change for name in CONTROL_INPUTS)))
 
 async def set_unknown(dut):
     # Set all inputs to all 1s
@@ -28,6 +112,7 @@ async def set_unknown(dut):
     dut.jump_to_debug.value = 0b0
     dut.jump_to_debug_exception.value = 0b0
     await Timer(1, unit="ns")
+    await CONTROL_COVERAGE.start(dut)
 
 
 # =============================================================================
@@ -1082,4 +1167,45 @@ async def simple_debug_return_test(dut):
     assert dut.branch.value == 0
     assert dut.jump.value == 0
     assert dut.write_back_source.value == 0b000
-    assert dut.csr_write_enable.value == 0
\ No newline at end of file
+    assert dut.csr_write_enable.value == 0
+
+@cocotb.test()
+async def trap_entry_latency_test(dut):
+    # Cycles between the csr_file trap request and the edge where the
+    # PC actually takes the trap vector (pc_source = MTVEC, no stall).
+    # Without stall the trap is taken on the very next edge, with a
+    # stall control holds the request (trap_pending) until it clears.
+    await set_unknown(dut)
+    dut.rst_n.value = 1
+    dut.trap.value = 0
+    dut.stall.value = 0
+    await RisingEdge(dut.clk)
+
+    for stall_cycles in (0, 1, 2, 5, 17):
+        await Timer(1, unit="ns")
+        dut.trap.value = 0b1
+        dut.stall.value = 0b1 if stall_cycles else 0b0
+
+        latency = 0
+        while True:
+            await Timer(1, unit="ns")
+            assert dut.pc_source.value == 0b010  # SOURCE_PC_MTVEC
+            assert dut.reg_write.value == 0
+            assert dut.mem_write.value == 0
+            taken = dut.stall.value == 0
+            await RisingEdge(dut.clk)
+            latency += 1
+            # trap is only high for 1 cycle
+            dut.trap.value = 0b0
+            if taken:
+                break
+            if latency == stall_cycles:
+                dut.stall.value = 0b0
+
+        assert latency == stall_cycles + 1
+        dut._log.info(f"stall {stall_cycles} : trap request -> PC update {latency} cycle(s)")
+
+        # request consumed, back to normal flow
+        await Timer(1, unit="ns")
+        assert dut.trap_pending.value == 0
+        assert dut.pc_source.value != 0b010
@@ -0,0 +1,171 @@
+# COVERAGE REPORT
+#
+# Merges the coverage db into one report :
+#   - functional coverage : the covergroups json dumps (covergroups.py),
+#     one per simulation process, hits are summed
+#   - code coverage : verilator's coverage.dat files (PROFILE=coverage),
+#     the ones the test runner moved into the db and the ones left in
+#     the tb directories by the Makefile flow
+#
+# Writes <out>/functional.json, <out>/coverage.dat (merged, usable with
+# verilator_coverage) and <out>/report.txt, and prints the report :
+# per point hit / total bins and holes, unexpected FSM arcs, line & toggle
+# coverage per module and, per testbench, the tests hitting no bin
+# that another test does not already hit (candidates to trim).
+#
+# python3 coverage_report.py [--db DIR] [--out DIR] [--holes N] [--annotate]
+#
+# BRH 10/26
+
+import argparse
+import json
+import re
+import shutil
+import subprocess
+from collections import defaultdict
+from pathlib import Path
+
+from covergroups import coverage_dir
+
+TB_DIR = Path(__file__).resolve().parent.parent
+DAT_LINE = re.compile(r"^C '(.*)' (\d+)$")
+
+def merge_functional(paths):
+    """{testbench : {"groups" : ..., "tests" : {test : set(bins)}}} summed over the dumps"""
+    merged = {}
+    for path in paths:
+        db = json.loads(path.read_text())
+        tb = merged.setdefault(db["testbench"], {"groups": {}, "tests": defaultdict(set)})
+        for group_name, group in db["groups"].items():
+            merged_group = tb["groups"].setdefault(group_name, {"samples": 0, "points": {}})
+            merged_group["samples"] += group["samples"]
+            for point_name, point in group["points"].items():
+                merged_point = merged_group["points"].setdefault(point_name, {"kind": point["kind"], "bins": {}, "ignored": {}, "unexpected": {}})
+                for field in ("bins", "ignored", "unexpected"):
+                    for label, hits in point.get(field, {}).items():
+                        merged_point[field][label] = merged_point[field].get(label, 0) + hits
+        for test, bins in db["tests"].items():
+            tb["tests"][test] |= set(bins)
+    return merged
+
+def parse_dat(path, points):
+    for line in path.read_text(errors="replace").splitlines():
+        match = DAT_LINE.match(line)
+        if match:
+            points[match.group(1)] = points.get(match.group(1), 0) + int(match.group(2))
+
+def dat_fields(key):
+    fields = {}
+    for part in key.split("\x01")[1:]:
+        name, _, value = part.partition("\x02")
+        fields[name] = value
+    return fields
+
+def merge_code(paths):
+    points = {}
+    for path in paths:
+        parse_dat(path, points)
+    return points
+
+def write_dat(points, path):
+    with open(path, "w") as f:
+        f.write("# SystemC::Coverage-3\n")
+        for key, count in points.items():
+            f.write(f"C '{key}' {count}\n")
+
+def functional_report(merged, holes):
+    lines = []
+    total_hit = total_bins = 0
+    for tb_name, tb in sorted(merged.items()):
+        tb_hit = tb_bins = 0
+        lines.append(f"== {tb_name}")
+        for group_name, group in tb["groups"].items():
+            lines.append(f"  {group_name} ({group['samples']} samples)")
+            for point_name, point in group["points"].items():
+                bins = point["bins"]
+                hit = sum(1 for hits in bins.values() if hits)
+                tb_hit += hit
+                tb_bins += len(bins)
+                pct = 100.0 * hit / len(bins) if bins else 100.0
+                lines.append(f"    {point_name:<28} {hit:>5}/{len(bins):<5} {pct:6.1f}%")
+                missing = [label for label, hits in bins.items() if not hits]
+                for label in missing[:holes]:
+                    lines.append(f"        hole : {label}")
+                if len(missing) > holes:
+                    lines.append(f"        ... {len(missing) - holes} more holes")
+                for arc, hits in point["unexpected"].items():
+                    lines.append(f"        UNEXPECTED : {arc} ({hits})")
+        lines.append(f"  total {tb_hit}/{tb_bins} bins ({100.0 * tb_hit / max(tb_bins, 1):.1f}%)")
+        lines += redundancy_report(tb["tests"])
+        total_hit += tb_hit
+        total_bins += tb_bins
+    lines.append(f"FUNCTIONAL COVERAGE : {total_hit}/{total_bins} bins ({100.0 * total_hit / max(total_bins, 1):.1f}%)")
+    return lines
+
+def redundancy_report(tests):
+    """tests whose bins are all hit by other tests as well"""
+    owners = defaultdict(int)
+    for bins in tests.values():
+        for key in bins:
+            owners[key] += 1
+    redundant = sorted(test for test, bins in tests.items() if all(owners[key] > 1 for key in bins))
+    lines = [f"  {len(tests)} tests, {len(redundant)} without any bin of their own"]
+    lines += [f"    {test} ({len(tests[test])} bins)" for test in redundant]
+    return lines
+
+def code_report(points):
+    """covered / total points per coverage type & module"""
+    stats = defaultdict(lambda: [0, 0])
+    for key, count in points.items():
+        page = dat_fields(key).get("page", "v_other/unknown")
+        kind, _, module = page.partition("/")
+        kind = kind.removeprefix("v_")
+        for entry in ((kind, module), (kind, "*")):
+            stats[entry][1] += 1
+            stats[entry][0] += 1 if count else 0
+    lines = []
+    for (kind, module), (covered, total) in sorted(stats.items()):
+        label = f"{kind} TOTAL" if module == "*" else f"{kind} {module}"
+        lines.append(f"  {label:<40} {covered:>7}/{total:<7} {100.0 * covered / total:6.1f}%")
+    return lines
+
+def main():
+    parser = argparse.ArgumentParser(description="HOLY CORE merged coverage report")
+    parser.add_argument("--db", default=str(coverage_dir()), help="coverage db (covergroups json & coverage .dat files)")
+    parser.add_argument("--out", default=None, help="output directory (default <db>/report)")
+    parser.add_argument("--holes", type=int, default=8, help="holes listed per point")
+    parser.add_argument("--annotate", action="store_true", help="annotated sources with verilator_coverage")
+    args = parser.parse_args()
+
+    db = Path(args.db)
+    out = Path(args.out) if args.out else db / "report"
+    out.mkdir(parents=True, exist_ok=True)
+
+    lines = []
+    dumps = sorted(db.glob("*.json"))
+    if dumps:
+        merged = merge_functional(dumps)
+        lines += functional_report(merged, args.holes)
+        for tb in merged.values():
+            tb["tests"] = {test: sorted(bins) for test, bins in tb["tests"].items()}
+        (out / "functional.json").write_text(json.dumps(merged, indent=1))
+    else:
+        lines.append(f"no covergroups dump in {db} (run with COVERAGE=1 or PROFILE=coverage)")
+
+    dats = sorted(db.glob("*.dat")) + sorted(TB_DIR.glob("*/coverage.dat"))
+    if dats:
+        points = merge_code(dats)
+        write_dat(points, out / "coverage.dat")
+        lines.append(f"CODE COVERAGE ({len(dats)} coverage.dat files)")
+        lines += code_report(points)
+        if args.annotate and shutil.which("verilator_coverage"):
+            subprocess.run(["verilator_coverage", "--annotate", str(out / "annotated"), str(out / "coverage.dat")], check=True)
+    else:
+        lines.append("no verilator coverage.dat (build with PROFILE=coverage)")
+
+    report = "\n".join(lines)
+    (out / "report.txt").write_text(report + "\n")
+    print(report)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+# COVERGROUPS
+#
+# Lightweight functional coverage for the cocotb testbenches.
+#
+# A Covergroup is a set of points sampled together :
+#   - Coverpoint  : named bins over a sampled value
+#   - Transitions : FSM arcs (state changes between two samples)
+#   - Cross       : combinations of the bins of other coverpoints
+#                   of the same group
+# A CoverageCollector samples its groups in the background
+# (every clock by default, or on a custom trigger) and dumps the
+# hit counts as json in the coverage db. Every process gets its
+# own file so parallel runs never clash, coverage_report.py
+# merges them (along with verilator's coverage.dat) into one report.
+#
+# Bins are matched against the sampled value, a bin matcher is :
+#   - a callable (predicate on the value)
+#   - a range / set / list / frozenset (membership)
+#   - anything else (equality)
+# ignore bins are matched first and never count as holes
+# (unreachable encodings, states belonging to other modules...)
+#
+# Collection is off unless COVERAGE=1 (set by PROFILE=coverage),
+# the hooks in the testbenches then cost nothing.
+#
+# Env knobs :
+#   COVERAGE      1 to collect
+#   COVERAGE_DIR  coverage db (default tb/coverage/db)
+#
+# BRH 10/26
+
+import itertools
+import json
+import os
+import socket
+import time
+from pathlib import Path
+
+import cocotb
+from cocotb.task import current_task
+from cocotb.triggers import RisingEdge, ReadOnly
+
+DEFAULT_DB = Path(__file__).resolve().parent / "db"
+
+def coverage_enabled():
+    return os.getenv("COVERAGE", "0") == "1"
+
+def coverage_dir():
+    return Path(os.getenv("COVERAGE_DIR", str(DEFAULT_DB)))
+
+def running_test_name():
+    """Name of the running test : cocotb names the main task of
+    each test "Test <name>" (other tasks keep their own name)"""
+    name = current_task().name
+    return name[len("Test "):] if name.startswith("Test ") else name
+
+def _matches(matcher, value):
+    if callable(matcher):
+        return bool(matcher(value))
+    if isinstance(matcher, (range, set, frozenset, list)):
+        return value in matcher
+    return value == matcher
+
+def enum_bins(names, ignore=()):
+    """{name : encoding} bins for a 0..N-1 enum, minus the ignored names"""
+    return {name: code for code, name in enumerate(names) if name not in ignore}
+
+class Coverpoint:
+    def __init__(self, name, sample, bins, ignore_bins=None):
+        """sample : callable(dut) -> value, bins / ignore_bins : {label : matcher}"""
+        self.name = name
+        self.sample_fn = sample
+        self.bins = dict(bins)
+        self.ignore_bins = dict(ignore_bins or {})
+        self.hits = dict.fromkeys(self.bins, 0)
+        self.ignored = dict.fromkeys(self.ignore_bins, 0)
+        # labels matched by the last sample, for the crosses
+        self.matched = ()
+
+    def sample(self, dut):
+        value = self.sample_fn(dut)
+        for label, matcher in self.ignore_bins.items():
+            if _matches(matcher, value):
+                self.ignored[label] += 1
+                self.matched = ()
+                return
+        self.matched = tuple(label for label, matcher in self.bins.items() if _matches(matcher, value))
+        for label in self.matched:
+            self.hits[label] += 1
+
+    def kind(self):
+        return "bins"
+
+    def dump(self):
+        return {"kind": self.kind(), "bins": dict(self.hits), "ignored": dict(self.ignored)}
+
+class Transitions(Coverpoint):
+    def __init__(self, name, sample, states, arcs):
+        """states : {encoding : name}, arcs : expected "FROM -> TO" transitions.
+        Changes not listed in arcs are counted as "unexpected" bins."""
+        self.states = dict(states)
+        super().__init__(name, sample, {arc: arc for arc in arcs})
+        self.unexpected = {}
+        self.previous = None
+
+    def sample(self, dut):
+        state = self.states.get(self.sample_fn(dut), "UNKNOWN")
+        self.matched = ()
+        if self.previous is not None and state != self.previous:
+            arc = f"{self.previous} -> {state}"
+            if arc in self.hits:
+                self.hits[arc] += 1
+                self.matched = (arc,)
+            else:
+                self.unexpected[arc] = self.unexpected.get(arc, 0) + 1
+        self.previous = state
+
+    def kind(self):
+        return "transitions"
+
+    def dump(self):
+        return {"kind": self.kind(), "bins": dict(self.hits), "ignored": {}, "unexpected": dict(self.unexpected)}
+
+class Cross(Coverpoint):
+    def __init__(self, name, points, ignore=None):
+        """points : coverpoints of the same group (sampled before the cross),
+        ignore : predicate on a labels tuple for illegal combinations"""
+        self.points = points
+        combos = itertools.product(*(point.bins for point in points))
+        ignore = ignore or (lambda labels: False)
+        bins = {" x ".join(labels): labels for labels in combos if not ignore(labels)}
+        super().__init__(name, None, bins)
+        self.by_labels = {labels: key for key, labels in bins.items()}
+
+    def sample(self, dut):
+        for labels in itertools.product(*(point.matched for point in self.points)):
+            key = self.by_labels.get(labels)
+            if key is not None:
+                self.hits[key] += 1
+
+    def kind(self):
+        return "cross"
+
+class Covergroup:
+    def __init__(self, name, points, guard=None):
+        """guard : callable(dut) -> bool, the group only samples when true.
+        Crosses must come after the points they cross."""
+        self.name = name
+        self.points = points
+        self.guard = guard
+        self.samples = 0
+
+    def sample(self, dut):
+        if self.guard is not None and not self.guard(dut):
+            # an FSM seen through a guard would report bogus arcs
+            for point in self.points:
+                if isinstance(point, Transitions):
+                    point.previous = None
+            return
+        self.samples += 1
+        for point in self.points:
+            point.sample(dut)
+
+    def hit_counts(self):
+        return {f"{self.name}/{point.name}/{label}": hits for point in self.points for label, hits in point.hits.items()}
+
+    def dump(self):
+        return {"samples": self.samples, "points": {point.name: point.dump() for point in self.points}}
+
+class CoverageCollector:
+    def __init__(self, name, groups, trigger=None):
+        """name : testbench name (db file prefix), trigger : callable(dut)
+        returning the trigger to sample on, a clock rising edge by default.
+        Build it once at module level : hits accumulate over the tests."""
+        self.name = name
+        self.groups = groups
+        self.trigger = trigger or (lambda dut: RisingEdge(dut.clk))
+        self.tests = {}
+        self.task = None
+        self.path = coverage_dir() / f"{name}_{socket.gethostname()}_{os.getpid()}_{int(time.time())}.json"
+
+    async def start(self, dut, test=None):
+        """Starts sampling for the running test (call it from the tb's reset helper).
+        test defaults to the running cocotb test, pass it when starting from
+        a task of the test rather than from the test itself."""
+        if not coverage_enabled():
+            return
+        # already sampling (a test resetting the DUT twice)
+        if self.task is not None and not self.task.done():
+            return
+        if test is None:
+            test = running_test_name()
+        self.task = cocotb.start_soon(self._run(dut, test))
+
+    async def _run(self, dut, test):
+        before = self.hit_counts()
+        try:
+            while True:
+                await self.trigger(dut)
+                await ReadOnly()
+                for group in self.groups:
+                    group.sample(dut)
+        finally:
+            # the task is killed at the end of the test
+            hit = {key for key, hits in self.hit_counts().items() if hits > before[key]}
+            self.tests[test] = sorted(hit | set(self.tests.get(test, ())))
+            self.write()
+
+    def hit_counts(self):
+        counts = {}
+        for group in self.groups:
+            counts.update(group.hit_counts())
+        return counts
+
+    def write(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        db = {
+            "testbench": self.name,
+            "groups": {group.name: group.dump() for group in self.groups},
+            # bins each test hit, for the redundancy report
+            "tests": self.tests
+        }
+        self.path.write_text(json.dumps(db, indent=1))
@@ -11,7 +11,7 @@ import numpy as np
 from copy import deepcopy
 
 # For basic R/W randomized testing
-RW_REGS = [0x7C0, 0x7C1, 0x7C2, 0x7C3, 0X7C4, 0x300, 0x304, 0x305, 0x341]
+RW_REGS = [0x7C0, 0x7C1, 0x7C2, 0x7C3, 0X7C4, 0x7C5, 0x7C6, 0x7C7, 0x7C8, 0x7C9, 0x300, 0x304, 0x305, 0x341]
 
 # Map each address to a register
 def get_csr_value(dut, addr):
@@ -25,6 +25,16 @@ def get_csr_value(dut, addr):
         return dut.instr_non_cachable_base.value
     elif addr == 0x7C4:
         return dut.instr_non_cachable_limit.value
+    elif addr == 0x7C5:
+        return dut.instr_lock_base.value
+    elif addr == 0x7C6:
+        return dut.instr_lock_limit.value
+    elif addr == 0x7C7:
+        return dut.data_range_base.value
+    elif addr == 0x7C8:
+        return dut.data_range_limit.value
+    elif addr == 0x7C9:
+        return dut.data_range_op.value
     elif addr == 0x300:
         return dut.mstatus.value
     elif addr == 0x304:
@@ -238,6 +248,156 @@ async def test_trap_behavior(dut):
     # MIE = 1, only MPIE = X (1 in our scenario)
     assert int(dut.mstatus.value) &  1 << 3 != 0
 
+@cocotb.test()
+async def test_vectored_trap(dut):
+    # ======================================
+    # mtvec.MODE = 1 (vectored) :
+    # interrupts go to BASE + 4*cause, exceptions to BASE.
+    # Also measures the interrupt -> trap request latency.
+    # ======================================
+
+    # Start a 10 ns clock
+    cocotb.start_soon(Clock(dut.clk, 10, unit="ns").start())
+
+    dut.rst_n.value = 0
+    dut.stall.value = 0
+    dut.m_ret.value = 0
+    dut.exception.value = 0
+    dut.timer_itr.value = 0
+    dut.soft_itr.value = 0
+    dut.ext_itr.value = 0
+    await RisingEdge(dut.clk)
+    dut.rst_n.value = 1
+    dut.instruction_valid.value = 1
+    dut.current_core_pc.value = 0x8000
+    await RisingEdge(dut.clk)
+
+    dut.mstatus.value = 1 << 3
+    dut.mie.value = 1 << 3 | 1 << 7 | 1 << 11
+    await RisingEdge(dut.clk)
+
+    itr_lines = {3: dut.soft_itr, 7: dut.timer_itr, 11: dut.ext_itr}
+
+    for mode, base in ((0, 0x4000), (1, 0x4000), (1, 0x2000_0100)):
+        dut.mtvec.value = base | mode
+        await RisingEdge(dut.clk)
+
+        for cause, line in itr_lines.items():
+            expected = base + 4 * cause if mode == 1 else base
+            await Timer(1, unit="ns")
+
+            # raise the line and count cycles until the trap request
+            line.value = 1
+            latency = 0
+            while True:
+                await RisingEdge(dut.clk)
+                await Timer(1, unit="ns")
+                latency += 1
+                if dut.trap.value == 1:
+                    break
+                assert latency < 10
+
+            # mip is registered : 1 cycle to see the trap request,
+            # the PC then jumps on the following edge
+            assert latency == 1
+            dut._log.info(f"mode {mode} cause {cause} : irq -> trap request {latency} cycle(s), "
+                          f"irq -> handler fetch {latency + 1} cycle(s)")
+            assert dut.trap_vector.value == expected
+
+            # Control may latch the trap while stalling (trap_pending) :
+            # the vector stays valid once mcause is registered
+            await RisingEdge(dut.clk)
+            await Timer(1, unit="ns")
+            assert dut.trap.value == 0
+            assert dut.mcause.value == 1 << 31 | cause
+            assert dut.trap_vector.value == expected
+
+            # handler clears the interrupt and returns
+            line.value = 0
+            for _ in range(5):
+                await RisingEdge(dut.clk)
+            dut.m_ret.value = 1
+            await RisingEdge(dut.clk)
+            await Timer(1, unit="ns")
+            dut.m_ret.value = 0
+
+    # Exceptions always go to BASE, even in vectored mode
+    dut.mtvec.value = 0x4001
+    await RisingEdge(dut.clk)
+    await Timer(1, unit="ns")
+    dut.exception_cause.value = 11 # ecall
+    dut.exception.value = 1
+    await Timer(1, unit="ns")
+    assert dut.trap.value == 1
+    assert dut.trap_vector.value == 0x4000
+    await RisingEdge(dut.clk)
+    await Timer(1, unit="ns")
+    dut.exception.value = 0
+    assert dut.mcause.value == 11
+    assert dut.trap_vector.value == 0x4000
+
+    # A pending interrupt masked by mstatus.MIE is not the cause
+    # of an exception taken meanwhile
+    dut.m_ret.value = 1
+    await RisingEdge(dut.clk)
+    await Timer(1, unit="ns")
+    dut.m_ret.value = 0
+    dut.mstatus.value = 0
+    dut.timer_itr.value = 1
+    await RisingEdge(dut.clk)
+    await RisingEdge(dut.clk)
+    await Timer(1, unit="ns")
+    assert dut.trap.value == 0
+    dut.exception.value = 1
+    await Timer(1, unit="ns")
+    assert dut.trap.value == 1
+    assert dut.trap_vector.value == 0x4000
+    await RisingEdge(dut.clk)
+    await Timer(1, unit="ns")
+    dut.exception.value = 0
+    dut.timer_itr.value = 0
+    assert dut.mcause.value == 11
+
+@cocotb.test()
+async def test_range_op_pending(dut):
+    # ======================================
+    # D$ range op CSR (0x7C9) : the op stays pending until the
+    # D$ acks it (e.g. after a running flush), then clears itself
+    # ======================================
+
+    # Start a 10 ns clock
+    cocotb.start_soon(Clock(dut.clk, 10, unit="ns").start())
+
+    dut.rst_n.value = 0
+    dut.stall.value = 0
+    dut.data_range_op_ack.value = 0
+    await RisingEdge(dut.clk)
+    dut.rst_n.value = 1
+    dut.instruction_valid.value = 1
+
+    # csrw 0x7C9, 0b11
+    dut.write_enable.value = 1
+    dut.write_data.value = 0b11
+    dut.address.value = 0x7C9
+    dut.f3.value = 0b001
+    await RisingEdge(dut.clk)
+    await Timer(1, unit="ns")
+    dut.write_enable.value = 0
+
+    # D$ busy flushing : held
+    for _ in range(20):
+        assert dut.data_range_op_o.value == 0b11
+        await RisingEdge(dut.clk)
+        await Timer(1, unit="ns")
+
+    # D$ takes it : cleared on the next cycle
+    dut.data_range_op_ack.value = 1
+    await RisingEdge(dut.clk)
+    await Timer(1, unit="ns")
+    dut.data_range_op_ack.value = 0
+    assert dut.data_range_op_o.value == 0
+    assert dut.data_range_op.value == 0
+
 #@cocotb.test()
 async def test_cache_control_behavior(dut):
     # ======================================
@@ -0,0 +1,26 @@
+# HC_TB
+#
+# Shared helpers for the HOLY CORE cocotb testbenches
+# (core, riscof, fpga lint & glue, units), so that they
+# stop carrying their own copy of each helper :
+#   - convert  : value <-> hex / bin strings, CSR names
+#   - memory   : bulk AXI ram loaders & cache array reads
+#   - clocking : clock & reset
+#   - signals  : cached handles & integer reads for the hot loops
+#   - snapshot : GPRs & CSRs snapshots, diffs and state trace
+#   - monitors : retired instructions monitor
+#   - stimulus : randomized tests knobs (regression.py shrinking)
+#
+# Testbenches import it by adding the tb/ directory to the path :
+#   sys.path.append(str(Path(__file__).resolve().parent.parent))
+#   from hc_tb import cpu_reset, load_hex
+#
+# BRH 10/26
+
+from .convert import MASK32, CSR_MAP, binary_to_hex, hex_to_bin, format_gpr
+from .memory import parse_hex, load_hex, load_words, read_words, init_memory, read_cache, dump_cache
+from .clocking import CPU_PERIOD, inst_clocks, cpu_reset
+from .signals import bits, words, Signals, CoreProbe
+from .snapshot import ArchState, StateTrace, state_trace_enabled
+from .monitors import RetireMonitor
+from .stimulus import random_iterations
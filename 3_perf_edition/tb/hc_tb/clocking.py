@@ -0,0 +1,27 @@
+# HC_TB CLOCKING
+#
+# Clock & reset for the core level testbenches
+# (holy_test_harness, riscof harness, fpga top).
+#
+# BRH 10/26
+
+import cocotb
+from cocotb.clock import Clock
+from cocotb.triggers import RisingEdge, Timer
+
+CPU_PERIOD = 10
+
+async def inst_clocks(dut, period=CPU_PERIOD):
+    """Starts the core clock"""
+    cocotb.start_soon(Clock(dut.clk, period, unit="ns").start())
+
+async def cpu_reset(dut, resets=("rst_n",)):
+    """Pulses the (active low) resets for one clock edge, returns
+    on the edge following the release"""
+    for name in resets:
+        getattr(dut, name).value = 0
+    await Timer(1, unit="ns")
+    await RisingEdge(dut.clk)     # Wait for a clock edge after reset
+    for name in resets:
+        getattr(dut, name).value = 1
+    await RisingEdge(dut.clk)     # Wait for a clock edge after reset
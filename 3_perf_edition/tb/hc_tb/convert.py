@@ -0,0 +1,45 @@
+# HC_TB CONVERSIONS
+#
+# Formatting helpers for the logs & asserts. Values are
+# converted through int() (cocotb values support it directly)
+# instead of a str() round trip of the whole bit string.
+#
+# BRH 10/26
+
+MASK32 = 0xFFFFFFFF
+
+CSR_MAP = {
+    0x300: "mstatus",
+    0x301: "misa",
+    0x304: "mie",
+    0x344: "mip",
+    0x305: "mtvec",
+    0x341: "mepc",
+    0x342: "mcause",
+    0x343: "mtval",
+    0x340: "mscratch",
+    0x7C0: "flush_cache",
+    0x7C1: "data_non_cachable_base",
+    0x7C2: "data_non_cachable_limit",
+    0x7C3: "instr_non_cachable_base",
+    0x7C4: "instr_non_cachable_limit",
+    0x7C5: "instr_lock_base",
+    0x7C6: "instr_lock_limit",
+    0x7C7: "data_range_base",
+    0x7C8: "data_range_limit",
+    0x7C9: "data_range_op"
+}
+
+def binary_to_hex(value):
+    """32 bits value (signal value or binary string) -> 8 upper case hex digits"""
+    if isinstance(value, str):
+        value = int(value, 2)
+    return f"{int(value):08X}"
+
+def hex_to_bin(hex_str):
+    """hex string -> 32 binary digits"""
+    return f"{int(str(hex_str), 16):032b}"
+
+def format_gpr(idx):
+    """Used for debug logs."""
+    return f"x{idx:<2}"
@@ -0,0 +1,67 @@
+# HC_TB MEMORY
+#
+# Bulk loaders for the cocotbext-axi rams : a hex file is parsed
+# once and written to each ram in a single write() instead of one
+# write() (and hexdump) per word. Hex files hold one 32 bits word
+# per line, "//" comments and empty lines are skipped (same format
+# as RefModel.load_hex()).
+#
+# Cache arrays (packed [N-1:0][31:0]) are read by shifting the
+# integer value instead of slicing its bit string.
+#
+# BRH 10/26
+
+import os
+
+import numpy as np
+
+from .signals import bits, words
+
+# parsed hex files, keyed by (path, mtime, size) : the same program is
+# usually loaded in both rams, and again for every test / seed
+_HEX_CACHE = {}
+
+def parse_hex(hexfile):
+    """hex file -> little endian bytes, ready for ram.write()"""
+    stat = os.stat(hexfile)
+    key = (os.path.abspath(hexfile), stat.st_mtime_ns, stat.st_size)
+    blob = _HEX_CACHE.get(key)
+    if blob is None:
+        with open(hexfile, "r") as file:
+            words = [word for word in (line.split("/")[0].strip() for line in file) if word]
+        blob = np.array([int(word, 16) for word in words], dtype="<u4").tobytes()
+        _HEX_CACHE[key] = blob
+    return blob
+
+def load_hex(rams, hexfile, base_addr):
+    """Loads hexfile at base_addr in every ram of rams"""
+    blob = parse_hex(hexfile)
+    for ram in rams:
+        ram.write(base_addr, blob)
+
+def load_words(rams, base_addr, words):
+    """Loads a list / array of 32 bits words at base_addr in every ram of rams"""
+    blob = np.asarray(words, dtype="<u4").tobytes()
+    for ram in rams:
+        ram.write(base_addr, blob)
+
+def read_words(ram, base_addr, count):
+    """count 32 bits words from ram as a numpy array"""
+    return np.frombuffer(ram.read(base_addr, 4 * count), dtype="<u4")
+
+async def init_memory(axi_ram, hexfile, base_addr):
+    """Legacy single ram loader, prefer load_hex() with all the rams"""
+    load_hex([axi_ram], hexfile, base_addr)
+
+def read_cache(cache_data, line):
+    """Word `line` of a packed cache data array"""
+    return bits(int(cache_data.value), 32 * line, 32)
+
+def dump_cache(cache_data, line="*"):
+    """Prints one word, or every word with line="*" """
+    value = int(cache_data.value)
+    if line == "*":
+        for word in words(value, len(cache_data) // 32):
+            print(hex(word))
+    else:
+        print(hex(bits(value, 32 * line, 32)))
@@ -0,0 +1,48 @@
+# HC_TB MONITORS
+#
+# RetireMonitor : calls back on every retired instruction.
+# This core is not pipelined, an instruction retires on the
+# rising edge where stall is low : the monitor samples 1ns
+# after each edge (same point as the spike-like loggers and
+# cosim.py) and runs the callbacks when stall is low, so per
+# instruction checks don't each need their own polling loop.
+#
+# BRH 10/26
+
+import cocotb
+from cocotb.triggers import RisingEdge, Timer
+
+class RetireMonitor:
+    def __init__(self, dut, callbacks=()):
+        """callbacks : callables without arguments, run in order
+        on every retired instruction (signals are settled)"""
+        self.dut = dut
+        self.callbacks = list(callbacks)
+        self.cycles = 0
+        self.retired = 0
+        self.task = None
+
+    def add_callback(self, callback):
+        self.callbacks.append(callback)
+
+    def start(self):
+        self.task = cocotb.start_soon(self.run())
+        return self.task
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def run(self):
+        edge = RisingEdge(self.dut.clk)
+        settle = Timer(1, unit="ns")
+        stall = self.dut.core.stall
+        while True:
+            await edge
+            await settle # let signals info propagate in sim
+            self.cycles += 1
+            if stall.value == 0:
+                self.retired += 1
+                for callback in self.callbacks:
+                    callback()
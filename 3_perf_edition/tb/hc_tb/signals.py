@@ -0,0 +1,90 @@
+# HC_TB SIGNALS
+#
+# Integer native signal access for the per cycle loops.
+#
+# Every `dut.core.regfile.registers[3].value` walks the hierarchy
+# again, and the str() / binary_to_hex() conversions that usually
+# follow format and parse the whole bit string. Here :
+#   - Signals resolves a dotted path ("regfile.registers[3]") once
+#     and keeps the handle
+#   - values are read with int() once, fields & words are then
+#     cut out with shifts and masks (bits(), words())
+#   - CoreProbe adds the core's architectural state on top
+#     (pc, instruction, stall, x0..x31) for the core level tbs
+#
+# BRH 10/26
+
+import re
+
+PATH_TOKEN = re.compile(r"(\w+)|\[(\d+)\]")
+
+def bits(value, lsb, width=1):
+    """value[lsb +: width] of an integer"""
+    return (value >> lsb) & ((1 << width) - 1)
+
+def words(value, count, width=32):
+    """Splits a packed [count-1:0][width-1:0] integer, word 0 first"""
+    mask = (1 << width) - 1
+    return [(value >> (width * k)) & mask for k in range(count)]
+
+class Signals:
+    def __init__(self, root):
+        """root : the handle paths are relative to (usually dut or dut.core)"""
+        self.root = root
+        self.handles = {}
+
+    def handle(self, path):
+        handle = self.handles.get(path)
+        if handle is None:
+            handle = self.root
+            for name, index in PATH_TOKEN.findall(path):
+                handle = getattr(handle, name) if name else handle[int(index)]
+            self.handles[path] = handle
+        return handle
+
+    def read(self, path):
+        return int(self.handle(path).value)
+
+    def read_bits(self, path, lsb, width=1):
+        return bits(self.read(path), lsb, width)
+
+    def read_words(self, path, count, width=32):
+        return words(self.read(path), count, width)
+
+class CoreProbe(Signals):
+    """Cached handles on dut.core, get the shared one with CoreProbe.of(dut)"""
+
+    _probes = {}
+
+    def __init__(self, dut):
+        super().__init__(dut.core)
+        self._pc = self.handle("pc")
+        self._instruction = self.handle("instruction")
+        self._stall = self.handle("stall")
+        self._registers = [self.handle(f"regfile.registers[{i}]") for i in range(32)]
+
+    @classmethod
+    def of(cls, dut):
+        probe = cls._probes.get(dut)
+        if probe is None:
+            probe = cls._probes[dut] = cls(dut)
+        return probe
+
+    @property
+    def pc(self):
+        return int(self._pc.value)
+
+    @property
+    def instruction(self):
+        return int(self._instruction.value)
+
+    @property
+    def stall(self):
+        return int(self._stall.value)
+
+    def reg(self, idx):
+        return int(self._registers[idx].value)
+
+    def regs(self):
+        """x0..x31"""
+        return [int(handle.value) for handle in self._registers]
@@ -0,0 +1,99 @@
+# HC_TB ARCHITECTURAL STATE SNAPSHOTS
+#
+# ArchState reads x0..x31 and the CSRs of CSR_MAP (csr_file.sv
+# registers) into one uint32 numpy array, over handles resolved
+# once. Consecutive snapshots are diffed with numpy so a test can
+# check what an instruction changed, and nothing else :
+#
+#   state = ArchState(dut)
+#   state.update()                       # baseline
+#   await NextInstr(dut)                 # lw x18 0x8(x3)
+#   state.expect_changes(x18=0xDEADBEEF)
+#
+# StateTrace logs the state changes of every retired instruction
+# (hook its retired() on a RetireMonitor), cheap enough to leave
+# on for a whole program. The core tb enables it with STATE_TRACE=1.
+#
+# BRH 10/26
+
+import os
+
+import numpy as np
+
+from .convert import CSR_MAP
+from .signals import CoreProbe
+
+# CSRs changing on their own (interrupt lines, self clearing flags,
+# mscratch holding the fetched instruction outside of debug mode) :
+# never reported as changes by default
+VOLATILE_CSRS = ("mip", "mscratch", "flush_cache", "data_range_op")
+
+def state_trace_enabled():
+    return os.getenv("STATE_TRACE", "0") not in ("", "0")
+
+class ArchState:
+    def __init__(self, dut, csrs=tuple(CSR_MAP.values()), ignore=VOLATILE_CSRS):
+        probe = CoreProbe.of(dut)
+        self.names = [f"x{i}" for i in range(32)] + list(csrs)
+        self.handles = [probe.handle(f"regfile.registers[{i}]") for i in range(32)]
+        self.handles += [probe.handle(f"holy_csr_file.{name}") for name in csrs]
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.tracked = np.array([name not in ignore for name in self.names])
+        self.last = None
+
+    def snapshot(self):
+        """uint32 array, x0..x31 then the CSRs in self.names order"""
+        return np.fromiter((int(handle.value) for handle in self.handles), dtype=np.uint32, count=len(self.handles))
+
+    def diff(self, before, after):
+        """{name : (old, new)} for the tracked entries that differ"""
+        return {
+            self.names[i]: (int(before[i]), int(after[i]))
+            for i in np.flatnonzero((before != after) & self.tracked)
+        }
+
+    def update(self):
+        """Takes a new snapshot, returns the changes since the previous one
+        (nothing on the first call, it only sets the baseline)"""
+        current = self.snapshot()
+        changes = {} if self.last is None else self.diff(self.last, current)
+        self.last = current
+        return changes
+
+    def expect_changes(self, **expected):
+        """Asserts that exactly the given registers changed, to the given values"""
+        changes = self.update()
+        got = {name: new for name, (_, new) in changes.items()}
+        assert got == expected, (
+            "unexpected state changes : "
+            + ", ".join(f"{name} {old:#010x} -> {new:#010x}" for name, (old, new) in changes.items())
+            + f" (expected {', '.join(f'{name} -> {value:#010x}' for name, value in expected.items()) or 'none'})"
+        )
+        return changes
+
+    def __getitem__(self, name):
+        """Value in the last snapshot"""
+        return int(self.last[self.index[name]])
+
+class StateTrace:
+    def __init__(self, dut, path="state_trace.log"):
+        """One line per retired instruction : pc, instruction & the state it changed"""
+        self.probe = CoreProbe.of(dut)
+        self.state = ArchState(dut)
+        self.path = path
+        # line buffered : the trace is complete even if the test dies
+        self.file = open(path, "w", buffering=1)
+        self.previous = None
+
+    def retired(self):
+        """RetireMonitor callback. Write backs land on the retire edge, so the
+        changes seen now belong to the previously retired instruction."""
+        changes = self.state.update()
+        if self.previous is not None:
+            pc, instr = self.previous
+            line = " ".join(f"{name}={new:08x}" for name, (_, new) in changes.items())
+            self.file.write(f"{pc:08x} ({instr:08x}) {line}\n")
+        self.previous = (self.probe.pc, self.probe.instruction)
+
+    def close(self):
+        self.file.close()
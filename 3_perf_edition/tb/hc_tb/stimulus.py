@@ -0,0 +1,18 @@
+# HC_TB STIMULUS
+#
+# Knobs of the randomized tests. Python's random is seeded by
+# cocotb from COCOTB_RANDOM_SEED, so a (test, seed) pair replays exactly.
+# The randomized loops take their iteration counts through
+# random_iterations() : RANDOM_ITERATIONS caps them, which is how
+# regression.py shrinks a failing seed to a shorter failing run
+# (same seed, fewer iterations => same first draws of the first loop,
+# but later loops shift : the shrunk cap is small, not minimal).
+#
+# BRH 10/26
+
+import os
+
+def random_iterations(default):
+    """Iteration count of a randomized loop, capped by RANDOM_ITERATIONS"""
+    cap = os.getenv("RANDOM_ITERATIONS")
+    return min(default, int(cap)) if cap else default
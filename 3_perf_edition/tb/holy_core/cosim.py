@@ -0,0 +1,222 @@
+# HOLY CORE LOCK-STEP CO-SIMULATION
+#
+# Steps the RefModel (ref_model.py) in lock-step with every
+# instruction retired by the DUT and compares :
+#   - PC & fetched instruction
+#   - rd write back (register + value)
+#   - stores (address, data, byte enable)
+#   - CSR writes
+#   - trap causes
+#
+# On the very first divergence, the checker dumps the last
+# retired instructions from both sides to cosim.log and raises
+# CosimMismatch, which aborts the cocotb test right away instead
+# of simulating the remaining cycles of an already failed run.
+#
+# Retirement point : this core is not pipelined, an instruction
+# "retires" on the rising edge where stall is low. Sample it
+# 1ns after the previous edge, exactly like the spike-like logger.
+#
+# Interrupts are asynchronous, the model can't predict them, so
+# when the DUT takes one we inject it in the model. Debug mode is
+# not modelled : checking is suspended and the model is re-synced
+# from the DUT when the core exits debug mode.
+#
+# Enable with COSIM=1 in the environment.
+#
+# BRH 10/26
+
+import os
+import sys
+from collections import deque
+from pathlib import Path
+
+from ref_model import RefModel, Retired, MASK32
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from hc_tb import RetireMonitor, CoreProbe
+
+# CSRs whose value depends on things the model does not see
+# (interrupt lines, self clearing flags, mscratch debug hack in csr_file.sv).
+# Reads & writes of these are NOT compared, the DUT value is trusted.
+VOLATILE_CSRS = {
+    0x344,  # mip
+    0x340,  # mscratch (holds the fetched instruction outside of debug mode)
+    0x7C0,  # flush_cache (self clears)
+    0x7C9,  # data_range_op (clears once the D$ takes it)
+}
+
+HISTORY_DEPTH = 8
+
+
+def cosim_enabled():
+    return os.getenv("COSIM", "0") not in ("", "0")
+
+
+class CosimMismatch(AssertionError):
+    pass
+
+
+class CosimChecker:
+    """Lock-step checker. Either call check_retire() from an existing per cycle
+    loop (riscof tb) or start run() as a background monitor (core tb)."""
+
+    def __init__(self, dut, ref: RefModel, log_path="cosim.log"):
+        self.dut = dut
+        # cached handles, read as integers on every retired instruction
+        self.core = CoreProbe.of(dut)
+        self.ref = ref
+        self.log_path = log_path
+        self.retired = 0
+        self.in_debug = False
+        self.dut_history = deque(maxlen=HISTORY_DEPTH)
+        self.ref_history = deque(maxlen=HISTORY_DEPTH)
+        # Clear the log file before simulation starts
+        with open(self.log_path, "w"):
+            pass
+
+    # ==========
+    # DUT SAMPLING
+    # ==========
+
+    def sample_dut(self):
+        """Build the Retired record for the instruction the DUT is about to retire.
+        Only meaningful when stall is low."""
+        core = self.core
+        ret = Retired(pc=core.pc, instr=core.instruction)
+
+        write_back_val = core.read("write_back_signal") # packed type
+        wb_data = (write_back_val >> 1) & MASK32          # bits [32:1]
+        wb_valid = write_back_val & 0x1                   # bit [0]
+        dest_reg = core.read("dest_reg")
+        if core.read("reg_write") and wb_valid and dest_reg != 0:
+            ret.rd = dest_reg
+            ret.rd_val = wb_data
+
+        if core.read("mem_write_enable"):
+            addr = core.read("alu_result")
+            ret.store = (
+                addr & ~0b11,
+                core.read("mem_write_data"),
+                core.read("mem_byte_enable")
+            )
+
+        if core.read("csr_write_enable"):
+            ret.csr = (core.read("csr_address"), core.read("holy_csr_file.write_back_to_csr"))
+
+        if core.read("trap") or core.read("control_unit.trap_pending"):
+            # next_mcause holds the cause both on the trap cycle and when
+            # the trap was latched earlier while stalling.
+            ret.trap = core.read("holy_csr_file.next_mcause")
+
+        return ret
+
+    def dut_in_debug(self):
+        core = self.core
+        return (
+            core.read("holy_csr_file.debug_mode")
+            or core.read("jump_to_debug")
+            or core.read("jump_to_debug_exception")
+        )
+
+    def sync_from_dut(self):
+        """Copy the architectural state of the DUT into the model."""
+        core = self.core
+        self.ref.pc = core.pc
+        for i in range(1, 32):
+            self.ref.x[i] = core.reg(i)
+        for addr, name in ((0x300, "mstatus"), (0x304, "mie"), (0x305, "mtvec"),
+                           (0x341, "mepc"), (0x342, "mcause"), (0x343, "mtval"),
+                           (0x7C1, "data_non_cachable_base"), (0x7C2, "data_non_cachable_limit"),
+                           (0x7C3, "instr_non_cachable_base"), (0x7C4, "instr_non_cachable_limit"),
+                           (0x7C5, "instr_lock_base"), (0x7C6, "instr_lock_limit"),
+                           (0x7C7, "data_range_base"), (0x7C8, "data_range_limit")):
+            self.ref.csrs[addr] = core.read(f"holy_csr_file.{name}")
+
+    # ==========
+    # CHECKING
+    # ==========
+
+    def check_retire(self):
+        """Call once per cycle where stall is low."""
+        if self.dut_in_debug():
+            self.in_debug = True
+            return
+        if self.in_debug:
+            # the debugger may have changed anything, start over from the DUT state
+            self.in_debug = False
+            self.sync_from_dut()
+
+        dut_ret = self.sample_dut()
+        self.retired += 1
+
+        if dut_ret.trap is not None and dut_ret.trap >> 31:
+            # async interrupt : the instruction is NOT executed
+            if dut_ret.pc != self.ref.pc:
+                self._mismatch("interrupted pc", dut_ret, None)
+            self.ref.take_interrupt(dut_ret.trap & 0x7FFFFFFF)
+            self.dut_history.append(dut_ret)
+            return
+
+        ref_ret = self.ref.step()
+
+        # values the model can't know : trust the DUT and re-sync the model
+        if ref_ret.rd and (ref_ret.mmio or ref_ret.csr_read in VOLATILE_CSRS):
+            self.ref.x[ref_ret.rd] = dut_ret.rd_val
+            ref_ret.rd_val = dut_ret.rd_val
+        if ref_ret.csr is not None and ref_ret.csr[0] in VOLATILE_CSRS:
+            ref_ret.csr = dut_ret.csr
+
+        self.dut_history.append(dut_ret)
+        self.ref_history.append(ref_ret)
+
+        if dut_ret.pc != ref_ret.pc:
+            self._mismatch("pc", dut_ret, ref_ret)
+        if dut_ret.instr != ref_ret.instr:
+            self._mismatch("instruction", dut_ret, ref_ret)
+        if dut_ret.trap != ref_ret.trap:
+            self._mismatch("trap", dut_ret, ref_ret)
+        if (dut_ret.rd, dut_ret.rd_val) != (ref_ret.rd, ref_ret.rd_val):
+            self._mismatch("rd write back", dut_ret, ref_ret)
+        if dut_ret.store != ref_ret.store:
+            self._mismatch("store", dut_ret, ref_ret)
+        if dut_ret.csr != ref_ret.csr:
+            self._mismatch("csr write", dut_ret, ref_ret)
+
+    async def run(self):
+        """Background monitor, to be started with cocotb.start_soon()
+        once the memories are initialized and reset is released."""
+        await RetireMonitor(self.dut, [self.check_retire]).run()
+
+    # ==========
+    # REPORTING
+    # ==========
+
+    @staticmethod
+    def format_retired(ret):
+        if ret is None:
+            return "<none>"
+        s = f"0x{ret.pc:08x} (0x{ret.instr:08x})"
+        if ret.rd:
+            s += f" x{ret.rd} 0x{ret.rd_val:08x}"
+        if ret.store is not None:
+            s += f" mem 0x{ret.store[0]:08x} 0x{ret.store[1]:08x} be={ret.store[2]:04b}"
+        if ret.csr is not None:
+            s += f" c{ret.csr[0]:03x} 0x{ret.csr[1]:08x}"
+        if ret.trap is not None:
+            s += f" trap mcause=0x{ret.trap:08x}"
+        return s
+
+    def _mismatch(self, what, dut_ret, ref_ret):
+        lines = [f"COSIM MISMATCH on {what} after {self.retired} retired instructions"]
+        lines.append(f"  DUT : {self.format_retired(dut_ret)}")
+        lines.append(f"  REF : {self.format_retired(ref_ret)}")
+        lines.append("  last DUT retired :")
+        lines += [f"    {self.format_retired(r)}" for r in self.dut_history]
+        lines.append("  last REF retired :")
+        lines += [f"    {self.format_retired(r)}" for r in self.ref_history]
+        message = "\n".join(lines)
+        with open(self.log_path, "a") as fd:
+            fd.write(message + "\n")
+        self.dut._log.error(message)
+        raise CosimMismatch(message)
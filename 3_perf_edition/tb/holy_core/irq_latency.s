@@ -0,0 +1,158 @@
+# HOLY_CORE INTERRUPT LATENCY FIRMWARE
+#
+# Workload for the interrupt latency harness
+# (test_irq_latency.py). The main loop is bigger
+# than the instruction cache and strides through a
+# buffer bigger than the data cache so the trap
+# handler regularly misses in both caches, like it
+# would in a real application.
+#
+# - CLINT : the timer handler re-arms mtimecmp with a
+#   pseudo random delay (LCG seeded by the tb)
+# - PLIC : the tb raises irq_in, the ext handler only
+#   claims & completes
+#
+# Config words written by the tb at DATA_BASE :
+#   0x0 : LCG seed
+#   0x4 : mtvec mode (0 : direct, 1 : vectored)
+#   0x8 : timer min delay (cycles)
+#   0xC : timer delay mask (delay = min + (rand & mask))
+#
+# BRH 10/26
+
+.equ DATA_BASE,     0x00100000
+.equ CLINT_BASE,    0x40000000
+.equ MTIMECMP,      0x40004000
+.equ MTIME,         0x4000BFF8
+.equ PLIC_BASE,     0x90000000
+.equ BUFFER_MASK,   0x7E0       # 2KiB, 32 bytes stride
+
+# Register use (no stack, handlers only use a* & ra)
+#   main loop : t0-t2, s1, s2
+#   handlers  : a0-a2, ra, a5 (LCG state)
+#   constants : s3 data base, s4 plic base, s5/s6 LCG
+#               s7 delay mask, s8 min delay,
+#               s9 mtime, s10 mtimecmp
+
+.section .text
+.global _start
+
+_start:
+    # I$ : everything cachable (empty non cachable range)
+    li t0, 0xFFFFFFFF
+    csrrw x0, 0x7C3, t0
+    csrrw x0, 0x7C4, t0
+    # D$ : CLINT & PLIC are not cachable
+    li t0, CLINT_BASE
+    csrrw x0, 0x7C1, t0
+    li t0, 0xFFFFFFFF
+    csrrw x0, 0x7C2, t0
+
+    li s3, DATA_BASE
+    li s4, PLIC_BASE
+    li s5, 1664525
+    li s6, 1013904223
+    lw a5, 0x0(s3)
+    lw s8, 0x8(s3)
+    lw s7, 0xC(s3)
+    li s9, MTIME
+    li s10, MTIMECMP
+
+    # trap vector : direct or vectored
+    la a0, trap
+    lw a1, 0x4(s3)
+    beqz a1, set_mtvec
+    la a0, vector_table
+    ori a0, a0, 1
+set_mtvec:
+    csrw mtvec, a0
+
+    # enable both PLIC sources
+    li a0, 0x3
+    sw a0, 0(s4)
+
+    # first timer deadline
+    sw x0, 4(s10)
+    jal ra, arm_timer
+
+    # enable timer & external interrupts
+    li t0, (1 << 11) | (1 << 7)
+    csrw mie, t0
+    li t0, (1 << 3)
+    csrw mstatus, t0
+
+    li s1, 0
+    li s2, BUFFER_MASK
+
+main_loop:
+    .rept 24
+    lw   t0, 0x20(s3)
+    mul  t1, t0, t0
+    addi t0, t1, 1
+    sw   t0, 0x20(s3)
+    .endr
+    # walk the buffer to keep evicting D$ lines
+    addi s1, s1, 32
+    and  s1, s1, s2
+    add  t2, s3, s1
+    lw   t0, 0x100(t2)
+    addi t0, t0, 1
+    sw   t0, 0x100(t2)
+    j main_loop
+
+#########################
+# Timer arming
+#########################
+
+# mtimecmp = mtime + min + (rand & mask)
+arm_timer:
+    mul  a5, a5, s5
+    add  a5, a5, s6
+    srli a1, a5, 8
+    and  a1, a1, s7
+    add  a1, a1, s8
+    lw   a2, 0(s9)
+    add  a2, a2, a1
+    sw   a2, 0(s10)
+    ret
+
+#########################
+# Trap handlers
+#########################
+
+# direct mode entry
+trap:
+    csrr a0, mcause
+    li a1, 0x8000000B
+    beq a0, a1, ext_handler
+    li a1, 0x80000007
+    beq a0, a1, timer_handler
+    # anything else is unexpected, park here (tb times out)
+unexpected:
+    j unexpected
+
+timer_handler:
+    # ra is free : the main loop never calls
+    jal ra, arm_timer
+    mret
+
+ext_handler:
+    lw a0, 4(s4)            # claim
+    sw a0, 4(s4)            # complete
+    mret
+
+# vectored mode entry (BASE + 4 * cause)
+.balign 64
+vector_table:
+    j unexpected            # 0
+    j unexpected            # 1
+    j unexpected            # 2
+    j unexpected            # 3  soft
+    j unexpected            # 4
+    j unexpected            # 5
+    j unexpected            # 6
+    j timer_handler         # 7  timer
+    j unexpected            # 8
+    j unexpected            # 9
+    j unexpected            # 10
+    j ext_handler           # 11 external
@@ -0,0 +1,539 @@
+# HOLY CORE CONSTRAINED RANDOM PROGRAM GENERATOR
+#
+# Generates valid RV32IM + Zicsr programs for stress testing
+# the core & its caches (see test_random_programs.py) :
+#   - long chains of dependent ALU / MDU ops
+#   - loads & stores of every size over a configurable memory
+#     footprint (bigger than the D$ to force evictions), part
+#     of them through the non cachable path
+#   - forward branches / jumps and small bounded loops
+#   - CSR accesses & cache maintenance (flush, range clean)
+#
+# Programs never trap and always reach the `end` loop. They are
+# self checking : the expected final state (registers & memory)
+# comes from running the same program on RefModel (ref_model.py).
+#
+# The generator encodes the machine code itself (no toolchain
+# needed to run thousands of seeds), the .s it writes next to the
+# .hex assembles to the exact same words with riscv gcc.
+#
+# CLI, to get the files for a given seed :
+#   python3 random_program.py --seed 42 [--count 10] [--out dir]
+#
+# BRH 10/26
+
+import argparse
+import os
+import random
+from dataclasses import dataclass, field
+
+from ref_model import RefModel, MASK32
+
+# ==========
+# MEMORY MAP (all in the testbench's "boot rom" window, see holy_test_harness.sv)
+# ==========
+CODE_BASE       = 0x0000_0000
+DATA_BASE       = 0x0010_0000   # cachable
+UNCACHED_BASE   = 0x0020_0000   # declared non cachable by the prologue (AXI LITE)
+SIG_BASE        = 0x0030_0000   # registers dump at the end of the program
+# loads & stores add an up to 2KiB immediate offset on top of the footprint
+OFFSET_SPAN     = 2048
+
+# ==========
+# REGISTERS
+# ==========
+REG_DATA        = 8     # s0 : DATA_BASE
+REG_UNCACHED    = 9     # s1 : UNCACHED_BASE
+REG_MASK_WORD   = 18    # s2 : footprint mask, word aligned
+REG_MASK_HALF   = 19    # s3 : footprint mask, halfword aligned
+REG_MASK_BYTE   = 20    # s4 : footprint mask
+REG_LOOP        = 30    # t5 : loop counter
+REG_ADDR        = 31    # t6 : address computations
+RESERVED_REGS = {0, REG_DATA, REG_UNCACHED, REG_MASK_WORD, REG_MASK_HALF, REG_MASK_BYTE, REG_LOOP, REG_ADDR}
+FREE_REGS = [r for r in range(32) if r not in RESERVED_REGS]
+
+# CSRs the program can freely read & write (no side effect on the program flow)
+SCRATCH_CSRS = [0x341, 0x343, 0x7C7, 0x7C8] # mepc, mtval, data_range_base/limit
+CSR_FLUSH = 0x7C0
+CSR_DATA_NON_CACHABLE_BASE = 0x7C1
+CSR_DATA_NON_CACHABLE_LIMIT = 0x7C2
+CSR_INSTR_NON_CACHABLE_BASE = 0x7C3
+CSR_INSTR_NON_CACHABLE_LIMIT = 0x7C4
+CSR_DATA_RANGE_OP = 0x7C9
+RANGE_OP_CLEAN = 0b01 # never invalidate : it would throw away stores the model keeps
+
+# values MDU & compare edge cases love
+SPECIAL_VALUES = [0x00000000, 0x00000001, 0xFFFFFFFF, 0x80000000, 0x7FFFFFFF, 0x0000FFFF, 0xFFFF8000]
+
+# ==========
+# ENCODINGS
+# ==========
+# name : (format, opcode, f3, f7)
+OPS = {
+    "add":    ("R", 0b0110011, 0b000, 0x00),
+    "sub":    ("R", 0b0110011, 0b000, 0x20),
+    "sll":    ("R", 0b0110011, 0b001, 0x00),
+    "slt":    ("R", 0b0110011, 0b010, 0x00),
+    "sltu":   ("R", 0b0110011, 0b011, 0x00),
+    "xor":    ("R", 0b0110011, 0b100, 0x00),
+    "srl":    ("R", 0b0110011, 0b101, 0x00),
+    "sra":    ("R", 0b0110011, 0b101, 0x20),
+    "or":     ("R", 0b0110011, 0b110, 0x00),
+    "and":    ("R", 0b0110011, 0b111, 0x00),
+    "mul":    ("R", 0b0110011, 0b000, 0x01),
+    "mulh":   ("R", 0b0110011, 0b001, 0x01),
+    "mulhsu": ("R", 0b0110011, 0b010, 0x01),
+    "mulhu":  ("R", 0b0110011, 0b011, 0x01),
+    "div":    ("R", 0b0110011, 0b100, 0x01),
+    "divu":   ("R", 0b0110011, 0b101, 0x01),
+    "rem":    ("R", 0b0110011, 0b110, 0x01),
+    "remu":   ("R", 0b0110011, 0b111, 0x01),
+    "addi":   ("I", 0b0010011, 0b000, None),
+    "slti":   ("I", 0b0010011, 0b010, None),
+    "sltiu":  ("I", 0b0010011, 0b011, None),
+    "xori":   ("I", 0b0010011, 0b100, None),
+    "ori":    ("I", 0b0010011, 0b110, None),
+    "andi":   ("I", 0b0010011, 0b111, None),
+    "slli":   ("SHIFT", 0b0010011, 0b001, 0x00),
+    "srli":   ("SHIFT", 0b0010011, 0b101, 0x00),
+    "srai":   ("SHIFT", 0b0010011, 0b101, 0x20),
+    "lb":     ("LOAD", 0b0000011, 0b000, None),
+    "lh":     ("LOAD", 0b0000011, 0b001, None),
+    "lw":     ("LOAD", 0b0000011, 0b010, None),
+    "lbu":    ("LOAD", 0b0000011, 0b100, None),
+    "lhu":    ("LOAD", 0b0000011, 0b101, None),
+    "sb":     ("S", 0b0100011, 0b000, None),
+    "sh":     ("S", 0b0100011, 0b001, None),
+    "sw":     ("S", 0b0100011, 0b010, None),
+    "beq":    ("B", 0b1100011, 0b000, None),
+    "bne":    ("B", 0b1100011, 0b001, None),
+    "blt":    ("B", 0b1100011, 0b100, None),
+    "bge":    ("B", 0b1100011, 0b101, None),
+    "bltu":   ("B", 0b1100011, 0b110, None),
+    "bgeu":   ("B", 0b1100011, 0b111, None),
+    "lui":    ("U", 0b0110111, None, None),
+    "auipc":  ("U", 0b0010111, None, None),
+    "jal":    ("J", 0b1101111, None, None),
+    "jalr":   ("LOAD", 0b1100111, 0b000, None), # same shape as loads : rd, imm(rs1)
+    "csrrw":  ("CSR", 0b1110011, 0b001, None),
+    "csrrs":  ("CSR", 0b1110011, 0b010, None),
+    "csrrc":  ("CSR", 0b1110011, 0b011, None),
+    "csrrwi": ("CSRI", 0b1110011, 0b101, None),
+    "csrrsi": ("CSRI", 0b1110011, 0b110, None),
+    "csrrci": ("CSRI", 0b1110011, 0b111, None),
+}
+
+ALU_OPS = ["add", "sub", "sll", "slt", "sltu", "xor", "srl", "sra", "or", "and"]
+ALU_IMM_OPS = ["addi", "slti", "sltiu", "xori", "ori", "andi", "slli", "srli", "srai"]
+MDU_OPS = ["mul", "mulh", "mulhsu", "mulhu", "div", "divu", "rem", "remu"]
+BRANCH_OPS = ["beq", "bne", "blt", "bge", "bltu", "bgeu"]
+LOAD_SIZES = {"lb": 1, "lbu": 1, "lh": 2, "lhu": 2, "lw": 4}
+STORE_SIZES = {"sb": 1, "sh": 2, "sw": 4}
+CSR_OPS = ["csrrw", "csrrs", "csrrc", "csrrwi", "csrrsi", "csrrci"]
+
+@dataclass
+class Instr:
+    """One instruction. Branches & jumps point to a label, resolved at layout time."""
+    op: str
+    rd: int = 0
+    rs1: int = 0
+    rs2: int = 0
+    imm: int = 0
+    csr: int = 0
+    target: str = None
+    anchor: str = None          # jalr : label of the auipc its offset is relative to
+
+@dataclass
+class Label:
+    name: str
+
+def encode(instr, pc, labels):
+    fmt, opcode, f3, f7 = OPS[instr.op]
+    imm = instr.imm
+    if instr.target is not None:
+        imm = labels[instr.target] - pc
+    if fmt == "R":
+        return (f7 << 25) | (instr.rs2 << 20) | (instr.rs1 << 15) | (f3 << 12) | (instr.rd << 7) | opcode
+    if fmt in ("I", "LOAD"):
+        return ((imm & 0xFFF) << 20) | (instr.rs1 << 15) | (f3 << 12) | (instr.rd << 7) | opcode
+    if fmt == "SHIFT":
+        return (f7 << 25) | ((imm & 0x1F) << 20) | (instr.rs1 << 15) | (f3 << 12) | (instr.rd << 7) | opcode
+    if fmt == "S":
+        return (((imm >> 5) & 0x7F) << 25) | (instr.rs2 << 20) | (instr.rs1 << 15) | (f3 << 12) | ((imm & 0x1F) << 7) | opcode
+    if fmt == "B":
+        return ((((imm >> 12) & 1) << 31) | (((imm >> 5) & 0x3F) << 25) | (instr.rs2 << 20) | (instr.rs1 << 15)
+                | (f3 << 12) | (((imm >> 1) & 0xF) << 8) | (((imm >> 11) & 1) << 7) | opcode)
+    if fmt == "U":
+        return ((imm & 0xFFFFF) << 12) | (instr.rd << 7) | opcode
+    if fmt == "J":
+        return ((((imm >> 20) & 1) << 31) | (((imm >> 1) & 0x3FF) << 21) | (((imm >> 11) & 1) << 20)
+                | (((imm >> 12) & 0xFF) << 12) | (instr.rd << 7) | opcode)
+    if fmt == "CSR":
+        return (instr.csr << 20) | (instr.rs1 << 15) | (f3 << 12) | (instr.rd << 7) | opcode
+    # CSRI : rs1 holds the 5 bits zimm
+    return (instr.csr << 20) | ((imm & 0x1F) << 15) | (f3 << 12) | (instr.rd << 7) | opcode
+
+def disassemble(instr, pc, labels):
+    """gcc syntax, branches & jal keep their labels"""
+    fmt = OPS[instr.op][0]
+    x = lambda r: f"x{r}"
+    if fmt == "R":
+        return f"{instr.op} {x(instr.rd)}, {x(instr.rs1)}, {x(instr.rs2)}"
+    if fmt in ("I", "SHIFT"):
+        return f"{instr.op} {x(instr.rd)}, {x(instr.rs1)}, {instr.imm}"
+    if fmt == "LOAD":
+        imm = labels[instr.target] - pc if instr.target is not None else instr.imm
+        return f"{instr.op} {x(instr.rd)}, {imm}({x(instr.rs1)})"
+    if fmt == "S":
+        return f"{instr.op} {x(instr.rs2)}, {instr.imm}({x(instr.rs1)})"
+    if fmt == "B":
+        return f"{instr.op} {x(instr.rs1)}, {x(instr.rs2)}, {instr.target}"
+    if fmt == "U":
+        return f"{instr.op} {x(instr.rd)}, {instr.imm & 0xFFFFF:#x}"
+    if fmt == "J":
+        return f"{instr.op} {x(instr.rd)}, {instr.target}"
+    if fmt == "CSR":
+        return f"{instr.op} {x(instr.rd)}, {instr.csr:#x}, {x(instr.rs1)}"
+    return f"{instr.op} {x(instr.rd)}, {instr.csr:#x}, {instr.imm & 0x1F}"
+
+# ==========
+# CONFIG
+# ==========
+
+DEFAULT_MIX = {
+    "alu": 20,
+    "alu_imm": 15,
+    "upper": 3,     # lui / auipc
+    "special": 3,   # load an edge case value in a register
+    "load": 15,
+    "store": 12,
+    "branch": 8,
+    "jump": 3,
+    "muldiv": 8,
+    "csr": 3,
+    "cache_op": 1,  # full flush or range clean
+    "loop": 2,      # small bounded loop (top level only)
+}
+
+@dataclass
+class ProgramConfig:
+    length: int = 2000              # instructions in the random body (loops bodies included once)
+    footprint: int = 16 * 1024      # bytes of data touched, power of 2 (the D$ is 4KiB)
+    uncached_ratio: float = 0.1     # share of loads & stores going through the non cachable path
+    dependency: float = 0.5         # probability to read a recently written register
+    max_skip: int = 8               # max instructions skipped by a forward branch / jump
+    max_loop_body: int = 24
+    max_loop_iterations: int = 8
+    mix: dict = field(default_factory=lambda: dict(DEFAULT_MIX))
+
+    @classmethod
+    def from_env(cls):
+        """RANDOM_LENGTH, RANDOM_FOOTPRINT, RANDOM_UNCACHED, RANDOM_DEPENDENCY,
+        RANDOM_BRANCHES (branch weight) & RANDOM_MIX ("load=30,store=20,...")"""
+        config = cls()
+        config.length = int(os.getenv("RANDOM_LENGTH", config.length))
+        config.footprint = int(os.getenv("RANDOM_FOOTPRINT", str(config.footprint)), 0)
+        config.uncached_ratio = float(os.getenv("RANDOM_UNCACHED", config.uncached_ratio))
+        config.dependency = float(os.getenv("RANDOM_DEPENDENCY", config.dependency))
+        if os.getenv("RANDOM_BRANCHES"):
+            config.mix["branch"] = int(os.getenv("RANDOM_BRANCHES"))
+        for item in filter(None, os.getenv("RANDOM_MIX", "").split(",")):
+            kind, weight = item.split("=")
+            if kind not in DEFAULT_MIX:
+                raise ValueError(f"Unknown RANDOM_MIX kind '{kind}', expected one of {tuple(DEFAULT_MIX)}")
+            config.mix[kind] = int(weight)
+        if config.footprint < 4 or config.footprint & (config.footprint - 1):
+            raise ValueError(f"footprint must be a power of 2, got {config.footprint}")
+        return config
+
+class GeneratorError(Exception):
+    pass
+
+# ==========
+# GENERATOR
+# ==========
+
+class RandomProgram:
+    """One random program : items (instructions & labels), initial data & expected state"""
+
+    def __init__(self, seed, config=None):
+        self.seed = seed
+        self.config = config if config else ProgramConfig()
+        self.rng = random.Random(seed)
+        self.items = []
+        self.recent = []
+        self.label_count = 0
+        region_size = self.config.footprint + OFFSET_SPAN
+        self.data_words = [self.rng.getrandbits(32) for _ in range(region_size // 4)]
+        self.uncached_words = [self.rng.getrandbits(32) for _ in range(region_size // 4)]
+        self._generate()
+        self.labels = self._layout()
+        self.words = [encode(item, self.pc_of[i], self.labels) for i, item in self._instructions()]
+        self.end_pc = self.labels["end"]
+
+    # ----- building blocks -----
+
+    def new_label(self):
+        self.label_count += 1
+        return f"L{self.label_count}"
+
+    def emit(self, instr, items):
+        items.append(instr)
+        if instr.rd and instr.rd in FREE_REGS:
+            self.recent = (self.recent + [instr.rd])[-4:]
+
+    def li(self, rd, value, items):
+        """lui + addi, no pseudo instruction so the layout is known"""
+        value &= MASK32
+        hi = ((value + 0x800) >> 12) & 0xFFFFF
+        lo = value - (hi << 12)
+        lo = ((lo + 0x800) & 0xFFF) - 0x800
+        items.append(Instr("lui", rd=rd, imm=hi))
+        items.append(Instr("addi", rd=rd, rs1=rd, imm=lo))
+
+    def src(self):
+        if self.recent and self.rng.random() < self.config.dependency:
+            return self.rng.choice(self.recent)
+        return self.rng.choice(FREE_REGS)
+
+    def dst(self):
+        return self.rng.choice(FREE_REGS)
+
+    def address(self, size, items):
+        """Returns (base register, imm) of a random aligned access in the footprint"""
+        rng = self.rng
+        base = REG_UNCACHED if rng.random() < self.config.uncached_ratio else REG_DATA
+        imm = rng.randrange(0, OFFSET_SPAN - 4, size)
+        if rng.random() < 0.3:
+            # hot spot right at the base
+            return base, imm
+        # data dependent address : base + (rs & mask) + imm
+        mask = {4: REG_MASK_WORD, 2: REG_MASK_HALF, 1: REG_MASK_BYTE}[size]
+        items.append(Instr("and", rd=REG_ADDR, rs1=self.src(), rs2=mask))
+        items.append(Instr("add", rd=REG_ADDR, rs1=REG_ADDR, rs2=base))
+        return REG_ADDR, imm
+
+    # ----- instruction kinds -----
+
+    def gen_simple(self, kind, items):
+        """One kind of the mix that does not change the control flow"""
+        rng = self.rng
+        if kind == "alu":
+            self.emit(Instr(rng.choice(ALU_OPS), rd=self.dst(), rs1=self.src(), rs2=self.src()), items)
+        elif kind == "alu_imm":
+            op = rng.choice(ALU_IMM_OPS)
+            imm = rng.randrange(32) if OPS[op][0] == "SHIFT" else rng.randrange(-2048, 2048)
+            self.emit(Instr(op, rd=self.dst(), rs1=self.src(), imm=imm), items)
+        elif kind == "upper":
+            self.emit(Instr(rng.choice(["lui", "auipc"]), rd=self.dst(), imm=rng.getrandbits(20)), items)
+        elif kind == "special":
+            rd = self.dst()
+            self.li(rd, rng.choice(SPECIAL_VALUES), items)
+            self.recent = (self.recent + [rd])[-4:]
+        elif kind == "muldiv":
+            self.emit(Instr(rng.choice(MDU_OPS), rd=self.dst(), rs1=self.src(), rs2=self.src()), items)
+        elif kind == "load":
+            op = rng.choice(list(LOAD_SIZES))
+            base, imm = self.address(LOAD_SIZES[op], items)
+            self.emit(Instr(op, rd=self.dst(), rs1=base, imm=imm), items)
+        elif kind == "store":
+            op = rng.choice(list(STORE_SIZES))
+            base, imm = self.address(STORE_SIZES[op], items)
+            items.append(Instr(op, rs1=base, rs2=self.src(), imm=imm))
+        elif kind == "csr":
+            op = rng.choice(CSR_OPS)
+            rd = self.dst() if rng.random() < 0.7 else 0
+            if OPS[op][0] == "CSRI":
+                self.emit(Instr(op, rd=rd, csr=rng.choice(SCRATCH_CSRS), imm=rng.randrange(32)), items)
+            else:
+                self.emit(Instr(op, rd=rd, csr=rng.choice(SCRATCH_CSRS), rs1=self.src()), items)
+        elif kind == "cache_op":
+            # write only (rd = x0) : these self clear on the DUT, not in the model
+            if rng.random() < 0.5:
+                items.append(Instr("csrrwi", rd=0, csr=CSR_FLUSH, imm=1))
+            else:
+                items.append(Instr("csrrwi", rd=0, csr=CSR_DATA_RANGE_OP, imm=RANGE_OP_CLEAN))
+        else:
+            raise GeneratorError(f"unknown kind {kind}")
+
+    def gen_block(self, length, items, allow_loops):
+        """length instructions worth of random mix (forward flow only, except loops)"""
+        rng = self.rng
+        mix = dict(self.config.mix)
+        if not allow_loops:
+            mix.pop("loop", None)
+        kinds = [k for k in mix if mix[k] > 0]
+        weights = [mix[k] for k in kinds]
+        simple = [k for k in kinds if k not in ("branch", "jump", "loop")]
+        simple_weights = [mix[k] for k in simple]
+
+        produced = 0
+        while produced < length:
+            kind = rng.choices(kinds, weights)[0]
+            start = len(items)
+            if kind == "branch":
+                label = self.new_label()
+                items.append(Instr(rng.choice(BRANCH_OPS), rs1=self.src(), rs2=self.src(), target=label))
+                for _ in range(rng.randint(1, self.config.max_skip)):
+                    self.gen_simple(rng.choices(simple, simple_weights)[0], items)
+                items.append(Label(label))
+            elif kind == "jump":
+                label = self.new_label()
+                if rng.random() < 0.5:
+                    self.emit(Instr("jal", rd=self.dst(), target=label), items)
+                else:
+                    # pc relative jalr : auipc t6, 0 + jalr rd, off(t6)
+                    anchor = self.new_label()
+                    items.append(Label(anchor))
+                    items.append(Instr("auipc", rd=REG_ADDR, imm=0))
+                    self.emit(Instr("jalr", rd=self.dst(), rs1=REG_ADDR, target=label, anchor=anchor), items)
+                for _ in range(rng.randint(1, self.config.max_skip)):
+                    self.gen_simple(rng.choices(simple, simple_weights)[0], items)
+                items.append(Label(label))
+            elif kind == "loop":
+                label = self.new_label()
+                items.append(Instr("addi", rd=REG_LOOP, rs1=0, imm=rng.randint(2, self.config.max_loop_iterations)))
+                items.append(Label(label))
+                self.gen_block(rng.randint(4, self.config.max_loop_body), items, allow_loops=False)
+                items.append(Instr("addi", rd=REG_LOOP, rs1=REG_LOOP, imm=-1))
+                items.append(Instr("bne", rs1=REG_LOOP, rs2=0, target=label))
+            else:
+                self.gen_simple(kind, items)
+            produced += sum(isinstance(item, Instr) for item in items[start:])
+
+    def _generate(self):
+        rng = self.rng
+        items = self.items
+        footprint_mask = self.config.footprint - 1
+        region_size = self.config.footprint + OFFSET_SPAN
+
+        items.append(Label("_start"))
+        # I$ : everything cachable
+        items.append(Instr("csrrwi", rd=0, csr=CSR_INSTR_NON_CACHABLE_BASE, imm=0))
+        items.append(Instr("csrrwi", rd=0, csr=CSR_INSTR_NON_CACHABLE_LIMIT, imm=0))
+        # D$ : only the uncached buffer is not cachable
+        self.li(REG_UNCACHED, UNCACHED_BASE, items)
+        items.append(Instr("csrrw", rd=0, csr=CSR_DATA_NON_CACHABLE_BASE, rs1=REG_UNCACHED))
+        self.li(REG_ADDR, UNCACHED_BASE + region_size, items)
+        items.append(Instr("csrrw", rd=0, csr=CSR_DATA_NON_CACHABLE_LIMIT, rs1=REG_ADDR))
+        self.li(REG_DATA, DATA_BASE, items)
+        self.li(REG_MASK_WORD, footprint_mask & ~0b11, items)
+        self.li(REG_MASK_HALF, footprint_mask & ~0b1, items)
+        self.li(REG_MASK_BYTE, footprint_mask, items)
+        for reg in FREE_REGS:
+            self.li(reg, rng.choice(SPECIAL_VALUES) if rng.random() < 0.2 else rng.getrandbits(32), items)
+
+        self.gen_block(self.config.length, items, allow_loops=True)
+
+        # dump the registers, flush the D$ and wait for the flush to
+        # be over (a load is not accepted while flushing) before parking
+        self.li(REG_ADDR, SIG_BASE, items)
+        for reg in range(1, 31):
+            items.append(Instr("sw", rs1=REG_ADDR, rs2=reg, imm=4 * reg))
+        items.append(Instr("csrrwi", rd=0, csr=CSR_FLUSH, imm=1))
+        items.append(Instr("lw", rd=REG_ADDR, rs1=REG_DATA, imm=0))
+        items.append(Label("end"))
+        items.append(Instr("jal", rd=0, target="end"))
+
+    def _instructions(self):
+        return [(i, item) for i, item in enumerate(self.items) if isinstance(item, Instr)]
+
+    def _layout(self):
+        labels = {}
+        self.pc_of = {}
+        pc = CODE_BASE
+        for i, item in enumerate(self.items):
+            if isinstance(item, Label):
+                labels[item.name] = pc
+            else:
+                self.pc_of[i] = pc
+                pc += 4
+        # jalr targets are relative to their auipc anchor
+        for i, item in self._instructions():
+            if item.anchor is not None:
+                item.imm = labels[item.target] - labels[item.anchor]
+                item.target = None
+        return labels
+
+    # ----- outputs -----
+
+    def asm(self):
+        lines = [
+            f"# HOLY CORE random program, seed {self.seed}",
+            f"# {self.config}",
+            "",
+            ".option norelax",
+            ".section .text",
+            ".global _start",
+            ""
+        ]
+        for i, item in enumerate(self.items):
+            if isinstance(item, Label):
+                lines.append(f"{item.name}:")
+            else:
+                lines.append(f"    {disassemble(item, self.pc_of[i], self.labels)}")
+        return "\n".join(lines) + "\n"
+
+    def regions(self):
+        """(name, base, initial words) of the data regions"""
+        return [
+            ("data", DATA_BASE, self.data_words),
+            ("uncached", UNCACHED_BASE, self.uncached_words),
+            ("sig", SIG_BASE, [0] * 32)
+        ]
+
+    def initial_model(self):
+        """RefModel with the program & data loaded, ready to run from CODE_BASE"""
+        ref = RefModel(reset_pc=CODE_BASE)
+        for addr, word in zip(range(CODE_BASE, CODE_BASE + 4 * len(self.words), 4), self.words):
+            ref.mem[addr >> 2] = word
+        for _, base, words in self.regions():
+            for k, word in enumerate(words):
+                ref.mem[(base >> 2) + k] = word
+        return ref
+
+    def reference(self, max_steps=None):
+        """Runs the program on RefModel until `end`, returns the model
+        (self.executed : number of instructions it took)"""
+        ref = self.initial_model()
+        max_steps = max_steps if max_steps else 10 * len(self.words) * self.config.max_loop_iterations
+        self.executed = 0
+        while ref.pc != self.end_pc:
+            ret = ref.step()
+            self.executed += 1
+            if ret.trap is not None:
+                raise GeneratorError(f"seed {self.seed} : trap {ret.trap:#x} at pc {ret.pc:#010x}")
+            if self.executed > max_steps:
+                raise GeneratorError(f"seed {self.seed} : end not reached after {max_steps} instructions")
+        return ref
+
+    def write(self, out_dir, name=None):
+        """Writes <name>.s, <name>.hex & one <name>_<region>.hex per data region"""
+        name = name if name else f"random_{self.seed}"
+        os.makedirs(out_dir, exist_ok=True)
+        with open(os.path.join(out_dir, f"{name}.s"), "w") as f:
+            f.write(self.asm())
+        with open(os.path.join(out_dir, f"{name}.hex"), "w") as f:
+            f.write("".join(f"{word:08x}\n" for word in self.words))
+        for region, base, words in self.regions():
+            with open(os.path.join(out_dir, f"{name}_{region}.hex"), "w") as f:
+                f.write(f"// {base:#010x}\n")
+                f.write("".join(f"{word:08x}\n" for word in words))
+        return os.path.join(out_dir, name)
+
+def main():
+    parser = argparse.ArgumentParser(description="HOLY CORE constrained random program generator")
+    parser.add_argument("--seed", type=int, default=0, help="first seed")
+    parser.add_argument("--count", type=int, default=1, help="number of programs (consecutive seeds)")
+    parser.add_argument("--out", default="random_programs", help="output directory")
+    args = parser.parse_args()
+
+    config = ProgramConfig.from_env()
+    for seed in range(args.seed, args.seed + args.count):
+        program = RandomProgram(seed, config)
+        program.reference()
+        path = program.write(args.out)
+        print(f"{path} : {len(program.words)} instructions, {program.executed} executed")
+
+if __name__ == "__main__":
+    main()
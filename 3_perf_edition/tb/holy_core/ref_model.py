@@ -0,0 +1,382 @@
+# HOLY CORE REFERENCE MODEL
+#
+# A tiny RV32IM + Zicsr instruction set simulator used as
+# the golden model for the lock-step co-simulation checker
+# (see cosim.py). It only models what the HOLY CORE claims
+# to support : M-mode only, no misaligned accesses, unknown
+# CSRs read as 0 (like csr_file.sv does).
+#
+# It is not meant to be fast, it is meant to be easy to read
+# and easy to compare against spike logs.
+#
+# BRH 10/26
+
+from dataclasses import dataclass
+
+MASK32 = 0xFFFFFFFF
+
+# CSR reset values, mirrors csr_file.sv reset block
+CSR_RESET = {
+    0x300: 0x00001800,  # mstatus
+    0x301: 0x40140100,  # misa
+    0x304: 0x00000000,  # mie
+    0x344: 0x00000000,  # mip
+    0x305: 0x00000000,  # mtvec
+    0x341: 0x00000000,  # mepc
+    0x342: 0x00000000,  # mcause
+    0x343: 0x00000000,  # mtval
+    0x340: 0x00000000,  # mscratch
+    0x7B0: 0x00000000,  # dcsr
+    0x7B1: 0x00000000,  # dpc
+    0x7B2: 0x00000000,  # dscratch0
+    0x7B3: 0x00000000,  # dscratch1
+    0x7C0: 0x00000000,  # flush_cache
+    0x7C1: 0x00000000,  # data_non_cachable_base
+    0x7C2: 0xFFFFFFFF,  # data_non_cachable_limit
+    0x7C3: 0x00000000,  # instr_non_cachable_base
+    0x7C4: 0xFFFFFFFF,  # instr_non_cachable_limit
+    0x7C5: 0x00000000,  # instr_lock_base
+    0x7C6: 0x00000000,  # instr_lock_limit
+    0x7C7: 0x00000000,  # data_range_base
+    0x7C8: 0x00000000,  # data_range_limit
+    0x7C9: 0x00000000,  # data_range_op
+}
+
+# mcause exception codes
+CAUSE_MISALIGNED_FETCH  = 0
+CAUSE_ILLEGAL_INSTR     = 2
+CAUSE_BREAKPOINT        = 3
+CAUSE_MISALIGNED_LOAD   = 4
+CAUSE_MISALIGNED_STORE  = 6
+CAUSE_ECALL_M           = 11
+
+MSTATUS_MIE  = 1 << 3
+MSTATUS_MPIE = 1 << 7
+
+
+def sext(value, bits):
+    """Sign extend a bits wide value to a python int"""
+    sign = 1 << (bits - 1)
+    return (value & (sign - 1)) - (value & sign)
+
+
+def to_signed(value):
+    return sext(value, 32)
+
+
+@dataclass
+class Retired:
+    """Architectural side effects of one retired instruction.
+    This is what gets compared between the DUT and the model."""
+    pc: int
+    instr: int
+    rd: int = 0
+    rd_val: int = 0
+    store: tuple = None         # (word aligned addr, data, byte enable), data as seen on the DUT bus
+    csr: tuple = None           # (csr addr, written value)
+    csr_read: int = None        # csr addr read by the instruction (if any)
+    trap: int = None            # mcause if the instruction trapped
+    mmio: bool = False          # True if the access hit an mmio range (value not modelled)
+
+
+class _Trap(Exception):
+    def __init__(self, cause, tval=0):
+        self.cause = cause
+        self.tval = tval & MASK32
+
+
+class RefModel:
+    """RV32IM golden model. Memory is a sparse dict of 32 bits words."""
+
+    def __init__(self, reset_pc=0x0, mmio_ranges=()):
+        self.pc = reset_pc
+        self.x = [0] * 32
+        self.csrs = dict(CSR_RESET)
+        self.mem = {}
+        # list of (base, limit) tuples, limit excluded
+        self.mmio_ranges = list(mmio_ranges)
+
+    # ==========
+    # MEMORY
+    # ==========
+
+    def load_hex(self, hexfile, base_addr):
+        """Same format as the init_memory() testbench helper : one 32 bits word per line"""
+        addr = base_addr
+        with open(hexfile, "r") as file:
+            for raw_word in file:
+                str_word = raw_word.split("/")[0].strip()
+                if not str_word:
+                    continue
+                self.mem[(addr >> 2) & 0x3FFFFFFF] = int(str_word, 16)
+                addr += 4
+
+    def read_word(self, addr):
+        return self.mem.get((addr >> 2) & 0x3FFFFFFF, 0)
+
+    def write_word(self, addr, data, byte_enable):
+        mask = 0
+        for i in range(4):
+            if byte_enable >> i & 1:
+                mask |= 0xFF << (8 * i)
+        key = (addr >> 2) & 0x3FFFFFFF
+        self.mem[key] = (self.mem.get(key, 0) & ~mask) | (data & mask)
+
+    def is_mmio(self, addr):
+        return any(base <= addr < limit for base, limit in self.mmio_ranges)
+
+    # ==========
+    # TRAPS
+    # ==========
+
+    def _enter_trap(self, cause, tval=None):
+        mstatus = self.csrs[0x300]
+        # save MIE in MPIE and clear MIE
+        mstatus = (mstatus & ~MSTATUS_MPIE) | (MSTATUS_MPIE if mstatus & MSTATUS_MIE else 0)
+        mstatus &= ~MSTATUS_MIE
+        self.csrs[0x300] = mstatus
+        self.csrs[0x341] = self.pc
+        self.csrs[0x342] = cause & MASK32
+        if tval is not None:
+            self.csrs[0x343] = tval
+        self.pc = self.trap_target(cause)
+
+    def trap_target(self, cause):
+        """mtvec MODE 0 (direct) : every trap goes to BASE,
+        MODE 1 (vectored) : interrupts go to BASE + 4*cause."""
+        mtvec = self.csrs[0x305]
+        base = mtvec & ~0b11 & MASK32
+        if (mtvec & 0b11) == 1 and cause >> 31:
+            return (base + 4 * (cause & 0x7FFFFFFF)) & MASK32
+        return base
+
+    def take_interrupt(self, code):
+        """Interrupts are asynchronous : the checker injects them when the DUT takes one."""
+        self._enter_trap((1 << 31) | code)
+
+    # ==========
+    # CSRs
+    # ==========
+
+    def read_csr(self, addr):
+        return self.csrs.get(addr, 0)
+
+    def write_csr(self, addr, value):
+        if addr == 0x301:
+            return # misa is read only
+        if addr in self.csrs:
+            self.csrs[addr] = value & MASK32
+
+    # ==========
+    # EXECUTION
+    # ==========
+
+    def step(self):
+        """Execute one instruction and return its Retired record."""
+        pc = self.pc
+        instr = self.read_word(pc)
+        ret = Retired(pc=pc, instr=instr)
+        try:
+            self.pc = self._execute(instr, pc, ret)
+        except _Trap as t:
+            # no architectural side effect on a trapping instruction
+            ret.rd, ret.rd_val, ret.store, ret.csr = 0, 0, None, None
+            ret.trap = t.cause
+            self.pc = pc
+            self._enter_trap(t.cause, t.tval)
+        return ret
+
+    def _write_rd(self, ret, rd, value):
+        if rd != 0:
+            value &= MASK32
+            self.x[rd] = value
+            ret.rd = rd
+            ret.rd_val = value
+
+    def _execute(self, instr, pc, ret):
+        opcode = instr & 0x7F
+        rd = (instr >> 7) & 0x1F
+        f3 = (instr >> 12) & 0x7
+        rs1 = (instr >> 15) & 0x1F
+        rs2 = (instr >> 20) & 0x1F
+        f7 = (instr >> 25) & 0x7F
+        a = self.x[rs1]
+        b = self.x[rs2]
+
+        imm_i = sext(instr >> 20, 12)
+        imm_s = sext(((instr >> 25) << 5) | ((instr >> 7) & 0x1F), 12)
+        imm_b = sext((((instr >> 31) & 1) << 12) | (((instr >> 7) & 1) << 11)
+                     | (((instr >> 25) & 0x3F) << 5) | (((instr >> 8) & 0xF) << 1), 13)
+        imm_u = instr & 0xFFFFF000
+        imm_j = sext((((instr >> 31) & 1) << 20) | (((instr >> 12) & 0xFF) << 12)
+                     | (((instr >> 20) & 1) << 11) | (((instr >> 21) & 0x3FF) << 1), 21)
+
+        next_pc = (pc + 4) & MASK32
+
+        if opcode == 0b0110111:     # LUI
+            self._write_rd(ret, rd, imm_u)
+
+        elif opcode == 0b0010111:   # AUIPC
+            self._write_rd(ret, rd, pc + imm_u)
+
+        elif opcode == 0b1101111:   # JAL
+            target = (pc + imm_j) & MASK32
+            if target & 0b11:
+                raise _Trap(CAUSE_MISALIGNED_FETCH, target)
+            self._write_rd(ret, rd, pc + 4)
+            next_pc = target
+
+        elif opcode == 0b1100111 and f3 == 0:  # JALR
+            target = (a + imm_i) & MASK32 & ~1
+            if target & 0b11:
+                raise _Trap(CAUSE_MISALIGNED_FETCH, target)
+            self._write_rd(ret, rd, pc + 4)
+            next_pc = target
+
+        elif opcode == 0b1100011:   # BRANCHES
+            sa, sb = to_signed(a), to_signed(b)
+            if f3 == 0b000:   taken = a == b
+            elif f3 == 0b001: taken = a != b
+            elif f3 == 0b100: taken = sa < sb
+            elif f3 == 0b101: taken = sa >= sb
+            elif f3 == 0b110: taken = a < b
+            elif f3 == 0b111: taken = a >= b
+            else:
+                raise _Trap(CAUSE_ILLEGAL_INSTR, instr)
+            if taken:
+                target = (pc + imm_b) & MASK32
+                if target & 0b11:
+                    raise _Trap(CAUSE_MISALIGNED_FETCH, target)
+                next_pc = target
+
+        elif opcode == 0b0000011:   # LOADS
+            addr = (a + imm_i) & MASK32
+            if f3 not in (0b000, 0b001, 0b010, 0b100, 0b101):
+                raise _Trap(CAUSE_ILLEGAL_INSTR, instr)
+            size = 1 << (f3 & 0b11)
+            if addr & (size - 1):
+                raise _Trap(CAUSE_MISALIGNED_LOAD, addr)
+            ret.mmio = self.is_mmio(addr)
+            raw = self.read_word(addr) >> (8 * (addr & 0b11))
+            if f3 == 0b000:   value = sext(raw & 0xFF, 8)
+            elif f3 == 0b001: value = sext(raw & 0xFFFF, 16)
+            elif f3 == 0b010: value = raw
+            elif f3 == 0b100: value = raw & 0xFF
+            else:             value = raw & 0xFFFF
+            self._write_rd(ret, rd, value)
+
+        elif opcode == 0b0100011:   # STORES
+            addr = (a + imm_s) & MASK32
+            if f3 not in (0b000, 0b001, 0b010):
+                raise _Trap(CAUSE_ILLEGAL_INSTR, instr)
+            size = 1 << f3
+            if addr & (size - 1):
+                raise _Trap(CAUSE_MISALIGNED_STORE, addr)
+            offset = addr & 0b11
+            # same shape as load_store_decoder.sv outputs
+            byte_enable = ((1 << size) - 1) << offset
+            data = ((b & ((1 << (8 * size)) - 1)) << (8 * offset)) & MASK32
+            ret.store = (addr & ~0b11, data, byte_enable)
+            ret.mmio = self.is_mmio(addr)
+            self.write_word(addr, data, byte_enable)
+
+        elif opcode == 0b0010011:   # I-TYPE ALU
+            shamt = (instr >> 20) & 0x1F
+            if f3 == 0b000:   value = a + imm_i
+            elif f3 == 0b010: value = int(to_signed(a) < imm_i)
+            elif f3 == 0b011: value = int(a < (imm_i & MASK32))
+            elif f3 == 0b100: value = a ^ (imm_i & MASK32)
+            elif f3 == 0b110: value = a | (imm_i & MASK32)
+            elif f3 == 0b111: value = a & (imm_i & MASK32)
+            elif f3 == 0b001 and f7 == 0x00: value = a << shamt
+            elif f3 == 0b101 and f7 == 0x00: value = a >> shamt
+            elif f3 == 0b101 and f7 == 0x20: value = to_signed(a) >> shamt
+            else:
+                raise _Trap(CAUSE_ILLEGAL_INSTR, instr)
+            self._write_rd(ret, rd, value)
+
+        elif opcode == 0b0110011:   # R-TYPE
+            if f7 == 0b0000001:
+                value = self._muldiv(f3, a, b)
+            else:
+                shamt = b & 0x1F
+                op = (f7, f3)
+                if op == (0x00, 0b000):   value = a + b
+                elif op == (0x20, 0b000): value = a - b
+                elif op == (0x00, 0b001): value = a << shamt
+                elif op == (0x00, 0b010): value = int(to_signed(a) < to_signed(b))
+                elif op == (0x00, 0b011): value = int(a < b)
+                elif op == (0x00, 0b100): value = a ^ b
+                elif op == (0x00, 0b101): value = a >> shamt
+                elif op == (0x20, 0b101): value = to_signed(a) >> shamt
+                elif op == (0x00, 0b110): value = a | b
+                elif op == (0x00, 0b111): value = a & b
+                else:
+                    raise _Trap(CAUSE_ILLEGAL_INSTR, instr)
+            self._write_rd(ret, rd, value)
+
+        elif opcode == 0b0001111:   # FENCE
+            # nop on the HOLY CORE, fence.i (Zifencei) is not supported
+            if f3 != 0b000:
+                raise _Trap(CAUSE_ILLEGAL_INSTR, instr)
+
+        elif opcode == 0b1110011:   # SYSTEM
+            if f3 == 0b000:
+                funct12 = instr >> 20
+                if funct12 == 0x000:
+                    raise _Trap(CAUSE_ECALL_M, 0)
+                elif funct12 == 0x001:
+                    raise _Trap(CAUSE_BREAKPOINT, pc)
+                elif funct12 == 0x302:  # MRET
+                    mstatus = self.csrs[0x300]
+                    mstatus = (mstatus & ~MSTATUS_MIE) | (MSTATUS_MIE if mstatus & MSTATUS_MPIE else 0)
+                    self.csrs[0x300] = mstatus | MSTATUS_MPIE
+                    next_pc = self.csrs[0x341]
+                elif funct12 == 0x105:  # WFI (nop)
+                    pass
+                else:
+                    raise _Trap(CAUSE_ILLEGAL_INSTR, instr)
+            elif f3 in (0b001, 0b010, 0b011, 0b101, 0b110, 0b111):
+                csr_addr = instr >> 20
+                src = rs1 if f3 & 0b100 else a  # zimm or rs1 value
+                old = self.read_csr(csr_addr)
+                if f3 & 0b11 == 0b01:   new = src
+                elif f3 & 0b11 == 0b10: new = old | src
+                else:                   new = old & ~src
+                self.write_csr(csr_addr, new)
+                ret.csr = (csr_addr, new & MASK32)
+                ret.csr_read = csr_addr
+                self._write_rd(ret, rd, old)
+            else:
+                raise _Trap(CAUSE_ILLEGAL_INSTR, instr)
+
+        else:
+            raise _Trap(CAUSE_ILLEGAL_INSTR, instr)
+
+        return next_pc
+
+    @staticmethod
+    def _muldiv(f3, a, b):
+        sa, sb = to_signed(a), to_signed(b)
+        if f3 == 0b000: return sa * sb
+        if f3 == 0b001: return (sa * sb) >> 32
+        if f3 == 0b010: return (sa * b) >> 32
+        if f3 == 0b011: return (a * b) >> 32
+        if f3 == 0b100:  # DIV
+            if b == 0:
+                return MASK32
+            if sa == -(1 << 31) and sb == -1:
+                return a
+            q = abs(sa) // abs(sb)
+            return q if (sa < 0) == (sb < 0) else -q
+        if f3 == 0b101:  # DIVU
+            return MASK32 if b == 0 else a // b
+        if f3 == 0b110:  # REM
+            if b == 0:
+                return a
+            if sa == -(1 << 31) and sb == -1:
+                return 0
+            r = abs(sa) % abs(sb)
+            return -r if sa < 0 else r
+        # REMU
+        return a if b == 0 else a % b
@@ -13,13 +13,18 @@
 # BRH 10/24
 
 import cocotb
-from cocotb.clock import Clock
 from cocotb.triggers import RisingEdge, Timer
 import random
 from cocotbext.axi import AxiBus, AxiRam, AxiLiteBus, AxiLiteRam
 import numpy as np
+import sys
+from pathlib import Path
+from ref_model import RefModel
+from cosim import CosimChecker, cosim_enabled
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from hc_tb import CoreProbe, ArchState, StateTrace, RetireMonitor, state_trace_enabled, cpu_reset, inst_clocks, load_hex, load_words, read_words
 
-CPU_PERIOD = 10
 DEADLOCK_MAX = 10_000
 
 # CACHE STATES CST
@@ -39,51 +44,29 @@ LITE_RECEIVING_READ_DATA    = 0b1010
 # STRESS TEST RELATED
 STRESS_TEST_TIMEOUT = 200_000
 
+# DEBUG RELATED
+EBREAK = 0x00100073
+CSRW_INSTR_NON_CACHABLE_BASE = 0x7C329073 # csrrw x0, 0x7c3, t0 (set_i_cache in test.s)
+
+def icache_word(dut, addr):
+    """Word cached by the I$ at addr, None if its line is not cached"""
+    i_cache = dut.core.instr_cache
+    num_sets = len(i_cache.cache_data_way0)
+    words_per_line = len(i_cache.cache_data_way0[0])
+    line = addr // (4 * words_per_line)
+    set_idx, tag, word = line % num_sets, line // num_sets, (addr >> 2) % words_per_line
+    for way, data in enumerate([i_cache.cache_data_way0, i_cache.cache_data_way1]):
+        if int(i_cache.cache_valid[way][set_idx].value) and int(i_cache.cache_tags[way][set_idx].value) == tag:
+            return int(data[set_idx][word].value)
+    return None
+
 async def NextInstr(dut):
     """Wait for the next instruction to be **fetched**"""
-    start_pc = dut.core.pc.value
-    while dut.core.pc.value == start_pc or dut.core.stall.value == 1:
-        await Timer(1, units="ns")
-
-def binary_to_hex(bin_str):
-    # Convert binary string to hexadecimal
-    hex_str = hex(int(str(bin_str), 2))[2:]
-    hex_str = hex_str.zfill(8)
-    return hex_str.upper()
-
-def hex_to_bin(hex_str):
-    # Convert hex str to bin
-    bin_str = bin(int(str(hex_str), 16))[2:]
-    bin_str = bin_str.zfill(32)
-    return bin_str.upper()
-
-def read_cache(cache_data, line) :
-    """To read cache_data, because the packed array makes it an array of bits..."""
-    l = 127 - line
-    return (int(str(cache_data.value[32*l:(32*l)+31]),2))
-
-async def cpu_reset(dut):
-    # Init and reset
-    dut.rst_n.value = 0
-    await Timer(1, units="ns")
-    await RisingEdge(dut.clk)     # Wait for a clock edge after reset
-    dut.rst_n.value = 1           # De-assert reset
-    await RisingEdge(dut.clk)     # Wait for a clock edge after reset
-
-async def inst_clocks(dut):
-    """this instantiates the axi environement & clocks"""
-    cocotb.start_soon(Clock(dut.clk, CPU_PERIOD, units="ns").start())
-
-async def init_memory(axi_ram : AxiRam, hexfile, base_addr):
-    addr_offset = 0
-    with open(hexfile, "r") as file:
-        for raw_instruction in file :
-            addr = addr_offset + base_addr
-            str_instruction = raw_instruction.split("/")[0].strip()
-            instruction = int(str_instruction, 16).to_bytes(4,'little')
-            axi_ram.write(addr, instruction)
-            axi_ram.hexdump(addr,4)
-            addr_offset += 4
+    core = CoreProbe.of(dut)
+    settle = Timer(1, unit="ns")
+    start_pc = core.pc
+    while core.pc == start_pc or core.stall == 1:
+        await settle
 
 @cocotb.test()
 async def cpu_insrt_test(dut):
@@ -127,15 +110,28 @@ async def cpu_insrt_test(dut):
     axi_lite_ram_slave = AxiLiteRam(AxiLiteBus.from_prefix(dut, "m_axi_lite"), dut.clk, dut.rst_n, size=SIZE, reset_active_level=False)
 
     await cpu_reset(dut)
+    # cached handles, integer reads of pc / instruction / stall / registers
+    core = CoreProbe.of(dut)
 
     DATA_INIT_BASE_ADDR = 0x100_000
-    print("init axi ram")
-    await init_memory(axi_ram_slave, "./test.hex", 0x0000)
-    await init_memory(axi_ram_slave, "./test_dmemory.hex", DATA_INIT_BASE_ADDR)
-    print("init axi lite ram")
-    await init_memory(axi_lite_ram_slave, "./test.hex", 0x0000)
-    await init_memory(axi_lite_ram_slave, "./test_dmemory.hex", DATA_INIT_BASE_ADDR)
+    print("init axi & axi lite rams")
+    load_hex([axi_ram_slave, axi_lite_ram_slave], "./test.hex", 0x0000)
+    load_hex([axi_ram_slave, axi_lite_ram_slave], "./test_dmemory.hex", DATA_INIT_BASE_ADDR)
+
+    # optional lock-step co-simulation (COSIM=1) against the reference model.
+    # CLINT and PLIC registers are not modelled, their reads are trusted.
+    if cosim_enabled():
+        ref = RefModel(mmio_ranges=[(0x4000_0000, 0x8000_0000), (0x9000_0000, 0x1_0000_0000)])
+        ref.load_hex("./test.hex", 0x0000)
+        ref.load_hex("./test_dmemory.hex", DATA_INIT_BASE_ADDR)
+        cocotb.start_soon(CosimChecker(dut, ref).run())
 
+    # optional trace (STATE_TRACE=1) of the registers & CSRs changed by every instruction
+    if state_trace_enabled():
+        RetireMonitor(dut, [StateTrace(dut).retired]).start()
+
+    # GPRs & CSRs snapshots, to check what an instruction changed
+    state = ArchState(dut)
 
     ##################
     # SAVE BASE ADDR IN X3
@@ -145,14 +141,14 @@ async def cpu_insrt_test(dut):
 
     # wait for 1st instruction to apprear : 001001b7 or # lui x3 0x100
     for _ in range(DEADLOCK_MAX):
-        if dut.core.instruction.value == 0x001001b7:
+        if core.instruction == 0x001001b7:
             break
         await RisingEdge(dut.clk)
 
     # Wait a clock cycle for the instruction to execute
     await NextInstr(dut) # lui x3 0x1
     # Check the value of reg x18
-    assert binary_to_hex(dut.core.regfile.registers[3].value) == "00100000"
+    assert core.reg(3) == 0x00100000
 
     ##################
     # LOAD WORD TEST 
@@ -164,12 +160,13 @@ async def cpu_insrt_test(dut):
     # dmem @ adress 0x00000008 that happens to be 0xDEADBEEF into register x18
 
     # Wait for the cache to retrieve data
-    while(dut.core.stall.value == 1) :
+    while(core.stall == 1) :
         await RisingEdge(dut.clk)
 
-    assert binary_to_hex(dut.core.instruction.value) == "0081A903"
+    assert core.instruction == 0x0081A903
+    state.update()
     await NextInstr(dut) # lw x18 0x8(x3)
-    assert binary_to_hex(dut.core.regfile.registers[18].value) == "DEADBEEF"
+    state.expect_changes(x18=0xDEADBEEF)
 
     ##################
     # STORE WORD TEST 
@@ -201,12 +198,12 @@ async def cpu_insrt_test(dut):
     # Expected result of x18 + x19
     expected_result = (0xDEADBEEF + 0x00000AAA) & 0xFFFFFFFF
         
+    state.update()
     await NextInstr(dut)  # lw x19 0x10(x3)
-
-    assert binary_to_hex(dut.core.regfile.registers[19].value) == "00000AAA"
+    state.expect_changes(x19=0x00000AAA)
 
     await NextInstr(dut) # add x20 x18 x19
-    assert dut.core.regfile.registers[20].value == expected_result
+    state.expect_changes(x20=expected_result)
 
     ##################
     # AND TEST
@@ -217,7 +214,7 @@ async def cpu_insrt_test(dut):
     # Use last expected result, as this instr uses last op result register
     expected_result = expected_result & 0xDEADBEEF
     await NextInstr(dut) # and x21 x18 x20
-    assert binary_to_hex(dut.core.regfile.registers[21].value) == "DEAD8889"
+    state.expect_changes(x21=0xDEAD8889)
 
     ##################
     # OR TEST
@@ -230,13 +227,13 @@ async def cpu_insrt_test(dut):
     await Timer(1, units="ns")
 
     await NextInstr(dut) # lw x5 0x14(x3) | x5  <= 125F552D
-    assert binary_to_hex(dut.core.regfile.registers[5].value) == "125F552D"
+    state.expect_changes(x5=0x125F552D)
 
     await NextInstr(dut) # lw x6 0x18(x3) | x6  <= 7F4FD46A
-    assert binary_to_hex(dut.core.regfile.registers[6].value) == "7F4FD46A"
+    state.expect_changes(x6=0x7F4FD46A)
 
     await NextInstr(dut) # or x7 x5 x6    | x7  <= 7F5FD56F
-    assert binary_to_hex(dut.core.regfile.registers[7].value) == "7F5FD56F"
+    state.expect_changes(x7=0x7F5FD56F)
 
     ##################
     # BEQ TEST
@@ -254,13 +251,13 @@ async def cpu_insrt_test(dut):
     await NextInstr(dut) # beq x6 x7 NOT TAKEN
 
     await NextInstr(dut) # lw x22 0x8(x3)
-    assert binary_to_hex(dut.core.regfile.registers[22].value) == "DEADBEEF"
+    assert core.reg(22) == 0xDEADBEEF
 
     assert dut.core.control_unit.branch.value == 1
     await NextInstr(dut) # beq x18 x22 TAKEN
 
     await NextInstr(dut) # lw x22 0x0(x3)
-    assert binary_to_hex(dut.core.regfile.registers[22].value) == "AEAEAEAE"
+    assert core.reg(22) == 0xAEAEAEAE
 
     await NextInstr(dut) # beq x22 x22 -0x8 TAKEN
 
@@ -282,7 +279,7 @@ async def cpu_insrt_test(dut):
     await NextInstr(dut) # jal x1 (to lw instruction below)
     
     await NextInstr(dut) # lw x7 0xC(x3)
-    assert binary_to_hex(dut.core.regfile.registers[7].value) == "DEADBEEF"
+    assert core.reg(7) == 0xDEADBEEF
     
     ##################
     # ADDI TEST
@@ -292,11 +289,11 @@ async def cpu_insrt_test(dut):
     print("\n\nTESTING ADDI\n\n")
 
     # Check test's init state
-    assert binary_to_hex(dut.core.instruction.value) == "1AB38D13"
-    assert not binary_to_hex(dut.core.regfile.registers[26].value) == "DEADC09A"
+    assert core.instruction == 0x1AB38D13
+    assert not core.reg(26) == 0xDEADC09A
 
     await NextInstr(dut) # addi x26 x7 0x1AB
-    assert binary_to_hex(dut.core.regfile.registers[26].value) == "DEADC09A"
+    assert core.reg(26) == 0xDEADC09A
 
     await NextInstr(dut) # NOP
 
@@ -307,12 +304,12 @@ async def cpu_insrt_test(dut):
     print("\n\nTESTING AUIPC\n\n")
 
     # Check test's init state
-    while not binary_to_hex(dut.core.instruction.value) == "1F1FA297":
+    while not core.instruction == 0x1F1FA297:
         await Timer(1, units="ns")
 
-    test_pc = (0x1F1FA << 12) + int(dut.core.pc.value)
+    test_pc = (0x1F1FA << 12) + core.pc
     await NextInstr(dut) # auipc x5 0x1F1FA
-    assert int(dut.core.regfile.registers[5].value) == test_pc
+    assert core.reg(5) == test_pc
 
     ##################
     # LUI TEST
@@ -321,12 +318,12 @@ async def cpu_insrt_test(dut):
     print("\n\nTESTING LUI\n\n")
 
     # Check test's init state
-    while(dut.core.stall.value == 1) :
+    while(core.stall == 1) :
         await RisingEdge(dut.clk)
-    assert binary_to_hex(dut.core.instruction.value) == "2F2FA2B7"
+    assert core.instruction == 0x2F2FA2B7
 
     await NextInstr(dut) # lui x5 0x2F2FA 
-    assert binary_to_hex(dut.core.regfile.registers[5].value) == "2F2FA000"
+    assert core.reg(5) == 0x2F2FA000
 
     ##################
     # nop
@@ -337,7 +334,7 @@ async def cpu_insrt_test(dut):
     await NextInstr(dut) # nop
 
     await NextInstr(dut) # slti x23 x23 0x001
-    assert binary_to_hex(dut.core.regfile.registers[23].value) == "00000001"
+    assert core.reg(23) == 0x00000001
 
     ##################
     # nop
@@ -348,7 +345,7 @@ async def cpu_insrt_test(dut):
     await NextInstr(dut) # nop
 
     await NextInstr(dut) # sltiu x22 x19 0x001 
-    assert binary_to_hex(dut.core.regfile.registers[22].value) == "00000000"
+    assert core.reg(22) == 0x00000000
 
     ##################
     # nop
@@ -359,7 +356,7 @@ async def cpu_insrt_test(dut):
     await NextInstr(dut) # nop
 
     await NextInstr(dut) # xori x19 x18 0x000 
-    assert binary_to_hex(dut.core.regfile.registers[19].value) == binary_to_hex(dut.core.regfile.registers[18].value)
+    assert core.reg(19) == core.reg(18)
 
     ##################
     # nop
@@ -370,7 +367,7 @@ async def cpu_insrt_test(dut):
     await NextInstr(dut) # nop
 
     await NextInstr(dut) # ori x21 x20 0x000
-    assert binary_to_hex(dut.core.regfile.registers[21].value) == binary_to_hex(dut.core.regfile.registers[20].value)
+    assert core.reg(21) == core.reg(20)
 
     ##################
     # andi x18 x20 0x7FF 
@@ -380,17 +377,17 @@ async def cpu_insrt_test(dut):
     print("\n\nTESTING ANDI\n\n")
 
     # Check test's init state
-    while(dut.core.stall.value == 1) :
+    while(core.stall == 1) :
         await RisingEdge(dut.clk)
-    assert binary_to_hex(dut.core.instruction.value) == "7FFA7913"
+    assert core.instruction == 0x7FFA7913
 
     await NextInstr(dut) # andi x18 x20 0x7FF
-    assert binary_to_hex(dut.core.regfile.registers[18].value) == "00000199"
+    assert core.reg(18) == 0x00000199
 
     await NextInstr(dut) # nop
 
     await NextInstr(dut) # andi x20 x21 0x000 
-    assert binary_to_hex(dut.core.regfile.registers[20].value) == "00000000"
+    assert core.reg(20) == 0x00000000
     
     ##################
     # slli x19 x19 0x4 
@@ -399,12 +396,12 @@ async def cpu_insrt_test(dut):
     print("\n\nTESTING SLLI\n\n")
 
     # Check test's init state
-    while(dut.core.stall.value == 1) :
+    while(core.stall == 1) :
         await RisingEdge(dut.clk)
-    assert binary_to_hex(dut.core.instruction.value) == "00499993"
+    assert core.instruction == 0x00499993
 
     await NextInstr(dut) # slli x19 x19 0x4
-    assert binary_to_hex(dut.core.regfile.registers[19].value) == "EADBEEF0"
+    assert core.reg(19) == 0xEADBEEF0
 
     await NextInstr(dut) # NOP
 
@@ -415,12 +412,12 @@ async def cpu_insrt_test(dut):
     print("\n\nTESTING SRLI\n\n")
 
     # Check test's init state
-    while(dut.core.stall.value == 1) :
+    while(core.stall == 1) :
         await RisingEdge(dut.clk)
-    assert binary_to_hex(dut.core.instruction.value) == "0049DA13"
+    assert core.instruction == 0x0049DA13
 
     await NextInstr(dut) # srli x20 x19 0x4
-    assert binary_to_hex(dut.core.regfile.registers[20].value) == "0EADBEEF"
+    assert core.reg(20) == 0x0EADBEEF
 
     await NextInstr(dut) # NOP
 
@@ -432,12 +429,12 @@ async def cpu_insrt_test(dut):
     print("\n\nTESTING SRAI\n\n")
 
     # Check test's init state
-    while(dut.core.stall.value == 1) :
+    while(core.stall == 1) :
         await RisingEdge(dut.clk)
-    assert binary_to_hex(dut.core.instruction.value) == "404ADA93"
+    assert core.instruction == 0x404ADA93
 
     await NextInstr(dut) # srai x21 x21 0x4
-    assert binary_to_hex(dut.core.regfile.registers[21].value) == "FDEADC99"
+    assert core.reg(21) == 0xFDEADC99
 
     await NextInstr(dut) # NOP
 
@@ -447,12 +444,12 @@ async def cpu_insrt_test(dut):
     print("\n\nTESTING SUB\n\n")
 
     # Check test's init state
-    while(dut.core.stall.value == 1) :
+    while(core.stall == 1) :
         await RisingEdge(dut.clk)
-    assert binary_to_hex(dut.core.instruction.value) == "412A8933"
+    assert core.instruction == 0x412A8933
 
     await NextInstr(dut) # sub x18 x21 x18
-    assert binary_to_hex(dut.core.regfile.registers[18].value) == "FDEADB00"
+    assert core.reg(18) == 0xFDEADB00
     
     ##################
     # addi x7 x0 0x8
@@ -461,15 +458,15 @@ async def cpu_insrt_test(dut):
     print("\n\nTESTING SLL\n\n")
 
     # Check test's init state
-    while(dut.core.stall.value == 1) :
+    while(core.stall == 1) :
         await RisingEdge(dut.clk)
-    assert binary_to_hex(dut.core.instruction.value) == "00800393"
+    assert core.instruction == 0x00800393
 
     await NextInstr(dut) # addi x7 x0 0x8
-    assert binary_to_hex(dut.core.regfile.registers[7].value) == "00000008"
+    assert core.reg(7) == 0x00000008
 
     await NextInstr(dut) # sll x18 x18 x7
-    assert binary_to_hex(dut.core.regfile.registers[18].value) == "EADB0000"
+    assert core.reg(18) == 0xEADB0000
     
     ##################
     # slt x17 x22 x23
@@ -477,12 +474,12 @@ async def cpu_insrt_test(dut):
     print("\n\nTESTING SLT\n\n")
 
     # Check test's init state
-    while(dut.core.stall.value == 1) :
+    while(core.stall == 1) :
         await RisingEdge(dut.clk)
-    assert binary_to_hex(dut.core.instruction.value) == "017B28B3"
+    assert core.instruction == 0x017B28B3
 
     await NextInstr(dut) # slt x17 x22 x23
-    assert binary_to_hex(dut.core.regfile.registers[17].value) == "00000001"
+    assert core.reg(17) == 0x00000001
     
     ##################
     # sltu x17 x22 x23 
@@ -490,12 +487,12 @@ async def cpu_insrt_test(dut):
     print("\n\nTESTING SLTU\n\n")
 
     # Check test's init state
-    while(dut.core.stall.value == 1) :
+    while(core.stall == 1) :
         await RisingEdge(dut.clk)
-    assert binary_to_hex(dut.core.instruction.value) == "017B38B3"
+    assert core.instruction == 0x017B38B3
 
     await NextInstr(dut) # sltu x17 x22 x23
-    assert binary_to_hex(dut.core.regfile.registers[17].value) == "00000001"
+    assert core.reg(17) == 0x00000001
     
     ##################
     # xor x17 x18 x19
@@ -503,12 +500,12 @@ async def cpu_insrt_test(dut):
     print("\n\nTESTING XOR\n\n")
 
     # Check test's init state
-    while(dut.core.stall.value == 1) :
+    while(core.stall == 1) :
         await RisingEdge(dut.clk)
-    assert binary_to_hex(dut.core.instruction.value) == "013948B3"
+    assert core.instruction == 0x013948B3
 
     await NextInstr(dut) # xor x17 x18 x19
-    assert binary_to_hex(dut.core.regfile.registers[17].value) == "0000EEF0"
+    assert core.reg(17) == 0x0000EEF0
 
     ##################
     # srl x8 x19 x7
@@ -516,12 +513,12 @@ async def cpu_insrt_test(dut):
     print("\n\nTESTING SRL\n\n")
 
     # Check test's init state
-    while(dut.core.stall.value == 1) :
+    while(core.stall == 1) :
         await RisingEdge(dut.clk)
-    assert binary_to_hex(dut.core.instruction.value) == "0079D433"
+    assert core.instruction == 0x0079D433
 
     await NextInstr(dut) # srl x8 x19 x7
-    assert binary_to_hex(dut.core.regfile.registers[8].value) == "00EADBEE"
+    assert core.reg(8) == 0x00EADBEE
 
     ##################
     # sra x8 x19 x7
@@ -529,12 +526,12 @@ async def cpu_insrt_test(dut):
     print("\n\nTESTING SRA\n\n")
 
     # Check test's init state
-    while(dut.core.stall.value == 1) :
+    while(core.stall == 1) :
         await RisingEdge(dut.clk)
-    assert binary_to_hex(dut.core.instruction.value) == "4079D433"
+    assert core.instruction == 0x4079D433
 
     await NextInstr(dut) # sra x8 x19 x7 
-    assert binary_to_hex(dut.core.regfile.registers[8].value) == "FFEADBEE"
+    assert core.reg(8) == 0xFFEADBEE
     
     ##################
     # blt x17 x8 0x8      | not taken : x8 neg (sign), x17 pos (no sign)
@@ -545,17 +542,17 @@ async def cpu_insrt_test(dut):
 
     # execute, branch should NOT be taken !
     await NextInstr(dut) # blt x17 x8 0x8
-    while(dut.core.stall.value == 1) :
+    while(core.stall == 1) :
         await RisingEdge(dut.clk)
-    assert binary_to_hex(dut.core.instruction.value) == "01144463"
+    assert core.instruction == 0x01144463
 
     # execute, branch SHOULD be taken !
     await NextInstr(dut) # blt x8 x17 0x8
-    while(dut.core.stall.value == 1) :
+    while(core.stall == 1) :
         await RisingEdge(dut.clk)
-    assert not binary_to_hex(dut.core.instruction.value) == "00C00413"
+    assert not core.instruction == 0x00C00413
     # We verify x8 value was not altered by addi instruction, because it was never meant tyo be executed (sad)
-    assert binary_to_hex(dut.core.regfile.registers[8].value) == "FFEADBEE"
+    assert core.reg(8) == 0xFFEADBEE
 
     ##################
     # bne x8 x8 0x8  
@@ -566,17 +563,17 @@ async def cpu_insrt_test(dut):
 
     # execute, branch should NOT be taken !
     await NextInstr(dut) # bne x8 x8 0x8
-    while(dut.core.stall.value == 1) :
+    while(core.stall == 1) :
         await RisingEdge(dut.clk)
-    assert binary_to_hex(dut.core.instruction.value) == "01141463"
+    assert core.instruction == 0x01141463
 
     # execute, branch SHOULD be taken !
     await NextInstr(dut) # bne x8 x17 0x8
-    while(dut.core.stall.value == 1) :
+    while(core.stall == 1) :
         await RisingEdge(dut.clk)
-    assert not binary_to_hex(dut.core.instruction.value) == "00C00413"
+    assert not core.instruction == 0x00C00413
     # We verify x8 value was not altered by addi instruction, because it was never meant tyo be executed (sad)
-    assert binary_to_hex(dut.core.regfile.registers[8].value) == "FFEADBEE"
+    assert core.reg(8) == 0xFFEADBEE
 
     ##################
     # BGE TEST
@@ -596,16 +593,16 @@ async def cpu_insrt_test(dut):
     # execute, branch should NOT be taken !
     await NextInstr(dut) # bge x8 x17 0x8 
     await NextInstr(dut) # li t0, 0x0c6
-    assert dut.core.regfile.registers[5].value == 0xc6
+    assert core.reg(5) == 0xc6
 
     # This branch SHOULD NOT be taken !
     await NextInstr(dut) # bgez t0, dummy_destination (not taken)
 
     # This branch SHOULD be taken !
     await NextInstr(dut) # bge x8 x8 0x8
-    assert not binary_to_hex(dut.core.instruction.value) == "00C00413"
+    assert not core.instruction == 0x00C00413
     # We verify x8 value was not altered by addi instruction, because it was never meant tyo be executed (sad)
-    assert binary_to_hex(dut.core.regfile.registers[8].value) == "FFEADBEE"
+    assert core.reg(8) == 0xFFEADBEE
 
     ##################
     # bltu x8 x17 0x8    
@@ -616,17 +613,17 @@ async def cpu_insrt_test(dut):
 
     # execute, branch should NOT be taken !
     await NextInstr(dut) # bltu x8 x17 0x8
-    while(dut.core.stall.value == 1) :
+    while(core.stall == 1) :
         await RisingEdge(dut.clk)
-    assert binary_to_hex(dut.core.instruction.value) == "0088E463"
+    assert core.instruction == 0x0088E463
 
     # execute, branch SHOULD be taken !
     await NextInstr(dut) # bltu x17 x8 0x8
-    while(dut.core.stall.value == 1) :
+    while(core.stall == 1) :
         await RisingEdge(dut.clk)
-    assert not binary_to_hex(dut.core.instruction.value) == "00C00413"
+    assert not core.instruction == 0x00C00413
     # We verify x8 value was not altered by addi instruction, because it was never meant tyo be executed (sad)
-    assert binary_to_hex(dut.core.regfile.registers[8].value) == "FFEADBEE"
+    assert core.reg(8) == 0xFFEADBEE
 
     ##################
     # bgeu x17 x8 0x8 
@@ -637,17 +634,17 @@ async def cpu_insrt_test(dut):
 
     # execute, branch should NOT be taken !
     await NextInstr(dut) # bgeu x17 x8 0x8
-    while(dut.core.stall.value == 1) :
+    while(core.stall == 1) :
         await RisingEdge(dut.clk)
-    assert binary_to_hex(dut.core.instruction.value) == "01147463"
+    assert core.instruction == 0x01147463
 
     # execute, branch SHOULD be taken !
     await NextInstr(dut) # bgeu x8 x17 0x8 
-    while(dut.core.stall.value == 1) :
+    while(core.stall == 1) :
         await RisingEdge(dut.clk)
-    assert not binary_to_hex(dut.core.instruction.value) == "00C00413"
+    assert not core.instruction == 0x00C00413
     # We verify x8 value was not altered by addi instruction, because it was never meant tyo be executed (sad)
-    assert binary_to_hex(dut.core.regfile.registers[8].value) == "FFEADBEE"
+    assert core.reg(8) == 0xFFEADBEE
 
     ##################
     # auipc x7 0x0    
@@ -659,22 +656,22 @@ async def cpu_insrt_test(dut):
     print("\n\nTESTING JALR\n\n")
 
     # Check test's init state
-    while not dut.core.instruction.value == 0x00000397:
+    while not core.instruction == 0x00000397:
         await Timer(2, units="ns")
 
-    test_value = int(dut.core.pc.value) + 0x10 + 4
+    test_value = core.pc + 0x10 + 4
     await NextInstr(dut) # auipc x7 0x00
     await NextInstr(dut) # addi x7 x7 0x10 
-    assert int(dut.core.regfile.registers[7].value) == test_value
+    assert core.reg(7) == test_value
 
-    while dut.core.instruction.value != 0xFFC380E7:
+    while core.instruction != 0xFFC380E7:
         await Timer(2, units="ns")
 
-    test_pc = int(dut.core.pc.value)
+    test_pc = core.pc
     await NextInstr(dut) # jalr x1  -4(x7)
     await NextInstr(dut) # nop
 
-    assert dut.core.regfile.registers[1].value == test_pc +4
+    assert core.reg(1) == test_pc +4
 
     #################
     # sb x8 0x6(x3)
@@ -708,9 +705,9 @@ async def cpu_insrt_test(dut):
     print("\n\nTESTING SH\n\n")
 
     # Check test's init state
-    while(dut.core.stall.value == 1) :
+    while(core.stall == 1) :
         await RisingEdge(dut.clk)
-    assert binary_to_hex(dut.core.instruction.value) == "00000013"
+    assert core.instruction == 0x00000013
 
     
     await NextInstr(dut) # nop
@@ -749,31 +746,31 @@ async def cpu_insrt_test(dut):
     print("\n\nTESTING LB\n\n")
 
     # Check test's init state
-    while(dut.core.stall.value == 1) :
+    while(core.stall == 1) :
         await RisingEdge(dut.clk)
-    assert binary_to_hex(dut.core.instruction.value) == "01018393"
+    assert core.instruction == 0x01018393
 
     await NextInstr(dut) # addi x7 x3 0x10 
-    # assert binary_to_hex(dut.core.regfile.registers[7].value) == "00001010"
-    assert binary_to_hex(dut.core.regfile.registers[18].value) == "EADB0000"
+    # assert core.reg(7) == 0x00001010
+    assert core.reg(18) == 0xEADB0000
 
     await NextInstr(dut) # nop
 
     await NextInstr(dut) # lb x18 -1(x7) 
-    assert binary_to_hex(dut.core.regfile.registers[18].value) == "FFFFFFDE"
+    assert core.reg(18) == 0xFFFFFFDE
 
     await NextInstr(dut) # lbu x19 -3(x7)
-    assert binary_to_hex(dut.core.regfile.registers[19].value) == "000000BE"
+    assert core.reg(19) == 0x000000BE
 
     await NextInstr(dut) # nop
 
     await NextInstr(dut) # lh x20 -6(x7)
-    assert binary_to_hex(dut.core.regfile.registers[20].value) == "FFFFDEAD"
+    assert core.reg(20) == 0xFFFFDEAD
 
     await NextInstr(dut) # nop
 
     await NextInstr(dut) # lhu x21 -6(x7)
-    assert binary_to_hex(dut.core.regfile.registers[21].value) == "0000DEAD"
+    assert core.reg(21) == 0x0000DEAD
 
     ##################
     # MUL TEST START
@@ -787,7 +784,7 @@ async def cpu_insrt_test(dut):
     await NextInstr(dut); await NextInstr(dut) # li x6, 0x1212ABCD
     await NextInstr(dut) # mul x4, x5, x6
 
-    assert dut.core.regfile.registers[4].value == (0x12345678 * 0x1212ABCD) & 0xFFFFFFFF
+    assert core.reg(4) == (0x12345678 * 0x1212ABCD) & 0xFFFFFFFF
 
     ##################
     # MULH TEST START
@@ -801,7 +798,7 @@ async def cpu_insrt_test(dut):
     await NextInstr(dut) # li x6, 0xFFFFFFFF
     await NextInstr(dut) # mulh x4, x5, x6
     # result of this simple mul signed is -5, so upper bits carry the sign (all 1s)
-    assert dut.core.regfile.registers[4].value == 0xFFFFFFFF
+    assert core.reg(4) == 0xFFFFFFFF
 
     ##################
     # MULHSU TEST START
@@ -816,7 +813,7 @@ async def cpu_insrt_test(dut):
     await NextInstr(dut) # mulhsu x4, x5, x6
 
     # x5 interpreted as signed and x6 as unsigned
-    assert dut.core.regfile.registers[4].value == ((-1 * 0xF123F123) & 0xFFFFFFFF << 32) >> 32
+    assert core.reg(4) == ((-1 * 0xF123F123) & 0xFFFFFFFF << 32) >> 32
 
     ##################
     # MULHU TEST START
@@ -827,7 +824,7 @@ async def cpu_insrt_test(dut):
     await NextInstr(dut); await NextInstr(dut) # mulhu x4, x5, x6
 
     # this time, x5 AND x6 are interpreted as unsigned, so no signext should happen and whe shoud have a raw result
-    assert dut.core.regfile.registers[4].value == ((0xFFFFFFFF * 0xF123F123) & 0xFFFFFFFF << 32) >> 32
+    assert core.reg(4) == ((0xFFFFFFFF * 0xF123F123) & 0xFFFFFFFF << 32) >> 32
     
     ##################
     # DIV TEST START
@@ -845,7 +842,7 @@ async def cpu_insrt_test(dut):
     dividend_signed = dividend - 0x100000000 if dividend >= 0x80000000 else dividend
     expected = int(dividend_signed / 3) & 0xFFFFFFFF
 
-    assert dut.core.regfile.registers[4].value == expected
+    assert core.reg(4) == expected
     assert expected == 0xFAAAAAAB
 
     ##################
@@ -855,7 +852,7 @@ async def cpu_insrt_test(dut):
     print("\n\nTESTING DIVU\n\n")
 
     await NextInstr(dut); await NextInstr(dut); await NextInstr(dut) # divu x4, x5, x6
-    assert dut.core.regfile.registers[4].value == 0xF0000000 // 3
+    assert core.reg(4) == 0xF0000000 // 3
 
     ##################
     # REM TEST START
@@ -869,7 +866,7 @@ async def cpu_insrt_test(dut):
     await NextInstr(dut) # li x5, 0xF0000005
     await NextInstr(dut) # rem x4, x5, x6
     
-    assert int(dut.core.regfile.registers[4].value) - (1 << 32) == -2
+    assert core.reg(4) - (1 << 32) == -2
 
     ##################
     # REMU TEST START
@@ -879,7 +876,7 @@ async def cpu_insrt_test(dut):
 
     await NextInstr(dut) # remu x4, x5, x6
 
-    assert dut.core.regfile.registers[4].value == 2
+    assert core.reg(4) == 2
 
     #################
     # SOFTWARE INTERRUPT TEST
@@ -897,7 +894,7 @@ async def cpu_insrt_test(dut):
     # dut.core.holy_csr_file.mstatus.value = 1 << 3
 
     # Wait until we are about to write 1 to software interrupt
-    while not binary_to_hex(dut.core.instruction.value) == "00522023":
+    while not core.instruction == 0x00522023:
         await RisingEdge(dut.clk)
     
     await NextInstr(dut) # sw x5 0(x4)
@@ -910,11 +907,11 @@ async def cpu_insrt_test(dut):
     assert dut.core.trap.value == 1 or dut.core.control_unit.trap_pending.value == 1
 
     # wait until we are about to mret
-    while not binary_to_hex(dut.core.instruction.value) == "30200073":
+    while not core.instruction == 0x30200073:
         await RisingEdge(dut.clk) # mret
 
     # check that x3° was signed with the right mcause by handler
-    assert binary_to_hex(dut.core.regfile.registers[30].value) == "80000003"
+    assert core.reg(30) == 0x80000003
     
     #################
     # TIMER INTERRUPT TEST
@@ -926,14 +923,14 @@ async def cpu_insrt_test(dut):
         await RisingEdge(dut.clk)
 
     # wait until we are about to mret
-    while not binary_to_hex(dut.core.instruction.value) == "30200073":
+    while not core.instruction == 0x30200073:
         await RisingEdge(dut.clk) # mret
 
     # timer interrupt is cleared
     assert dut.core.timer_itr.value == 0
 
     # mcause saved in x30 is the right one
-    assert binary_to_hex(dut.core.regfile.registers[30].value) == "80000007"
+    assert core.reg(30) == 0x80000007
 
     #################
     # EXTERNAL INTERRUPT TEST
@@ -946,11 +943,11 @@ async def cpu_insrt_test(dut):
     # a specific signal : a simple NOP in the trap handler.
 
     # Wait for previous mret to finish (instr cache may be pulling data)
-    while binary_to_hex(dut.core.instruction.value) == "30200073":
+    while core.instruction == 0x30200073:
         await RisingEdge(dut.clk)
 
     # wait until ext irq waiting loop
-    while not binary_to_hex(dut.core.instruction.value) == "0000006F":
+    while not core.instruction == 0x0000006F:
         await RisingEdge(dut.clk)
 
     # Introduce an external itr request in the PLIC
@@ -961,9 +958,9 @@ async def cpu_insrt_test(dut):
         await RisingEdge(dut.clk)
 
     # wait until we are about to mret
-    while not binary_to_hex(dut.core.instruction.value) == "30200073":
+    while not core.instruction == 0x30200073:
         # NOP is our placeholder to deassert the interrupt request
-        if binary_to_hex(dut.core.instruction.value) == "00000013":
+        if core.instruction == 0x00000013:
             dut.irq_in.value =  0
         await RisingEdge(dut.clk)
     
@@ -971,7 +968,7 @@ async def cpu_insrt_test(dut):
     await Timer(1, unit="ns")
     #assert dut.core.ext_itr.value == 0
     # mcause saved in x30 is the right one
-    assert binary_to_hex(dut.core.regfile.registers[30].value) == "8000000B"
+    assert core.reg(30) == 0x8000000B
 
     #################
     # ECALL EXCEPTION TEST
@@ -979,20 +976,20 @@ async def cpu_insrt_test(dut):
 
     print("\n\nTESTING ECALL IRT\n\n")
     # wait for ecall to be fetched
-    while not binary_to_hex(dut.core.instruction.value) == "00000073":
+    while not core.instruction == 0x00000073:
         await RisingEdge(dut.clk)
 
     assert dut.core.exception.value == 1
     assert dut.core.trap.value == 1
     
     # wait until we are about to mret (mret fetched)
-    while not binary_to_hex(dut.core.instruction.value) == "30200073":
+    while not core.instruction == 0x30200073:
         await RisingEdge(dut.clk)
 
     assert dut.core.exception.value == 0
     assert dut.core.trap.value == 0
 
-    #assert binary_to_hex(dut.core.regfile.registers[30].value) == "0000000B"
+    #assert core.reg(30) == 0x0000000B
 
     #################
     # DEBUG REQUEST TEST
@@ -1002,38 +999,46 @@ async def cpu_insrt_test(dut):
     assert dut.core.holy_csr_file.dscratch0.value == 0
 
     # we use this this NOP (00000013) to mark the beginning of the debug test
-    while not binary_to_hex(dut.core.instruction.value) == "00000013":
+    while not core.instruction == 0x00000013:
         await RisingEdge(dut.clk)
 
     # send a debug request
     print("\n\n==========\n\nTESTBENCH IS SENDING A DEBUG REQ TO DUT...\n\n=========\n\n")
 
     # in the test code, we pass the addres at which debug code live (assigned at link time) through register x5 (t0)
-    dut.core.debug_halt_addr.value = dut.core.regfile.registers[5].value
-    halt_value = dut.core.regfile.registers[5].value
-    dut.core.debug_exception_addr.value = dut.core.regfile.registers[6].value
+    dut.core.debug_halt_addr.value = core.reg(5)
+    halt_value = core.reg(5)
+    dut.core.debug_exception_addr.value = core.reg(6)
     await RisingEdge(dut.clk)
     await RisingEdge(dut.clk)
     dut.core.debug_req.value = 1
     await Timer(1, units="ns")
 
-    while dut.core.stall.value == 1:
+    while core.stall == 1:
         await RisingEdge(dut.clk)
 
     # wait to switch to debug mode
     print("\n\n==========\n\nTESTBENCH IS WAITING FOR CORE TO ENTER DEBUG MODE...\n\n=========\n\n")
     while not dut.core.holy_csr_file.debug_mode.value == 1:
         # save the last known pc to later check is dpc saves it well
-        pc_save = int(dut.core.pc.value)
+        pc_save = core.pc
         await RisingEdge(dut.clk)
 
     print("\n\n==========\n\nCORE ENTERED DEBUG MODE !\n\n=========\n\n")
     dut.core.debug_req.value = 0
     await Timer(1, units="ns")
 
+    # act as the debugger : while the core is halted, insert a software
+    # breakpoint (ebreak) on set_i_cache, the instruction the single step
+    # test below steps on (1st csrrw x0, 0x7c3, t0 after the park loop).
+    # Its line is in the I$ from the park loop, dret shall drop it.
+    code = read_words(axi_ram_slave, pc_save, 16)
+    step_addr = pc_save + 4 * int(np.flatnonzero(code == CSRW_INSTR_NON_CACHABLE_BASE)[0])
+    load_words([axi_ram_slave, axi_lite_ram_slave], step_addr, [EBREAK])
+
     # wait for ebreak
     print("\n\n==========\n\nWATING FOR EBREAK...\n\n=========\n\n")
-    while not binary_to_hex(dut.core.instruction.value) == "00100073":
+    while not core.instruction == 0x00100073:
         assert dut.core.holy_csr_file.debug_mode.value == 1
         await RisingEdge(dut.clk)
     
@@ -1043,11 +1048,11 @@ async def cpu_insrt_test(dut):
     # exception address within the Debug Module."
     print("\n\n==========\n\nCORE RETURNING TO PARK LOOP..\n\n=========\n\n")
     await NextInstr(dut)
-    assert int(dut.core.pc.value) == halt_value
+    assert core.pc == halt_value
 
     # wait for dret
     print("\n\n==========\n\nWAITING FOR DEBUG REUTRN...\n\n=========\n\n")
-    while not binary_to_hex(dut.core.instruction.value) == "7B200073":
+    while not core.instruction == 0x7B200073:
         assert dut.core.holy_csr_file.debug_mode.value == 1
         await RisingEdge(dut.clk)
 
@@ -1058,6 +1063,12 @@ async def cpu_insrt_test(dut):
     assert dut.core.holy_csr_file.debug_mode.value == 0
     dut.core.debug_req.value = 0
 
+    # back in the park loop : the line was dropped on dret, the I$ holds
+    # the breakpoint (or not the line at all), never the stale instruction
+    while core.pc != step_addr - 4 or core.stall == 1:
+        await Timer(1, unit="ns")
+    assert icache_word(dut, step_addr) in (EBREAK, None)
+
     #################
     # SINGLE STEP DEBUG REQUEST TEST
     #################
@@ -1089,7 +1100,7 @@ async def cpu_insrt_test(dut):
     await NextInstr(dut)
     dut.core.debug_req.value = 0
     
-    while dut.core.stall.value == 1:
+    while core.stall == 1:
         await RisingEdge(dut.clk)
 
     assert int(dut.core.holy_csr_file.dcsr.value) >> 2 & 0b1 != 1
@@ -1097,12 +1108,17 @@ async def cpu_insrt_test(dut):
     while int(dut.core.holy_csr_file.dcsr.value) >> 2 & 0b1 != 1:
         # we wait for step flag in dcsr to be set
         await RisingEdge(dut.clk)
-    
+
+    # the debugger restores the original instruction before stepping over
+    # the breakpoint, the I$ still holds the ebreak until dret
+    load_words([axi_ram_slave, axi_lite_ram_slave], step_addr, [CSRW_INSTR_NON_CACHABLE_BASE])
+    assert icache_word(dut, step_addr) in (EBREAK, None)
+
 
     # we await the 1st dret from the set_step section
     # this dret jumps to dpc which has been set to a cachable range
     # altering instruction (set_i_cache) to monitor behavior
-    while not dut.core.instruction.value == 0x7b200073:
+    while not core.instruction == 0x7b200073:
         await Timer(1, units="ns")
         
     await NextInstr(dut) # execute dret from the "set step" section
@@ -1110,6 +1126,10 @@ async def cpu_insrt_test(dut):
     # check if we exited debug mode
     assert dut.core.holy_csr_file.debug_mode.value == 0
 
+    # the stepped instruction is the restored one, not the stale ebreak
+    assert core.pc == step_addr
+    assert core.instruction == CSRW_INSTR_NON_CACHABLE_BASE
+
     await NextInstr(dut) # execute EXACTLY 1 instruction
 
     # we should be back to debug mode
@@ -1149,7 +1169,7 @@ async def cpu_insrt_test(dut):
 
     
     # Wait for stress test end (use flush cache order)
-    while not dut.core.instruction.value == 0x7c00d073:
+    while not core.instruction == 0x7c00d073:
         await RisingEdge(dut.clk)
     
     for _ in range(200):
@@ -1183,7 +1203,7 @@ async def cpu_insrt_test(dut):
     print("=" * 60 + "\n")
 
     # Wait for stress test end (use flush cache order)
-    while not dut.core.instruction.value == 0x7c00d073:
+    while not core.instruction == 0x7c00d073:
         await RisingEdge(dut.clk)
     
     for _ in range(200):
@@ -1213,7 +1233,7 @@ async def cpu_insrt_test(dut):
     print("=" * 60 + "\n")
 
     # Wait for stress test end (use flush cache order)
-    while not dut.core.instruction.value == 0x7c00d073:
+    while not core.instruction == 0x7c00d073:
         await RisingEdge(dut.clk)
     
     for _ in range(200):
@@ -1233,4 +1253,29 @@ async def cpu_insrt_test(dut):
     assert write_checksum == expected, f"Write checksum mismatch! Got {write_checksum}, expected {expected}"
     assert verify_checksum == expected, f"Verify checksum mismatch! Got {verify_checksum}, expected {expected}"
 
-    print("\n✓ Phase 3 PASSED: Jumps + large memory verified")
\ No newline at end of file
+    print("\n✓ Phase 3 PASSED: Jumps + large memory verified")
+@cocotb.test(skip="WAVE_START_CYCLE" not in cocotb.plusargs)
+async def wave_window_test(dut):
+    """TRACE=window : the FST is only opened at WAVE_START_CYCLE, e.g.
+    make TRACE=window WAVE_START_CYCLE=300 TESTCASE=wave_window_test
+    (no other WAVE_* trigger, they could open it earlier)"""
+    start = int(cocotb.plusargs["WAVE_START_CYCLE"])
+    wave_file = Path(cocotb.plusargs.get("WAVE_FILE", "window.fst"))
+    window = dut.wave_dump
+
+    await inst_clocks(dut)
+    await RisingEdge(dut.clk)
+    if int(window.cycle.value) < start:
+        # stale dump of a previous run, the window is not opened yet
+        wave_file.unlink(missing_ok=True)
+    while int(window.cycle.value) < start:
+        assert not int(window.dump_started.value), f"dump opened at cycle {int(window.dump_start_cycle.value)}"
+        assert not wave_file.exists(), f"{wave_file} created before cycle {start}"
+        await RisingEdge(dut.clk)
+    # the edge at cycle == start opens the dump
+    await RisingEdge(dut.clk)
+    await RisingEdge(dut.clk)
+    await Timer(1, unit="ns")
+    assert int(window.dump_started.value)
+    assert int(window.dump_start_cycle.value) == start
+    assert wave_file.exists()
@@ -0,0 +1,239 @@
+# HOLY_CORE INTERRUPT LATENCY HARNESS
+#
+# Measures how many cycles pass between an interrupt
+# being raised and the first instruction of its handler
+# retiring, while irq_latency.s keeps the core & caches busy.
+#
+#   - PLIC  : the tb raises a random irq_in line after a
+#             random idle time, and drops it on handler entry
+#             (a peripheral that holds its line until serviced)
+#   - CLINT : the firmware re-arms mtimecmp with random delays,
+#             the tb timestamps every timer_irq rising edge
+#
+# Timestamps are cycle indexes sampled 1ns after each rising edge
+# (same retirement point as cosim.py) :
+#   assert : first cycle the line is seen high by the logic
+#   entry  : cycle where the handler's first instruction is
+#            about to retire (stall low, pc = handler entry)
+# Every entry also checks the trap itself : mcause is the interrupt
+# and mepc the interrupted instruction (the last pc before the handler).
+#
+# Env knobs :
+#   IRQ_SAMPLES      samples per controller (default 100)
+#   IRQ_SEED         stimulus & firmware LCG seed (default random)
+#   MTVEC_MODE       0 : direct, 1 : vectored (default 0)
+#   IRQ_LATENCY_MAX  fail if any latency exceeds it (cycles)
+#   IRQ_LATENCY_CSV  dump all samples (source, assert, entry, latency)
+#
+# e.g. IRQ_SAMPLES=500 MTVEC_MODE=1 make irq_latency
+#
+# BRH 10/26
+
+import os
+import random
+import sys
+from pathlib import Path
+
+import cocotb
+import numpy as np
+from cocotb.clock import Clock
+from cocotb.triggers import RisingEdge, Timer
+from cocotbext.axi import AxiBus, AxiRam, AxiLiteBus, AxiLiteRam
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from hc_tb import cpu_reset, load_hex, load_words
+
+CPU_PERIOD = 10
+DATA_BASE_ADDR = 0x100_000
+# firmware config words (see irq_latency.s)
+CFG_SEED = 0x0
+CFG_MTVEC_MODE = 0x4
+CFG_TIMER_MIN = 0x8
+CFG_TIMER_MASK = 0xC
+
+TIMER_MIN_DELAY = 200
+TIMER_DELAY_MASK = 0x1FF
+PLIC_IDLE_CYCLES = (50, 600)
+PLIC_LINES = 2              # irq_in lines wired to the harness' PLIC
+CAUSE_TIMER = 7
+CAUSE_EXT = 11
+# per sample, way more than any sane latency
+TIMEOUT_CYCLES_PER_SAMPLE = 20_000
+HISTOGRAM_WIDTH = 50
+
+class IrqLatencyMonitor:
+    """Drives the PLIC lines and timestamps interrupt assertions & handler
+    entries, one (assert, entry) sample per taken interrupt"""
+
+    def __init__(self, dut, rng):
+        self.dut = dut
+        self.rng = rng
+        self.cycle = 0
+        self.pending = {CAUSE_TIMER: [], CAUSE_EXT: []}
+        self.samples = {CAUSE_TIMER: [], CAUSE_EXT: []}
+        self.entries = None
+        self.plic_raise_at = None
+        self._timer_irq = 0
+        # current & previous (different) pc, the previous one is the
+        # interrupted instruction when the handler is entered
+        self.pc = None
+        self.prev_pc = None
+
+    def handler_entries(self):
+        """cause -> entry pc, from the mtvec the firmware set"""
+        mtvec = int(self.dut.core.holy_csr_file.mtvec.value)
+        base = mtvec & ~0b11
+        if mtvec & 0b11 == 1:
+            return {cause: base + 4 * cause for cause in self.samples}
+        return {cause: base for cause in self.samples}
+
+    def schedule_plic(self):
+        self.plic_raise_at = self.cycle + self.rng.randint(*PLIC_IDLE_CYCLES)
+
+    def step(self):
+        """One cycle, called 1ns after the rising edge"""
+        core = self.dut.core
+        csr_file = core.holy_csr_file
+
+        pc = int(core.pc.value)
+        if pc != self.pc:
+            self.prev_pc, self.pc = self.pc, pc
+
+        timer_irq = int(self.dut.clint.timer_irq.value)
+        if timer_irq and not self._timer_irq:
+            self.pending[CAUSE_TIMER].append(self.cycle)
+        self._timer_irq = timer_irq
+
+        if self.entries is None:
+            # wait for the firmware to set mtvec before firing anything
+            if int(csr_file.mtvec.value):
+                self.entries = self.handler_entries()
+                self.schedule_plic()
+            return
+
+        # PLIC : raise a random line, sampled by the PLIC on the next edge
+        if self.plic_raise_at is not None and self.cycle >= self.plic_raise_at:
+            self.dut.irq_in.value = 1 << self.rng.randrange(PLIC_LINES)
+            self.pending[CAUSE_EXT].append(self.cycle)
+            self.plic_raise_at = None
+
+        if int(core.stall.value):
+            return
+        # mcause is already registered when the handler's 1st instruction is there
+        mcause = int(csr_file.mcause.value)
+        cause = mcause & 0x7FFF_FFFF
+        if pc in self.entries.values():
+            # entries are only reached by traps : it must be a raised interrupt
+            assert mcause >> 31 and cause in self.entries and self.pending[cause], (
+                f"unexpected trap to {pc:#010x} : mcause {mcause:#010x}"
+            )
+        if not mcause >> 31:
+            return
+        if cause in self.entries and pc == self.entries[cause] and self.pending[cause]:
+            mepc = int(csr_file.mepc.value)
+            assert mepc == self.prev_pc, (
+                f"cause {cause} : mepc {mepc:#010x}, interrupted instruction at {self.prev_pc:#010x}"
+            )
+            self.samples[cause].append((self.pending[cause].pop(0), self.cycle))
+            if cause == CAUSE_EXT:
+                # the peripheral drops its line once serviced, next one later
+                self.dut.irq_in.value = 0
+                self.schedule_plic()
+
+    async def run(self):
+        while True:
+            await RisingEdge(self.dut.clk)
+            await Timer(1, unit="ns")
+            self.cycle += 1
+            self.step()
+
+    def done(self, n_samples):
+        return all(len(samples) >= n_samples for samples in self.samples.values())
+
+    def latencies(self, cause):
+        return np.array([entry - asserted for asserted, entry in self.samples[cause]], dtype=np.int64)
+
+def histogram(latencies):
+    """ASCII histogram lines of the latency distribution"""
+    if len(latencies) == 0:
+        return []
+    lo, hi = int(latencies.min()), int(latencies.max())
+    # integer bins, at most 20 of them
+    width = -(-(hi - lo + 1) // 20)
+    edges = np.arange(lo, hi + width + 1, width)
+    counts, _ = np.histogram(latencies, bins=edges)
+    scale = HISTOGRAM_WIDTH / counts.max()
+    return [
+        f"  {edges[i]:>6} - {edges[i + 1] - 1:<6} | {'#' * int(round(count * scale)):<{HISTOGRAM_WIDTH}} {count}"
+        for i, count in enumerate(counts)
+    ]
+
+def report(dut, monitor):
+    """Logs min/p50/p99/max + histogram per controller, returns the worst latency"""
+    worst = 0
+    for cause, name in ((CAUSE_EXT, "PLIC irq_in"), (CAUSE_TIMER, "CLINT mtimecmp")):
+        lat = monitor.latencies(cause)
+        if len(lat) == 0:
+            dut._log.warning(f"{name} : no samples")
+            continue
+        p50, p99 = np.percentile(lat, [50, 99])
+        dut._log.info(
+            f"{name} -> handler entry ({len(lat)} samples) : "
+            f"min {lat.min()}  p50 {p50:.0f}  p99 {p99:.0f}  max {lat.max()}  cycles"
+        )
+        for line in histogram(lat):
+            dut._log.info(line)
+        worst = max(worst, int(lat.max()))
+    return worst
+
+def dump_csv(monitor, path):
+    with open(path, "w") as f:
+        f.write("source,assert_cycle,entry_cycle,latency\n")
+        for cause, name in ((CAUSE_EXT, "plic"), (CAUSE_TIMER, "clint")):
+            for asserted, entry in monitor.samples[cause]:
+                f.write(f"{name},{asserted},{entry},{entry - asserted}\n")
+
+@cocotb.test()
+async def irq_latency_test(dut):
+    n_samples = int(os.getenv("IRQ_SAMPLES", "100"))
+    seed = int(os.getenv("IRQ_SEED", str(random.getrandbits(32))))
+    mtvec_mode = int(os.getenv("MTVEC_MODE", "0"))
+    max_latency = os.getenv("IRQ_LATENCY_MAX")
+    dut._log.info(f"IRQ latency : {n_samples} samples / controller, seed {seed}, mtvec mode {mtvec_mode}")
+    rng = random.Random(seed)
+
+    cocotb.start_soon(Clock(dut.clk, CPU_PERIOD, unit="ns").start())
+    dut.irq_in.value = 0
+
+    SIZE = 2**32
+    axi_ram_slave = AxiRam(AxiBus.from_prefix(dut, "m_axi"), dut.clk, dut.rst_n, size=SIZE, reset_active_level=False)
+    axi_lite_ram_slave = AxiLiteRam(AxiLiteBus.from_prefix(dut, "m_axi_lite"), dut.clk, dut.rst_n, size=SIZE, reset_active_level=False)
+
+    rams = [axi_ram_slave, axi_lite_ram_slave]
+    load_hex(rams, "./irq_latency.hex", 0x0000)
+    load_words(rams, DATA_BASE_ADDR + CFG_SEED, [seed, mtvec_mode, TIMER_MIN_DELAY, TIMER_DELAY_MASK])
+
+    monitor = IrqLatencyMonitor(dut, rng)
+    await cpu_reset(dut)
+    cocotb.start_soon(monitor.run())
+
+    timeout = n_samples * TIMEOUT_CYCLES_PER_SAMPLE
+    for _ in range(timeout):
+        await RisingEdge(dut.clk)
+        if monitor.done(n_samples):
+            break
+    else:
+        report(dut, monitor)
+        assert False, (
+            f"timeout : {len(monitor.samples[CAUSE_EXT])} PLIC & {len(monitor.samples[CAUSE_TIMER])} "
+            f"CLINT samples after {timeout} cycles (pc {int(dut.core.pc.value):#010x})"
+        )
+
+    worst = report(dut, monitor)
+    if os.getenv("IRQ_LATENCY_CSV"):
+        dump_csv(monitor, os.getenv("IRQ_LATENCY_CSV"))
+
+    for cause in (CAUSE_EXT, CAUSE_TIMER):
+        assert (monitor.latencies(cause) > 0).all()
+    if max_latency is not None:
+        assert worst <= int(max_latency), f"worst case latency {worst} > IRQ_LATENCY_MAX={max_latency}"
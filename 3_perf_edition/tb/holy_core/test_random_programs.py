@@ -0,0 +1,148 @@
+# HOLY CORE RANDOM PROGRAMS TESTBENCH
+#
+# Runs constrained random programs (random_program.py) on
+# holy_test_harness, one after the other in the same simulation
+# (the build & elaboration are paid once), and compares the
+# final state against the reference model :
+#   - registers x1..x31
+#   - the cachable & non cachable data buffers and the registers
+#     dump, read back from the AXI / AXI LITE rams once the
+#     program flushed the D$
+# With COSIM=1 every retired instruction is also checked in
+# lock-step (cosim.py), pinpointing the first divergence.
+#
+# Failing programs are written to RANDOM_DUMP_DIR (.s, .hex &
+# data .hex, see random_program.py) to be replayed / debugged.
+#
+# Env knobs :
+#   RANDOM_FIRST_SEED  first seed (default random)
+#   RANDOM_SEEDS       number of programs / consecutive seeds (default 10)
+#   RANDOM_DUMP_DIR    where failing programs go (default ./random_fails)
+#   + the generator knobs : RANDOM_LENGTH, RANDOM_FOOTPRINT,
+#     RANDOM_UNCACHED, RANDOM_DEPENDENCY, RANDOM_BRANCHES, RANDOM_MIX
+#
+# Seeds are independent : shard big campaigns across processes
+# with disjoint RANDOM_FIRST_SEED ranges, e.g.
+#   RANDOM_FIRST_SEED=1000 RANDOM_SEEDS=500 make random TRACE=off
+#
+# BRH 10/26
+
+import os
+import random
+import sys
+from pathlib import Path
+
+import cocotb
+import numpy as np
+from cocotb.clock import Clock
+from cocotb.triggers import RisingEdge, Timer
+from cocotbext.axi import AxiBus, AxiRam, AxiLiteBus, AxiLiteRam
+
+from cosim import CosimChecker, cosim_enabled
+from random_program import RandomProgram, ProgramConfig, GeneratorError, CODE_BASE
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from hc_tb import CoreProbe, cpu_reset, load_words, read_words
+
+CPU_PERIOD = 10
+# cycles per executed instruction before calling it a hang (misses are slow)
+CYCLES_PER_INSTR_MAX = 200
+DRAIN_CYCLES_MIN = 10_000
+
+def compare_state(dut, program, ref, axi_ram, axi_lite_ram):
+    """Returns a list of mismatch descriptions (empty if the DUT matches the model)"""
+    errors = []
+    dut_regs = CoreProbe.of(dut).regs()
+    for reg in range(1, 32):
+        value = dut_regs[reg]
+        if value != ref.x[reg]:
+            errors.append(f"x{reg} : DUT {value:#010x} REF {ref.x[reg]:#010x}")
+    for name, base, words in program.regions():
+        # the non cachable buffer only lives in the AXI LITE ram
+        ram = axi_lite_ram if name == "uncached" else axi_ram
+        dut_words = read_words(ram, base, len(words))
+        ref_words = np.array([ref.read_word(base + 4 * k) for k in range(len(words))], dtype="<u4")
+        for k in np.flatnonzero(dut_words != ref_words)[:8]:
+            errors.append(f"{name} @ {base + 4 * k:#010x} : DUT {dut_words[k]:#010x} REF {ref_words[k]:#010x}")
+    return errors
+
+async def run_program(dut, program, rams):
+    """Resets the core, loads the program and runs it until it parks on `end`.
+    Returns (cycles, reached end)"""
+    load_words(rams, CODE_BASE, program.words)
+    for _, base, words in program.regions():
+        load_words(rams, base, words)
+    await cpu_reset(dut)
+
+    checker_task = None
+    if cosim_enabled():
+        checker = CosimChecker(dut, program.initial_model(), log_path=f"cosim_{program.seed}.log")
+        checker_task = cocotb.start_soon(checker.run())
+
+    core = CoreProbe.of(dut)
+    max_cycles = max(DRAIN_CYCLES_MIN, CYCLES_PER_INSTR_MAX * program.executed)
+    cycles = 0
+    reached = False
+    try:
+        while cycles < max_cycles:
+            await RisingEdge(dut.clk)
+            await Timer(1, unit="ns")
+            cycles += 1
+            # the epilogue only parks once its D$ flush is over
+            if core.pc == program.end_pc and not core.stall:
+                reached = True
+                break
+    finally:
+        if checker_task is not None:
+            checker_task.cancel()
+    return cycles, reached
+
+@cocotb.test()
+async def random_programs_test(dut):
+    first_seed = int(os.getenv("RANDOM_FIRST_SEED", str(random.getrandbits(31))))
+    n_seeds = int(os.getenv("RANDOM_SEEDS", "10"))
+    dump_dir = os.getenv("RANDOM_DUMP_DIR", "./random_fails")
+    config = ProgramConfig.from_env()
+    dut._log.info(f"random programs : seeds {first_seed} .. {first_seed + n_seeds - 1}, {config}")
+
+    cocotb.start_soon(Clock(dut.clk, CPU_PERIOD, unit="ns").start())
+    SIZE = 2**32
+    axi_ram_slave = AxiRam(AxiBus.from_prefix(dut, "m_axi"), dut.clk, dut.rst_n, size=SIZE, reset_active_level=False)
+    axi_lite_ram_slave = AxiLiteRam(AxiLiteBus.from_prefix(dut, "m_axi_lite"), dut.clk, dut.rst_n, size=SIZE, reset_active_level=False)
+    rams = [axi_ram_slave, axi_lite_ram_slave]
+
+    failed = []
+    total_instr = 0
+    total_cycles = 0
+    previous_code_size = 0
+    for seed in range(first_seed, first_seed + n_seeds):
+        try:
+            program = RandomProgram(seed, config)
+            ref = program.reference()
+        except GeneratorError as e:
+            # a generator bug, not a DUT one
+            dut._log.error(str(e))
+            failed.append(seed)
+            continue
+
+        # don't leave the tail of a longer previous program behind `end`
+        if previous_code_size > len(program.words):
+            load_words(rams, CODE_BASE, [0] * previous_code_size)
+        previous_code_size = len(program.words)
+
+        cycles, reached = await run_program(dut, program, rams)
+        errors = [] if reached else [f"did not reach end ({program.end_pc:#010x}) after {cycles} cycles, pc {int(dut.core.pc.value):#010x}"]
+        if reached:
+            errors = compare_state(dut, program, ref, axi_ram_slave, axi_lite_ram_slave)
+
+        total_instr += program.executed
+        total_cycles += cycles
+        if errors:
+            failed.append(seed)
+            path = program.write(dump_dir)
+            dut._log.error(f"seed {seed} FAILED ({path}.s) :\n  " + "\n  ".join(errors))
+        else:
+            dut._log.info(f"seed {seed} : {program.executed} instructions, {cycles} cycles, CPI {cycles / program.executed:.2f}")
+
+    dut._log.info(f"{n_seeds - len(failed)}/{n_seeds} programs passed, {total_instr} instructions in {total_cycles} cycles")
+    assert not failed, f"failing seeds : {failed}"
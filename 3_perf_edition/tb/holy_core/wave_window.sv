@@ -0,0 +1,106 @@
+/** wave_window
+*
+*   Author : BRH
+*
+*   Description : Windowed waveform dumping for long simulations.
+*                 Instead of dumping the entire run (which can take
+*                 gigabytes for compliance or stress tests), the dump
+*                 is only turned on around a trigger condition:
+*
+*                 +WAVE_START_CYCLE=N  +WAVE_STOP_CYCLE=M   cycle window
+*                 +WAVE_PC_LO=0x...    +WAVE_PC_HI=0x...    pc range (hi excluded)
+*                 +WAVE_TRAP_CYCLES=N  dump N cycles starting at each trap
+*                 +WAVE_FILE=name      output file (default window.fst)
+*
+*                 The dump file is only opened ($dumpfile / $dumpvars)
+*                 the first time a trigger is true, so nothing before
+*                 the window is ever dumped. Verilator ignores
+*                 $dumpoff / $dumpon : the dump then runs to the end of
+*                 the simulation, stop conditions (WAVE_STOP_CYCLE, end
+*                 of the pc range / trap hold) are only honoured by
+*                 simulators supporting them.
+*                 Only elaborated when HC_WAVE_WINDOW is defined (TRACE=window).
+*                 The design must be built with --trace or --trace-fst, but
+*                 cocotb's own full tracing should be OFF (WAVES=0).
+*
+*   BRH 10/26
+*/
+
+module wave_window (
+    input logic         clk,
+    input logic [31:0]  pc,
+    input logic         trap
+);
+
+string          wave_file;
+longint         start_cycle;
+longint         stop_cycle;
+longint         pc_lo;
+longint         pc_hi;
+int             trap_cycles;
+
+longint         cycle;
+int             trap_hold;
+logic           dumping;
+// dump opened, and at which cycle (checked by the core tb)
+logic           dump_started;
+longint         dump_start_cycle;
+
+initial begin
+    if (!$value$plusargs("WAVE_FILE=%s", wave_file))            wave_file = "window.fst";
+    // defaults : no trigger is ever true
+    if (!$value$plusargs("WAVE_START_CYCLE=%d", start_cycle))   start_cycle = -1;
+    if (!$value$plusargs("WAVE_STOP_CYCLE=%d", stop_cycle))     stop_cycle = -1;
+    if (!$value$plusargs("WAVE_PC_LO=%h", pc_lo))               pc_lo = 0;
+    if (!$value$plusargs("WAVE_PC_HI=%h", pc_hi))               pc_hi = 0;
+    if (!$value$plusargs("WAVE_TRAP_CYCLES=%d", trap_cycles))   trap_cycles = 0;
+
+    cycle = 0;
+    trap_hold = 0;
+    dumping = 1'b0;
+    dump_started = 1'b0;
+    dump_start_cycle = 0;
+end
+
+logic in_window;
+always_comb begin
+    in_window = 1'b0;
+    if (start_cycle >= 0 && cycle >= start_cycle && (stop_cycle < 0 || cycle < stop_cycle))
+        in_window = 1'b1;
+    if (({32'd0, pc} >= pc_lo) && ({32'd0, pc} < pc_hi))
+        in_window = 1'b1;
+    if (trap_hold > 0 || (trap && trap_cycles > 0))
+        in_window = 1'b1;
+end
+
+always @(posedge clk) begin
+    cycle <= cycle + 1;
+
+    if (trap && trap_cycles > 0) begin
+        trap_hold <= trap_cycles;
+    end else if (trap_hold > 0) begin
+        trap_hold <= trap_hold - 1;
+    end
+
+    if (in_window && !dump_started) begin
+        // first window : open the dump now (supported by Verilator)
+        $dumpfile(wave_file);
+        $dumpvars;
+        $display("wave_window : dumping to %s from cycle %0d", wave_file, cycle);
+        dump_started <= 1'b1;
+        dump_start_cycle <= cycle;
+        dumping <= 1'b1;
+    end
+`ifndef VERILATOR
+    // pause the dump between windows (ignored by Verilator)
+    else if (in_window && !dumping) begin
+        $dumpon;
+        dumping <= 1'b1;
+    end else if (!in_window && dumping) begin
+        $dumpoff;
+        dumping <= 1'b0;
+    end
+`endif
+end
+
+endmodule
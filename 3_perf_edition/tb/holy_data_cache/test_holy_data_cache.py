@@ -8,16 +8,135 @@ import cocotb
 from cocotb.clock import Clock
 from cocotb.triggers import RisingEdge, ClockCycles, Timer
 import random
+import sys
+from pathlib import Path
 from cocotbext.axi import AxiBus, AxiRam, AxiLiteBus, AxiLiteRam
 
+sys.path.append(str(Path(__file__).resolve().parent.parent / "coverage"))
+from covergroups import Coverpoint, Transitions, Cross, Covergroup, CoverageCollector, enum_bins
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from hc_tb import random_iterations
+
 CPU_PERIOD = 10
 MEMORY_SIZE = 2**20
-NUM_READS = 1000
+NUM_READS = random_iterations(1000)
 NUM_WRITES = 1000
-NUM_R_W = 250
+NUM_R_W = random_iterations(250)
 # close test = nuber of near addr R/W tests
 CLOSE_TESTS = 40
 
+# =============================================================================
+# FUNCTIONAL COVERAGE (COVERAGE=1, see tb/coverage/covergroups.py)
+# =============================================================================
+
+# holy_data_cache defaults (axi_translator.sv does not override them)
+WORDS_PER_LINE = 16
+NUM_SETS = 8
+
+# cache_state_t, the LITE_* states belong to holy_no_cache
+CACHE_STATES = [
+    "IDLE", "SENDING_WRITE_REQ", "SENDING_WRITE_DATA", "WAITING_WRITE_RES",
+    "FULFILL_PENDING_WRITE", "FLUSH_NEXT", "RANGE_OP_NEXT", "SENDING_READ_REQ",
+    "RECEIVING_READ_DATA", "READ_OK", "LITE_SENDING_WRITE_REQ", "LITE_SENDING_WRITE_DATA",
+    "LITE_WAITING_WRITE_RES", "LITE_SENDING_READ_REQ", "LITE_RECEIVING_READ_DATA"
+]
+STATE = {name: code for code, name in enumerate(CACHE_STATES)}
+LITE_STATES = [name for name in CACHE_STATES if name.startswith("LITE_")]
+DATA_CACHE_ARCS = [
+    "IDLE -> SENDING_WRITE_REQ", "IDLE -> FLUSH_NEXT", "IDLE -> RANGE_OP_NEXT",
+    "IDLE -> SENDING_READ_REQ", "IDLE -> READ_OK",
+    "SENDING_WRITE_REQ -> SENDING_WRITE_DATA", "SENDING_WRITE_DATA -> WAITING_WRITE_RES",
+    "WAITING_WRITE_RES -> IDLE", "WAITING_WRITE_RES -> SENDING_WRITE_REQ", "WAITING_WRITE_RES -> FLUSH_NEXT",
+    "WAITING_WRITE_RES -> RANGE_OP_NEXT", "WAITING_WRITE_RES -> SENDING_READ_REQ",
+    "FLUSH_NEXT -> IDLE", "FLUSH_NEXT -> SENDING_WRITE_REQ",
+    "RANGE_OP_NEXT -> IDLE", "RANGE_OP_NEXT -> SENDING_WRITE_REQ",
+    "SENDING_READ_REQ -> RECEIVING_READ_DATA",
+    "RECEIVING_READ_DATA -> READ_OK", "RECEIVING_READ_DATA -> FULFILL_PENDING_WRITE",
+    "READ_OK -> IDLE", "FULFILL_PENDING_WRITE -> IDLE"
+]
+
+def cache_state(dut):
+    return int(dut.cache_system.state.value)
+
+def request_accepted(dut):
+    return (
+        cache_state(dut) == STATE["IDLE"] and int(dut.cpu_req_valid.value) and int(dut.cpu_req_ready.value)
+    )
+
+BYTE_ENABLES = {
+    "word": 0b1111, "low half": 0b0011, "high half": 0b1100,
+    "byte 0": 0b0001, "byte 1": 0b0010, "byte 2": 0b0100, "byte 3": 0b1000
+}
+
+request_kind = Coverpoint("kind", lambda dut: int(dut.cpu_req_write.value), {"read": 0, "write": 1})
+# what the accepted request leads to
+request_outcome = Coverpoint(
+    "outcome",
+    lambda dut: int(dut.cache_system.next_state.value),
+    {"hit": [STATE["IDLE"], STATE["READ_OK"]], "clean miss": STATE["SENDING_READ_REQ"], "dirty miss": STATE["SENDING_WRITE_REQ"]}
+)
+request_word = Coverpoint(
+    "word", lambda dut: int(dut.cache_system.req_word_offset.value),
+    {"first": 0, "middle": range(1, WORDS_PER_LINE - 1), "last": WORDS_PER_LINE - 1}
+)
+
+DATA_CACHE_COVERAGE = CoverageCollector("holy_data_cache", [
+    Covergroup("fsm", [
+        Coverpoint("state", cache_state, enum_bins(CACHE_STATES, ignore=LITE_STATES), {"LITE_*": [STATE[name] for name in LITE_STATES]}),
+        Transitions("arcs", cache_state, dict(enumerate(CACHE_STATES)), DATA_CACHE_ARCS)
+    ]),
+    Covergroup("requests", [
+        request_kind, request_outcome, request_word,
+        Coverpoint("set", lambda dut: int(dut.cache_system.req_set.value), {f"set {i}": i for i in range(NUM_SETS)}),
+        Cross("kind x outcome", [request_kind, request_outcome]),
+        Cross("kind x word", [request_kind, request_word])
+    ], guard=request_accepted),
+    Covergroup("writes", [
+        Coverpoint("byte_enable", lambda dut: int(dut.cpu_byte_enable.value), BYTE_ENABLES, {"other": lambda be: be not in BYTE_ENABLES.values()})
+    ], guard=lambda dut: request_accepted(dut) and int(dut.cpu_req_write.value)),
+    Covergroup("maintenance", [
+        Coverpoint("order", lambda dut: (int(dut.cache_system.csr_flush_order.value), int(dut.cache_system.csr_range_op.value)), {
+            "flush": lambda v: v[0] == 1, "clean": (0, 0b01), "invalidate": (0, 0b10), "clean + invalidate": (0, 0b11)
+        }),
+        Coverpoint("range", lambda dut: (int(dut.cache_system.range_empty.value), int(dut.cache_system.range_lines_m1.value)), {
+            "empty": lambda v: v[0] == 1,
+            "one line": (0, 0),
+            "some lines": lambda v: v[0] == 0 and 0 < v[1] < NUM_SETS - 1,
+            "whole cache or more": lambda v: v[0] == 0 and v[1] >= NUM_SETS - 1
+        })
+    ], guard=lambda dut: (
+        cache_state(dut) == STATE["IDLE"] and not int(dut.cache_system.csr_flushing_done.value)
+        and (int(dut.cache_system.csr_flush_order.value) or int(dut.cache_system.csr_range_op.value))
+    )),
+    Covergroup("range_lines", [
+        Coverpoint("line", lambda dut: (
+            int(dut.cache_system.range_line_hit.value),
+            int(dut.cache_system.next_state.value) == STATE["SENDING_WRITE_REQ"],
+            int(dut.cache_system.range_inval.value)
+        ), {
+            "not cached": lambda v: v[0] == 0,
+            "write back": lambda v: v[1],
+            "invalidate": lambda v: v[0] and not v[1] and v[2],
+            "nothing to do": lambda v: v[0] and not v[1] and not v[2]
+        })
+    ], guard=lambda dut: cache_state(dut) == STATE["RANGE_OP_NEXT"]),
+    Covergroup("handshakes", [
+        Coverpoint("stalls", lambda dut: (
+            int(dut.cpu_req_valid.value) and not int(dut.cpu_req_ready.value),
+            int(dut.cpu_read_valid.value) and not int(dut.cpu_read_ack.value),
+            int(dut.axi_awvalid.value) and not int(dut.axi_awready.value),
+            int(dut.axi_wvalid.value) and not int(dut.axi_wready.value),
+            int(dut.axi_bready.value) and not int(dut.axi_bvalid.value),
+            int(dut.axi_arvalid.value) and not int(dut.axi_arready.value),
+            int(dut.axi_rready.value) and not int(dut.axi_rvalid.value)
+        ), {
+            "cpu request held": lambda v: v[0], "cpu read not acked": lambda v: v[1],
+            "awready low": lambda v: v[2], "wready low": lambda v: v[3], "bvalid wait": lambda v: v[4],
+            "arready low": lambda v: v[5], "rvalid gap": lambda v: v[6]
+        })
+    ])
+])
+
 def generate_random_bytes(length):
     return bytes([random.randint(0, 255) for _ in range(length)])
 
@@ -39,10 +158,14 @@ async def reset(dut):
     dut.cpu_write_data.value = 0
     dut.cpu_byte_enable.value = 0
     dut.cpu_read_ack.value = 0
+    dut.cache_system.csr_range_op.value = 0
+    dut.cache_system.csr_range_base.value = 0
+    dut.cache_system.csr_range_limit.value = 0
     
     await ClockCycles(dut.clk, 5)
     dut.rst_n.value = 1
     await RisingEdge(dut.clk)
+    await DATA_CACHE_COVERAGE.start(dut)
 
 async def wait_for_ready(dut, timeout=5000):
     """Wait for cache to become ready"""
@@ -101,6 +224,40 @@ async def flush_cache(dut):
     await RisingEdge(dut.clk)
     await RisingEdge(dut.clk)
 
+async def timed_flush(dut):
+    """Full flush, returns the number of cycles the cache was not ready"""
+    dut.cache_system.csr_flush_order.value = 1
+    await RisingEdge(dut.clk)
+    cycles = 1
+    while dut.cpu_req_ready.value == 0:
+        await RisingEdge(dut.clk)
+        cycles += 1
+    dut.cache_system.csr_flush_order.value = 0
+    await RisingEdge(dut.clk)
+    return cycles
+
+async def range_op(dut, op, base, limit):
+    """Range maintenance (op bit 0 : clean, bit 1 : invalidate) on [base, limit[,
+    held until range_op_ack like the CSR, returns the number of busy cycles"""
+    dut.cache_system.csr_range_base.value = base
+    dut.cache_system.csr_range_limit.value = limit
+    dut.cache_system.csr_range_op.value = op
+    cycles = 0
+    accepted = False
+    while not accepted:
+        await Timer(1, unit="ns")
+        accepted = dut.cache_system.range_op_ack.value == 1
+        await RisingEdge(dut.clk)
+        cycles += 1
+    dut.cache_system.csr_range_op.value = 0
+    await Timer(1, unit="ns")
+    while dut.cache_system.range_op_busy.value == 1:
+        await RisingEdge(dut.clk)
+        cycles += 1
+        await Timer(1, unit="ns")
+    await RisingEdge(dut.clk)
+    return cycles
+
 @cocotb.test()
 async def test_random_reads(dut):
     """Random read stress test with golden reference"""
@@ -1476,4 +1633,124 @@ async def test_write_miss_address_change(dut):
         errors += 1
     
     assert errors == 0, f"Write miss address change test failed with {errors} errors"
-    dut._log.info("✓ Write miss address change test PASSED")
\ No newline at end of file
+    dut._log.info("✓ Write miss address change test PASSED")
+
+
+@cocotb.test()
+async def test_range_maintenance(dut):
+    """
+    Clean / invalidate / clean + invalidate by address range, and how many
+    cycles a DMA buffer sync costs compared to a full flush.
+
+    Default cache : 2 ways x 8 sets x 64B lines, [0x000, 0x400[ fills it
+    (sets 0-7, tag 0 & tag 1 in both ways).
+    """
+    cocotb.start_soon(Clock(dut.clk, CPU_PERIOD, unit="ns").start())
+    axi_ram = AxiRam(AxiBus.from_prefix(dut, "axi"), dut.clk, dut.rst_n,
+                     size=MEMORY_SIZE, reset_active_level=False)
+    await reset(dut)
+
+    LINE = 64
+    CACHE_BYTES = 1024
+    # a DMA buffer, 4 lines in sets 4-7
+    BUF_BASE, BUF_LIMIT = 0x100, 0x200
+
+    mem_init = generate_random_bytes(4 * CACHE_BYTES)
+    axi_ram.write(0, mem_init)
+    model = {}
+
+    async def dirty_all():
+        """one dirty word per line, the whole cache"""
+        for addr in range(0, CACHE_BYTES, LINE):
+            model[addr] = random.getrandbits(32)
+            await cpu_write(dut, addr, model[addr])
+
+    def mem_word(addr):
+        return bytes_to_int(axi_ram.read(addr, 4))
+
+    # ==========================
+    # CLEAN : only the lines in range get written back
+    # ==========================
+    await dirty_all()
+    await range_op(dut, 0b01, BUF_BASE, BUF_LIMIT)
+    for addr in range(0, CACHE_BYTES, LINE):
+        if BUF_BASE <= addr < BUF_LIMIT:
+            assert mem_word(addr) == model[addr], f"line {addr:#x} not cleaned"
+        else:
+            assert mem_word(addr) == bytes_to_int(mem_init[addr:addr + 4]), f"line {addr:#x} written back"
+    # a second clean has nothing left to write back
+    assert await range_op(dut, 0b01, BUF_BASE, BUF_LIMIT) <= 2 * 4 + 2
+
+    # ==========================
+    # INVALIDATE : a DMA wrote the buffer behind the cache
+    # ==========================
+    dma_data = generate_random_bytes(BUF_LIMIT - BUF_BASE)
+    axi_ram.write(BUF_BASE, dma_data)
+    # still cached, stale
+    assert await cpu_read(dut, BUF_BASE) == model[BUF_BASE]
+    await range_op(dut, 0b10, BUF_BASE, BUF_LIMIT)
+    for addr in range(BUF_BASE, BUF_LIMIT, 4):
+        assert await cpu_read(dut, addr) == bytes_to_int(dma_data[addr - BUF_BASE:addr - BUF_BASE + 4])
+    # out of range lines are untouched (still dirty in cache)
+    assert await cpu_read(dut, 0x000) == model[0x000]
+    assert await cpu_read(dut, 0x200) == model[0x200]
+
+    # ==========================
+    # CLEAN + INVALIDATE on a single line (limit = base + 1)
+    # ==========================
+    await range_op(dut, 0b11, 0x200, 0x201)
+    assert mem_word(0x200) == model[0x200]
+    axi_ram.write(0x200, int_to_bytes(0xCAFEBABE))
+    assert await cpu_read(dut, 0x200) == 0xCAFEBABE
+    # the line sharing its set in the other way stays
+    assert await cpu_read(dut, 0x000) == model[0x000]
+
+    # ==========================
+    # EMPTY RANGE : 1 busy cycle, nothing happens
+    # ==========================
+    assert await range_op(dut, 0b11, 0x300, 0x300) == 1
+    assert await cpu_read(dut, 0x300) == model[0x300]
+
+    # ==========================
+    # RANGE OP DURING A FLUSH : csrw flush then dcache_invalidate_range(),
+    # the op waits for the flush instead of being dropped
+    # ==========================
+    await dirty_all()
+    dut.cache_system.csr_flush_order.value = 1
+    await RisingEdge(dut.clk)
+    dut.cache_system.csr_flush_order.value = 0
+    await Timer(1, unit="ns")
+    assert int(dut.cache_system.csr_flushing.value) == 1
+    await range_op(dut, 0b10, BUF_BASE, BUF_LIMIT)
+    assert int(dut.cache_system.csr_flushing.value) == 0
+    for addr in range(0, CACHE_BYTES, LINE):
+        assert mem_word(addr) == model[addr], f"line {addr:#x} not flushed"
+    dma_data = generate_random_bytes(BUF_LIMIT - BUF_BASE)
+    axi_ram.write(BUF_BASE, dma_data)
+    for addr in range(BUF_BASE, BUF_LIMIT, LINE):
+        assert await cpu_read(dut, addr) == bytes_to_int(dma_data[addr - BUF_BASE:addr - BUF_BASE + 4]), \
+            f"line {addr:#x} not invalidated after the flush"
+
+    # ==========================
+    # CYCLES : full flush vs range clean, whole cache dirty each time
+    # ==========================
+    await dirty_all()
+    flush_cycles = await timed_flush(dut)
+    await dirty_all()
+    buffer_cycles = await range_op(dut, 0b01, BUF_BASE, BUF_LIMIT)
+    await dirty_all()
+    line_cycles = await range_op(dut, 0b01, BUF_BASE, BUF_BASE + 4)
+    await dirty_all()
+    all_cycles = await range_op(dut, 0b01, 0x0, 0xFFFFFFFF)
+
+    dut._log.info(f"full flush (whole cache)       : {flush_cycles} cycles")
+    dut._log.info(f"range clean whole address space : {all_cycles} cycles")
+    dut._log.info(f"range clean {BUF_LIMIT - BUF_BASE}B buffer       : {buffer_cycles} cycles "
+                  f"({flush_cycles / buffer_cycles:.1f}x faster)")
+    dut._log.info(f"range clean 1 line              : {line_cycles} cycles "
+                  f"({flush_cycles / line_cycles:.1f}x faster)")
+    assert line_cycles < buffer_cycles < flush_cycles
+
+    # everything made it to memory in the end
+    for addr in range(0, CACHE_BYTES, LINE):
+        assert mem_word(addr) == model[addr]
@@ -0,0 +1,127 @@
+/* AXI_TRANSLATOR
+*
+* BRH 10/26
+*
+* This wrapper module instantiates the data TCM and routes its AXI slave
+* interface as discrete Verilog signals for cocotb (AxiMaster as the "DMA").
+*/
+
+module axi_translator (
+// Cpu Clock and Reset
+input  logic                     clk,
+input  logic                     rst_n,
+// ==========
+// AXI FULL SLAVE
+// ==========
+// Write Address Channel
+input  logic [3:0]               s_axi_awid,
+input  logic [31:0]              s_axi_awaddr,
+input  logic [7:0]               s_axi_awlen,
+input  logic [2:0]               s_axi_awsize,
+input  logic [1:0]               s_axi_awburst,
+input  logic                     s_axi_awvalid,
+output logic                     s_axi_awready,
+// Write Data Channel
+input  logic [31:0]              s_axi_wdata,
+input  logic [3:0]               s_axi_wstrb,
+input  logic                     s_axi_wlast,
+input  logic                     s_axi_wvalid,
+output logic                     s_axi_wready,
+// Write Response Channel
+output logic [3:0]               s_axi_bid,
+output logic [1:0]               s_axi_bresp,
+output logic                     s_axi_bvalid,
+input  logic                     s_axi_bready,
+// Read Address Channel
+input  logic [3:0]               s_axi_arid,
+input  logic [31:0]              s_axi_araddr,
+input  logic [7:0]               s_axi_arlen,
+input  logic [2:0]               s_axi_arsize,
+input  logic [1:0]               s_axi_arburst,
+input  logic                     s_axi_arvalid,
+output logic                     s_axi_arready,
+// Read Data Channel
+output logic [3:0]               s_axi_rid,
+output logic [31:0]              s_axi_rdata,
+output logic [1:0]               s_axi_rresp,
+output logic                     s_axi_rlast,
+output logic                     s_axi_rvalid,
+input  logic                     s_axi_rready,
+// ==========
+// CPU Interface
+// ==========
+input logic [31:0]               cpu_address,
+input logic [31:0]               cpu_write_data,
+input logic [3:0]                cpu_byte_enable,
+// handshake
+input logic                      cpu_req_valid,
+output logic                     cpu_req_ready,
+input logic                      cpu_req_write,
+// read out
+output logic [31:0]              cpu_read_data,
+output logic                     cpu_read_valid
+);
+import holy_core_pkg::*;
+// ==========
+// AXI FULL SLAVE
+// ==========
+axi_if axi_slave_intf();
+// Write Address Channel
+assign axi_slave_intf.awid    = s_axi_awid;
+assign axi_slave_intf.awaddr  = s_axi_awaddr;
+assign axi_slave_intf.awlen   = s_axi_awlen;
+assign axi_slave_intf.awsize  = s_axi_awsize;
+assign axi_slave_intf.awburst = s_axi_awburst;
+assign axi_slave_intf.awqos   = 4'b0;
+assign axi_slave_intf.awlock  = 2'b0;
+assign axi_slave_intf.awvalid = s_axi_awvalid;
+assign s_axi_awready          = axi_slave_intf.awready;
+// Write Data Channel
+assign axi_slave_intf.wdata  = s_axi_wdata;
+assign axi_slave_intf.wstrb  = s_axi_wstrb;
+assign axi_slave_intf.wlast  = s_axi_wlast;
+assign axi_slave_intf.wvalid = s_axi_wvalid;
+assign s_axi_wready          = axi_slave_intf.wready;
+// Write Response Channel
+assign s_axi_bid             = axi_slave_intf.bid;
+assign s_axi_bresp           = axi_slave_intf.bresp;
+assign s_axi_bvalid          = axi_slave_intf.bvalid;
+assign axi_slave_intf.bready = s_axi_bready;
+// Read Address Channel
+assign axi_slave_intf.arid    = s_axi_arid;
+assign axi_slave_intf.araddr  = s_axi_araddr;
+assign axi_slave_intf.arlen   = s_axi_arlen;
+assign axi_slave_intf.arsize  = s_axi_arsize;
+assign axi_slave_intf.arburst = s_axi_arburst;
+assign axi_slave_intf.arqos   = 4'b0;
+assign axi_slave_intf.arlock  = 2'b0;
+assign axi_slave_intf.arvalid = s_axi_arvalid;
+assign s_axi_arready          = axi_slave_intf.arready;
+// Read Data Channel
+assign s_axi_rid             = axi_slave_intf.rid;
+assign s_axi_rdata           = axi_slave_intf.rdata;
+assign s_axi_rresp           = axi_slave_intf.rresp;
+assign s_axi_rlast           = axi_slave_intf.rlast;
+assign s_axi_rvalid          = axi_slave_intf.rvalid;
+assign axi_slave_intf.rready = s_axi_rready;
+// Instantiate the TCM
+holy_data_tcm #(
+    .SIZE_BYTES(8192)
+) tcm (
+    .clk(clk),
+    .rst_n(rst_n),
+    // AXI Slave Interface
+    .s_axi(axi_slave_intf),
+    // CPU Interface
+    .address(cpu_address),
+    .write_data(cpu_write_data),
+    .byte_enable(cpu_byte_enable),
+    // handshake
+    .req_valid(cpu_req_valid),
+    .req_ready(cpu_req_ready),
+    .req_write(cpu_req_write),
+    // read out
+    .read_data(cpu_read_data),
+    .read_valid(cpu_read_valid)
+);
+endmodule
@@ -0,0 +1,144 @@
+# DATA TCM TESTBENCH
+#
+# BRH 10/26
+#
+# CPU port : single cycle reads & writes (no stall, ever)
+# AXI slave : DMA like bursts in & out, checked from the CPU side,
+# and both at once (CPU writes win the single write port).
+
+import random
+
+import cocotb
+from cocotb.clock import Clock
+from cocotb.triggers import RisingEdge, ClockCycles, Timer
+from cocotbext.axi import AxiBus, AxiMaster
+
+CPU_PERIOD = 10
+TCM_SIZE = 8192
+# window base the core would use, only the low bits matter in the TCM
+TCM_BASE = 0x8000_4000
+NUM_CPU_OPS = 2000
+NUM_BURSTS = 20
+
+async def reset(dut):
+    """Reset the DUT"""
+    await RisingEdge(dut.clk)
+    dut.rst_n.value = 0
+    dut.cpu_req_valid.value = 0
+    dut.cpu_req_write.value = 0
+    dut.cpu_address.value = 0
+    dut.cpu_write_data.value = 0
+    dut.cpu_byte_enable.value = 0
+
+    await ClockCycles(dut.clk, 5)
+    dut.rst_n.value = 1
+    await RisingEdge(dut.clk)
+
+def apply_strobe(mem, offset, data, byte_enable):
+    for i in range(4):
+        if byte_enable >> i & 1:
+            mem[offset + i] = (data >> (8 * i)) & 0xFF
+
+async def cpu_write(dut, address, data, byte_enable=0xF):
+    """Write lands on the next edge, ready is always high"""
+    dut.cpu_address.value = address
+    dut.cpu_write_data.value = data
+    dut.cpu_byte_enable.value = byte_enable
+    dut.cpu_req_write.value = 1
+    dut.cpu_req_valid.value = 1
+    await Timer(1, unit="ns")
+    assert dut.cpu_req_ready.value == 1
+    assert dut.cpu_read_valid.value == 0
+    await RisingEdge(dut.clk)
+    dut.cpu_req_valid.value = 0
+
+async def cpu_read(dut, address):
+    """Read data is valid in the request cycle"""
+    dut.cpu_address.value = address
+    dut.cpu_byte_enable.value = 0xF
+    dut.cpu_req_write.value = 0
+    dut.cpu_req_valid.value = 1
+    await Timer(1, unit="ns")
+    assert dut.cpu_req_ready.value == 1
+    assert dut.cpu_read_valid.value == 1
+    data = int(dut.cpu_read_data.value)
+    await RisingEdge(dut.clk)
+    dut.cpu_req_valid.value = 0
+    return data
+
+def word(mem, offset):
+    return int.from_bytes(mem[offset:offset + 4], "little")
+
+@cocotb.test()
+async def main_test(dut):
+    cocotb.start_soon(Clock(dut.clk, CPU_PERIOD, unit="ns").start())
+    dma = AxiMaster(AxiBus.from_prefix(dut, "s_axi"), dut.clk, dut.rst_n, reset_active_level=False)
+    await reset(dut)
+
+    # reference model of the TCM content, starts all zeros (from the DMA)
+    mem = bytearray(TCM_SIZE)
+    await dma.write(TCM_BASE, bytes(mem))
+
+    # ==========================
+    # CPU : random R/W, 1 cycle each
+    # ==========================
+    for _ in range(NUM_CPU_OPS):
+        offset = random.randrange(0, TCM_SIZE, 4)
+        if random.random() < 0.5:
+            data = random.getrandbits(32)
+            byte_enable = random.choice([0xF, 0x3, 0xC, 0x1, 0x2, 0x4, 0x8])
+            await cpu_write(dut, TCM_BASE + offset, data, byte_enable)
+            apply_strobe(mem, offset, data, byte_enable)
+        else:
+            assert await cpu_read(dut, TCM_BASE + offset) == word(mem, offset)
+
+    # ==========================
+    # DMA bursts in, CPU reads
+    # ==========================
+    for _ in range(NUM_BURSTS):
+        length = random.randrange(4, 1500, 4)
+        offset = random.randrange(0, TCM_SIZE - length, 4)
+        payload = bytes(random.getrandbits(8) for _ in range(length))
+        await dma.write(TCM_BASE + offset, payload)
+        mem[offset:offset + length] = payload
+        for k in range(0, length, 4):
+            assert await cpu_read(dut, TCM_BASE + offset + k) == word(mem, offset + k)
+
+    # ==========================
+    # CPU writes, DMA bursts out
+    # ==========================
+    for _ in range(NUM_BURSTS):
+        length = random.randrange(4, 600, 4)
+        offset = random.randrange(0, TCM_SIZE - length, 4)
+        for k in range(0, length, 4):
+            data = random.getrandbits(32)
+            await cpu_write(dut, TCM_BASE + offset + k, data)
+            apply_strobe(mem, offset + k, data, 0xF)
+        result = await dma.read(TCM_BASE + offset, length)
+        assert result.data == bytes(mem[offset:offset + length])
+
+    # ==========================
+    # Both at once, on disjoint halves : CPU writes every cycle
+    # the DMA W channel is ready, the DMA burst only slows down
+    # ==========================
+    half = TCM_SIZE // 2
+    payload = bytes(random.getrandbits(8) for _ in range(half))
+    dma_write = cocotb.start_soon(dma.write(TCM_BASE + half, payload))
+    cpu_cycles = 0
+    for k in range(0, half, 4):
+        data = random.getrandbits(32)
+        await cpu_write(dut, TCM_BASE + k, data)
+        apply_strobe(mem, k, data, 0xF)
+        cpu_cycles += 1
+        # leave some cycles for the DMA now and then
+        if random.random() < 0.3:
+            await RisingEdge(dut.clk)
+    await dma_write
+    mem[half:] = payload
+    assert cpu_cycles == half // 4
+
+    result = await dma.read(TCM_BASE, TCM_SIZE)
+    assert result.data == bytes(mem)
+    for _ in range(200):
+        offset = random.randrange(0, TCM_SIZE, 4)
+        assert await cpu_read(dut, TCM_BASE + offset) == word(mem, offset)
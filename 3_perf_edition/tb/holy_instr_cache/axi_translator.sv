@@ -71,7 +71,15 @@ module axi_translator #(
     input  logic                     cpu_req_valid,
     output logic                     cpu_req_ready,
     output logic                     cpu_read_valid,
-    input  logic                     cpu_read_ack
+    input  logic                     cpu_read_ack,
+
+    // ==========
+    // Cache control (CSRs)
+    // ==========
+    input  logic                     cpu_flush,
+    input  logic                     cpu_invalidate,
+    input  logic [31:0]              lock_base,
+    input  logic [31:0]              lock_limit
 );
 
     // ==========
@@ -143,6 +151,12 @@ module axi_translator #(
         .read_valid(cpu_read_valid),
         .read_ack(cpu_read_ack),
 
+        // Cache control
+        .flush(cpu_flush),
+        .invalidate(cpu_invalidate),
+        .lock_base(lock_base),
+        .lock_limit(lock_limit),
+
         // AXI Master Interface
         .axi(axi_master_intf),
 
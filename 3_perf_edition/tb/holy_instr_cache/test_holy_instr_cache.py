@@ -9,11 +9,18 @@ import cocotb
 from cocotb.clock import Clock
 from cocotb.triggers import RisingEdge, ClockCycles, Timer
 import random
+import sys
+from pathlib import Path
 from cocotbext.axi import AxiBus, AxiRam
 
+sys.path.append(str(Path(__file__).resolve().parent.parent / "coverage"))
+from covergroups import Coverpoint, Transitions, Cross, Covergroup, CoverageCollector, enum_bins
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from hc_tb import random_iterations
+
 CPU_PERIOD = 10
 MEMORY_SIZE = 2**20
-NUM_READS = 1000
+NUM_READS = random_iterations(1000)
 
 # CACHE DESCRIPTION (for stress tests at the end)
 WORDS_PER_LINE = 8
@@ -22,6 +29,81 @@ NUM_WAYS = 2
 LINE_SIZE_BYTES = WORDS_PER_LINE * 4
 CACHE_SIZE_BYTES = NUM_SETS * NUM_WAYS * LINE_SIZE_BYTES 
 
+# =============================================================================
+# FUNCTIONAL COVERAGE (COVERAGE=1, see tb/coverage/covergroups.py)
+# =============================================================================
+
+# the actual number of sets axi_translator.sv instantiates
+HW_NUM_SETS = 8
+
+# cache_state_t, the I$ only goes through the read states
+CACHE_STATES = [
+    "IDLE", "SENDING_WRITE_REQ", "SENDING_WRITE_DATA", "WAITING_WRITE_RES",
+    "FULFILL_PENDING_WRITE", "FLUSH_NEXT", "RANGE_OP_NEXT", "SENDING_READ_REQ",
+    "RECEIVING_READ_DATA", "READ_OK", "LITE_SENDING_WRITE_REQ", "LITE_SENDING_WRITE_DATA",
+    "LITE_WAITING_WRITE_RES", "LITE_SENDING_READ_REQ", "LITE_RECEIVING_READ_DATA"
+]
+STATE = {name: code for code, name in enumerate(CACHE_STATES)}
+INSTR_CACHE_STATES = ["IDLE", "SENDING_READ_REQ", "RECEIVING_READ_DATA", "READ_OK"]
+UNUSED_STATES = [name for name in CACHE_STATES if name not in INSTR_CACHE_STATES]
+INSTR_CACHE_ARCS = [
+    "IDLE -> SENDING_READ_REQ", "SENDING_READ_REQ -> RECEIVING_READ_DATA",
+    "RECEIVING_READ_DATA -> READ_OK", "READ_OK -> IDLE"
+]
+
+def cache_state(dut):
+    return int(dut.cache_system.state.value)
+
+def request_accepted(dut):
+    return (
+        cache_state(dut) == STATE["IDLE"] and int(dut.cpu_req_valid.value) and int(dut.cpu_req_ready.value)
+    )
+
+request_lookup = Coverpoint("lookup", lambda dut: int(dut.cache_system.hit.value), {"miss": 0, "hit": 1})
+request_word = Coverpoint(
+    "word", lambda dut: int(dut.cpu_address.value) >> 2 & (WORDS_PER_LINE - 1),
+    {"first": 0, "middle": range(1, WORDS_PER_LINE - 1), "last": WORDS_PER_LINE - 1}
+)
+lock_window = Coverpoint(
+    "lock window", lambda dut: int(dut.lock_base.value) < int(dut.lock_limit.value), {"off": False, "on": True}
+)
+
+INSTR_CACHE_COVERAGE = CoverageCollector("holy_instr_cache", [
+    Covergroup("fsm", [
+        Coverpoint("state", cache_state, {name: STATE[name] for name in INSTR_CACHE_STATES}, {"unused": [STATE[name] for name in UNUSED_STATES]}),
+        Transitions("arcs", cache_state, dict(enumerate(CACHE_STATES)), INSTR_CACHE_ARCS)
+    ]),
+    Covergroup("requests", [
+        request_lookup, request_word, lock_window,
+        Coverpoint("set", lambda dut: get_set_index(int(dut.cpu_address.value)), {f"set {i}": i for i in range(HW_NUM_SETS)}),
+        Coverpoint(
+            "miss victim", lambda dut: (int(dut.cache_system.hit.value), int(dut.cache_system.victim_way.value)),
+            {"way 0": (0, 0), "way 1": (0, 1)}, {"hit": lambda v: v[0] == 1}
+        ),
+        Cross("lookup x word", [request_lookup, request_word]),
+        Cross("lookup x lock window", [request_lookup, lock_window])
+    ], guard=request_accepted),
+    Covergroup("events", [
+        Coverpoint("events", lambda dut: (
+            int(dut.cpu_flush.value),
+            cache_state(dut),
+            int(dut.cache_system.fill_stale.value),
+            int(dut.cpu_read_valid.value) and not int(dut.cpu_read_ack.value),
+            int(dut.cpu_req_valid.value) and not int(dut.cpu_req_ready.value),
+            int(dut.axi_arvalid.value) and not int(dut.axi_arready.value),
+            int(dut.axi_rready.value) and not int(dut.axi_rvalid.value)
+        ), {
+            "flush while idle": lambda v: v[0] and v[1] == STATE["IDLE"],
+            "flush during a fill": lambda v: v[0] and v[1] != STATE["IDLE"],
+            "stale fill delivered": lambda v: v[1] == STATE["READ_OK"] and v[2],
+            "cpu read not acked": lambda v: v[3],
+            "cpu request held": lambda v: v[4],
+            "arready low": lambda v: v[5],
+            "rvalid gap": lambda v: v[6]
+        })
+    ])
+])
+
 def generate_random_bytes(length):
     return bytes([random.randint(0, 255) for _ in range(length)])
 
@@ -40,11 +122,16 @@ async def reset(dut):
     dut.cpu_req_valid.value = 0
     dut.cpu_address.value = 0
     dut.cpu_read_ack.value = 0
+    dut.cpu_flush.value = 0
+    dut.cpu_invalidate.value = 0
+    dut.lock_base.value = 0
+    dut.lock_limit.value = 0
     
     await ClockCycles(dut.clk, 5)
     dut.rst_n.value = 1
     await RisingEdge(dut.clk)
     dut._log.info("Reset complete")
+    await INSTR_CACHE_COVERAGE.start(dut)
 
 async def wait_for_ready(dut, timeout=1000):
     """Wait for cache to become ready"""
@@ -617,7 +704,7 @@ async def test_mega_stress(dut):
     
     # Pattern 1: Sequential bursts
     dut._log.info("Phase 1: Sequential bursts")
-    for burst in range(20):
+    for burst in range(random_iterations(20)):
         base = random.randint(0, 0x1F000) & ~0x3
         for i in range(32):
             addr = base + i * 4
@@ -629,7 +716,7 @@ async def test_mega_stress(dut):
     
     # Pattern 2: Random jumps
     dut._log.info("Phase 2: Random jumps")
-    for _ in range(200):
+    for _ in range(random_iterations(200)):
         addr = (random.randint(0, 0x1FFFF) & ~0x3)
         if addr in golden:
             result = await cpu_read(dut, addr)
@@ -640,7 +727,7 @@ async def test_mega_stress(dut):
     # Pattern 3: Ping-pong between distant addresses
     dut._log.info("Phase 3: Ping-pong distant")
     addr_list = [0x0000, 0x8000, 0x10000, 0x18000]
-    for _ in range(100):
+    for _ in range(random_iterations(100)):
         for addr in addr_list:
             result = await cpu_read(dut, addr)
             if result != golden[addr]:
@@ -657,7 +744,7 @@ async def test_mega_stress(dut):
                 golden[a] = random.randint(0, 0xFFFFFFFF)
                 axi_ram.write(a, int_to_bytes(golden[a]))
     
-    for _ in range(50):
+    for _ in range(random_iterations(50)):
         for addr in thrash_addrs:
             result = await cpu_read(dut, addr)
             if result != golden[addr]:
@@ -673,7 +760,7 @@ async def test_mega_stress(dut):
             golden[addr] = 0x50000000 + i
             axi_ram.write(addr, int_to_bytes(golden[addr]))
     
-    for _ in range(100):
+    for _ in range(random_iterations(100)):
         # Tight loop
         for i in range(8):
             addr = loop_base + i * 4
@@ -1045,4 +1132,133 @@ async def test_thrashing_worst_case(dut):
             expected = golden[addr]
             assert result == expected, f"Iter {iteration}, tag {tag}: expected 0x{expected:08X}, got 0x{result:08X}"
     
-    dut._log.info("✓ Thrashing worst case test passed")
\ No newline at end of file
+    dut._log.info("✓ Thrashing worst case test passed")
+
+# =============================================================================
+# TEST: Locked lines (CSRs 0x7C5/0x7C6) survive eviction & flush
+# =============================================================================
+
+async def count_line_fills(dut, counter):
+    """Counts AXI read bursts, i.e. cache misses"""
+    while True:
+        await RisingEdge(dut.clk)
+        if dut.axi_arvalid.value == 1 and dut.axi_arready.value == 1:
+            counter[0] += 1
+
+async def flush_pulse(dut):
+    dut.cpu_flush.value = 1
+    await RisingEdge(dut.clk)
+    dut.cpu_flush.value = 0
+
+@cocotb.test()
+async def test_locked_lines(dut):
+    """A locked line stays cached while its set thrashes, and across flushes"""
+    dut._log.info("=" * 60)
+    dut._log.info("TEST: Locked Lines")
+    dut._log.info("=" * 60)
+
+    cocotb.start_soon(Clock(dut.clk, CPU_PERIOD, unit="ns").start())
+    axi_ram = AxiRam(AxiBus.from_prefix(dut, "axi"), dut.clk, dut.rst_n,
+                     size=MEMORY_SIZE, reset_active_level=False)
+    await reset(dut)
+    fills = [0]
+    cocotb.start_soon(count_line_fills(dut, fills))
+
+    set_idx = 2
+    locked_addr = make_address_for_set(set_idx, tag=5)
+    others = [make_address_for_set(set_idx, tag=t) for t in range(4)]
+    golden = {}
+    for addr in [locked_addr] + others:
+        data = 0x10C00000 | (get_tag(addr) << 8)
+        for i in range(WORDS_PER_LINE):
+            axi_ram.write(addr + i * 4, int_to_bytes(data + i))
+        golden[addr] = data
+
+    async def read_and_count(addr):
+        before = fills[0]
+        result = await cpu_read(dut, addr)
+        assert result == golden[addr], f"0x{addr:08X}: expected 0x{golden[addr]:08X}, got 0x{result:08X}"
+        return fills[0] - before
+
+    # lock the window BEFORE the line is fetched, 1st access fills it
+    dut.lock_base.value = locked_addr
+    dut.lock_limit.value = locked_addr + LINE_SIZE_BYTES
+    assert await read_and_count(locked_addr) == 1
+
+    # thrash the set : the other way takes every miss, locked line stays
+    for _ in range(20):
+        for addr in others:
+            assert await read_and_count(addr) == 1
+        assert await read_and_count(locked_addr) == 0
+
+    # flush : only the locked line survives
+    await flush_pulse(dut)
+    assert await read_and_count(locked_addr) == 0
+    assert await read_and_count(others[-1]) == 1
+
+    # all the lines of the set in the window : only one way keeps the lock,
+    # the set still serves everything else
+    dut.lock_base.value = others[0]
+    dut.lock_limit.value = locked_addr + LINE_SIZE_BYTES
+    for _ in range(5):
+        for addr in [locked_addr] + others:
+            await read_and_count(addr)
+
+    # unlock : the line is a regular one again and gets evicted
+    dut.lock_base.value = 0
+    dut.lock_limit.value = 0
+    for addr in others:
+        await read_and_count(addr)
+    assert await read_and_count(locked_addr) == 1
+
+    dut._log.info("✓ Locked lines test passed")
+
+# =============================================================================
+# TEST: Invalidate (leaving debug mode) drops every line, locked ones too
+# =============================================================================
+@cocotb.test()
+async def test_invalidate(dut):
+    """Code patched in memory (debugger breakpoints) is refetched after an invalidate"""
+    dut._log.info("=" * 60)
+    dut._log.info("TEST: Invalidate")
+    dut._log.info("=" * 60)
+
+    cocotb.start_soon(Clock(dut.clk, CPU_PERIOD, unit="ns").start())
+    axi_ram = AxiRam(AxiBus.from_prefix(dut, "axi"), dut.clk, dut.rst_n,
+                     size=MEMORY_SIZE, reset_active_level=False)
+    await reset(dut)
+    fills = [0]
+    cocotb.start_soon(count_line_fills(dut, fills))
+
+    EBREAK = 0x00100073
+    locked_addr = make_address_for_set(1, tag=3)
+    regular_addr = make_address_for_set(2, tag=3)
+    for addr in [locked_addr, regular_addr]:
+        axi_ram.write(addr, int_to_bytes(0x13))
+    dut.lock_base.value = locked_addr
+    dut.lock_limit.value = locked_addr + LINE_SIZE_BYTES
+
+    for addr in [locked_addr, regular_addr]:
+        assert await cpu_read(dut, addr) == 0x13
+
+    # the debugger patches breakpoints in : stale until invalidated
+    for addr in [locked_addr, regular_addr]:
+        axi_ram.write(addr, int_to_bytes(EBREAK))
+        assert await cpu_read(dut, addr) == 0x13
+
+    dut.cpu_invalidate.value = 1
+    await RisingEdge(dut.clk)
+    dut.cpu_invalidate.value = 0
+
+    before = fills[0]
+    for addr in [locked_addr, regular_addr]:
+        assert await cpu_read(dut, addr) == EBREAK
+    assert fills[0] - before == 2
+
+    # the refilled line is locked again : a flush keeps it
+    await flush_pulse(dut)
+    before = fills[0]
+    assert await cpu_read(dut, locked_addr) == EBREAK
+    assert fills[0] == before
+
+    dut._log.info("✓ Invalidate test passed")
@@ -8,16 +8,86 @@ import cocotb
 from cocotb.clock import Clock
 from cocotb.triggers import RisingEdge, ClockCycles, Timer
 import random
+import sys
+from pathlib import Path
 from cocotbext.axi import AxiLiteBus, AxiLiteRam
 
+sys.path.append(str(Path(__file__).resolve().parent.parent / "coverage"))
+from covergroups import Coverpoint, Transitions, Covergroup, CoverageCollector
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from hc_tb import random_iterations
+
 CPU_PERIOD = 10
 MEMORY_SIZE = 2**20
-NUM_READS = 500
+NUM_READS = random_iterations(500)
 NUM_WRITES = 500
-NUM_R_W = 500
+NUM_R_W = random_iterations(500)
 # close test = number of near addr R/W tests
 CLOSE_TESTS = 10
 
+# =============================================================================
+# FUNCTIONAL COVERAGE (COVERAGE=1, see tb/coverage/covergroups.py)
+# =============================================================================
+
+# cache_state_t, holy_no_cache only goes through IDLE, READ_OK and the LITE_* states
+CACHE_STATES = [
+    "IDLE", "SENDING_WRITE_REQ", "SENDING_WRITE_DATA", "WAITING_WRITE_RES",
+    "FULFILL_PENDING_WRITE", "FLUSH_NEXT", "RANGE_OP_NEXT", "SENDING_READ_REQ",
+    "RECEIVING_READ_DATA", "READ_OK", "LITE_SENDING_WRITE_REQ", "LITE_SENDING_WRITE_DATA",
+    "LITE_WAITING_WRITE_RES", "LITE_SENDING_READ_REQ", "LITE_RECEIVING_READ_DATA"
+]
+STATE = {name: code for code, name in enumerate(CACHE_STATES)}
+NO_CACHE_STATES = ["IDLE", "READ_OK"] + [name for name in CACHE_STATES if name.startswith("LITE_")]
+CACHE_ONLY_STATES = [name for name in CACHE_STATES if name not in NO_CACHE_STATES]
+NO_CACHE_ARCS = [
+    "IDLE -> LITE_SENDING_WRITE_REQ", "IDLE -> LITE_SENDING_READ_REQ",
+    "LITE_SENDING_WRITE_REQ -> LITE_SENDING_WRITE_DATA", "LITE_SENDING_WRITE_DATA -> LITE_WAITING_WRITE_RES",
+    "LITE_WAITING_WRITE_RES -> IDLE",
+    "LITE_SENDING_READ_REQ -> LITE_RECEIVING_READ_DATA", "LITE_RECEIVING_READ_DATA -> READ_OK",
+    "READ_OK -> IDLE"
+]
+
+def cache_state(dut):
+    return int(dut.cache_system.state.value)
+
+def request_accepted(dut):
+    return (
+        cache_state(dut) == STATE["IDLE"] and int(dut.cpu_req_valid.value) and int(dut.cpu_req_ready.value)
+    )
+
+BYTE_ENABLES = {
+    "word": 0b1111, "low half": 0b0011, "high half": 0b1100,
+    "byte 0": 0b0001, "byte 1": 0b0010, "byte 2": 0b0100, "byte 3": 0b1000
+}
+
+NO_CACHE_COVERAGE = CoverageCollector("holy_no_cache", [
+    Covergroup("fsm", [
+        Coverpoint("state", cache_state, {name: STATE[name] for name in NO_CACHE_STATES}, {"cache only": [STATE[name] for name in CACHE_ONLY_STATES]}),
+        Transitions("arcs", cache_state, dict(enumerate(CACHE_STATES)), NO_CACHE_ARCS)
+    ]),
+    Covergroup("requests", [
+        Coverpoint("kind", lambda dut: int(dut.cpu_req_write.value), {"read": 0, "write": 1})
+    ], guard=request_accepted),
+    Covergroup("writes", [
+        Coverpoint("byte_enable", lambda dut: int(dut.cpu_byte_enable.value), BYTE_ENABLES, {"other": lambda be: be not in BYTE_ENABLES.values()})
+    ], guard=lambda dut: request_accepted(dut) and int(dut.cpu_req_write.value)),
+    Covergroup("handshakes", [
+        Coverpoint("stalls", lambda dut: (
+            int(dut.cpu_req_valid.value) and not int(dut.cpu_req_ready.value),
+            int(dut.cpu_read_valid.value) and not int(dut.cpu_read_ack.value),
+            int(dut.axi_lite_awvalid.value) and not int(dut.axi_lite_awready.value),
+            int(dut.axi_lite_wvalid.value) and not int(dut.axi_lite_wready.value),
+            int(dut.axi_lite_bready.value) and not int(dut.axi_lite_bvalid.value),
+            int(dut.axi_lite_arvalid.value) and not int(dut.axi_lite_arready.value),
+            int(dut.axi_lite_rready.value) and not int(dut.axi_lite_rvalid.value)
+        ), {
+            "cpu request held": lambda v: v[0], "cpu read not acked": lambda v: v[1],
+            "awready low": lambda v: v[2], "wready low": lambda v: v[3], "bvalid wait": lambda v: v[4],
+            "arready low": lambda v: v[5], "rvalid gap": lambda v: v[6]
+        })
+    ])
+])
+
 def generate_random_bytes(length):
     return bytes([random.randint(0, 255) for _ in range(length)])
 
@@ -44,6 +114,7 @@ async def reset(dut):
     dut.rst_n.value = 1
     await RisingEdge(dut.clk)
     dut._log.info("Reset complete")
+    await NO_CACHE_COVERAGE.start(dut)
 
 async def wait_for_ready(dut, timeout=1000):
     """Wait for module to become ready"""
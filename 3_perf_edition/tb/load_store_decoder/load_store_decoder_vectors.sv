@@ -0,0 +1,62 @@
+/* LOAD_STORE_DECODER_VECTORS
+*
+* BRH 10/26
+*
+* Batched vector replay around the load/store decoder (see tb/vectors/vector_replay.sv).
+* Every field is padded to a nibble so the python side can write the
+* batch files with plain hex digits :
+*   stim   = {1'b0, f3, alu_result_address, reg_read}  68 bits
+*   result = {byte_enable, data}                       36 bits
+*/
+
+`timescale 1ns/1ps
+
+module load_store_decoder_vectors #(
+    parameter DEPTH = 65536,
+    parameter MAX_FAILS = 16
+)(
+    input logic                             clk,
+    input logic                             load,
+    input logic                             start,
+    input logic [31:0]                      count,
+    output logic                            done,
+    output logic [31:0]                     fail_count,
+    output logic [MAX_FAILS-1:0][31:0]      fail_index,
+    output logic [MAX_FAILS-1:0][35:0]      fail_result
+);
+
+logic [67:0] stim;
+logic [35:0] result;
+
+logic [3:0]     byte_enable;
+logic [31:0]    data;
+
+vector_replay #(
+    .IN_WIDTH(68),
+    .OUT_WIDTH(36),
+    .DEPTH(DEPTH),
+    .MAX_FAILS(MAX_FAILS)
+) replay (
+    .clk(clk),
+    .load(load),
+    .start(start),
+    .count(count),
+    .stim(stim),
+    .result(result),
+    .done(done),
+    .fail_count(fail_count),
+    .fail_index(fail_index),
+    .fail_result(fail_result)
+);
+
+load_store_decoder load_store_decoder_inst (
+    .alu_result_address(stim[63:32]),
+    .f3(stim[66:64]),
+    .reg_read(stim[31:0]),
+    .byte_enable(byte_enable),
+    .data(data)
+);
+
+assign result = {byte_enable, data};
+
+endmodule
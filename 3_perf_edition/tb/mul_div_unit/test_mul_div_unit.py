@@ -8,6 +8,13 @@ import cocotb
 from cocotb.clock import Clock
 from cocotb.triggers import RisingEdge, Timer
 import random
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent / "coverage"))
+from covergroups import Coverpoint, Transitions, Cross, Covergroup, CoverageCollector
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from hc_tb import random_iterations
 
 # MDU control encodings (matches mdu_control_t)
 ALU_MUL    = 0b01010
@@ -24,6 +31,52 @@ ALU_IDLE = 0
 ALU_BUSY = 1
 ALU_DONE = 2
 
+# =============================================================================
+# FUNCTIONAL COVERAGE (COVERAGE=1, see tb/coverage/covergroups.py)
+# =============================================================================
+
+MDU_OPS = {
+    "MUL": ALU_MUL, "MULH": ALU_MULH, "MULHSU": ALU_MULHSU, "MULHU": ALU_MULHU,
+    "DIV": ALU_DIV, "DIVU": ALU_DIVU, "REM": ALU_REM, "REMU": ALU_REMU
+}
+# operand classes, the corner values get their own bins
+OPERAND_CLASSES = {
+    "zero": 0, "one": 1, "minus one": 0xFFFFFFFF, "INT_MIN": 0x80000000, "INT_MAX": 0x7FFFFFFF,
+    "positive": range(2, 0x7FFFFFFF), "negative": range(0x80000001, 0xFFFFFFFF)
+}
+MDU_STATES = {ALU_IDLE: "ALU_IDLE", ALU_BUSY: "ALU_BUSY", ALU_DONE: "ALU_DONE"}
+
+def mdu_state(dut):
+    return int(dut.state.value)
+
+mdu_op = Coverpoint("op", lambda dut: int(dut.mdu_control.value), MDU_OPS)
+mdu_src1 = Coverpoint("src1", lambda dut: int(dut.src1.value), OPERAND_CLASSES)
+mdu_src2 = Coverpoint("src2", lambda dut: int(dut.src2.value), OPERAND_CLASSES)
+
+MDU_COVERAGE = CoverageCollector("mul_div_unit", [
+    Covergroup("fsm", [
+        Coverpoint("state", mdu_state, {name: code for code, name in MDU_STATES.items()}),
+        Transitions("arcs", mdu_state, MDU_STATES, [
+            "ALU_IDLE -> ALU_DONE", "ALU_IDLE -> ALU_BUSY", "ALU_BUSY -> ALU_DONE", "ALU_DONE -> ALU_IDLE"
+        ])
+    ]),
+    Covergroup("requests", [
+        mdu_op, mdu_src1, mdu_src2,
+        Coverpoint("special", lambda dut: (int(dut.mdu_control.value), int(dut.src1.value), int(dut.src2.value)), {
+            "div by zero": lambda v: v[0] in (ALU_DIV, ALU_DIVU) and v[2] == 0,
+            "rem by zero": lambda v: v[0] in (ALU_REM, ALU_REMU) and v[2] == 0,
+            "div overflow": (ALU_DIV, 0x80000000, 0xFFFFFFFF),
+            "rem overflow": (ALU_REM, 0x80000000, 0xFFFFFFFF),
+            "dividend < divisor": lambda v: v[0] in (ALU_DIVU, ALU_REMU) and 0 < v[1] < v[2]
+        }),
+        Cross("op x src1", [mdu_op, mdu_src1]),
+        Cross("op x src2", [mdu_op, mdu_src2])
+    ], guard=lambda dut: mdu_state(dut) == ALU_IDLE and int(dut.req_valid.value)),
+    Covergroup("handshake", [
+        Coverpoint("result", lambda dut: int(dut.res_ack.value), {"acked": 1, "held": 0})
+    ], guard=lambda dut: mdu_state(dut) == ALU_DONE)
+])
+
 
 def to_signed_32(val):
     """Convert unsigned 32-bit value to signed Python int"""
@@ -49,6 +102,7 @@ async def reset_dut(dut):
     await RisingEdge(dut.clk)
     dut.rst_n.value = 1
     await RisingEdge(dut.clk)
+    await MDU_COVERAGE.start(dut)
 
 
 async def mdu_operation(dut, src1, src2, control):
@@ -121,7 +175,7 @@ async def mul_random_test(dut):
     cocotb.start_soon(Clock(dut.clk, 10, units="ns").start())
     await reset_dut(dut)
 
-    for _ in range(200):
+    for _ in range(random_iterations(200)):
         src1 = random.randint(0, 0xFFFFFFFF)
         src2 = random.randint(0, 0xFFFFFFFF)
         expected = (src1 * src2) & 0xFFFFFFFF
@@ -0,0 +1,62 @@
+/* READER_VECTORS
+*
+* BRH 10/26
+*
+* Batched vector replay around the reader (see tb/vectors/vector_replay.sv).
+* Every field is padded to a nibble so the python side can write the
+* batch files with plain hex digits :
+*   stim   = {1'b0, f3, be_mask, mem_data}     40 bits
+*   result = {3'b0, valid, wb_data}            36 bits
+*/
+
+`timescale 1ns/1ps
+
+module reader_vectors #(
+    parameter DEPTH = 65536,
+    parameter MAX_FAILS = 16
+)(
+    input logic                             clk,
+    input logic                             load,
+    input logic                             start,
+    input logic [31:0]                      count,
+    output logic                            done,
+    output logic [31:0]                     fail_count,
+    output logic [MAX_FAILS-1:0][31:0]      fail_index,
+    output logic [MAX_FAILS-1:0][35:0]      fail_result
+);
+
+logic [39:0] stim;
+logic [35:0] result;
+
+logic [31:0]    wb_data;
+logic           valid;
+
+vector_replay #(
+    .IN_WIDTH(40),
+    .OUT_WIDTH(36),
+    .DEPTH(DEPTH),
+    .MAX_FAILS(MAX_FAILS)
+) replay (
+    .clk(clk),
+    .load(load),
+    .start(start),
+    .count(count),
+    .stim(stim),
+    .result(result),
+    .done(done),
+    .fail_count(fail_count),
+    .fail_index(fail_index),
+    .fail_result(fail_result)
+);
+
+reader reader_inst (
+    .mem_data(stim[31:0]),
+    .be_mask(stim[35:32]),
+    .f3(stim[38:36]),
+    .wb_data(wb_data),
+    .valid(valid)
+);
+
+assign result = {3'b0, valid, wb_data};
+
+endmodule
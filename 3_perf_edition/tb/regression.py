@@ -0,0 +1,214 @@
+# REGRESSION
+#
+# Multi-seed regression of the randomized cocotb tests.
+#
+# Each testbench is built ONCE (PROFILE, default fast), then every
+# (test, seed) pair runs as its own simulation in a process pool,
+# sharing that build. Runs get their own directory under --out
+# (sim.log, results.xml) so they never clash.
+#
+# The seed is passed to the runner (seed=, i.e. COCOTB_RANDOM_SEED),
+# which seeds python's random : a failing seed replays exactly with
+#   COCOTB_RANDOM_SEED=<seed> make TESTCASE=<test>      (in the tb directory)
+#
+# Failing seeds are then shrunk. The randomized loops take their
+# iteration counts through hc_tb.random_iterations(), capped by
+# RANDOM_ITERATIONS, and a failing cap is searched (doubling, then
+# bisection). It is a small failing RANDOM_ITERATIONS, not guaranteed
+# minimal : with several capped loops in one test (test_mega_stress),
+# a cap truncates all of them at once, the later loops start from
+# another RNG / DUT state than the original run, and failing is not
+# monotonic in the cap.
+#
+# Results go to <out>/regression.json : failing seeds, their shrunk
+# RANDOM_ITERATIONS and the command replaying them.
+#
+# python3 regression.py [--tb NAME ...] [--seeds N] [--first-seed S]
+#                       [--jobs J] [--no-shrink] [--out DIR]
+#
+# e.g. shard a campaign across machines with disjoint seed ranges :
+#   python3 regression.py --tb holy_data_cache --seeds 2000 --first-seed 100000
+#
+# BRH 10/26
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+TB_DIR = Path(__file__).resolve().parent
+# largest RANDOM_ITERATIONS tried while shrinking (above any loop count)
+SHRINK_CAP_MAX = 1 << 16
+
+def suite():
+    """testbench : (build function, randomized tests). Imported lazily :
+    the paths in test_runner.py are relative to the tb directory"""
+    from test_runner import generic_tb_runner, axi_translator_runner, holy_plic_runner
+    return {
+        "holy_instr_cache": (lambda **kw: axi_translator_runner("holy_instr_cache", **kw), ["test_random_reads", "test_mega_stress"]),
+        "holy_data_cache": (lambda **kw: axi_translator_runner("holy_data_cache", **kw), ["test_random_reads", "test_random_read_write_mixed"]),
+        "holy_no_cache": (lambda **kw: axi_translator_runner("holy_no_cache", **kw), ["test_random_reads", "test_random_read_write_mixed"]),
+        "mul_div_unit": (lambda **kw: generic_tb_runner("mul_div_unit", **kw), ["mul_random_test"]),
+        "holy_plic": (lambda **kw: holy_plic_runner(**kw), ["main_test", "priority_test"]),
+    }
+
+def read_results(results_xml):
+    """(tests, failures) from a cocotb results.xml, None if missing (crash)"""
+    if not results_xml.exists():
+        return None
+    cases = ET.parse(results_xml).getroot().iter("testcase")
+    tests = failures = 0
+    for case in cases:
+        tests += 1
+        if case.find("failure") is not None or case.find("error") is not None:
+            failures += 1
+    return tests, failures
+
+def run_one(test_args, test, seed, run_dir, iterations=None):
+    """One simulation of one test. Returns True if it passed."""
+    from cocotb_tools.runner import get_runner
+
+    run_dir = Path(run_dir)
+    run_dir.mkdir(parents=True, exist_ok=True)
+    results_xml = run_dir / "results.xml"
+    results_xml.unlink(missing_ok=True)
+    env = dict(test_args["extra_env"])
+    if iterations is not None:
+        env["RANDOM_ITERATIONS"] = str(iterations)
+    # the test module is looked up from the python path, not from the run dir
+    module_dir = str(Path(test_args["test_dir"]).resolve())
+    if module_dir not in sys.path:
+        sys.path.insert(0, module_dir)
+
+    # keep the pool's output readable : the simulator writes to sim.log
+    log = open(run_dir / "sim.log", "w")
+    sys.stdout.flush()
+    sys.stderr.flush()
+    saved = os.dup(1), os.dup(2)
+    os.dup2(log.fileno(), 1)
+    os.dup2(log.fileno(), 2)
+    try:
+        get_runner(os.getenv("SIM", "verilator")).test(
+            **dict(test_args, extra_env=env, test_dir=str(run_dir)),
+            seed=seed,
+            hdl_toplevel_lang="verilog",
+            test_filter=f"^{test}$",
+            results_xml=str(results_xml)
+        )
+    except (Exception, SystemExit):
+        # failing tests may raise, results.xml tells what happened
+        pass
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.dup2(saved[0], 1)
+        os.dup2(saved[1], 2)
+        os.close(saved[0])
+        os.close(saved[1])
+        log.close()
+
+    results = read_results(results_xml)
+    return results is not None and results[0] > 0 and results[1] == 0
+
+def shrink(test_args, test, seed, run_dir):
+    """A small RANDOM_ITERATIONS still failing (not guaranteed minimal,
+    see the header), None if no cap fails (the failure does not depend
+    on the randomized loops)"""
+    cap = 1
+    while run_one(test_args, test, seed, run_dir, cap):
+        if cap >= SHRINK_CAP_MAX:
+            return None
+        cap *= 2
+    # cap fails, cap // 2 passes (or cap is 1) : bisect between them
+    lo, hi = cap // 2, cap
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if run_one(test_args, test, seed, run_dir, mid):
+            lo = mid
+        else:
+            hi = mid
+    return hi
+
+def replay_command(test_args, test, seed, iterations):
+    cap = f" RANDOM_ITERATIONS={iterations}" if iterations is not None else ""
+    return f"cd {Path(test_args['test_dir']).resolve()} && COCOTB_RANDOM_SEED={seed}{cap} make TESTCASE={test}"
+
+def main():
+    parser = argparse.ArgumentParser(description="HOLY CORE multi-seed regression")
+    parser.add_argument("--tb", nargs="*", help="testbenches (default : all of the suite)")
+    parser.add_argument("--tests", nargs="*", help="restrict to these tests")
+    parser.add_argument("--seeds", type=int, default=20, help="seeds per test")
+    parser.add_argument("--first-seed", type=int, default=None, help="first seed (default random, logged)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="parallel simulations")
+    parser.add_argument("--no-shrink", action="store_true", help="don't shrink the failing seeds")
+    parser.add_argument("--out", default=str(TB_DIR / "regression"), help="runs & report directory")
+    args = parser.parse_args()
+
+    # test_runner.py paths are relative to the tb directory
+    os.chdir(TB_DIR)
+    os.environ.setdefault("PROFILE", "fast")
+    out = Path(args.out).resolve()
+    first_seed = args.first_seed if args.first_seed is not None else random.getrandbits(31)
+
+    tbs = suite()
+    selected = args.tb or list(tbs)
+    for name in selected:
+        if name not in tbs:
+            parser.error(f"unknown testbench {name}, expected one of {list(tbs)}")
+
+    # one build per testbench, shared by all its runs
+    builds = {}
+    for name in selected:
+        print(f"building {name} ({os.environ['PROFILE']})")
+        builds[name] = tbs[name][0](build_only=True)
+
+    jobs = [
+        (name, test, seed)
+        for name in selected
+        for test in tbs[name][1] if not args.tests or test in args.tests
+        for seed in range(first_seed, first_seed + args.seeds)
+    ]
+    print(f"{len(jobs)} runs, seeds {first_seed} .. {first_seed + args.seeds - 1}, {args.jobs} jobs")
+
+    start = time.time()
+    failures = []
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        futures = {
+            pool.submit(run_one, builds[name], test, seed, out / name / f"{test}_{seed}"): (name, test, seed)
+            for name, test, seed in jobs
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            name, test, seed = futures[future]
+            if not future.result():
+                failures.append({"tb": name, "test": test, "seed": seed, "run_dir": str(out / name / f"{test}_{seed}")})
+                print(f"[{done}/{len(jobs)}] FAIL {name}.{test} seed {seed}")
+        print(f"{len(jobs) - len(failures)}/{len(jobs)} passed in {time.time() - start:.0f}s")
+
+        if failures and not args.no_shrink:
+            print(f"shrinking {len(failures)} failing seeds")
+            shrinks = {
+                pool.submit(shrink, builds[f["tb"]], f["test"], f["seed"], out / f["tb"] / f"{f['test']}_{f['seed']}_shrink"): f
+                for f in failures
+            }
+            for future in as_completed(shrinks):
+                f = shrinks[future]
+                f["iterations"] = future.result()
+                print(f"{f['tb']}.{f['test']} seed {f['seed']} : shrunk to RANDOM_ITERATIONS {f['iterations']}")
+
+    for f in failures:
+        f["replay"] = replay_command(builds[f["tb"]], f["test"], f["seed"], f.get("iterations"))
+    failures.sort(key=lambda f: (f["tb"], f["test"], f.get("iterations") or 0, f["seed"]))
+    out.mkdir(parents=True, exist_ok=True)
+    report = {"first_seed": first_seed, "seeds": args.seeds, "runs": len(jobs), "failures": failures}
+    (out / "regression.json").write_text(json.dumps(report, indent=1))
+    for f in failures:
+        print(f"  {f['replay']}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
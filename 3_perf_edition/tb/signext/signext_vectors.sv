@@ -0,0 +1,57 @@
+/* SIGNEXT_VECTORS
+*
+* BRH 10/26
+*
+* Batched vector replay around the sign extender (see tb/vectors/vector_replay.sv).
+* Every field is padded to a nibble so the python side can write the
+* batch files with plain hex digits :
+*   stim   = {1'b0, imm_source, 7'b0, raw_src}     36 bits
+*   result = immediate                             32 bits
+*/
+
+`timescale 1ns/1ps
+
+import holy_core_pkg::*;
+
+module signext_vectors #(
+    parameter DEPTH = 65536,
+    parameter MAX_FAILS = 16
+)(
+    input logic                             clk,
+    input logic                             load,
+    input logic                             start,
+    input logic [31:0]                      count,
+    output logic                            done,
+    output logic [31:0]                     fail_count,
+    output logic [MAX_FAILS-1:0][31:0]      fail_index,
+    output logic [MAX_FAILS-1:0][31:0]      fail_result
+);
+
+logic [35:0] stim;
+logic [31:0] result;
+
+vector_replay #(
+    .IN_WIDTH(36),
+    .OUT_WIDTH(32),
+    .DEPTH(DEPTH),
+    .MAX_FAILS(MAX_FAILS)
+) replay (
+    .clk(clk),
+    .load(load),
+    .start(start),
+    .count(count),
+    .stim(stim),
+    .result(result),
+    .done(done),
+    .fail_count(fail_count),
+    .fail_index(fail_index),
+    .fail_result(fail_result)
+);
+
+signext signext_inst (
+    .raw_src(stim[24:0]),
+    .imm_source(imm_source_t'(stim[34:32])),
+    .immediate(result)
+);
+
+endmodule
@@ -10,29 +10,128 @@
 # https://docs.cocotb.org/en/latest/runner.html
 
 import os
+import sys
+import time
 from pathlib import Path
 from cocotbext.axi import AxiBus, AxiRam, AxiLiteBus, AxiLiteRam
 
 from cocotb_tools.runner import get_runner
 
-def generic_tb_runner(design_name, specific_top_level=None, additional_sources=[], initial_sources=[], includes=[]):
+# WAVEFORMS CONTROL
+# TRACE env var selects how (and if) waveforms are dumped:
+#   off     no tracing at all, fastest
+#   vcd     full VCD dump of the entire run (default, historical behavior)
+#   fst     full FST dump, way smaller files than VCD
+#   window  FST dump only around a trigger (cycle window, pc range, trap)
+#           see tb/holy_core/wave_window.sv. Triggers are passed through
+#           WAVE_START_CYCLE, WAVE_STOP_CYCLE, WAVE_PC_LO, WAVE_PC_HI,
+#           WAVE_TRAP_CYCLES and WAVE_FILE env vars.
+TRACE_MODES = ("off", "vcd", "fst", "window")
+WAVE_WINDOW_PLUSARGS = ("WAVE_START_CYCLE", "WAVE_STOP_CYCLE", "WAVE_PC_LO", "WAVE_PC_HI", "WAVE_TRAP_CYCLES", "WAVE_FILE")
+
+def trace_args(trace):
+    """Returns (build_args, plusargs, full_dump) for the selected trace mode"""
+    if trace not in TRACE_MODES:
+        raise ValueError(f"Unknown TRACE mode '{trace}', expected one of {TRACE_MODES}")
+    if trace == "off":
+        return [], [], False
+    if trace == "vcd":
+        return ["--trace", "--trace-structs"], [], True
+    if trace == "fst":
+        return ["--trace-fst", "--trace-structs"], [], True
+    # window : the design dumps by itself, cocotb's full dump stays off
+    plusargs = [f"+{arg}={os.environ[arg]}" for arg in WAVE_WINDOW_PLUSARGS if arg in os.environ]
+    return ["--trace-fst", "--trace-structs", "+define+HC_WAVE_WINDOW"], plusargs, False
+
+# BUILD PROFILES
+# PROFILE env var selects the verilator build flavor:
+#   debug   today's behavior : all warnings, tracing as per TRACE
+#   fast    regression throughput : no tracing, -O3, --x-assign fast.
+#           designs built with threaded=True (the big holy_test_harness)
+#           also get --threads $THREADS if THREADS is set.
+#   coverage verilator line & toggle coverage + python covergroups
+#           (COVERAGE=1), no tracing. coverage.dat files are moved to
+#           the coverage db, see tb/coverage/coverage_report.py to merge.
+BUILD_PROFILES = {
+    "debug": {
+        "args": ["-sv", "-Wall", "-Wno-fatal"],
+        "trace": None # use TRACE
+    },
+    "fast": {
+        "args": ["-sv", "-Wno-fatal", "-O3", "--x-assign", "fast"],
+        "trace": "off"
+    },
+    "coverage": {
+        "args": ["-sv", "-Wno-fatal", "--coverage-line", "--coverage-toggle"],
+        "trace": "off"
+    }
+}
+
+def profile_args(profile, threaded=False):
+    """Returns (build_args, forced trace mode or None) for the selected build profile"""
+    if profile not in BUILD_PROFILES:
+        raise ValueError(f"Unknown PROFILE '{profile}', expected one of {tuple(BUILD_PROFILES)}")
+    args = list(BUILD_PROFILES[profile]["args"])
+    threads = os.getenv("THREADS")
+    if profile == "fast" and threaded and threads:
+        args += ["--threads", threads]
+    return args, BUILD_PROFILES[profile]["trace"]
+
+def collect_code_coverage(run_dirs, name):
+    """Moves the coverage.dat verilator wrote into the coverage db, under a
+    per process name so parallel runs can be merged"""
+    sys.path.append(str(Path(__file__).resolve().parent / "coverage"))
+    from covergroups import coverage_dir
+    db = coverage_dir()
+    db.mkdir(parents=True, exist_ok=True)
+    for run_dir in run_dirs:
+        dat = Path(run_dir) / "coverage.dat"
+        if dat.exists():
+            dat.replace(db / f"{name}_{os.getpid()}_{int(time.time())}.dat")
+
+def generic_tb_runner(design_name, specific_top_level=None, additional_sources=[], initial_sources=[], includes=[], window_sources=[], trace=None, profile=None, threaded=False, test_module=None, variant=None, test_dir=None, build_only=False):
     """
         initial sources : packages and "early" source files needed to build most modules
         additional sources : main source, Note: add top module last in these sources
         includes : self explainatory
+        window_sources : sources only needed by the windowed trace mode (wave_window.sv)
+        trace : waveforms mode (see TRACE_MODES), defaults to the TRACE env var
+        profile : build profile (see BUILD_PROFILES), defaults to the PROFILE env var
+        threaded : allow multithreaded verilator model in the fast profile
+        test_module : cocotb test module, defaults to test_<design_name>
+        variant : build dir suffix, for alternate top levels of the same design (e.g. "vectors")
+        test_dir : where the test module lives & runs, defaults to ./<design_name>
+        build_only : only build, return the runner.test() arguments (see regression.py)
     """
     print(initial_sources, additional_sources)
     sim = os.getenv("SIM", "verilator")
+    profile = profile if profile else os.getenv("PROFILE", "debug")
+    profile_build_args, profile_trace = profile_args(profile, threaded)
+    trace = profile_trace or trace or os.getenv("TRACE", "vcd")
+    trace_build_args, trace_plusargs, full_dump = trace_args(trace)
+    if trace == "window":
+        additional_sources = window_sources + additional_sources
     proj_path = Path(__name__).resolve().parent.parent
     sources = list(proj_path.glob("src/*.sv"))
     runner = get_runner(sim)
     toplevel = specific_top_level if specific_top_level else design_name
+    test_dir = test_dir if test_dir else f"./{design_name}"
+    # one build dir per profile & trace mode so switching does not trash the default build
+    if profile == "debug" and trace == "vcd":
+        build_dir = f"{test_dir}/sim_build"
+    elif profile == "debug":
+        build_dir = f"{test_dir}/sim_build_{trace}"
+    else:
+        build_dir = f"{test_dir}/sim_build_{profile}"
+    if variant:
+        build_dir = f"{build_dir}_{variant}"
     runner.build(
         sources=initial_sources+sources+additional_sources,
         hdl_toplevel=f"{toplevel}",
-        build_dir=f"./{design_name}/sim_build",
+        build_dir=build_dir,
         build_args=(
-            ["-sv", "-Wall", "-Wno-fatal", "--trace", "--trace-structs"]
+            profile_build_args
+            + trace_build_args
             + includes
             + [
                 f"{proj_path}/packages/holy_core_pkg.sv",
@@ -41,7 +140,20 @@ def generic_tb_runner(design_name, specific_top_level=None, additional_sources=[
             ]
         )
     )
-    runner.test(hdl_toplevel=f"{toplevel}", test_module=f"test_{design_name}", test_dir=f"./{design_name}")
+    test_args = dict(
+        hdl_toplevel=f"{toplevel}",
+        test_module=test_module if test_module else f"test_{design_name}",
+        test_dir=test_dir,
+        build_dir=build_dir,
+        plusargs=trace_plusargs,
+        waves=full_dump,
+        extra_env={"COVERAGE": "1"} if profile == "coverage" else {}
+    )
+    if build_only:
+        return test_args
+    runner.test(**test_args)
+    if profile == "coverage":
+        collect_code_coverage([test_dir, build_dir], f"{design_name}_{variant}" if variant else design_name)
 
 def test_alu():
     generic_tb_runner("alu")
@@ -49,7 +161,8 @@ def test_alu():
 def test_control():
     generic_tb_runner("control")
 
-def test_holy_core():
+def holy_core_runner(test_module=None):
+    """holy_test_harness build, shared by all the SoC level test modules"""
     proj_path = Path(__name__).resolve().parent.parent
 
     # this is kinda sloppy tbh, TODO: shoulf use .f files
@@ -113,9 +226,21 @@ def test_holy_core():
             f"-I{proj_path}/vendor/include",
             f"-I{proj_path}/vendor/include/common_cells",
             f"-I{proj_path}/vendor/include/axi"
-        ]
+        ],
+        window_sources=[f"{proj_path}/tb/holy_core/wave_window.sv"],
+        threaded=True,
+        test_module=test_module
     )
 
+def test_holy_core():
+    holy_core_runner()
+
+def test_irq_latency():
+    holy_core_runner("test_irq_latency")
+
+def test_random_programs():
+    holy_core_runner("test_random_programs")
+
 """def test_memory():
     generic_tb_runner("memory")"""
 
@@ -131,21 +256,65 @@ def test_load_store_decoder():
 def test_reader():
     generic_tb_runner("reader")
 
-def test_holy_instr_cache():
+# BATCHED VECTORS (see tb/vectors/vector_engine.py)
+# numpy batches replayed by a <unit>_vectors.sv wrapper, never traced
+
+def vectors_runner(design_name):
     proj_path = Path(__name__).resolve().parent.parent
-    generic_tb_runner("holy_instr_cache", specific_top_level="axi_translator", additional_sources=[f"{proj_path}/tb/holy_instr_cache/axi_translator.sv"])
+    generic_tb_runner(
+        design_name,
+        specific_top_level=f"{design_name}_vectors",
+        additional_sources=[
+            f"{proj_path}/tb/vectors/vector_replay.sv",
+            f"{proj_path}/tb/{design_name}/{design_name}_vectors.sv"
+        ],
+        trace="off",
+        test_module=f"test_{design_name}_vectors",
+        variant="vectors"
+    )
 
-def test_holy_data_cache():
+def test_alu_vectors():
+    vectors_runner("alu")
+
+def test_reader_vectors():
+    vectors_runner("reader")
+
+def test_signext_vectors():
+    vectors_runner("signext")
+
+def test_load_store_decoder_vectors():
+    vectors_runner("load_store_decoder")
+
+def axi_translator_runner(design_name, **kwargs):
+    """designs tested through their tb/<design>/axi_translator.sv wrapper"""
     proj_path = Path(__name__).resolve().parent.parent
-    generic_tb_runner("holy_data_cache", specific_top_level="axi_translator", additional_sources=[f"{proj_path}/tb/holy_data_cache/axi_translator.sv"])
+    return generic_tb_runner(design_name, specific_top_level="axi_translator", additional_sources=[f"{proj_path}/tb/{design_name}/axi_translator.sv"], **kwargs)
+
+def test_holy_instr_cache():
+    axi_translator_runner("holy_instr_cache")
+
+def test_holy_data_cache():
+    axi_translator_runner("holy_data_cache")
 
 def test_holy_no_cache():
-    proj_path = Path(__name__).resolve().parent.parent
-    generic_tb_runner("holy_no_cache", specific_top_level="axi_translator", additional_sources=[f"{proj_path}/tb/holy_no_cache/axi_translator.sv"])
+    axi_translator_runner("holy_no_cache")
+
+def test_holy_data_tcm():
+    axi_translator_runner("holy_data_tcm")
 
 def test_external_req_arbitrer():
+    axi_translator_runner("external_req_arbitrer")
+
+def holy_plic_runner(**kwargs):
+    """The PLIC tb lives with its sources (src/holy_plic/tb), default NUM_IRQS"""
     proj_path = Path(__name__).resolve().parent.parent
-    generic_tb_runner("external_req_arbitrer", specific_top_level="axi_translator", additional_sources=[f"{proj_path}/tb/external_req_arbitrer/axi_translator.sv"])
+    return generic_tb_runner(
+        "holy_plic",
+        specific_top_level="holy_plic_wrapper",
+        additional_sources=[f"{proj_path}/src/holy_plic/holy_plic.sv", f"{proj_path}/src/holy_plic/tb/wrapper.sv"],
+        test_dir=f"{proj_path}/src/holy_plic/tb",
+        **kwargs
+    )
 
 def test_csr_file():
     generic_tb_runner("csr_file")
\ No newline at end of file
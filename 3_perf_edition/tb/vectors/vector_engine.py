@@ -0,0 +1,181 @@
+# VECTOR ENGINE
+#
+# Batched stimulus for the combinational units testbenches
+# (alu, reader, signext, load_store_decoder).
+#
+# Instead of one python <-> simulator round trip per vector
+# (set inputs, await 1ns, read outputs), the test computes
+# whole batches of stimulus & expected results with numpy
+# (vectorised golden model) and hands them to vector_replay.sv,
+# which applies one vector per clock cycle and checks the
+# outputs in hardware. Python only wakes up once per chunk
+# of DEPTH vectors to read the fail counter.
+#
+# Each unit has a <unit>_vectors.sv wrapper packing its ports,
+# fields are padded to a nibble so batches are written as plain
+# hex, MSB field first : the field lists given to VectorEngine
+# must follow the wrapper's packing order.
+#
+# Env knobs (read by the test modules) :
+#   VECTOR_COUNT   random vectors per test (default 1M)
+#   VECTOR_SEED    numpy seed (default random, logged)
+#   VECTOR_SWEEP   0 to skip the exhaustive sweeps (default 1)
+#
+# e.g. VECTOR_COUNT=10000000 make vectors
+#
+# BRH 10/26
+
+import os
+import random
+import time
+
+import cocotb
+import numpy as np
+from cocotb.clock import Clock
+from cocotb.triggers import RisingEdge, Timer
+
+# must match the wrappers / vector_replay.sv parameters
+DEPTH = 65536
+MAX_FAILS = 16
+STIM_FILE = "vectors_stim.hex"
+EXPECT_FILE = "vectors_expect.hex"
+MASK_FILE = "vectors_mask.hex"
+
+CLK_PERIOD = 2
+HEX_DIGITS = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+
+def vector_count():
+    return int(os.getenv("VECTOR_COUNT", str(1 << 20)))
+
+def vector_sweep():
+    return os.getenv("VECTOR_SWEEP", "1") != "0"
+
+def vector_rng(dut):
+    """numpy generator seeded from VECTOR_SEED (logged, to replay a failure)"""
+    seed = int(os.getenv("VECTOR_SEED", str(random.getrandbits(32))))
+    dut._log.info(f"vector seed {seed}")
+    return np.random.default_rng(seed)
+
+def random_words(rng, n, bits=32):
+    return rng.integers(0, 1 << bits, size=n, dtype=np.uint64)
+
+def sign_extend(values, bits):
+    """sign extends the low `bits` of values to 32 bits (as uint64 arrays)"""
+    values = np.asarray(values, dtype=np.uint64) & np.uint64((1 << bits) - 1)
+    sign = (values >> np.uint64(bits - 1)) & np.uint64(1)
+    return values | (sign * np.uint64((0xFFFFFFFF << bits) & 0xFFFFFFFF))
+
+def hex_lines(columns, nibbles):
+    """One $readmemh line per vector, the columns (uint64 arrays) being
+    concatenated MSB first on their nibbles widths"""
+    n = len(columns[0])
+    digits = []
+    for values, width in zip(columns, nibbles):
+        values = np.asarray(values, dtype=np.uint64)
+        shifts = np.arange(width - 1, -1, -1, dtype=np.uint64) * np.uint64(4)
+        digits.append(HEX_DIGITS[(values[:, None] >> shifts) & np.uint64(0xF)])
+    digits.append(np.full((n, 1), ord("\n"), dtype=np.uint8))
+    return np.hstack(digits).tobytes()
+
+class VectorEngine:
+    """Streams numpy batches through a <unit>_vectors wrapper
+
+    inputs / outputs : [(field name, nibbles), ...] MSB first,
+    in the wrapper's stim / result packing order.
+    """
+
+    def __init__(self, dut, inputs, outputs):
+        self.dut = dut
+        self.inputs = inputs
+        self.outputs = outputs
+        self.out_width = 4 * sum(width for _, width in outputs)
+        self.vectors = 0
+        self.fails = 0
+        self.reports = []
+        self.elapsed = 0.0
+
+    async def start(self):
+        """Starts the replay clock, call once per test"""
+        dut = self.dut
+        cocotb.start_soon(Clock(dut.clk, CLK_PERIOD, unit="ns").start())
+        dut.load.value = 0
+        dut.start.value = 0
+        dut.count.value = 0
+        await RisingEdge(dut.clk)
+
+    def split_result(self, value):
+        """packed result -> {field : value}"""
+        fields = {}
+        shift = self.out_width
+        for name, width in self.outputs:
+            shift -= 4 * width
+            fields[name] = (value >> shift) & ((1 << (4 * width)) - 1)
+        return fields
+
+    async def run(self, stim, expected, mask=None, label=""):
+        """Replays stim (dict of arrays) and checks against expected (dict of arrays).
+        mask (dict of arrays, optional) : "do care" bits per output field, missing
+        fields are fully checked. Returns the number of failing vectors."""
+        n = len(next(iter(stim.values())))
+        mask = mask if mask else {}
+        t0 = time.perf_counter()
+        fails = 0
+        for lo in range(0, n, DEPTH):
+            hi = min(lo + DEPTH, n)
+            fails += await self._run_chunk(stim, expected, mask, lo, hi, label)
+        elapsed = time.perf_counter() - t0
+        self.vectors += n
+        self.fails += fails
+        self.elapsed += elapsed
+        self.dut._log.info(
+            f"{label} : {n} vectors, {fails} failing, {elapsed:.2f}s ({n / max(elapsed, 1e-9):,.0f} vectors/s)"
+        )
+        return fails
+
+    async def _run_chunk(self, stim, expected, mask, lo, hi, label):
+        dut = self.dut
+        with open(STIM_FILE, "wb") as f:
+            f.write(hex_lines([stim[name][lo:hi] for name, _ in self.inputs], [w for _, w in self.inputs]))
+        with open(EXPECT_FILE, "wb") as f:
+            f.write(hex_lines([expected[name][lo:hi] for name, _ in self.outputs], [w for _, w in self.outputs]))
+        with open(MASK_FILE, "wb") as f:
+            full = np.full(hi - lo, (1 << 64) - 1, dtype=np.uint64)
+            f.write(hex_lines(
+                [mask[name][lo:hi] if name in mask else full for name, _ in self.outputs],
+                [w for _, w in self.outputs]
+            ))
+
+        dut.load.value = 1
+        await RisingEdge(dut.clk)
+        dut.load.value = 0
+        dut.count.value = hi - lo
+        dut.start.value = 1
+        await RisingEdge(dut.clk)
+        dut.start.value = 0
+        await RisingEdge(dut.done)
+        await Timer(1, unit="ns")
+
+        fails = int(dut.fail_count.value)
+        if fails:
+            indexes = int(dut.fail_index.value)
+            results = int(dut.fail_result.value)
+            for k in range(min(fails, MAX_FAILS)):
+                if len(self.reports) >= MAX_FAILS:
+                    break
+                i = lo + ((indexes >> (32 * k)) & 0xFFFFFFFF)
+                got = self.split_result((results >> (self.out_width * k)) & ((1 << self.out_width) - 1))
+                inputs = ", ".join(f"{name}={int(stim[name][i]):#x}" for name, _ in self.inputs)
+                wanted = ", ".join(f"{name}={int(expected[name][i]):#x}" for name, _ in self.outputs)
+                actual = ", ".join(f"{name}={got[name]:#x}" for name, _ in self.outputs)
+                self.reports.append(f"{label} #{i} : {inputs} -> expected {wanted}, got {actual}")
+        return fails
+
+    def check(self):
+        """Logs the totals and fails the test on any mismatch"""
+        for line in self.reports:
+            self.dut._log.error(line)
+        self.dut._log.info(
+            f"total : {self.vectors} vectors in {self.elapsed:.2f}s "
+            f"({self.vectors / max(self.elapsed, 1e-9):,.0f} vectors/s)"
+        )
+        assert self.fails == 0, f"{self.fails} failing vectors out of {self.vectors} (first {len(self.reports)} above)"
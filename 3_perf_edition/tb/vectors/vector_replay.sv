@@ -0,0 +1,101 @@
+/** vector_replay
+*
+*   Author : BRH
+*
+*   Description : Replays a batch of pre computed vectors into a combinational
+*                 unit, one vector per clock cycle, and checks its outputs
+*                 against the expected values without going back to python.
+*                 Used by tb/vectors/vector_engine.py, see the <unit>_vectors.sv
+*                 wrappers for how the unit ports are packed.
+*
+*                 - load : on a clock edge, (re)loads the 3 batch files
+*                   (STIM_FILE, EXPECT_FILE & MASK_FILE, $readmemh format,
+*                   one vector per line)
+*                 - start : on a clock edge, replays the first `count` vectors
+*                   and raises done once the last one is checked
+*                 - a vector fails when (result ^ expected) & mask != 0, mask
+*                   being the "do care" bits of that vector. The first
+*                   MAX_FAILS failing indexes & results are logged for the
+*                   python side to report.
+*
+*   BRH 10/26
+*/
+
+module vector_replay #(
+    parameter IN_WIDTH = 32,
+    parameter OUT_WIDTH = 32,
+    parameter DEPTH = 65536,
+    parameter MAX_FAILS = 16,
+    parameter STIM_FILE = "vectors_stim.hex",
+    parameter EXPECT_FILE = "vectors_expect.hex",
+    parameter MASK_FILE = "vectors_mask.hex"
+)(
+    input logic                                 clk,
+    input logic                                 load,
+    input logic                                 start,
+    input logic [31:0]                          count,
+
+    // to / from the unit under test
+    output logic [IN_WIDTH-1:0]                 stim,
+    input logic [OUT_WIDTH-1:0]                 result,
+
+    output logic                                done,
+    output logic [31:0]                         fail_count,
+    output logic [MAX_FAILS-1:0][31:0]          fail_index,
+    output logic [MAX_FAILS-1:0][OUT_WIDTH-1:0] fail_result
+);
+
+logic [IN_WIDTH-1:0]    stim_mem [DEPTH-1:0];
+logic [OUT_WIDTH-1:0]   expect_mem [DEPTH-1:0];
+logic [OUT_WIDTH-1:0]   mask_mem [DEPTH-1:0];
+
+logic [31:0]    index;
+logic           running;
+logic           fail;
+
+assign stim = stim_mem[index];
+assign fail = |((result ^ expect_mem[index]) & mask_mem[index]);
+
+always_ff @(posedge clk) begin
+    if (load) begin
+        $readmemh(STIM_FILE, stim_mem);
+        $readmemh(EXPECT_FILE, expect_mem);
+        $readmemh(MASK_FILE, mask_mem);
+    end
+
+    if (start) begin
+        index <= 32'd0;
+        running <= (count != 32'd0);
+        done <= (count == 32'd0);
+        fail_count <= 32'd0;
+        fail_index <= '0;
+        fail_result <= '0;
+    end else if (running) begin
+        // the unit is combinational : result is settled for stim_mem[index]
+        if (fail) begin
+            if (fail_count < MAX_FAILS) begin
+                fail_index[fail_count[$clog2(MAX_FAILS)-1:0]] <= index;
+                fail_result[fail_count[$clog2(MAX_FAILS)-1:0]] <= result;
+            end
+            fail_count <= fail_count + 1;
+        end
+
+        if (index == count - 1) begin
+            running <= 1'b0;
+            done <= 1'b1;
+        end else begin
+            index <= index + 1;
+        end
+    end
+end
+
+initial begin
+    index = 32'd0;
+    running = 1'b0;
+    done = 1'b0;
+    fail_count = 32'd0;
+    fail_index = '0;
+    fail_result = '0;
+end
+
+endmodule